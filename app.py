@@ -3,21 +3,41 @@ SnortForge — Flask Web Application
 Snort IDS/IPS Rule Generator & Management Tool
 """
 
+import io
 import json
 import os
+import tarfile
 import tempfile
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
 from datetime import datetime
 from flask import (
-    Flask, render_template, request, jsonify, send_file, session
+    Flask, Response, render_template, request, jsonify, send_file, session
 )
 import logging
-from snortforge.core.rule import SnortRule
-from snortforge.core.validator import validate_rule
-from snortforge.core.scorer import score_rule
+from snortforge.core.rule import SnortRule, clear_unset_positions, rule_dict_errors
+from snortforge.core.validator import (
+    validate_rule, validate_rules, PLANS as VALIDATION_PLANS, VALIDATION_CACHE
+)
+from snortforge.core.scorer import (
+    score_rule, score_rules, set_selectivity_index, ScoreSession, ScoreSummary, SCORE_CACHE
+)
+from snortforge.core.analyze import analyze_rule
+from snortforge.core.anchors import anchor_rules, propose_anchors, apply_anchors
+from snortforge.core.pcap import PcapError
+from snortforge.core.pcre import analyze_pcre
+from snortforge.core.scope import ScopeIndex, Variables
+from snortforge.core.profile import SORT_KEYS as PROFILE_SORT_KEYS, profile_rules
 from snortforge.core.templates_data import (
     get_templates_json, get_template_categories, load_template, TEMPLATES
 )
-from snortforge.core.parser import parse_rule, parse_rules_file, ParseError
+from snortforge.core.parser import (
+    parse_rule, parse_rules_file, iter_rules_stream, ParseError
+)
+from snortforge.core.cache import ParseCache
+from snortforge.core.project import ProjectReader, ProjectFormatError, write_project
 
 app = Flask(
     __name__,
@@ -28,6 +48,62 @@ app = Flask(
 logger = logging.getLogger(__name__)
 app.secret_key = os.urandom(24)
 
+# Shared parse cache for rule imports. Set SNORTFORGE_PARSE_CACHE to a file
+# path to persist it between restarts.
+PARSE_CACHE = ParseCache(
+    max_size=int(os.getenv("SNORTFORGE_PARSE_CACHE_SIZE", "200000")),
+    path=os.getenv("SNORTFORGE_PARSE_CACHE") or None,
+)
+
+# Benign-traffic n-gram index for content selectivity scoring, built with
+# `python -m snortforge.core.ngram build <corpus dir> <index file>`
+if os.getenv("SNORTFORGE_NGRAM_INDEX"):
+    set_selectivity_index(os.environ["SNORTFORGE_NGRAM_INDEX"])
+
+# Local traffic corpus replayed by /api/profile: pcap files, raw payload
+# files or directories of them, separated like PATH
+PROFILE_CORPUS = [p for p in os.getenv("SNORTFORGE_PROFILE_CORPUS", "").split(os.pathsep) if p]
+PROFILE_MAX_RULES = 5000
+
+# Version of the JSON project export; before 2, an unset depth, offset,
+# distance or within was stored as 0
+JSON_PROJECT_FORMAT = 2
+
+# Rules per streamed line of /api/score/batch
+SCORE_BATCH_LINE = 1000
+
+# Incremental scoring sessions (see ScoreSession): one per browser session
+# for /api/analyze, plus those created through /api/score/session. The
+# least recently used are dropped first.
+SCORE_SESSIONS = OrderedDict()
+SCORE_SESSION_LIMIT = 64
+_score_sessions_lock = threading.Lock()
+
+
+def _score_session(session_id, create=False):
+    with _score_sessions_lock:
+        score_session = SCORE_SESSIONS.get(session_id)
+        if score_session is None:
+            if not create:
+                return None
+            score_session = SCORE_SESSIONS[session_id] = ScoreSession()
+        SCORE_SESSIONS.move_to_end(session_id)
+        _evict_score_sessions()
+    return score_session
+
+
+def _keep_score_session(session_id, score_session):
+    """Register an already populated *score_session* under *session_id*."""
+    with _score_sessions_lock:
+        SCORE_SESSIONS[session_id] = score_session
+        _evict_score_sessions()
+
+
+def _evict_score_sessions():
+    # Callers hold _score_sessions_lock
+    while len(SCORE_SESSIONS) > SCORE_SESSION_LIMIT:
+        SCORE_SESSIONS.popitem(last=False)
+
 
 @app.after_request
 def _set_security_headers(response):
@@ -70,7 +146,7 @@ def api_validate():
     data = request.get_json()
     try:
         rule = SnortRule.from_dict(data)
-        result = validate_rule(rule)
+        result = validate_rule(rule, cache=VALIDATION_CACHE)
         result["rule_text"] = rule.build()
         return jsonify(result)
     except ParseError as e:
@@ -91,6 +167,53 @@ def api_validate():
         }), 500
 
 
+# ── API: Analyze Rule ──
+
+@app.route("/api/analyze", methods=["POST"])
+def api_analyze():
+    data = request.get_json()
+    try:
+        rule = SnortRule.from_dict(data)
+        # Successive edits from the same browser only rescore what changed
+        session_id = session.setdefault("score_session", uuid.uuid4().hex)
+        result = analyze_rule(
+            rule, validation_cache=VALIDATION_CACHE,
+            score_session=_score_session(session_id, create=True),
+        )
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        logger.exception("Unexpected error during rule analysis")
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred while analyzing the rule.",
+        }), 500
+
+
+@app.route("/api/validate/batch", methods=["POST"])
+def api_validate_batch():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"error": "Expected a JSON object with a 'rules' list."}), 400
+    plan = data.get("plan", "full")
+    if not isinstance(plan, str) or plan not in VALIDATION_PLANS:
+        return jsonify({"error": f"Unknown validation plan. Use one of: {', '.join(VALIDATION_PLANS)}"}), 400
+    return Response(_stream_validation(rules_data, plan), mimetype="application/json")
+
+
+def _stream_validation(rules_data, plan):
+    """Stream per-rule validation results, then the ruleset summary."""
+    summary = {}
+    rules = (
+        SnortRule.from_dict(item) if isinstance(item, dict) else None
+        for item in rules_data
+    )
+    yield '{"results": ['
+    for n, result in enumerate(validate_rules(rules, summary, plan, VALIDATION_CACHE)):
+        yield (", " if n else "") + json.dumps(result)
+    yield '], "summary": ' + json.dumps(summary) + '}'
+
+
 # ── API: Build Snort 3 Rule ──
 
 @app.route("/api/build/snort3", methods=["POST"])
@@ -114,7 +237,7 @@ def api_score():
     data = request.get_json()
     try:
         rule = SnortRule.from_dict(data)
-        result = score_rule(rule)
+        result = score_rule(rule, cache=SCORE_CACHE)
         return jsonify(result)
     except Exception as e:
         logger.exception("Unexpected error during rule scoring")
@@ -123,6 +246,291 @@ def api_score():
         }), 500
 
 
+@app.route("/api/score/batch", methods=["POST"])
+def api_score_batch():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"error": "Expected a JSON object with a 'rules' list."}), 400
+    top_n = data.get("top_n", 10)
+    if not isinstance(top_n, int) or not 0 <= top_n <= 1000:
+        return jsonify({"error": "'top_n' must be an integer between 0 and 1000."}), 400
+    return Response(_stream_scores(rules_data, top_n), mimetype="application/x-ndjson")
+
+
+def _stream_scores(rules_data, top_n):
+    """Stream JSON lines of ``{"results", "summary"}``, one per batch of rules.
+
+    Each line carries the per-rule grades of its batch and a snapshot of
+    the aggregates so far; the last line has ``"done": true``.
+    """
+    summary = ScoreSummary(top_n)
+    rules = (
+        SnortRule.from_dict(item) if isinstance(item, dict) else None
+        for item in rules_data
+    )
+    batch = []
+    for result in score_rules(rules, summary, cache=SCORE_CACHE):
+        entry = {"index": result["index"], "sid": result["sid"]}
+        if "error" in result:
+            entry["error"] = result["error"]
+        else:
+            entry["score"] = result["score"]
+            entry["grade"] = result["grade"]
+        batch.append(entry)
+        if len(batch) >= SCORE_BATCH_LINE:
+            yield json.dumps({"results": batch, "summary": summary.to_dict()}) + "\n"
+            batch = []
+    yield json.dumps({"results": batch, "summary": summary.to_dict(), "done": True}) + "\n"
+
+
+@app.route("/api/score/session", methods=["POST"])
+def api_score_session():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"error": "Expected a JSON object with a 'rules' list."}), 400
+    top_n = data.get("top_n", 10)
+    if not isinstance(top_n, int) or isinstance(top_n, bool) or not 0 <= top_n <= 1000:
+        return jsonify({"error": "'top_n' must be an integer between 0 and 1000."}), 400
+    error = _first_rule_dict_error(rules_data)
+    if error:
+        return jsonify({"error": error}), 400
+    # Built before it is registered, so a failure leaves no half-filled session
+    try:
+        rules = [SnortRule.from_dict(item) for item in rules_data]
+        score_session = ScoreSession()
+        for rule in rules:
+            score_session.add(rule)
+        summary = score_session.summary(top_n)
+    except Exception:
+        logger.exception("Unexpected error while creating a scoring session")
+        return jsonify({
+            "error": "An internal error occurred while scoring the rules.",
+        }), 500
+    session_id = uuid.uuid4().hex
+    _keep_score_session(session_id, score_session)
+    return jsonify({
+        "session": session_id,
+        "total": len(rules),
+        "summary": summary.to_dict(),
+    })
+
+
+@app.route("/api/score/session/<session_id>/what-if", methods=["POST"])
+def api_score_what_if(session_id):
+    score_session = _score_session(session_id)
+    if score_session is None:
+        return jsonify({"error": "Unknown or expired scoring session."}), 404
+    data = request.get_json()
+    changes = data.get("changes") if isinstance(data, dict) else None
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({"error": "Expected a JSON object with a non-empty 'changes' object."}), 400
+    indexes = data.get("indexes")
+    if indexes is not None and not (
+        isinstance(indexes, list)
+        and all(isinstance(i, int) and 0 <= i < len(score_session) for i in indexes)
+    ):
+        return jsonify({"error": "'indexes' must be a list of rule indexes in this session."}), 400
+    top_n = data.get("top_n", 10)
+    if not isinstance(top_n, int) or not 0 <= top_n <= 1000:
+        return jsonify({"error": "'top_n' must be an integer between 0 and 1000."}), 400
+
+    summary = ScoreSummary(top_n)
+    changed = []
+    rescored = 0
+    with score_session.lock:
+        for result in score_session.what_if(changes, indexes, bool(data.get("commit")), summary):
+            if result["rescored"]:
+                rescored += 1
+            if result["delta"]:
+                changed.append({
+                    "index": result["index"], "sid": result["sid"],
+                    "score": result["score"], "grade": result["grade"], "delta": result["delta"],
+                })
+    return jsonify({
+        "rescored": rescored,
+        "changed": changed,
+        "summary": summary.to_dict(),
+    })
+
+
+# ── API: Rule Profiling ──
+
+@app.route("/api/profile", methods=["POST"])
+def api_profile():
+    if not PROFILE_CORPUS:
+        return jsonify({"success": False, "error": "No profiling corpus configured. Set SNORTFORGE_PROFILE_CORPUS."}), 503
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list) or len(rules_data) > PROFILE_MAX_RULES:
+        return jsonify({"success": False, "error": f"Expected a JSON object with a 'rules' list of at most {PROFILE_MAX_RULES} rules."}), 400
+    sort = data.get("sort", "total_us")
+    if sort not in PROFILE_SORT_KEYS:
+        return jsonify({"success": False, "error": f"Unknown sort key. Use one of: {', '.join(PROFILE_SORT_KEYS)}"}), 400
+    top = data.get("top")
+    if top is not None and (not isinstance(top, int) or isinstance(top, bool) or top < 0):
+        return jsonify({"success": False, "error": "'top' must be a non-negative integer."}), 400
+    config = data.get("config", "")
+    if not isinstance(config, str):
+        return jsonify({"success": False, "error": "'config' must be the text of a snort.conf or snort.lua."}), 400
+    error = _first_rule_dict_error(rules_data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    try:
+        rules = [SnortRule.from_dict(item) for item in rules_data]
+        result = profile_rules(rules, PROFILE_CORPUS, Variables.parse(config) if config else None,
+                               sort=sort, top=top)
+        # Measured cost next to the heuristic grade
+        for entry in result["rules"] + result["errors"]:
+            score = score_rule(rules[entry["rule"]], cache=SCORE_CACHE)
+            entry["score"] = score["score"]
+            entry["grade"] = score["grade"]
+        return jsonify({"success": True, **result})
+    except (OSError, PcapError):
+        logger.exception("Profiling corpus could not be read")
+        return jsonify({"success": False, "error": "The profiling corpus could not be read."}), 500
+    except Exception:
+        logger.exception("Unexpected error during rule profiling")
+        return jsonify({"success": False, "error": "An internal error occurred while profiling the rules."}), 500
+
+
+# ── API: PCRE Content Anchors ──
+
+@app.route("/api/pcre/anchors", methods=["POST"])
+def api_pcre_anchors():
+    data = request.get_json()
+    try:
+        rule = SnortRule.from_dict(data)
+        anchored, anchors = apply_anchors(rule)
+        reason = None if anchors else propose_anchors(rule)[1]
+        return jsonify({
+            "success": True,
+            "anchors": [cm.to_dict() for cm in anchors],
+            "reason": reason,
+            "rule": anchored.to_dict(),
+            "rule_text": anchored.build(),
+        })
+    except Exception as e:
+        logger.exception("Unexpected error while extracting PCRE anchors")
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred while extracting PCRE anchors.",
+        }), 500
+
+
+@app.route("/api/pcre/cost", methods=["POST"])
+def api_pcre_cost():
+    """Static analysis plus a sandboxed timing of one PCRE.
+
+    Scores only use the static half; this is where a pattern gets timed,
+    in the analyzer's pool of worker processes under a hard time limit.
+    """
+    data = request.get_json()
+    pcre = data.get("pcre") if isinstance(data, dict) else None
+    if not isinstance(pcre, str) or not pcre:
+        return jsonify({"success": False, "error": "Expected a JSON object with a 'pcre' string."}), 400
+    try:
+        return jsonify({"success": True, "analysis": analyze_pcre(pcre)})
+    except Exception:
+        logger.exception("Unexpected error while measuring a PCRE")
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred while measuring the PCRE.",
+        }), 500
+
+
+@app.route("/api/pcre/anchors/batch", methods=["POST"])
+def api_pcre_anchors_batch():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"error": "Expected a JSON object with a 'rules' list."}), 400
+    pcre_only = bool(data.get("pcre_only", True))
+    error = _first_rule_dict_error(rules_data)
+    if error:
+        return jsonify({"error": error}), 400
+    return Response(_stream_anchors(rules_data, pcre_only), mimetype="application/json")
+
+
+def _stream_anchors(rules_data, pcre_only):
+    """Stream per-rule anchor proposals, then how many rules were anchored.
+
+    Headers are sent with the first chunk, so a rule that fails is reported
+    in its own result and the document stays well-formed.
+    """
+    anchored = 0
+    yield '{"results": ['
+    for n, item in enumerate(rules_data):
+        try:
+            rule = SnortRule.from_dict(item)
+            result = next(anchor_rules([rule], pcre_only))
+            anchored_rule = result.pop("rule")
+            if result["anchors"]:
+                result["rule"] = anchored_rule.to_dict()
+                result["rule_text"] = anchored_rule.build()
+        except Exception:
+            logger.exception("Unexpected error while extracting PCRE anchors")
+            result = {
+                "sid": item.get("sid"), "anchors": [], "reason": None,
+                "error": "An internal error occurred while extracting PCRE anchors.",
+            }
+        if result["anchors"]:
+            anchored += 1
+        yield (", " if n else "") + json.dumps(result)
+    yield '], "anchored": ' + json.dumps(anchored) + '}'
+
+
+# ── API: Scope Analysis ──
+
+@app.route("/api/scope", methods=["POST"])
+def api_scope():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"success": False, "error": "Expected a JSON object with a 'rules' list."}), 400
+    config = data.get("config", "")
+    if not isinstance(config, str):
+        return jsonify({"success": False, "error": "'config' must be the text of a snort.conf or snort.lua."}), 400
+    error = _first_rule_dict_error(rules_data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    try:
+        rules = [SnortRule.from_dict(item) for item in rules_data]
+        index = ScopeIndex(rules, Variables.parse(config))
+        result = {
+            "success": True,
+            "unresolved": [{"index": i, "sid": rules[i].sid, "error": e} for i, e in index.errors.items()],
+            "empty": [{"index": i, "sid": rules[i].sid} for i in index.empty_rules()],
+            "shadowed": [
+                {"index": i, "sid": rules[i].sid, "by_index": j, "by_sid": rules[j].sid}
+                for i, j in index.shadowed_rules()
+            ],
+        }
+
+        lookup = data.get("lookup")
+        if isinstance(lookup, dict):
+            try:
+                port = lookup.get("port")
+                src_port = lookup.get("src_port")
+                matches = index.lookup(
+                    str(lookup.get("host", "")),
+                    int(port) if port not in (None, "") else None,
+                    lookup.get("protocol") or None,
+                    lookup.get("src_host") or None,
+                    int(src_port) if src_port not in (None, "") else None,
+                )
+            except (TypeError, ValueError) as e:
+                return jsonify({"success": False, "error": f"Invalid lookup: {e}"}), 400
+            result["matches"] = [{"index": i, "sid": rules[i].sid, "msg": rules[i].msg} for i in matches]
+        return jsonify(result)
+    except Exception:
+        logger.exception("Error during scope analysis")
+        return jsonify({"success": False, "error": "An internal error occurred during scope analysis."}), 500
+
+
 # ── API: Get Templates ──
 
 @app.route("/api/templates")
@@ -195,6 +603,7 @@ def api_export_json():
 
     project = {
         "snortforge_version": "1.0.0",
+        "format": JSON_PROJECT_FORMAT,
         "exported": datetime.now().isoformat(),
         "rule_count": len(rules_data),
         "rules": rules_data,
@@ -214,6 +623,50 @@ def api_export_json():
     )
 
 
+@app.route("/api/export/binary", methods=["POST"])
+def api_export_binary():
+    data = request.get_json()
+    rules_data = data.get("rules", []) if isinstance(data, dict) else None
+    if not isinstance(rules_data, list):
+        return jsonify({"success": False, "error": "Expected a JSON object with a 'rules' list."}), 400
+    error = _first_rule_dict_error(rules_data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    meta = {
+        "snortforge_version": "1.0.0",
+        "exported": datetime.now().isoformat(),
+    }
+
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode='wb', suffix='.sfproj', delete=False, prefix='snortforge_'
+        ) as tmp:
+            write_project(tmp, rules_data, meta)
+    except Exception:
+        logger.exception("Unexpected error during binary project export")
+        return jsonify({
+            "success": False,
+            "error": "An internal error occurred while exporting the project.",
+        }), 500
+
+    return send_file(
+        tmp.name,
+        as_attachment=True,
+        download_name="snortforge_project.sfproj",
+        mimetype="application/octet-stream",
+    )
+
+
+def _first_rule_dict_error(rules_data):
+    """Client-facing message for the first rule dict with mistyped fields, or None."""
+    for i, item in enumerate(rules_data):
+        errors = rule_dict_errors(item)
+        if errors:
+            return f"Rule #{i + 1}: {errors[0]}"
+    return None
+
+
 # ── API: Import Rules ──
 
 @app.route("/api/import/rules", methods=["POST"])
@@ -225,28 +678,54 @@ def api_import_rules():
     if not file.filename:
         return jsonify({"error": "No file selected"}), 400
 
-    tmp = tempfile.NamedTemporaryFile(
-        mode='wb', suffix='.rules', delete=False
-    )
-    file.save(tmp.name)
-    tmp.close()
-
+    # Take ownership of the upload stream so it outlives the request context,
+    # which closes request.files before the streamed response is consumed.
+    stream, file.stream = file.stream, io.BytesIO()
+    return Response(_stream_import(stream, file.filename), mimetype="application/json")
+
+
+def _stream_import(stream, filename):
+    """Stream the import response one rule at a time.
+
+    The upload is parsed straight from the request stream; rule packs
+    (.gz, .tar.gz, .zip) are decompressed member by member. Rules are
+    serialized as they are parsed so the response never holds the whole
+    ruleset; only the (small) parse error messages and per-file summaries
+    are buffered.
+    """
+    errors = []
+    sources = {}
+    count = 0
+    stats = {"cache_hits": 0, "cache_misses": 0}
+    yield '{"success": true, "rules": ['
     try:
-        rules, errors = parse_rules_file(tmp.name)
-        return jsonify({
-            "success": True,
-            "rules": [r.to_dict() for r in rules],
-            "errors": errors,
-            "count": len(rules),
-        })
-    except Exception:
-        logger.exception("Error importing rules file")
-        return jsonify({
-            "success": False,
-            "error": "Failed to import rules file."
-        }), 400
+        for source, _, item in iter_rules_stream(
+            stream, filename, cache=PARSE_CACHE, stats=stats
+        ):
+            summary = sources.setdefault(source, {"file": source, "count": 0, "errors": []})
+            if isinstance(item, SnortRule):
+                yield ("," if count else "") + json.dumps(item.to_dict())
+                count += 1
+                summary["count"] += 1
+            else:
+                summary["errors"].append(item)
+                errors.append(item if source == filename else f"{source}: {item}")
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile):
+        # Headers are already sent, so report a corrupt upload in-band
+        logger.exception("Error reading uploaded rules file")
+        errors.append("Failed to read the rest of the uploaded file.")
     finally:
-        os.unlink(tmp.name)
+        stream.close()
+    yield (
+        f'], "errors": {json.dumps(errors)}, "count": {count}, '
+        f'"sources": {json.dumps(list(sources.values()))}, '
+        f'"stats": {json.dumps(stats)}}}'
+    )
+    if PARSE_CACHE.path and stats["cache_misses"]:
+        try:
+            PARSE_CACHE.save()
+        except OSError:
+            logger.exception("Failed to persist parse cache")
 
 
 @app.route("/api/import/json", methods=["POST"])
@@ -258,6 +737,10 @@ def api_import_json():
     try:
         data = json.loads(file.read())
         rules = data.get("rules", [])
+        if data.get("format", 1) < 2:
+            for item in rules:
+                if isinstance(item, dict):
+                    clear_unset_positions(item)
         return jsonify({
             "success": True,
             "rules": rules,
@@ -271,6 +754,42 @@ def api_import_json():
         }), 400
 
 
+@app.route("/api/import/binary", methods=["POST"])
+def api_import_binary():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = request.files["file"]
+    try:
+        reader = ProjectReader(file.stream)
+    except (ProjectFormatError, ValueError):
+        logger.exception("Error reading binary project header")
+        return jsonify({
+            "success": False,
+            "error": "Failed to import binary project."
+        }), 400
+
+    # Same ownership hand-off as the .rules import: records are decoded
+    # while the response streams.
+    stream, file.stream = file.stream, io.BytesIO()
+    return Response(_stream_binary_import(reader, stream), mimetype="application/json")
+
+
+def _stream_binary_import(reader, stream):
+    count = 0
+    yield '{"rules": ['
+    try:
+        for rule in reader:
+            yield (", " if count else "") + json.dumps(rule)
+            count += 1
+        yield f'], "count": {count}, "success": true}}'
+    except ProjectFormatError:
+        logger.exception("Error importing binary project")
+        yield f'], "count": {count}, "success": false, "error": "Failed to import binary project."}}'
+    finally:
+        stream.close()
+
+
 if __name__ == "__main__":
     # Debug mode should not be enabled by default in production.
     # Enable it explicitly for development by setting FLASK_DEBUG=1 (or "true").
@@ -0,0 +1,150 @@
+"""
+SnortForge - Parser micro-benchmark
+
+Compares the original per-character option tokenizer against the
+precompiled scanner in snortforge.core.parser and reports rules/sec, then
+measures the auto-detecting parser on Snort 3 and mixed-dialect corpora.
+
+Usage:
+    python benchmarks/bench_parser.py [--rules 100000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from snortforge.core.parser import parse_rule  # noqa: E402
+from snortforge.core.rule import SnortRule  # noqa: E402
+from snortforge.core.templates_data import TEMPLATES, load_template  # noqa: E402
+
+
+# ── Legacy implementation (pre-scanner), kept verbatim for comparison ──
+
+def legacy_parse_rule(rule_string):
+    rule_string = rule_string.strip()
+    match = re.match(r'^(\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+)\s*\((.+)\)\s*$', rule_string)
+    header_parts = match.group(1).split()
+    rule = SnortRule()
+    rule.action, rule.protocol = header_parts[0], header_parts[1]
+    rule.src_ip, rule.src_port = header_parts[2], header_parts[3]
+    rule.direction = header_parts[4]
+    rule.dst_ip, rule.dst_port = header_parts[5], header_parts[6]
+    for opt in _legacy_tokenize(match.group(2)):
+        opt = opt.strip()
+        if not opt:
+            continue
+        if ":" in opt:
+            key, _, value = opt.partition(":")
+            key, value = key.strip(), value.strip()
+        else:
+            key, value = opt.strip(), ""
+        _legacy_apply(key, value, rule)
+    return rule
+
+
+def _legacy_tokenize(options_str):
+    tokens, current, in_quotes = [], [], False
+    for char in options_str:
+        if char == '"' and (not current or current[-1] != '\\'):
+            in_quotes = not in_quotes
+            current.append(char)
+        elif char == ';' and not in_quotes:
+            tokens.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        tokens.append(''.join(current))
+    return tokens
+
+
+def _legacy_apply(key, value, rule):
+    value = value.strip('"').strip("'")
+    mapping = {
+        "msg": ("msg", str), "sid": ("sid", int), "rev": ("rev", int),
+        "classtype": ("classtype", str), "priority": ("priority", int),
+        "content": None, "pcre": ("pcre", str), "flow": ("flow", str),
+        "depth": ("depth", int), "offset": ("offset", int),
+        "distance": ("distance", int), "within": ("within", int),
+        "reference": ("reference", str), "metadata": ("metadata", str),
+        "nocase": None, "threshold": None,
+    }
+    if key == "content":
+        if value.startswith("!"):
+            rule.content_negated = True
+            rule.content = value[1:].strip('"')
+        else:
+            rule.content = value
+    elif key == "nocase":
+        rule.content_nocase = True
+    elif key == "threshold":
+        for part in value.split(","):
+            kv = part.strip().split()
+            if len(kv) == 2:
+                k, v = kv
+                if k == "type": rule.threshold_type = v
+                elif k == "track": rule.threshold_track = v
+                elif k == "count":
+                    try: rule.threshold_count = int(v)
+                    except (ValueError, TypeError): pass
+                elif k == "seconds":
+                    try: rule.threshold_seconds = int(v)
+                    except (ValueError, TypeError): pass
+    elif key in mapping and mapping[key]:
+        attr, typ = mapping[key]
+        try:
+            setattr(rule, attr, typ(value))
+        except (ValueError, TypeError):
+            pass
+
+
+# ── Harness ──
+
+def build_corpus(count, dialect="snort2"):
+    """Cycle the bundled templates into `count` rule lines with unique SIDs.
+
+    `dialect` is "snort2", "snort3" or "mixed" (alternating).
+    """
+    base = [load_template(name) for name in TEMPLATES]
+    lines = []
+    for i in range(count):
+        rule = base[i % len(base)]
+        rule.sid = 2000000 + i
+        snort3 = dialect == "snort3" or (dialect == "mixed" and i % 2)
+        lines.append(rule.build_snort3() if snort3 else rule.build())
+    return lines
+
+
+def bench(label, fn, lines):
+    start = time.perf_counter()
+    for line in lines:
+        fn(line)
+    elapsed = time.perf_counter() - start
+    rate = len(lines) / elapsed if elapsed else float("inf")
+    print(f"  {label:<10} {elapsed:8.3f}s  {rate:>12,.0f} rules/sec")
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rules", type=int, default=100000)
+    args = ap.parse_args()
+
+    lines = build_corpus(args.rules)
+    print(f"Parsing {len(lines):,} rules")
+    before = bench("before", legacy_parse_rule, lines)
+    after = bench("after", parse_rule, lines)
+    print(f"  speedup    {after / before:.2f}x")
+
+    # The legacy parser only understands Snort 2, so these are after-only
+    for dialect in ("snort3", "mixed"):
+        print(f"Parsing {args.rules:,} rules ({dialect}, auto-detected)")
+        bench("after", parse_rule, build_corpus(args.rules, dialect))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+SnortForge - Rule model memory/throughput benchmark
+
+Compares the original dict-backed SnortRule/ContentMatch dataclasses and
+their hasattr/setattr from_dict against the slotted, interned model in
+snortforge.core.rule. Rules are loaded from JSON so every string starts out
+as a distinct object, as it does for /api/export/rules requests.
+
+Usage:
+    python benchmarks/bench_rule_model.py [--rules 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from snortforge.core.rule import ContentMatch, SnortRule  # noqa: E402
+from bench_parser import build_corpus  # noqa: E402
+from snortforge.core.parser import parse_rule  # noqa: E402
+
+
+# ── Legacy representation (pre-slots), rebuilt from the current fields ──
+
+def _legacy_class(name, cls):
+    specs = []
+    for f in fields(cls):
+        if f.name.startswith("_"):
+            continue
+        if f.default is not MISSING:
+            specs.append((f.name, f.type, field(default=f.default)))
+        else:
+            specs.append((f.name, f.type, field(default_factory=list)))
+    return make_dataclass(name, specs)
+
+
+LegacyContentMatch = _legacy_class("LegacyContentMatch", ContentMatch)
+LegacyRule = _legacy_class("LegacyRule", SnortRule)
+
+
+def legacy_from_dict(data):
+    rule = LegacyRule()
+    for key, value in data.items():
+        if key == "reference" and isinstance(value, str):
+            if value:
+                rule.references = [value]
+            continue
+        if key == "contents" and isinstance(value, list):
+            rule.contents = []
+            for c in value:
+                if isinstance(c, dict) and c.get("content"):
+                    cm = LegacyContentMatch()
+                    for k, v in c.items():
+                        if hasattr(cm, k):
+                            setattr(cm, k, v)
+                    rule.contents.append(cm)
+            continue
+        if hasattr(rule, key):
+            setattr(rule, key, value)
+    return rule
+
+
+def legacy_to_dict(self):
+    return {
+        "action": self.action, "protocol": self.protocol,
+        "src_ip": self.src_ip, "src_port": self.src_port,
+        "direction": self.direction,
+        "dst_ip": self.dst_ip, "dst_port": self.dst_port,
+        "msg": self.msg, "sid": self.sid, "rev": self.rev,
+        "classtype": self.classtype, "priority": self.priority,
+        "references": self.references,
+        "content": self.content,
+        "content_nocase": self.content_nocase,
+        "content_negated": self.content_negated,
+        "content_http_uri": self.content_http_uri,
+        "content_http_header": self.content_http_header,
+        "pcre": self.pcre, "depth": self.depth, "offset": self.offset,
+        "distance": self.distance, "within": self.within,
+        "contents": [{
+            "content": cm.content, "nocase": cm.nocase, "negated": cm.negated,
+            "http_uri": cm.http_uri, "http_header": cm.http_header,
+            "depth": cm.depth, "offset": cm.offset,
+            "distance": cm.distance, "within": cm.within,
+        } for cm in self.contents],
+        "flow": self.flow,
+        "threshold_type": self.threshold_type,
+        "threshold_track": self.threshold_track,
+        "threshold_count": self.threshold_count,
+        "threshold_seconds": self.threshold_seconds,
+        "metadata": self.metadata,
+    }
+
+
+# ── Harness ──
+
+def load_payload(count):
+    """JSON text of `count` rule dicts, as a client would upload it."""
+    return json.dumps([parse_rule(line).to_dict() for line in build_corpus(count)])
+
+
+def measure(label, from_dict, to_dict, payload):
+    # Throughput first, without tracemalloc's per-allocation overhead
+    dicts = json.loads(payload)
+    start = time.perf_counter()
+    rules = [from_dict(d) for d in dicts]
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for rule in rules:
+        to_dict(rule)
+    dump_time = time.perf_counter() - start
+    del rules, dicts
+
+    # Retained memory of the loaded rules (JSON dicts freed afterwards)
+    dicts = json.loads(payload)
+    tracemalloc.start()
+    rules = [from_dict(d) for d in dicts]
+    del dicts
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = len(rules)
+    print(
+        f"  {label:<8} {retained / 1024 / 1024:8.1f} MB  "
+        f"from_dict {n / load_time:>10,.0f}/s  to_dict {n / dump_time:>10,.0f}/s"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rules", type=int, default=100000)
+    args = ap.parse_args()
+
+    payload = load_payload(args.rules)
+    print(f"Loading {args.rules:,} rules from JSON")
+    measure("before", legacy_from_dict, legacy_to_dict, payload)
+    measure("after", SnortRule.from_dict, SnortRule.to_dict, payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+SnortForge - Content selectivity benchmark
+
+Builds an n-gram index from a synthetic benign corpus (HTTP-like text and
+random binary), then measures cold hit-rate lookups for distinct contents
+and in-process batch scoring with and without the index.
+
+Usage:
+    python benchmarks/bench_selectivity.py [--rules 100000] [--samples 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from snortforge.core.anchors import content_text  # noqa: E402
+from snortforge.core.ngram import NgramIndex, build_index  # noqa: E402
+from snortforge.core.rule import ContentMatch, decode_content  # noqa: E402
+from snortforge.core.scorer import score_rules, set_selectivity_index  # noqa: E402
+from snortforge.core.templates_data import TEMPLATES, load_template  # noqa: E402
+
+_PATHS = ["/", "/index.html", "/api/v1/users", "/login", "/static/app.js", "/images/logo.png"]
+_HEADERS = [
+    b"Host: example.com", b"User-Agent: Mozilla/5.0 (X11; Linux x86_64)",
+    b"Accept: text/html,application/xhtml+xml", b"Accept-Encoding: gzip, deflate",
+    b"Connection: keep-alive", b"Content-Type: application/json", b"Cookie: session=abc123",
+]
+
+
+def build_samples(count, rng):
+    samples = []
+    for i in range(count):
+        if i % 3 == 2:
+            samples.append(rng.randbytes(rng.randrange(64, 1460)))
+            continue
+        method = rng.choice([b"GET", b"POST"])
+        lines = [method + b" " + rng.choice(_PATHS).encode() + b" HTTP/1.1"]
+        lines += rng.sample(_HEADERS, rng.randrange(2, len(_HEADERS)))
+        samples.append(b"\r\n".join(lines) + b"\r\n\r\n" + rng.randbytes(rng.randrange(0, 200)))
+    return samples
+
+
+def build_rules(count, samples, rng):
+    """Template rules whose contents are slices of the corpus or random magics."""
+    base = [load_template(name) for name in TEMPLATES]
+    rules = []
+    for i in range(count):
+        rule = base[i % len(base)].copy()
+        rule.sid = 3000000 + i
+        if i % 2:
+            sample = rng.choice(samples)
+            start = rng.randrange(max(1, len(sample) - 12))
+            literal = sample[start:start + rng.randrange(3, 12)]
+        else:
+            literal = rng.randbytes(rng.randrange(3, 8))
+        rule.content = ""
+        rule.contents = [ContentMatch(content=content_text(literal.decode("latin-1")))]
+        rules.append(rule)
+    return rules
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rules", type=int, default=100000)
+    ap.add_argument("--samples", type=int, default=20000)
+    args = ap.parse_args()
+    rng = random.Random(22)
+
+    samples = build_samples(args.samples, rng)
+    size = sum(map(len, samples))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benign.sfng")
+        start = time.perf_counter()
+        build_index(samples, path)
+        elapsed = time.perf_counter() - start
+        print(f"Index build: {len(samples):,} samples, {size / 1e6:.1f} MB in {elapsed:.2f}s "
+              f"({size / 1e6 / elapsed:.2f} MB/s)")
+
+        rules = build_rules(args.rules, samples, rng)
+        patterns = [decode_content(rule.contents[0].content) for rule in rules]
+        with NgramIndex.open(path) as index:
+            start = time.perf_counter()
+            for pattern in patterns:
+                index.hit_rate(pattern)
+            elapsed = time.perf_counter() - start
+            print(f"Lookups:     {len(patterns):,} contents in {elapsed:.3f}s "
+                  f"({len(patterns) / elapsed:,.0f}/sec, cold cache)")
+
+        for label, index in (("length", None), ("index", path)):
+            set_selectivity_index(index)
+            start = time.perf_counter()
+            for _ in score_rules(rules, workers=1):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"Scoring ({label:<6}) {len(rules):,} rules in {elapsed:.2f}s "
+                  f"({len(rules) / elapsed:,.0f} rules/sec)")
+        set_selectivity_index(None)
+
+
+if __name__ == "__main__":
+    main()
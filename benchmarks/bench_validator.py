@@ -0,0 +1,195 @@
+"""
+SnortForge - Validator benchmark
+
+Compares the original validate_rule (inline regexes, list lookups) against
+the compiled check plans in snortforge.core.validator and reports rules/sec
+for the full plan and the syntax-only plan.
+
+Usage:
+    python benchmarks/bench_validator.py [--rules 100000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from snortforge.core.parser import parse_rule  # noqa: E402
+from snortforge.core.rule import POSITIONAL_FIELDS  # noqa: E402
+from snortforge.core.validator import (  # noqa: E402
+    IP_PATTERN, PORT_PATTERN, VALID_ACTIONS, VALID_CLASSTYPES, VALID_DIRECTIONS,
+    VALID_FLOW_OPTIONS, VALID_PROTOCOLS, VALID_REFERENCE_TYPES, validate_rule,
+)
+from bench_parser import build_corpus  # noqa: E402
+
+
+# ── Legacy implementation (pre-registry), kept verbatim for comparison ──
+
+def legacy_validate_rule(rule):
+    errors = []
+    warnings = []
+
+    # Action
+    if rule.action not in VALID_ACTIONS:
+        errors.append(f"Invalid action '{rule.action}'. Must be: {', '.join(VALID_ACTIONS)}")
+
+    # Protocol
+    if rule.protocol not in VALID_PROTOCOLS:
+        errors.append(f"Invalid protocol '{rule.protocol}'. Must be: {', '.join(VALID_PROTOCOLS)}")
+
+    # Network
+    for label, value in [("Source IP", rule.src_ip), ("Destination IP", rule.dst_ip)]:
+        if not IP_PATTERN.match(value):
+            errors.append(f"Invalid {label}: '{value}'")
+    for label, value in [("Source port", rule.src_port), ("Destination port", rule.dst_port)]:
+        if not PORT_PATTERN.match(value):
+            errors.append(f"Invalid {label}: '{value}'")
+    if rule.src_ip == "any" and rule.dst_ip == "any":
+        warnings.append("Both source and destination IPs are 'any' — rule may be overly broad.")
+    if rule.src_port == "any" and rule.dst_port == "any":
+        warnings.append("Both ports are 'any' — consider narrowing scope.")
+
+    # Direction
+    if rule.direction not in VALID_DIRECTIONS:
+        errors.append(f"Invalid direction '{rule.direction}'. Must be '->' or '<>'.")
+
+    # Message
+    if not rule.msg:
+        errors.append("Rule message (msg) is required.")
+    elif len(rule.msg) < 5:
+        warnings.append("Rule message is very short — use a descriptive message.")
+    elif '"' in rule.msg or ";" in rule.msg:
+        errors.append("Message must not contain '\"' or ';' characters.")
+
+    # SID
+    if rule.sid < 1000000:
+        warnings.append(f"SID {rule.sid} is reserved (< 1,000,000). Custom rules should use >= 1,000,000.")
+    if rule.rev < 1:
+        errors.append("Revision must be >= 1.")
+
+    # Content — use get_content_matches() for multi-content awareness
+    matches = rule.get_content_matches()
+    if not matches and not rule.pcre:
+        warnings.append("No content or PCRE — rule matches on header only.")
+
+    for i, cm in enumerate(matches):
+        label = f"Content #{i+1}" if len(matches) > 1 else "Content"
+        if cm.content and "|" in cm.content:
+            hex_parts = re.findall(r'\|([^|]*)\|', cm.content)
+            for part in hex_parts:
+                cleaned = part.replace(" ", "")
+                if len(cleaned) % 2 != 0:
+                    errors.append(f"{label}: Invalid hex '|{part}|' — must have even number of hex chars.")
+                if not re.match(r'^[0-9a-fA-F\s]+$', part):
+                    errors.append(f"{label}: Invalid hex '|{part}|' — contains non-hex characters.")
+        # Depth/Offset per content match
+        if cm.depth > 0 and not cm.content:
+            errors.append(f"{label}: Depth requires content.")
+        if cm.offset > 0 and not cm.content:
+            errors.append(f"{label}: Offset requires content.")
+        if cm.depth > 0 and cm.offset >= cm.depth:
+            warnings.append(f"{label}: Offset >= depth — content may never match.")
+        # Chained match checks (2nd+ content)
+        if i > 0 and cm.distance == 0 and cm.within == 0 and cm.depth == 0 and cm.offset == 0:
+            warnings.append(
+                f"{label}: No positional modifier — consider distance/within "
+                f"to constrain match relative to Content #{i}."
+            )
+
+    # Flow
+    if rule.flow:
+        parts = [p.strip() for p in rule.flow.split(",")]
+        for part in parts:
+            if part not in VALID_FLOW_OPTIONS:
+                errors.append(f"Invalid flow option '{part}'.")
+    elif rule.protocol == "tcp":
+        warnings.append("No flow option for TCP — consider adding 'established'.")
+
+    # Classtype
+    if rule.classtype and rule.classtype not in VALID_CLASSTYPES:
+        warnings.append(f"Classtype '{rule.classtype}' is non-standard.")
+
+    # References
+    for ref in rule.references:
+        if not ref:
+            continue
+        if "," not in ref:
+            errors.append(f"Invalid reference '{ref}' — must be in format: type,value (e.g., cve,2024-1234).")
+            continue
+        ref_type = ref.split(",", 1)[0].strip().lower()
+        ref_value = ref.split(",", 1)[1].strip()
+        if ref_type not in VALID_REFERENCE_TYPES:
+            warnings.append(
+                f"Reference type '{ref_type}' is non-standard. "
+                f"Known types: {', '.join(VALID_REFERENCE_TYPES)}."
+            )
+        if not ref_value:
+            errors.append(f"Reference '{ref}' is missing a value after the type.")
+        # CVE format check
+        if ref_type == "cve" and not re.match(r'^\d{4}-\d{4,}$', ref_value):
+            warnings.append(f"CVE reference '{ref_value}' may not match standard format (YYYY-NNNNN).")
+
+    # PCRE
+    if rule.pcre:
+        if not rule.pcre.startswith("/") or rule.pcre.count("/") < 2:
+            errors.append("PCRE must be in format: /pattern/flags")
+
+    # Threshold
+    if rule.threshold_type:
+        if rule.threshold_type not in ["limit", "threshold", "both"]:
+            errors.append("Threshold type must be 'limit', 'threshold', or 'both'.")
+        if rule.threshold_track not in ["by_src", "by_dst"]:
+            errors.append("Threshold track must be 'by_src' or 'by_dst'.")
+        if rule.threshold_count <= 0:
+            errors.append("Threshold count must be > 0.")
+        if rule.threshold_seconds <= 0:
+            errors.append("Threshold seconds must be > 0.")
+
+    return {
+        "is_valid": len(errors) == 0,
+        "errors": errors,
+        "warnings": warnings,
+    }
+
+
+
+# ── Harness ──
+
+def legacy_rule(rule):
+    """Copy of *rule* in the pre-Optional model, where unset positions were 0."""
+    dup = rule.copy()
+    for cm in dup.contents:
+        for name in POSITIONAL_FIELDS:
+            if getattr(cm, name) is None:
+                setattr(cm, name, 0)
+    return dup
+
+
+def bench(label, fn, rules):
+    start = time.perf_counter()
+    for rule in rules:
+        fn(rule)
+    elapsed = time.perf_counter() - start
+    rate = len(rules) / elapsed if elapsed else float("inf")
+    print(f"  {label:<12} {elapsed:8.3f}s  {rate:>12,.0f} rules/sec")
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rules", type=int, default=100000)
+    args = ap.parse_args()
+
+    rules = [parse_rule(line) for line in build_corpus(args.rules, "mixed")]
+    print(f"Validating {len(rules):,} rules")
+    before = bench("before", legacy_validate_rule, [legacy_rule(rule) for rule in rules])
+    full = bench("full plan", validate_rule, rules)
+    syntax = bench("syntax plan", lambda rule: validate_rule(rule, "syntax"), rules)
+    print(f"  speedup    {full / before:.2f}x full, {syntax / before:.2f}x syntax-only")
+
+
+if __name__ == "__main__":
+    main()
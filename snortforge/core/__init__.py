@@ -1,5 +1,22 @@
 from .rule import SnortRule
-from .validator import validate_rule
-from .scorer import score_rule
+from .validator import validate_rule, validate_rules, compile_plan, register_check
+from .scorer import score_rule, score_rules, set_selectivity_index, ScoreSession, ScoreSummary
+from .features import RuleFeatures, extract_features
+from .analyze import analyze_rule
 from .templates_data import TEMPLATES, load_template, get_templates_json, get_template_categories
-from .parser import parse_rule, parse_rules_file
+from .parser import (
+    parse_rule, parse_rules_file, iter_rules,
+    iter_rules_parallel, parse_rules_file_parallel, iter_rules_stream,
+)
+from .cache import ParseCache
+from .archive import iter_rule_sources
+from .ruleset import RuleSet
+from .convert import convert_file, convert_rule_line
+from .project import ProjectReader, read_project, write_project
+from .canonical import canonicalize, canonical_text, rule_digest
+from .pcre import analyze_pcre
+from .anchors import propose_anchors, apply_anchors, anchor_rules, anchor_ruleset
+from .scope import ScopeIndex, Variables
+from .ngram import NgramIndex, build_index
+from .engine import RuleEngine, run_pcaps
+from .profile import profile_rules
@@ -0,0 +1,47 @@
+"""
+SnortForge - One-Call Rule Analysis
+
+Builds, validates and scores a rule in one go. The validator and scorer
+share one feature extraction (see :mod:`snortforge.core.features`); the
+rule digest used by the result caches is memoized on the rule.
+"""
+
+from typing import Optional
+
+from .cache import ResultCache
+from .features import extract_features
+from .rule import SnortRule
+from .scorer import CRITERIA, ScoreSession, score_rule
+from .validator import validate_rule
+
+
+def analyze_rule(rule: SnortRule, plan=None,
+                 validation_cache: Optional[ResultCache] = None,
+                 score_cache: Optional[ResultCache] = None,
+                 score_session: Optional[ScoreSession] = None) -> dict:
+    """Return ``{"rule_text", "rule_text_snort3", "validation", "score"}`` for *rule*.
+
+    *plan* and *validation_cache* go to :func:`validate_rule`, *score_cache*
+    to :func:`score_rule`. With a *score_session* the rule is scored as an
+    edit of the session's first rule if it has the same SID, so only the
+    criteria touched since the previous call are rerun; a rule with another
+    SID replaces it (or is added to an empty session) and is scored in full.
+    """
+    features = extract_features(rule)
+    if score_session is None:
+        score = score_rule(rule, score_cache, features)
+    else:
+        with score_session.lock:
+            if not len(score_session):
+                score = score_session.result(score_session.add(rule, features))
+                score["rescored"] = list(CRITERIA)
+            elif score_session.rule(0).sid != rule.sid:
+                score = score_session.replace(0, rule, features)
+            else:
+                score = score_session.rescore(0, rule, features=features)
+    return {
+        "rule_text": rule.build(),
+        "rule_text_snort3": rule.build_snort3(),
+        "validation": validate_rule(rule, plan, validation_cache, features),
+        "score": score,
+    }
@@ -0,0 +1,179 @@
+"""
+SnortForge - PCRE Content Anchors
+
+Snort only evaluates a PCRE after the rule's fast-pattern content has
+matched, so a PCRE-only rule runs its regex against every packet that
+reaches it. This module derives ``content`` matches from the literal text
+a PCRE requires (see :func:`snortforge.core.pcre.required_literals`):
+
+  - ``/i`` (or an inline ``(?i)``) becomes ``nocase``
+  - ``/U`` and ``/H`` become ``http_uri`` and ``http_header``
+  - Literals after the first are chained with ``distance``/``within``
+    bounds taken from the pattern; a pattern anchored with ``^`` gives the
+    first literal ``offset``/``depth``
+
+``within`` and ``depth`` are counted from the end of the previous match
+(or the buffer start), which is never tighter than the pattern allows, so
+an anchored rule matches everything the PCRE-only rule matched.
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .pcre import required_literals, split_pcre
+from .rule import ContentMatch, SnortRule, _content_values
+
+# PCRE buffer modifiers that ContentMatch can express
+_BUFFER_FLAGS = {"U": "http_uri", "H": "http_header"}
+# Buffers (client body, cookies, method, raw URI/header, status, raw bytes)
+# with no matching content modifier in the rule model
+_UNSUPPORTED_BUFFERS = frozenset("PCKMIDSYB")
+# At most this many anchors are proposed per rule (the longest literals)
+MAX_ANCHORS = 3
+
+# Characters that must be hex-escaped inside content:"..."
+_CONTENT_SPECIAL = frozenset('";\\|')
+
+
+def content_text(literal: str) -> str:
+    """Encode *literal* as Snort content text, hex-escaping special bytes."""
+    out, hex_run = [], []
+    for ch in literal:
+        if ch in _CONTENT_SPECIAL or not " " <= ch <= "~":
+            hex_run.append(f"{ord(ch):02X}")
+            continue
+        if hex_run:
+            out.append("|" + " ".join(hex_run) + "|")
+            hex_run = []
+        out.append(ch)
+    if hex_run:
+        out.append("|" + " ".join(hex_run) + "|")
+    return "".join(out)
+
+
+def propose_anchors(rule: SnortRule) -> Tuple[List[ContentMatch], Optional[str]]:
+    """Content matches that can safely prefilter *rule*'s PCRE.
+
+    Returns ``(anchors, reason)``; *reason* explains an empty proposal.
+    Literals already present as content matches are not proposed again.
+    """
+    if not rule.pcre:
+        return [], "Rule has no PCRE."
+    parts = split_pcre(rule.pcre)
+    if parts is None:
+        return [], "PCRE is not in /pattern/flags form."
+    _, modifiers, negated = parts
+    if negated:
+        return [], "Negated PCRE — its literals are not required for a match."
+    if "R" in modifiers:
+        return [], "Relative PCRE (/R) — inserting contents would move its starting point."
+    if _UNSUPPORTED_BUFFERS & set(modifiers):
+        return [], "PCRE inspects a buffer that content modifiers here cannot express."
+
+    required = required_literals(rule.pcre)
+    if required is None:
+        return [], "PCRE could not be parsed."
+    literals = _longest(required["literals"], MAX_ANCHORS)
+    if not literals:
+        return [], "PCRE has no required literal long enough to anchor on."
+
+    buffer = {name: True for flag, name in _BUFFER_FLAGS.items() if flag in modifiers}
+    existing = {(cm.content, cm.nocase) for cm in rule.get_content_matches() if not cm.negated}
+    anchors = []
+    for i, lit in enumerate(literals):
+        text, hi = lit["text"], lit["gap_max"]
+        cm = ContentMatch(content=content_text(text), nocase=lit["nocase"], **buffer)
+        if i == 0:
+            if required["anchored"]:
+                cm.offset = lit["gap_min"] or None
+                cm.depth = None if hi is None else hi + len(text)
+        else:
+            cm.distance = lit["gap_min"]
+            cm.within = None if hi is None else hi + len(text)
+        anchors.append(cm)
+
+    # A literal the rule already matches on adds nothing; the anchor after
+    # it loses its reference point, so it is left unchained
+    kept, dropped = [], False
+    for cm in anchors:
+        if (cm.content, cm.nocase) in existing or (cm.nocase and (cm.content, False) in existing):
+            dropped = True
+            continue
+        if dropped or not kept:
+            cm.distance = cm.within = None
+        dropped = False
+        kept.append(cm)
+    if not kept:
+        return [], "The PCRE's literals are already content matches."
+    return kept, None
+
+
+def _longest(literals: List[dict], limit: int) -> List[dict]:
+    """The *limit* longest literals in match order, with gaps re-folded."""
+    if len(literals) <= limit:
+        return literals
+    keep = set(sorted(range(len(literals)), key=lambda i: -len(literals[i]["text"]))[:limit])
+    result, carry_lo, carry_hi = [], 0, 0
+    for i, lit in enumerate(literals):
+        lo = carry_lo + lit["gap_min"]
+        hi = None if carry_hi is None or lit["gap_max"] is None else carry_hi + lit["gap_max"]
+        if i in keep:
+            result.append(dict(lit, gap_min=lo, gap_max=hi))
+            carry_lo, carry_hi = 0, 0
+        else:
+            carry_lo = lo + len(lit["text"])
+            carry_hi = None if hi is None else hi + len(lit["text"])
+    return result
+
+
+def apply_anchors(rule: SnortRule) -> Tuple[SnortRule, List[ContentMatch]]:
+    """Return a copy of *rule* with its proposed anchors appended, and the anchors.
+
+    A legacy single content is moved into ``contents`` first. The copy is
+    identical to *rule* when nothing is proposed.
+    """
+    anchors, _ = propose_anchors(rule)
+    return _with_anchors(rule, anchors), anchors
+
+
+def _with_anchors(rule: SnortRule, anchors: List[ContentMatch]) -> SnortRule:
+    anchored = rule.copy()
+    if anchors:
+        anchored.contents = [ContentMatch(*_content_values(cm)) for cm in rule.get_content_matches()]
+        anchored.contents.extend(anchors)
+        anchored.content = ""
+    return anchored
+
+
+def anchor_rules(rules: Iterable[SnortRule], pcre_only: bool = True) -> Iterator[dict]:
+    """Propose and apply anchors over *rules*, yielding one result per rule.
+
+    Each result is ``{"sid", "anchors", "reason", "rule"}``, where ``rule``
+    is the anchored copy (or the original when nothing was added). With
+    *pcre_only*, rules that already have a content match are passed
+    through with a reason instead.
+    """
+    for rule in rules:
+        if pcre_only and rule.pcre and rule.get_content_matches():
+            anchors, reason = [], "Rule already has a content match."
+        else:
+            anchors, reason = propose_anchors(rule)
+        yield {
+            "sid": rule.sid,
+            "anchors": [cm.to_dict() for cm in anchors],
+            "reason": reason,
+            "rule": _with_anchors(rule, anchors) if anchors else rule,
+        }
+
+
+def anchor_ruleset(ruleset, pcre_only: bool = True) -> int:
+    """Anchor every PCRE rule of a :class:`RuleSet` in place; returns rows changed."""
+    criteria = {"has_pcre": True}
+    if pcre_only:
+        criteria["has_content"] = False
+    changed = 0
+    for row in ruleset.find(**criteria):
+        rule, anchors = apply_anchors(ruleset.rule(row))
+        if anchors:
+            ruleset.replace(row, rule)
+            changed += 1
+    return changed
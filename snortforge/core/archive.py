@@ -0,0 +1,102 @@
+"""
+SnortForge - Rule Pack Sources
+
+Opens an uploaded rules file or compressed rule pack (.gz, .tar, .tar.gz,
+.zip) as a stream of ``(source_name, binary_file)`` pairs, decompressing
+member by member without writing anything to disk.
+"""
+
+import gzip
+import io
+import posixpath
+import tarfile
+import zipfile
+
+# Archive members with these extensions are treated as rule files
+RULE_EXTENSIONS = (".rules", ".txt")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZIP_MAGIC = b"PK\x03\x04"
+_TAR_MAGIC_OFFSET = 257
+_SNIFF_BYTES = 512
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Raw stream that replays already-consumed bytes before the rest of *stream*."""
+
+    def __init__(self, head: bytes, stream):
+        self._head = head
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        if self._head:
+            n = min(len(buf), len(self._head))
+            buf[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        data = self._stream.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+def _sniff(stream):
+    """Read the leading bytes of *stream* and return ``(head, buffered_stream)``."""
+    head = stream.read(_SNIFF_BYTES)
+    return head, io.BufferedReader(_PrefixedStream(head, stream))
+
+
+def _is_tar(head: bytes) -> bool:
+    return head[_TAR_MAGIC_OFFSET:_TAR_MAGIC_OFFSET + 5] == b"ustar"
+
+
+def _is_rules_member(name: str) -> bool:
+    return name.lower().endswith(RULE_EXTENSIONS)
+
+
+def iter_rule_sources(stream, filename: str = ""):
+    """Yield ``(source_name, binary_file)`` for every rule file in *stream*.
+
+    Plain rule files yield themselves. Gzip, tar (optionally compressed) and
+    zip archives are detected by magic bytes and yield one entry per
+    ``.rules``/``.txt`` member. Tar members are streamed, so each yielded
+    file must be consumed before advancing to the next one.
+    """
+    start = stream.tell() if stream.seekable() else None
+    head, buffered = _sniff(stream)
+
+    if head.startswith(_ZIP_MAGIC):
+        # zipfile needs random access to the central directory
+        if start is not None:
+            stream.seek(start)
+            data = stream
+        else:
+            data = io.BytesIO(buffered.read())
+        with zipfile.ZipFile(data) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and _is_rules_member(info.filename):
+                    with zf.open(info) as member:
+                        yield info.filename, member
+        return
+
+    if head.startswith(_GZIP_MAGIC):
+        inner_head, inner = _sniff(gzip.GzipFile(fileobj=buffered, mode="rb"))
+        if not _is_tar(inner_head):
+            name = filename[:-3] if filename.lower().endswith(".gz") else filename
+            yield name, inner
+            return
+        buffered = inner
+        head = inner_head
+
+    if _is_tar(head):
+        with tarfile.open(fileobj=buffered, mode="r|") as tf:
+            for member in tf:
+                if member.isfile() and _is_rules_member(member.name):
+                    f = tf.extractfile(member)
+                    if f is not None:
+                        yield posixpath.normpath(member.name), f
+        return
+
+    yield filename, buffered
@@ -0,0 +1,223 @@
+"""
+SnortForge - Parse Cache
+
+Bounded LRU cache of parse results keyed on a hash of the stripped rule
+line. Re-importing a mostly unchanged ruleset only parses the lines that
+changed. The cache can optionally be persisted to disk as an append-only
+JSON Lines journal: a version header, then one ``[key, kind, value]``
+record per entry. :meth:`ParseCache.save` appends only the entries added
+since the last save, and rewrites the file once it holds more than
+``COMPACT_RATIO`` times as many records as the cache has entries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+from .rule import SnortRule
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 9
+# Rewrite the journal once it holds this many records per live entry
+COMPACT_RATIO = 2
+
+
+class ParseCache:
+    """LRU map of ``line hash -> SnortRule | parse error message``.
+
+    Rules handed out by :meth:`get` are copies, so callers may mutate them
+    freely without corrupting the cached entry.
+    """
+
+    def __init__(self, max_size: Optional[int] = 100000, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._unsaved = {}      # keys put since the last save, in order
+        self._records = 0       # records in the journal at self.path
+        self._rewrite = True    # the journal is missing, stale or damaged
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def key(line: str) -> str:
+        return hashlib.blake2b(line.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Union[SnortRule, str]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return value.copy() if isinstance(value, SnortRule) else value
+
+    def put(self, key: str, value: Union[SnortRule, str]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.path:
+                self._unsaved[key] = None
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def update(self, items):
+        for key, value in items:
+            self.put(key, value)
+
+    def items(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._unsaved.clear()
+            self._rewrite = True
+            self.hits = self.misses = 0
+
+    def __contains__(self, key: str) -> bool:
+        """Whether *key* is cached, without touching LRU order or hit counts."""
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ── Persistence ──
+
+    def load(self, path: Optional[str] = None):
+        path = path or self.path
+        records = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if not isinstance(header, dict) or header.get("version") != CACHE_FORMAT_VERSION:
+                    logger.info("Ignoring parse cache %s with unknown version", path)
+                    return
+                for line in f:
+                    try:
+                        key, kind, value = json.loads(line)
+                        value = SnortRule.from_dict(value) if kind == "r" else value
+                    except (ValueError, TypeError, AttributeError):
+                        # A record cut short by a crash mid-append; compact on the next save
+                        logger.warning("Skipping damaged record in parse cache %s", path)
+                        records = -1
+                        break
+                    self.put(key, value)
+                    records += 1
+        except (OSError, ValueError):
+            logger.warning("Could not load parse cache from %s", path, exc_info=True)
+            return
+        if path == self.path:
+            with self._lock:
+                self._unsaved.clear()
+                self._records = max(records, 0)
+                self._rewrite = records < 0
+
+    def save(self, path: Optional[str] = None):
+        """Append the entries added since the last save, or rewrite the journal.
+
+        Saving to a path other than the cache's own always writes the whole cache.
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            with self._lock:
+                full = (path != self.path or self._rewrite
+                        or self._records + len(self._unsaved) > COMPACT_RATIO * max(len(self._entries), 1))
+                if full:
+                    pending = list(self._entries.items())
+                else:
+                    pending = [(key, self._entries[key]) for key in self._unsaved if key in self._entries]
+                if path == self.path:
+                    self._unsaved.clear()
+            try:
+                if full:
+                    tmp = f"{path}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(json.dumps({"version": CACHE_FORMAT_VERSION}) + "\n")
+                        f.writelines(map(_record, pending))
+                    os.replace(tmp, path)
+                    records = len(pending)
+                else:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.writelines(map(_record, pending))
+                    records = self._records + len(pending)
+            except OSError:
+                if path == self.path:
+                    with self._lock:
+                        self._rewrite = True
+                raise
+            if path == self.path:
+                with self._lock:
+                    self._records = records
+                    self._rewrite = False
+
+
+def _record(item) -> str:
+    key, value = item
+    if isinstance(value, SnortRule):
+        return json.dumps([key, "r", value.to_dict()]) + "\n"
+    return json.dumps([key, "e", value]) + "\n"
+
+
+class ResultCache:
+    """Bounded LRU of analysis results (validation, scoring) keyed on a rule digest.
+
+    :meth:`get` returns a shallow copy: top-level keys may be added or
+    replaced freely, but nested lists and dicts are shared with the cache
+    and must be treated as read-only.
+    """
+
+    def __init__(self, max_size: Optional[int] = 100000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return dict(value)
+
+    def put(self, key, value: dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute) -> dict:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+            value = dict(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,99 @@
+"""
+SnortForge - Canonical Rule Form
+
+Two rules that mean the same thing can still differ in representation:
+legacy single-content fields vs. the ``contents`` list, spacing inside
+``flow`` and ``metadata``, empty reference slots, or leftover threshold
+values with no threshold type. :func:`canonicalize` folds those into one
+form, and :func:`rule_digest` hashes it into a stable key, used to memoize
+validation and scoring results and to deduplicate rules.
+
+Only representation is normalized; anything the validator or scorer can
+tell apart (header values, msg, content bytes, option values) is kept as is,
+so both give identical results for rules with the same digest.
+"""
+
+import hashlib
+import marshal
+
+from .rule import ContentMatch, SnortRule, _content_values, _scalar_values, _RULE_FIELDS
+
+_SCALAR_FIELDS = tuple(n for n in _RULE_FIELDS if n not in ("references", "contents"))
+_POS = {name: i for i, name in enumerate(_SCALAR_FIELDS)}
+
+# Legacy single-content fields; the canonical form keeps every match in `contents`
+_LEGACY_CONTENT_DEFAULTS = tuple((_POS[name], value) for name, value in (
+    ("content", ""), ("content_nocase", False), ("content_negated", False),
+    ("content_http_uri", False), ("content_http_header", False),
+    ("depth", None), ("offset", None), ("distance", None), ("within", None),
+))
+_THRESHOLD_DEFAULTS = tuple((_POS[name], value) for name, value in (
+    ("threshold_track", ""), ("threshold_count", 0), ("threshold_seconds", 0),
+))
+_FLOW, _METADATA, _THRESHOLD_TYPE = _POS["flow"], _POS["metadata"], _POS["threshold_type"]
+_ID_POSITIONS = frozenset((_POS["sid"], _POS["rev"]))
+
+
+def canonical_state(rule: SnortRule, ignore_ids: bool = False) -> tuple:
+    """Hashable canonical state of *rule*, optionally without sid/rev.
+
+    Has the same shape as ``SnortRule.snapshot()``.
+    """
+    scalars = list(_scalar_values(rule))
+    for pos, value in _LEGACY_CONTENT_DEFAULTS:
+        scalars[pos] = value
+    if " " in rule.flow:
+        scalars[_FLOW] = ",".join(part.strip() for part in rule.flow.split(","))
+    if rule.metadata:
+        scalars[_METADATA] = ", ".join(
+            part for part in (p.strip() for p in rule.metadata.split(",")) if part
+        )
+    if not rule.threshold_type:
+        for pos, value in _THRESHOLD_DEFAULTS:
+            scalars[pos] = value
+    if ignore_ids:
+        scalars = [v for i, v in enumerate(scalars) if i not in _ID_POSITIONS]
+    return (
+        tuple(scalars),
+        tuple(ref for ref in rule.references if ref),
+        tuple(map(_content_values, rule.get_content_matches())),
+    )
+
+
+def canonicalize(rule: SnortRule) -> SnortRule:
+    """Return a new rule in canonical form; *rule* is not modified."""
+    scalars, references, contents = canonical_state(rule)
+    canon = SnortRule()
+    for name, value in zip(_SCALAR_FIELDS, scalars):
+        setattr(canon, name, value)
+    canon.references = list(references)
+    canon.contents = [ContentMatch(*values) for values in contents]
+    return canon
+
+
+def canonical_text(rule: SnortRule) -> str:
+    """Snort 2 text of the canonical form."""
+    return canonicalize(rule).build()
+
+
+def rule_digest(rule: SnortRule, ignore_ids: bool = False) -> str:
+    """Stable hex digest of the canonical form.
+
+    Equal for rules that differ only in representation; with *ignore_ids*
+    also for rules that differ only in sid/rev. Memoized on the rule until
+    one of its fields changes.
+    """
+    return rule._memoized(
+        ("digest", ignore_ids), lambda: _digest(canonical_state(rule, ignore_ids)),
+    )
+
+
+def _digest(state: tuple) -> str:
+    # marshal format 0 has no object references or interning flags, so equal
+    # states always serialize to the same bytes (unlike hash(), which is
+    # salted per process).
+    try:
+        data = marshal.dumps(state, 0)
+    except ValueError:
+        data = repr(state).encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -0,0 +1,153 @@
+"""
+SnortForge - Bulk Snort 2 -> Snort 3 Conversion
+
+Converts a Snort 2 rules file to Snort 3 syntax file-to-file. The input is
+cut into line-aligned blocks that are parsed and rebuilt with
+``SnortRule.build_snort3()`` in worker processes; converted blocks are
+written to the output in file order as they complete, so memory stays
+bounded by the block size rather than the ruleset size.
+
+Comments and blank lines are copied through unchanged. Rules that cannot
+be converted are left out of the output and written to a JSON-lines
+report instead, one ``{"line", "error", "rule"}`` object per failure.
+That includes rules using options the rule model does not carry
+(``flowbits``, ``byte_test``, ``dsize``, ...) or modifiers without a
+Snort 3 rule equivalent (``rawbytes``, thresholds other than type
+``threshold``), which would otherwise be lost or changed silently.
+
+Usage::
+
+    python -m snortforge.core.convert community.rules snort3.rules --report failed.jsonl
+"""
+
+import argparse
+import collections
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .parser import (
+    PARALLEL_BLOCK_BYTES, PARALLEL_MIN_BYTES, ParseError, _iter_blocks, parse_rule,
+    unsupported_options,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def convert_rule_line(line: str) -> str:
+    """Convert one Snort 2 rule line to Snort 3 syntax.
+
+    Raises ParseError when the line is not a valid rule or cannot be
+    converted without losing options.
+    """
+    rule = parse_rule(line)
+    unsupported = unsupported_options(line)
+    if unsupported:
+        raise ParseError(f"Unsupported option(s): {', '.join(unsupported)}")
+    for cm in rule.get_content_matches():
+        if "rawbytes" in cm.modifier_names():
+            raise ParseError("rawbytes has no Snort 3 equivalent")
+    # build_snort3() writes thresholds as detection_filter, which only
+    # matches the semantics of type threshold
+    if rule.threshold_type and rule.threshold_type != "threshold":
+        raise ParseError(f"threshold type {rule.threshold_type} needs a Snort 3 event_filter")
+    return rule.build_snort3()
+
+
+def convert_file(src_path, dst_path, report_path=None, workers=None,
+                 block_size=PARALLEL_BLOCK_BYTES) -> dict:
+    """Convert the rules file *src_path* to Snort 3 syntax at *dst_path*.
+
+    Failures are written to *report_path* (JSON lines) when given. Files
+    below ``PARALLEL_MIN_BYTES`` (or ``workers`` <= 1) are converted
+    in-process. Returns ``{"converted", "failed", "passthrough"}`` counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = {"converted": 0, "failed": 0, "passthrough": 0}
+    serial = workers <= 1 or os.path.getsize(src_path) < PARALLEL_MIN_BYTES
+
+    report = open(report_path, "w", encoding="utf-8") if report_path else None
+    try:
+        with open(src_path, "rb") as src, open(dst_path, "w", encoding="utf-8") as dst:
+            blocks = _iter_blocks(src, block_size)
+            if serial:
+                results = (_convert_block(data, first_line) for data, first_line in blocks)
+            else:
+                results = _iter_converted(blocks, workers)
+            for text, failures, counts in results:
+                dst.write(text)
+                for name, n in counts.items():
+                    summary[name] += n
+                if report is not None:
+                    for failure in failures:
+                        report.write(json.dumps(failure) + "\n")
+    finally:
+        if report is not None:
+            report.close()
+    return summary
+
+
+def _iter_converted(blocks, workers):
+    """Convert ``(data, first_line)`` blocks in a process pool, yielding results in order.
+
+    At most ``2 * workers`` blocks are in flight at any time.
+    """
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for data, first_line in blocks:
+            pending.append(pool.submit(_convert_block, data, first_line))
+            if len(pending) > workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _convert_block(data, first_line):
+    """Return ``(output_text, failures, counts)`` for one block of the input."""
+    out = io.StringIO()
+    failures = []
+    counts = {"converted": 0, "failed": 0, "passthrough": 0}
+    # Split on "\n" only, as _iter_blocks counts lines, so a stray "\r"
+    # cannot shift the line numbers of the following blocks
+    lines = data.decode("utf-8", errors="replace").split("\n")
+    if not lines[-1]:
+        lines.pop()
+    for line_num, raw in enumerate(lines, first_line):
+        raw = raw.rstrip("\r")
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            out.write(raw + "\n")
+            counts["passthrough"] += 1
+            continue
+        try:
+            out.write(convert_rule_line(line) + "\n")
+            counts["converted"] += 1
+        except ParseError as e:
+            failures.append({"line": line_num, "error": str(e), "rule": line})
+            counts["failed"] += 1
+        except Exception as e:
+            logger.exception("Unexpected error while converting rule on line %d", line_num)
+            failures.append({"line": line_num, "error": f"Internal error: {e}", "rule": line})
+            counts["failed"] += 1
+    return out.getvalue(), failures, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a Snort 2 rules file to Snort 3 syntax.")
+    parser.add_argument("src", help="Snort 2 rules file")
+    parser.add_argument("dst", help="output Snort 3 rules file")
+    parser.add_argument("--report", help="write rules that failed to convert here (JSON lines)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    summary = convert_file(args.src, args.dst, args.report, args.workers)
+    print(f"Converted {summary['converted']} rules, {summary['failed']} failed, "
+          f"{summary['passthrough']} comment/blank lines kept.", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
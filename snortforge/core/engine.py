@@ -0,0 +1,649 @@
+"""
+SnortForge - Offline Rule Matching Engine
+
+Runs rules against captured traffic without a Snort sensor, to check that
+a rule fires where it should (and nowhere else) in CI. Each rule is
+compiled once into a :class:`CompiledRule` and evaluated in pure Python:
+
+  - header: protocol, addresses and ports (``$VAR`` resolved against
+    optional snort.conf variables; undefined variables match anything)
+  - ``flow``: established/not_established, to_server/to_client and
+    no_stream/only_stream, from the state kept by
+    :mod:`snortforge.core.stream`
+  - contents: ``|..|`` hex bytes, ``nocase``, negation, ``offset``/``depth``
+    from the start of the buffer and ``distance``/``within`` from the end
+    of the previous match, retrying earlier matches when a later one fails
+  - ``http_uri``/``http_header`` and the other HTTP buffers (method,
+    cookie, client body, status code and message): taken from an HTTP
+    request or response at the start of the payload; raw and normalized
+    buffers are the same
+  - ``pcre``: compiled with Python ``re`` (``/R`` relative, ``/A``
+    anchored, ``/U``/``/H``/``/P``/``/M``/``/C`` buffers)
+
+Packets are evaluated one at a time, and reassembled TCP streams once per
+direction when their flow closes. Each payload is first scanned once by a
+multi-pattern prefilter (:mod:`snortforge.core.prefilter`), and only the
+rules whose contents all occur in it are evaluated. Evaluation time is
+recorded per rule.
+
+Usage::
+
+    python -m snortforge.core.engine local.rules capture.pcap --expect 1000001
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .features import extract_features
+from .parser import parse_rules_file
+from .pcap import IPPROTO_ICMP, IPPROTO_ICMPV6, IPPROTO_TCP, IPPROTO_UDP, PcapError, decode_frame, iter_frames
+from .pcre import analyze_pcre, python_flags, split_pcre
+from .prefilter import Prefilter
+from .rule import SnortRule, _SLOTS, decode_content
+from .scope import _V4_BASE, ANY_IP, ANY_PORT, RuleScope, ScopeError, Variables
+from .stream import DEFAULT_MAX_BYTES, FlowTable
+
+HTTP_BUFFERS = (
+    "http_method", "http_uri", "http_header", "http_cookie", "http_body",
+    "http_stat_code", "http_stat_msg",
+)
+DEFAULT_MAX_ALERTS = 10000
+# Content match attempts per rule evaluation before giving up, like
+# Snort's pattern match recursion limit
+MAX_CONTENT_ATTEMPTS = 1024
+
+_HTTP_METHODS = frozenset({
+    b"GET", b"POST", b"HEAD", b"PUT", b"DELETE", b"OPTIONS", b"PATCH", b"TRACE", b"CONNECT",
+})
+_PROTOCOLS = {
+    "tcp": frozenset({IPPROTO_TCP}),
+    "udp": frozenset({IPPROTO_UDP}),
+    "icmp": frozenset({IPPROTO_ICMP, IPPROTO_ICMPV6}),
+}
+# Snort 3 service headers (alert http ...) ride on TCP or UDP
+_SERVICE_PROTOCOLS = frozenset({IPPROTO_TCP, IPPROTO_UDP})
+# Snort 2 pcre buffer modifiers -> buffer
+_PCRE_BUFFERS = {
+    "U": "http_uri", "I": "http_uri", "H": "http_header", "D": "http_header",
+    "C": "http_cookie", "K": "http_cookie", "P": "http_body", "M": "http_method",
+    "S": "http_stat_code", "Y": "http_stat_msg", "B": "payload",
+}
+_PCRE_SUPPORTED = frozenset("ismxAREO") | frozenset(_PCRE_BUFFERS)
+# ContentMatch.buffer -> buffer
+_CONTENT_BUFFERS = {
+    "http_method": "http_method", "http_client_body": "http_body",
+    "http_cookie": "http_cookie", "http_raw_cookie": "http_cookie",
+    "http_raw_uri": "http_uri", "http_raw_header": "http_header",
+    "http_stat_code": "http_stat_code", "http_stat_msg": "http_stat_msg",
+    "pkt_data": "payload", "raw_data": "payload",
+}
+
+
+class EngineError(ValueError):
+    """A rule uses something the engine cannot evaluate."""
+
+
+# ── Inspected traffic ──
+
+def http_buffers(payload: bytes) -> Dict[str, bytes]:
+    """Split an HTTP request or response at the start of *payload* into buffers.
+
+    Every buffer is empty when the payload does not start with a request
+    or status line. Unlike Snort, URIs are not normalized and only the
+    first message of a stream is parsed.
+    """
+    buffers = dict.fromkeys(HTTP_BUFFERS, b"")
+    line_end = payload.find(b"\n")
+    if line_end < 0:
+        line_end = len(payload)
+    parts = payload[:line_end].rstrip(b"\r").split(b" ", 2)
+    if parts[0] in _HTTP_METHODS and len(parts) > 1:
+        buffers["http_method"], buffers["http_uri"] = parts[0], parts[1]
+    elif parts[0].startswith(b"HTTP/") and len(parts) > 1:
+        buffers["http_stat_code"] = parts[1]
+        buffers["http_stat_msg"] = parts[2] if len(parts) > 2 else b""
+    else:
+        return buffers
+    head_end = payload.find(b"\r\n\r\n", max(line_end - 1, 0))
+    if head_end < 0:
+        header = payload[line_end + 1:]
+    else:
+        header = payload[line_end + 1:head_end + 2]
+        buffers["http_body"] = payload[head_end + 4:]
+    buffers["http_header"] = header
+    buffers["http_cookie"] = b"\r\n".join(
+        line[7:].strip() for line in header.split(b"\n") if line[:7].lower() == b"cookie:"
+    )
+    return buffers
+
+
+class Inspection:
+    """One unit of traffic to run rules against: a packet or a reassembled stream.
+
+    Addresses are integer points of the combined address space used by
+    :mod:`snortforge.core.scope`. ``to_server`` is ``None`` when the
+    direction is unknown (ICMP). A ``raw`` payload has no packet around it
+    (a file from a payload corpus): only the detection options of a rule
+    are evaluated.
+    """
+
+    __slots__ = ("payload", "proto", "src", "sport", "dst", "dport",
+                 "to_server", "established", "stream", "raw", "_http", "_lowered")
+
+    def __init__(self, payload: bytes, proto: int = 0, src: int = 0, sport: int = 0,
+                 dst: int = 0, dport: int = 0, to_server: Optional[bool] = None,
+                 established: bool = False, stream: bool = False, raw: bool = False):
+        self.payload = payload
+        self.proto = proto
+        self.src, self.sport, self.dst, self.dport = src, sport, dst, dport
+        self.to_server = to_server
+        self.established = established
+        self.stream = stream
+        self.raw = raw
+        self._http = None
+        self._lowered = {}
+
+    def buffer(self, name: str) -> bytes:
+        if name == "payload":
+            return self.payload
+        if self._http is None:
+            self._http = http_buffers(self.payload)
+        return self._http[name]
+
+    def lowered(self, name: str) -> bytes:
+        data = self._lowered.get(name)
+        if data is None:
+            data = self._lowered[name] = self.buffer(name).lower()
+        return data
+
+
+def address_point(addr: bytes) -> int:
+    """Integer point of a packed IPv4/IPv6 address (see :func:`scope.ip_point`)."""
+    value = int.from_bytes(addr, "big")
+    return _V4_BASE + value if len(addr) == 4 else value
+
+
+# ── Compiled rules ──
+
+@dataclass(**_SLOTS)
+class _Content:
+    pattern: bytes       # lowercased for nocase
+    nocase: bool
+    negated: bool
+    buffer: str
+    relative: bool       # placed after the previous match (distance/within)
+    offset: int
+    depth: Optional[int]   # None: to the end of the buffer
+    distance: int
+    within: Optional[int]
+
+
+class _LenientVariables:
+    """Resolves like *variables* but treats unresolvable fields as ``any``."""
+
+    def __init__(self, variables: Variables):
+        self.variables = variables
+        self.unresolved: List[str] = []
+
+    def ips(self, spec):
+        try:
+            return self.variables.ips(spec)
+        except ScopeError as e:
+            self.unresolved.append(str(e))
+            return ANY_IP
+
+    def ports(self, spec):
+        try:
+            return self.variables.ports(spec)
+        except ScopeError as e:
+            self.unresolved.append(str(e))
+            return ANY_PORT
+
+
+class CompiledRule:
+    """A rule prepared for repeated evaluation.
+
+    ``warning`` is set when the header had to be widened because a
+    variable could not be resolved.
+    """
+
+    __slots__ = ("index", "rule", "sid", "protocols", "orientations", "established",
+                 "to_server", "stream", "contents", "pcre", "pcre_negated",
+                 "pcre_relative", "pcre_anchored", "pcre_buffer", "warning")
+
+    def __init__(self, rule: SnortRule, index: int = 0, variables: Optional[Variables] = None,
+                 skip_catastrophic: bool = True):
+        self.index = index
+        self.rule = rule
+        self.sid = rule.sid
+        self.warning = ""
+        protocol = rule.protocol.lower()
+        self.protocols = None if protocol == "ip" else _PROTOCOLS.get(protocol, _SERVICE_PROTOCOLS)
+
+        lenient = _LenientVariables(variables or Variables())
+        try:
+            self.orientations = RuleScope(rule, lenient).orientations
+        except ScopeError as e:
+            raise EngineError(f"Header: {e}") from None
+        if lenient.unresolved:
+            self.warning = "; ".join(lenient.unresolved) + " (matched as any)"
+
+        self.established = self.to_server = self.stream = None
+        for part in extract_features(rule).flow_parts:
+            if part in ("established", "not_established"):
+                self.established = part == "established"
+            elif part in ("to_server", "from_client", "to_client", "from_server"):
+                self.to_server = part in ("to_server", "from_client")
+            elif part in ("no_stream", "only_stream"):
+                self.stream = part == "only_stream"
+
+        self.contents = []
+        for cm in rule.get_content_matches():
+            try:
+                pattern = decode_content(cm.content)
+            except ValueError as e:
+                raise EngineError(f"Content '{cm.content}': {e}") from None
+            if not pattern:
+                continue
+            if cm.http_uri or cm.http_header:
+                buffer = "http_uri" if cm.http_uri else "http_header"
+            elif cm.buffer:
+                buffer = _CONTENT_BUFFERS.get(cm.buffer)
+                if buffer is None:
+                    raise EngineError(f"Content buffer '{cm.buffer}' is not supported")
+            else:
+                buffer = "payload"
+            self.contents.append(_Content(
+                pattern.lower() if cm.nocase else pattern,
+                cm.nocase, cm.negated, buffer,
+                cm.distance is not None or cm.within is not None,
+                cm.offset or 0, cm.depth, cm.distance or 0, cm.within,
+            ))
+
+        self.pcre = None
+        self.pcre_negated = self.pcre_relative = self.pcre_anchored = False
+        self.pcre_buffer = "payload"
+        if rule.pcre:
+            self._compile_pcre(rule.pcre, skip_catastrophic)
+
+    def _compile_pcre(self, value: str, skip_catastrophic: bool):
+        parts = split_pcre(value)
+        if parts is None:
+            raise EngineError(f"PCRE '{value}' is not in /pattern/flags form")
+        body, modifiers, self.pcre_negated = parts
+        unsupported = set(modifiers) - _PCRE_SUPPORTED
+        if unsupported:
+            raise EngineError(f"PCRE modifier(s) not supported: {''.join(sorted(unsupported))}")
+        # Static analysis only: nested quantifiers and ambiguous alternation
+        # inside a repeat are the shapes that backtrack catastrophically
+        if skip_catastrophic and analyze_pcre(value, measure=False)["cost_class"] == "high":
+            raise EngineError("PCRE can backtrack catastrophically; not evaluated")
+        try:
+            self.pcre = re.compile(body.encode("utf-8"), python_flags(modifiers))
+        except re.error as e:
+            raise EngineError(f"PCRE does not compile: {e}") from None
+        self.pcre_relative = "R" in modifiers
+        self.pcre_anchored = "A" in modifiers
+        for flag in modifiers:
+            if flag in _PCRE_BUFFERS:
+                self.pcre_buffer = _PCRE_BUFFERS[flag]
+
+    # ── Evaluation ──
+
+    def match(self, insp: Inspection) -> bool:
+        """True when the rule fires on *insp*."""
+        if not insp.raw and not self._header_match(insp):
+            return False
+        cursors = self._match_contents(insp, 0, {}, [MAX_CONTENT_ATTEMPTS]) if self.contents else {}
+        if cursors is None:
+            return False
+        return self.pcre is None or self._match_pcre(insp, cursors)
+
+    def match_profiled(self, insp: Inspection, stats: "RuleStats", clock) -> bool:
+        """:meth:`match`, adding the time spent in contents and PCRE to *stats*."""
+        if not insp.raw and not self._header_match(insp):
+            return False
+        start = clock()
+        cursors = self._match_contents(insp, 0, {}, [MAX_CONTENT_ATTEMPTS]) if self.contents else {}
+        middle = clock()
+        stats.content_ns += middle - start
+        if cursors is None:
+            return False
+        if self.pcre is None:
+            return True
+        hit = self._match_pcre(insp, cursors)
+        stats.pcre_ns += clock() - middle
+        return hit
+
+    def _header_match(self, insp):
+        """Protocol, flow, address and port checks."""
+        if self.protocols is not None and insp.proto not in self.protocols:
+            return False
+        if self.stream is not None and self.stream != insp.stream:
+            return False
+        if self.established is not None and self.established != insp.established:
+            return False
+        if self.to_server is not None and self.to_server != insp.to_server:
+            return False
+        for src_ips, src_ports, dst_ips, dst_ports in self.orientations:
+            if (insp.src in src_ips and insp.dst in dst_ips
+                    and insp.sport in src_ports and insp.dport in dst_ports):
+                return True
+        return False
+
+    def _match_contents(self, insp, i, cursors, budget):
+        """End offsets of a consistent placement of contents ``i:``, or ``None``."""
+        if i == len(self.contents):
+            return cursors
+        c = self.contents[i]
+        data = insp.lowered(c.buffer) if c.nocase else insp.buffer(c.buffer)
+        if c.relative:
+            start = cursors.get(c.buffer, 0) + c.distance
+            end = len(data) if c.within is None else start + c.within
+        else:
+            start = c.offset
+            end = len(data) if c.depth is None else start + c.depth
+        # A negative distance or offset looks back, but not past the start
+        # of the buffer; str.find would read a negative bound from the end
+        start, end = max(start, 0), max(end, 0)
+        if c.negated:
+            if data.find(c.pattern, start, end) >= 0:
+                return None
+            return self._match_contents(insp, i + 1, cursors, budget)
+        pos = data.find(c.pattern, start, end)
+        while pos >= 0:
+            budget[0] -= 1
+            if budget[0] < 0:
+                return None
+            placed = dict(cursors)
+            placed[c.buffer] = pos + len(c.pattern)
+            result = self._match_contents(insp, i + 1, placed, budget)
+            if result is not None:
+                return result
+            pos = data.find(c.pattern, pos + 1, end)
+        return None
+
+    def _match_pcre(self, insp, cursors):
+        data = insp.buffer(self.pcre_buffer)
+        if self.pcre_relative:
+            # Snort hands PCRE the rest of the buffer, so ^ anchors at the cursor
+            data = data[cursors.get(self.pcre_buffer, 0):]
+        if self.pcre_anchored:
+            found = self.pcre.match(data) is not None
+        else:
+            found = self.pcre.search(data) is not None
+        return found != self.pcre_negated
+
+
+class RuleStats:
+    """Per-rule counters of a :class:`RuleEngine`.
+
+    ``match_ns`` is the share of ``ns`` spent on evaluations that matched;
+    ``content_ns`` and ``pcre_ns`` are only measured by a profiling engine.
+    """
+
+    __slots__ = ("checks", "matches", "ns", "match_ns", "content_ns", "pcre_ns")
+
+    def __init__(self):
+        self.checks = self.matches = self.ns = self.match_ns = 0
+        self.content_ns = self.pcre_ns = 0
+
+    def to_dict(self) -> dict:
+        total_us = self.ns / 1000
+        return {
+            "checks": self.checks,
+            "matches": self.matches,
+            "total_us": round(total_us, 1),
+            "avg_us": round(total_us / self.checks, 2) if self.checks else 0.0,
+        }
+
+
+class RuleEngine:
+    """A compiled ruleset with per-rule evaluation counters.
+
+    Rules that cannot be compiled are left out and listed in ``errors``
+    as ``{rule index: message}``; header widening notes go to ``warnings``.
+    With *prefilter* (the default) a payload is scanned once by a
+    :class:`~snortforge.core.prefilter.Prefilter` and only the candidate
+    rules are evaluated, so ``checks`` counts candidates, as Snort counts
+    rules that passed the fast-pattern stage. A *profile* engine also
+    splits each rule's time into content and PCRE matching; the time spent
+    in prefilter scans is kept in ``prefilter_ns``.
+    """
+
+    def __init__(self, rules: Iterable[SnortRule], variables: Optional[Variables] = None,
+                 skip_catastrophic: bool = True, prefilter: bool = True, profile: bool = False):
+        self.rules: List[SnortRule] = list(rules)
+        self.compiled: List[CompiledRule] = []
+        self.errors: Dict[int, str] = {}
+        self.warnings: Dict[int, str] = {}
+        for i, rule in enumerate(self.rules):
+            try:
+                compiled = CompiledRule(rule, i, variables, skip_catastrophic)
+            except EngineError as e:
+                self.errors[i] = str(e)
+                continue
+            if compiled.warning:
+                self.warnings[i] = compiled.warning
+            self.compiled.append(compiled)
+        self.stats: Dict[int, RuleStats] = {c.index: RuleStats() for c in self.compiled}
+        self.prefilter = Prefilter(self.compiled) if prefilter else None
+        self.prefilter_ns = 0
+        self.profile = profile
+        # Rules per IP protocol number, so a packet only visits rules that can apply
+        self._by_proto: Dict[int, List[CompiledRule]] = {}
+        for proto in (IPPROTO_TCP, IPPROTO_UDP, IPPROTO_ICMP, IPPROTO_ICMPV6):
+            self._by_proto[proto] = [c for c in self.compiled if c.protocols is None or proto in c.protocols]
+
+    def candidates(self, insp: Inspection) -> List[CompiledRule]:
+        """The rules worth evaluating on *insp*, in rule order."""
+        if self.prefilter is None:
+            return self.compiled if insp.raw else self._by_proto.get(insp.proto, [])
+        compiled, proto = self.compiled, insp.proto
+        start = time.perf_counter_ns()
+        positions = self.prefilter.candidates(insp.lowered("payload"))
+        self.prefilter_ns += time.perf_counter_ns() - start
+        if insp.raw:
+            return [compiled[pos] for pos in positions]
+        rules = []
+        for pos in positions:
+            rule = compiled[pos]
+            if rule.protocols is None or proto in rule.protocols:
+                rules.append(rule)
+        return rules
+
+    def evaluate(self, insp: Inspection) -> List[int]:
+        """Indexes of the rules that fire on *insp*, timing each evaluation."""
+        fired = []
+        stats = self.stats
+        clock = time.perf_counter_ns
+        profile = self.profile
+        for compiled in self.candidates(insp):
+            entry = stats[compiled.index]
+            start = clock()
+            hit = compiled.match_profiled(insp, entry, clock) if profile else compiled.match(insp)
+            elapsed = clock() - start
+            entry.ns += elapsed
+            entry.checks += 1
+            if hit:
+                entry.matches += 1
+                entry.match_ns += elapsed
+                fired.append(compiled.index)
+        return fired
+
+
+# ── pcap replay ──
+
+def run_pcaps(rules, paths: Iterable[str], variables: Optional[Variables] = None,
+              streams: bool = True, midstream: bool = True,
+              max_stream_bytes: int = DEFAULT_MAX_BYTES,
+              max_alerts: int = DEFAULT_MAX_ALERTS, prefilter: bool = True) -> dict:
+    """Replay pcap files through *rules* (a list of rules or a :class:`RuleEngine`).
+
+    Returns::
+
+        {
+            "frames": int, "packets": int, "bytes": int, "flows": int,
+            "alerts": [{"sid", "rule", "msg", "unit": "packet" | "stream",
+                        "pcap", "frame", "ts", "flow", "direction"}, ...],
+            "alert_count": int,         # alerts also counts those past max_alerts
+            "rules": [{"rule", "sid", "msg", "packet_alerts", "stream_alerts",
+                       "checks", "matches", "total_us", "avg_us"}, ...],
+            "flow_details": {flow id: Flow.to_dict()},   # flows with alerts
+            "errors": [{"rule", "sid", "error"}, ...],
+            "warnings": [{"rule", "sid", "warning"}, ...],
+        }
+
+    ``frame`` is the 1-based record number in its pcap (as Wireshark counts
+    them); stream alerts carry the frame that closed the flow, or ``None``
+    at the end of the capture.
+    """
+    engine = rules if isinstance(rules, RuleEngine) else RuleEngine(rules, variables, prefilter=prefilter)
+    table = FlowTable(max_stream_bytes, midstream)
+    report = {"frames": 0, "packets": 0, "bytes": 0, "flows": 0, "alerts": [], "alert_count": 0}
+    per_rule = {c.index: [0, 0] for c in engine.compiled}
+    flow_details = {}
+
+    def alert(index, unit, pcap, frame, ts, flow, to_server):
+        per_rule[index][unit == "stream"] += 1
+        report["alert_count"] += 1
+        if flow is not None:
+            flow_details.setdefault(flow.id, flow)
+        if len(report["alerts"]) < max_alerts:
+            rule = engine.rules[index]
+            report["alerts"].append({
+                "sid": rule.sid, "rule": index, "msg": rule.msg, "unit": unit,
+                "pcap": pcap, "frame": frame, "ts": ts,
+                "flow": flow.id if flow is not None else None,
+                "direction": None if to_server is None else "to_server" if to_server else "to_client",
+            })
+
+    def inspect_streams(flows, pcap, frame, ts):
+        if not streams:
+            return
+        for flow in flows:
+            if flow.proto != IPPROTO_TCP:
+                continue
+            for to_server, half in ((True, flow.to_server), (False, flow.to_client)):
+                if not half.data:
+                    continue
+                if to_server:
+                    ends = (flow.client, flow.client_port, flow.server, flow.server_port)
+                else:
+                    ends = (flow.server, flow.server_port, flow.client, flow.client_port)
+                insp = Inspection(bytes(half.data), IPPROTO_TCP,
+                                  address_point(ends[0]), ends[1], address_point(ends[2]), ends[3],
+                                  to_server, flow.established, stream=True)
+                for index in engine.evaluate(insp):
+                    alert(index, "stream", pcap, frame, ts, flow, to_server)
+            if flow.id in flow_details:
+                flow_details[flow.id] = flow.to_dict()
+            # Streams are inspected once; free the buffers
+            flow.to_server.data = bytearray()
+            flow.to_client.data = bytearray()
+
+    pcap = None
+    for pcap in paths:
+        for frame, (ts, linktype, data) in enumerate(iter_frames(pcap), 1):
+            report["frames"] += 1
+            packet = decode_frame(linktype, data, ts)
+            if packet is None:
+                continue
+            report["packets"] += 1
+            report["bytes"] += len(packet.payload)
+            flow, to_server = table.feed(packet)
+            insp = Inspection(packet.payload, packet.proto,
+                              address_point(packet.src), packet.sport,
+                              address_point(packet.dst), packet.dport,
+                              to_server, flow is not None and flow.established)
+            for index in engine.evaluate(insp):
+                alert(index, "packet", pcap, frame, ts, flow, to_server)
+            inspect_streams(table.drain_closed(), pcap, frame, ts)
+    inspect_streams(table.close_all(), pcap, None, None)
+
+    report["flows"] = table.count
+    report["rules"] = []
+    for compiled in engine.compiled:
+        index = compiled.index
+        packet_alerts, stream_alerts = per_rule[index]
+        entry = {"rule": index, "sid": compiled.sid, "msg": compiled.rule.msg,
+                 "packet_alerts": packet_alerts, "stream_alerts": stream_alerts}
+        entry.update(engine.stats[index].to_dict())
+        report["rules"].append(entry)
+    report["flow_details"] = {
+        flow_id: flow if isinstance(flow, dict) else flow.to_dict()
+        for flow_id, flow in sorted(flow_details.items())
+    }
+    report["errors"] = [{"rule": i, "sid": engine.rules[i].sid, "error": msg}
+                        for i, msg in sorted(engine.errors.items())]
+    report["warnings"] = [{"rule": i, "sid": engine.rules[i].sid, "warning": msg}
+                          for i, msg in sorted(engine.warnings.items())]
+    return report
+
+
+def _sid_list(value: str) -> List[int]:
+    try:
+        return [int(sid) for sid in value.replace(",", " ").split()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a list of SIDs: '{value}'") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay pcap files through a ruleset and report which rules fire.")
+    parser.add_argument("rules", help="rules file")
+    parser.add_argument("pcaps", nargs="+", help="classic pcap capture files")
+    parser.add_argument("--conf", help="snort.conf or snort.lua with ipvar/portvar definitions")
+    parser.add_argument("--expect", type=_sid_list, default=[], metavar="SIDS",
+                        help="comma-separated SIDs that must fire (exit 1 otherwise)")
+    parser.add_argument("--forbid", type=_sid_list, default=[], metavar="SIDS",
+                        help="comma-separated SIDs that must not fire (exit 1 otherwise)")
+    parser.add_argument("--no-streams", action="store_true", help="inspect packets only, not reassembled TCP streams")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="evaluate every rule on every payload instead of prefiltering by content")
+    parser.add_argument("--json", metavar="PATH", help="write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    rules, parse_errors = parse_rules_file(args.rules)
+    for error in parse_errors:
+        print(f"{args.rules}: {error}", file=sys.stderr)
+    variables = Variables.load(args.conf) if args.conf else None
+    try:
+        report = run_pcaps(rules, args.pcaps, variables, streams=not args.no_streams,
+                           prefilter=not args.no_prefilter)
+    except PcapError as e:
+        parser.error(str(e))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for entry in report["errors"]:
+        print(f"sid {entry['sid']}: not evaluated: {entry['error']}", file=sys.stderr)
+    print(f"{'SID':>10} {'PKT':>7} {'STREAM':>7} {'CHECKS':>9} {'AVG_US':>8}  MSG")
+    for entry in report["rules"]:
+        if entry["matches"]:
+            print(f"{entry['sid']:>10} {entry['packet_alerts']:>7} {entry['stream_alerts']:>7} "
+                  f"{entry['checks']:>9} {entry['avg_us']:>8.2f}  {entry['msg']}")
+    print(f"{report['packets']} packets, {report['flows']} flows: {report['alert_count']} alerts "
+          f"from {sum(1 for e in report['rules'] if e['matches'])} of {len(rules)} rules "
+          f"({len(report['errors'])} not evaluated).", file=sys.stderr)
+
+    fired = {entry["sid"] for entry in report["rules"] if entry["matches"]}
+    failed = False
+    for sid in args.expect:
+        if sid not in fired:
+            print(f"FAIL: sid {sid} did not fire", file=sys.stderr)
+            failed = True
+    for sid in args.forbid:
+        if sid in fired:
+            print(f"FAIL: sid {sid} fired", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
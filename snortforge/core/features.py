@@ -0,0 +1,80 @@
+"""
+SnortForge - Rule Features
+
+Facts about a rule that the validator checks and the scorer criteria
+both need — the effective content matches, their lengths and modifiers,
+flow keywords, header scoping, non-empty references — derived in one pass.
+``validate_rule`` and ``score_rule`` take an already extracted
+:class:`RuleFeatures`, so a caller running both (``analyze_rule``) extracts
+once. Extraction is cheaper than snapshotting the rule, so it is not
+memoized on it.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .rule import ContentMatch, SnortRule, _SLOTS
+
+
+@dataclass(**_SLOTS)
+class RuleFeatures:
+    """Derived, read-only facts about one rule."""
+
+    matches: List[ContentMatch]
+    content_lengths: Tuple[int, ...]
+    has_nocase: bool
+    has_http_scope: bool
+    # Positional modifier -> number of content matches using it (non-zero only)
+    modifier_counts: Dict[str, int]
+    flow_parts: Tuple[str, ...]
+    src_ip_scoped: bool
+    dst_ip_scoped: bool
+    src_port_scoped: bool
+    dst_port_scoped: bool
+    uses_variables: bool
+    references: Tuple[str, ...]
+    threshold_complete: bool
+
+    @property
+    def has_content(self) -> bool:
+        return bool(self.matches)
+
+
+def extract_features(rule: SnortRule) -> RuleFeatures:
+    """Derive the :class:`RuleFeatures` of *rule* in one pass."""
+    matches = rule.get_content_matches()
+    lengths = []
+    counts = {}
+    has_nocase = has_http_scope = False
+    for cm in matches:
+        lengths.append(len(cm.content))
+        if cm.nocase:
+            has_nocase = True
+        if cm.http_uri or cm.http_header or cm.buffer.startswith("http_"):
+            has_http_scope = True
+        if cm.depth is not None:
+            counts["depth"] = counts.get("depth", 0) + 1
+        if cm.offset is not None:
+            counts["offset"] = counts.get("offset", 0) + 1
+        if cm.distance is not None:
+            counts["distance"] = counts.get("distance", 0) + 1
+        if cm.within is not None:
+            counts["within"] = counts.get("within", 0) + 1
+
+    src_ip, dst_ip, src_port, dst_port = rule.src_ip, rule.dst_ip, rule.src_port, rule.dst_port
+    flow = rule.flow
+    return RuleFeatures(
+        matches,
+        tuple(lengths),
+        has_nocase,
+        has_http_scope,
+        counts,
+        tuple([p.strip() for p in flow.split(",")]) if flow else (),
+        src_ip != "any",
+        dst_ip != "any",
+        src_port != "any",
+        dst_port != "any",
+        src_ip[:1] == "$" or dst_ip[:1] == "$" or src_port[:1] == "$" or dst_port[:1] == "$",
+        tuple([ref for ref in rule.references if ref]),
+        bool(rule.threshold_type and rule.threshold_count > 0 and rule.threshold_seconds > 0),
+    )
@@ -0,0 +1,253 @@
+"""
+SnortForge - Benign-Traffic N-gram Index
+
+Estimates how often a content would match ordinary traffic. The index is
+built once from a directory of benign samples and stores, for every
+1-, 2-, 3- and 4-byte sequence, the number of samples containing it
+(document frequency):
+
+  - ``.pcap``/``.cap`` files contribute one sample per packet payload
+  - any other file is cut into ``SAMPLE_BYTES`` windows, roughly one
+    TCP segment each
+
+Samples are case-folded (ASCII, like Snort's ``nocase``). 1- and 2-grams
+are counted exactly; 3- and 4-grams go into hashed tables of
+``2 ** hash_bits`` buckets, where collisions can only overcount. The
+estimated hit rate of a longer content is the smallest frequency among
+its 4-grams, since a sample holding the content holds all of them. All
+estimates err towards "less selective".
+
+The index file is a small header followed by little-endian uint32
+tables; :class:`NgramIndex` memory-maps it, so opening is instant and
+worker processes share the pages.
+
+Usage::
+
+    python -m snortforge.core.ngram build ./benign-corpus benign.sfng
+"""
+
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+from .pcap import PcapError, iter_packets
+
+INDEX_MAGIC = b"SFNG"
+INDEX_VERSION = 1
+DEFAULT_HASH_BITS = 22
+SAMPLE_BYTES = 1460
+PCAP_SUFFIXES = (".pcap", ".cap")
+
+# magic, version, hash_bits, samples, payload bytes
+_HEADER = struct.Struct("<4sHHQQ")
+# Distinct 2/3/4-grams held in memory before they are folded into the tables
+_FLUSH_KEYS = 1 << 20
+_HASH_MULT = 0x9E3779B1
+
+
+class NgramIndex:
+    """Read-only, memory-mapped document-frequency tables.
+
+    Use :func:`build_index` to create the file and :meth:`open` to load it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: empty n-gram index") from None
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: truncated n-gram index")
+        magic, version, bits, samples, size = _HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a SnortForge n-gram index (or an unsupported version)")
+        self.hash_bits = bits
+        self.samples = samples
+        self.bytes = size
+        buckets = 1 << bits
+        expected = _HEADER.size + 4 * (256 + 65536 + 2 * buckets)
+        if len(self._mm) != expected:
+            self.close()
+            raise ValueError(f"{path}: truncated n-gram index")
+        self._uni, self._bi, self._tri, self._quad = _views(self._mm, buckets)
+        self._shift = 32 - bits
+        self.doc_freq = lru_cache(maxsize=65536)(self._doc_freq)
+
+    @classmethod
+    def open(cls, path: str) -> "NgramIndex":
+        return cls(path)
+
+    def close(self):
+        for view in ("_uni", "_bi", "_tri", "_quad"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+                delattr(self, view)
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _doc_freq(self, pattern: bytes) -> int:
+        """Upper bound on the number of samples containing *pattern* (any case)."""
+        pattern = pattern.lower()
+        n = len(pattern)
+        if n == 0:
+            return self.samples
+        if n == 1:
+            return self._uni[pattern[0]]
+        if n == 2:
+            return self._bi[pattern[0] << 8 | pattern[1]]
+        if n == 3:
+            return self._tri[_bucket(int.from_bytes(pattern, "little"), self._shift)]
+        quad, shift = self._quad, self._shift
+        best = self.samples
+        for i in range(n - 3):
+            count = quad[_bucket(int.from_bytes(pattern[i:i + 4], "little"), shift)]
+            if count < best:
+                best = count
+                if not best:
+                    break
+        return best
+
+    def hit_rate(self, pattern: bytes) -> float:
+        """Estimated fraction of benign samples that contain *pattern*."""
+        if not self.samples:
+            return 1.0
+        return min(self.doc_freq(pattern), self.samples) / self.samples
+
+    def stats(self) -> dict:
+        return {"path": self.path, "samples": self.samples, "bytes": self.bytes,
+                "hash_bits": self.hash_bits}
+
+
+def _views(mm, buckets):
+    base = memoryview(mm)
+    views, pos = [], _HEADER.size
+    for count in (256, 65536, buckets, buckets):
+        raw = base[pos:pos + 4 * count]
+        if sys.byteorder == "little":
+            views.append(raw.cast("I"))
+        else:
+            table = array.array("I", raw)
+            table.byteswap()
+            views.append(memoryview(table))
+        raw.release()
+        pos += 4 * count
+    base.release()
+    return views
+
+
+def _bucket(value: int, shift: int) -> int:
+    # Fibonacci hashing of the gram's 32-bit value onto 2**bits buckets
+    return ((value * _HASH_MULT) & 0xFFFFFFFF) >> shift
+
+
+# ── Building ──
+
+def iter_samples(directory: str) -> Iterator[bytes]:
+    """Yield benign payload samples from every file under *directory*."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.lower().endswith(PCAP_SUFFIXES):
+                try:
+                    for packet in iter_packets(path):
+                        if packet.payload:
+                            yield packet.payload
+                except PcapError:
+                    continue
+                continue
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(SAMPLE_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
+
+
+def build_index(samples: Iterable[bytes], path: str, hash_bits: int = DEFAULT_HASH_BITS) -> dict:
+    """Count the n-grams of *samples* and write the index to *path*.
+
+    Returns ``{"samples", "bytes", "hash_bits"}``.
+    """
+    if not 8 <= hash_bits <= 28:
+        raise ValueError("hash_bits must be between 8 and 28")
+    buckets = 1 << hash_bits
+    shift = 32 - hash_bits
+    uni = array.array("I", bytes(4 * 256))
+    bi = array.array("I", bytes(4 * 65536))
+    tri = array.array("I", bytes(4 * buckets))
+    quad = array.array("I", bytes(4 * buckets))
+    # Per-sample distinct grams are counted in C (Counter.update over a set)
+    # and folded into the tables in batches
+    pending = {2: Counter(), 3: Counter(), 4: Counter()}
+    n_samples = n_bytes = 0
+
+    def flush():
+        for gram, count in pending[2].items():
+            bi[gram[0] << 8 | gram[1]] += count
+        for table, k in ((tri, 3), (quad, 4)):
+            for gram, count in pending[k].items():
+                table[_bucket(int.from_bytes(gram, "little"), shift)] += count
+        for counter in pending.values():
+            counter.clear()
+
+    for sample in samples:
+        sample = bytes(sample).lower()
+        n_samples += 1
+        n_bytes += len(sample)
+        for b in set(sample):
+            uni[b] += 1
+        n = len(sample)
+        for k, counter in pending.items():
+            counter.update({sample[i:i + k] for i in range(n - k + 1)})
+        if len(pending[4]) >= _FLUSH_KEYS:
+            flush()
+    flush()
+
+    if sys.byteorder != "little":
+        for table in (uni, bi, tri, quad):
+            table.byteswap()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, hash_bits, n_samples, n_bytes))
+        for table in (uni, bi, tri, quad):
+            table.tofile(f)
+    os.replace(tmp, path)
+    return {"samples": n_samples, "bytes": n_bytes, "hash_bits": hash_bits}
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Build a benign-traffic n-gram index for content selectivity scoring.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index a directory of benign payload files and pcaps")
+    build.add_argument("corpus", help="directory of benign samples (.pcap/.cap or raw payload files)")
+    build.add_argument("index", help="output index file")
+    build.add_argument("--hash-bits", type=int, default=DEFAULT_HASH_BITS,
+                       help=f"log2 of the 3-/4-gram table size (default: {DEFAULT_HASH_BITS})")
+    args = parser.parse_args(argv)
+
+    stats = build_index(iter_samples(args.corpus), args.index, args.hash_bits)
+    print(f"Indexed {stats['samples']} samples ({stats['bytes']} bytes) into {args.index}.",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,127 +2,606 @@
 SnortForge - Rule Parser
 """
 
+import collections
+import heapq
+import io
+import itertools
+import operator
+import os
 import re
+import sys
 import logging
-from .rule import SnortRule
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from .archive import iter_rule_sources
+from .cache import ParseCache
+from .rule import ContentMatch, SnortRule, decode_content
 
 logger = logging.getLogger(__name__)
 
+# Files smaller than this are parsed serially — the process pool startup
+# cost outweighs the gain on typical uploads.
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+# Upper bound on a single worker chunk so the parent never holds much of the
+# file in memory.
+PARALLEL_MAX_CHUNK_BYTES = 8 * 1024 * 1024
+# Block size used when the input size is unknown (upload streams, archives).
+PARALLEL_BLOCK_BYTES = 1024 * 1024
+
 
 class ParseError(Exception):
     pass
 
 
-def parse_rule(rule_string: str) -> SnortRule:
+SNORT2 = "snort2"
+SNORT3 = "snort3"
+
+# Compiled once at import time — parse_rule runs per line on 100k-rule imports.
+_RULE_RE = re.compile(r'^(\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+)\s*\((.+)\)\s*$')
+# Snort 3 service rules may omit addresses and ports: "alert http (...)"
+_SERVICE_RULE_RE = re.compile(r'^(\S+)\s+(\S+)\s*\((.+)\)\s*$')
+
+# One option token: a run of unquoted non-';' characters, backslash escapes
+# and quoted strings (which may contain ';' and escaped quotes). An
+# unterminated quote swallows the rest of the option string.
+_OPTION_RE = re.compile(r'(?:[^;"\\]+|\\.|"(?:[^"\\]+|\\.)*"?)+', re.DOTALL)
+
+# Snort 3 content with inline modifiers: content:"abc", depth 4, nocase
+_SNORT3_CONTENT_RE = re.compile(r'^(!?)\s*"((?:[^"\\]|\\.)*)"\s*(?:,(.*))?$', re.DOTALL)
+
+# Option keywords that only exist in Snort 3
+_SNORT3_KEYWORDS = frozenset({
+    "service", "rem", "bufferlen", "regex", "md5", "sha256", "sha512", "ber_data", "ber_skip",
+    "js_data", "vba_data", "http_param", "http_true_ip", "http_version", "http_trailer",
+    "http_raw_body", "http_raw_request", "http_raw_status", "http_raw_trailer",
+    "http_num_headers", "http_num_trailers", "http_num_cookies", "http_max_header_line",
+    "http_max_trailer_line", "http_version_match", "http_header_test", "http_trailer_test",
+})
+
+
+def parse_rule(rule_string: str, dialect: str = None) -> SnortRule:
+    """Parse one rule line.
+
+    *dialect* is ``SNORT2`` or ``SNORT3``; by default it is detected per rule
+    from Snort 3-only syntax (dotted sticky buffers, ``depth 4`` style
+    modifiers, inline content modifiers, Snort 3-only keywords such as
+    ``service`` or ``js_data``, a buffer keyword before the first content,
+    service headers).
+    """
     rule_string = rule_string.strip()
     if not rule_string or rule_string.startswith("#"):
         raise ParseError("Empty or commented rule.")
 
-    match = re.match(r'^(\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+)\s*\((.+)\)\s*$', rule_string)
-    if not match:
-        raise ParseError("Could not parse rule structure.")
-
-    header_parts = match.group(1).split()
-    if len(header_parts) != 7:
-        raise ParseError(f"Expected 7 header fields, got {len(header_parts)}.")
-
     rule = SnortRule()
-    rule.action, rule.protocol = header_parts[0], header_parts[1]
-    rule.src_ip, rule.src_port = header_parts[2], header_parts[3]
-    rule.direction = header_parts[4]
-    rule.dst_ip, rule.dst_port = header_parts[5], header_parts[6]
+    match = _RULE_RE.match(rule_string)
+    if match:
+        header_parts = list(map(sys.intern, match.group(1).split()))
+        if len(header_parts) != 7:
+            raise ParseError(f"Expected 7 header fields, got {len(header_parts)}.")
+        rule.action, rule.protocol = header_parts[0], header_parts[1]
+        rule.src_ip, rule.src_port = header_parts[2], header_parts[3]
+        rule.direction = header_parts[4]
+        rule.dst_ip, rule.dst_port = header_parts[5], header_parts[6]
+        options_str = match.group(2)
+    else:
+        match = _SERVICE_RULE_RE.match(rule_string)
+        if not match or dialect == SNORT2:
+            raise ParseError("Could not parse rule structure.")
+        rule.action, rule.protocol = sys.intern(match.group(1)), sys.intern(match.group(2))
+        options_str = match.group(3)
+        dialect = SNORT3
 
-    _parse_options(match.group(2), rule)
+    _parse_options(options_str, rule, dialect)
     return rule
 
 
-def _parse_options(options_str, rule):
-    tokens = _tokenize_options(options_str)
-    for opt in tokens:
-        opt = opt.strip()
-        if not opt:
+def unsupported_options(rule_string: str, dialect: str = None) -> List[str]:
+    """Keywords of the options in *rule_string* that :func:`parse_rule` drops.
+
+    The rule model has no place for them (``flowbits``, ``byte_test``,
+    ``dsize``, ...), so a rule rebuilt from the parsed form would silently
+    lose them. Returns an empty list for lines that are not rules.
+    """
+    rule_string = rule_string.strip()
+    match = _RULE_RE.match(rule_string)
+    if match:
+        options_str = match.group(2)
+    else:
+        match = _SERVICE_RULE_RE.match(rule_string)
+        if not match or dialect == SNORT2:
+            return []
+        options_str, dialect = match.group(3), SNORT3
+    options, snort3 = _split_options(options_str, dialect)
+    if snort3 and dialect != SNORT2:
+        unknown = (key for key, _ in options
+                   if key not in _SNORT3_OPTION_HANDLERS and not _is_sticky_buffer(key))
+    else:
+        unknown = (key for key, _ in options if key not in _OPTION_HANDLERS)
+    return list(dict.fromkeys(unknown))
+
+
+def _parse_options(options_str, rule, dialect=None):
+    options, snort3 = _split_options(options_str, dialect)
+    if snort3 and dialect != SNORT2:
+        _apply_snort3_options(options, rule)
+        return
+    for key, value in options:
+        handler = _OPTION_HANDLERS.get(key)
+        if handler is not None:
+            handler(rule, _unquote(value.strip()))
+
+
+def _split_options(options_str, dialect=None):
+    """Return ``([(key, value), ...], snort3)`` for an option string."""
+    options = []
+    snort3 = dialect == SNORT3
+    seen_content = False
+    for opt in _tokenize_options(options_str):
+        key, colon, value = opt.partition(":")
+        key = key.strip()
+        if not colon:
+            # Snort 3 sticky buffers are dotted ("http.uri") and positional
+            # modifiers are space-separated ("depth 4")
+            key, _, value = key.partition(" ")
+            if value or "." in key or (key in _BUFFER_KEYWORDS and not seen_content):
+                snort3 = True
+        elif key == "content":
+            seen_content = True
+            # Inline modifiers after the closing quote: content:"abc", nocase
+            match = _SNORT3_CONTENT_RE.match(value.strip())
+            if match and match.group(3) is not None:
+                snort3 = True
+        if key in _SNORT3_KEYWORDS:
+            snort3 = True
+        if key:
+            options.append((key, value))
+    return options, snort3
+
+
+def _apply_snort3_options(options, rule):
+    """Apply Snort 3 options, tracking the active sticky buffer for contents.
+
+    Buffers with a ContentMatch flag set it; any other sticky buffer
+    (``http.method``, ``file_data``, ``http_header:field user-agent``, ...)
+    is kept by name in ``ContentMatch.buffer``. ``pkt_data`` resets it.
+    """
+    flag = buffer = None
+    for key, value in options:
+        value = value.strip()
+        if _is_sticky_buffer(key):
+            name = key.replace(".", "_")
+            if value:
+                # Buffers with arguments (a single header field, ...) stay opaque
+                flag, buffer = None, sys.intern(f"{name}:{value}")
+            elif key in _SNORT3_BUFFERS:
+                flag, buffer = _SNORT3_BUFFERS[key], None
+            else:
+                flag, buffer = None, sys.intern(name)
             continue
-        if ":" in opt:
-            key, _, value = opt.partition(":")
-            key, value = key.strip(), value.strip()
-        else:
-            key, value = opt.strip(), ""
-        _apply_option(key, value, rule)
+        handler = _SNORT3_OPTION_HANDLERS.get(key)
+        if handler is None:
+            continue
+        handler(rule, value if key == "content" else _unquote(value))
+        if key == "content" and rule.contents:
+            if flag:
+                setattr(rule.contents[-1], flag, True)
+            elif buffer:
+                rule.contents[-1].buffer = buffer
+
+
+def _is_sticky_buffer(key):
+    return ((key in _SNORT3_BUFFERS or key.startswith(("http.", "http_")) or key.endswith("_data")
+             or key in ("sip_header", "sip_body"))
+            and key not in _SNORT3_OPTION_HANDLERS and key not in _SNORT3_HTTP_OPTIONS)
 
 
 def _tokenize_options(options_str):
-    tokens, current, in_quotes = [], [], False
-    for char in options_str:
-        if char == '"' and (not current or current[-1] != '\\'):
-            in_quotes = not in_quotes
-            current.append(char)
-        elif char == ';' and not in_quotes:
-            tokens.append(''.join(current))
-            current = []
-        else:
-            current.append(char)
-    if current:
-        tokens.append(''.join(current))
-    return tokens
-
-
-def _apply_option(key, value, rule):
-    value = value.strip('"').strip("'")
-    mapping = {
-        "msg": ("msg", str), "sid": ("sid", int), "rev": ("rev", int),
-        "classtype": ("classtype", str), "priority": ("priority", int),
-        "content": None, "pcre": ("pcre", str), "flow": ("flow", str),
-        "depth": ("depth", int), "offset": ("offset", int),
-        "distance": ("distance", int), "within": ("within", int),
-        "reference": ("reference", str), "metadata": ("metadata", str),
-        "nocase": None, "threshold": None,
-    }
-
-    if key == "content":
-        if value.startswith("!"):
-            rule.content_negated = True
-            rule.content = value[1:].strip('"')
-        else:
-            rule.content = value
-    elif key == "nocase":
-        rule.content_nocase = True
-    elif key == "threshold":
-        for part in value.split(","):
-            kv = part.strip().split()
-            if len(kv) == 2:
-                k, v = kv
-                if k == "type": rule.threshold_type = v
-                elif k == "track": rule.threshold_track = v
-                elif k == "count":
-                    try: rule.threshold_count = int(v)
-                    except (ValueError, TypeError): pass
-                elif k == "seconds":
-                    try: rule.threshold_seconds = int(v)
-                    except (ValueError, TypeError): pass
-    elif key in mapping and mapping[key]:
-        attr, typ = mapping[key]
+    """Split an option string on unquoted ';' in a single regex pass."""
+    return _OPTION_RE.findall(options_str)
+
+
+def _unquote(value):
+    """Remove one pair of enclosing quotes, leaving quotes inside the value intact."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+# ── Option handlers ──
+
+def _setter(attr, typ):
+    def apply(rule, value):
         try:
             setattr(rule, attr, typ(value))
         except (ValueError, TypeError):
             pass
+    return apply
+
+
+def _opt_content(rule, value):
+    cm = ContentMatch()
+    if value.startswith("!"):
+        cm.negated = True
+        value = _unquote(value[1:].strip())
+    cm.content = value
+    rule.contents.append(cm)
+
+
+def _opt_uricontent(rule, value):
+    _opt_content(rule, value)
+    rule.contents[-1].http_uri = True
+
+
+def _content_modifier(attr, typ):
+    """Handler for a modifier that applies to the most recent content."""
+    def apply(rule, value):
+        if not rule.contents:
+            return
+        try:
+            setattr(rule.contents[-1], attr, typ(value) if typ else True)
+        except (ValueError, TypeError):
+            pass
+    return apply
+
+
+def _content_buffer(name):
+    """Handler for a Snort 2 buffer modifier without its own ContentMatch flag."""
+    def apply(rule, value):
+        if rule.contents:
+            rule.contents[-1].buffer = name
+    return apply
+
+
+def _content_extra(key):
+    """Handler for a content modifier kept verbatim in ``ContentMatch.modifiers``."""
+    def apply(rule, value):
+        if not rule.contents:
+            return
+        cm = rule.contents[-1]
+        text = f"{key}:{value}" if value else key
+        cm.modifiers = f"{cm.modifiers}; {text}" if cm.modifiers else text
+    return apply
+
+
+def _fast_pattern_bound(name):
+    """Handler for Snort 3 ``fast_pattern_offset``/``fast_pattern_length``.
+
+    Both are folded into Snort 2's ``fast_pattern:<offset>,<length>`` so the
+    modifiers stay in one dialect; the length defaults to the rest of the
+    content after the offset.
+    """
+    def apply(rule, value):
+        if not rule.contents:
+            return
+        try:
+            number = int(value)
+            total = len(decode_content(rule.contents[-1].content))
+        except ValueError:
+            return
+        cm = rule.contents[-1]
+        mods = [m.strip() for m in cm.modifiers.split(";") if m.strip()]
+        pos = next((i for i, m in enumerate(mods) if m.partition(":")[0].strip() == "fast_pattern"), None)
+        if pos is None:
+            mods.append("fast_pattern")
+            pos = len(mods) - 1
+        start, _, length = mods[pos].partition(":")[2].partition(",")
+        start = int(start) if length else 0
+        length = int(length) if length else total - start
+        if name == "fast_pattern_offset":
+            if length == total - start:
+                length = total - number
+            start = number
+        else:
+            length = number
+        mods[pos] = f"fast_pattern:{start},{length}"
+        cm.modifiers = "; ".join(mods)
+    return apply
+
+
+def _opt_reference(rule, value):
+    if value:
+        rule.references.append(value)
 
 
-def parse_rules_file(filepath):
+def _opt_content_snort3(rule, value):
+    match = _SNORT3_CONTENT_RE.match(value)
+    if not match:
+        _opt_content(rule, _unquote(value))
+        return
+    negated, content, modifiers = match.groups()
+    _opt_content(rule, content)
+    if negated:
+        rule.contents[-1].negated = True
+    for mod in (modifiers or "").split(","):
+        key, _, arg = mod.strip().partition(" ")
+        handler = _SNORT3_OPTION_HANDLERS.get(key)
+        if handler is not None and key != "content":
+            handler(rule, arg.strip())
+
+
+def _opt_detection_filter(rule, value):
+    # Snort 3 replaces threshold with detection_filter; SnortForge models it
+    # as a threshold of type "threshold" so it round-trips through build_snort3
+    _opt_threshold(rule, value)
+    rule.threshold_type = "threshold"
+
+
+def _opt_threshold(rule, value):
+    for part in value.split(","):
+        kv = part.strip().split()
+        if len(kv) == 2:
+            k, v = kv
+            if k == "type": rule.threshold_type = sys.intern(v)
+            elif k == "track": rule.threshold_track = sys.intern(v)
+            elif k == "count":
+                try: rule.threshold_count = int(v)
+                except (ValueError, TypeError): pass
+            elif k == "seconds":
+                try: rule.threshold_seconds = int(v)
+                except (ValueError, TypeError): pass
+
+
+_OPTION_HANDLERS = {
+    "msg": _setter("msg", str), "sid": _setter("sid", int), "rev": _setter("rev", int),
+    "classtype": _setter("classtype", sys.intern), "priority": _setter("priority", int),
+    "content": _opt_content, "uricontent": _opt_uricontent, "pcre": _setter("pcre", str), "flow": _setter("flow", sys.intern),
+    "depth": _content_modifier("depth", int), "offset": _content_modifier("offset", int),
+    "distance": _content_modifier("distance", int), "within": _content_modifier("within", int),
+    "nocase": _content_modifier("nocase", None),
+    "http_uri": _content_modifier("http_uri", None),
+    "http_header": _content_modifier("http_header", None),
+    "reference": _opt_reference, "metadata": _setter("metadata", str),
+    "threshold": _opt_threshold, "detection_filter": _opt_detection_filter,
+    "fast_pattern": _content_extra("fast_pattern"), "rawbytes": _content_extra("rawbytes"),
+}
+# Snort 2 buffer modifiers, kept as the equivalent Snort 3 sticky buffer
+_SNORT2_BUFFER_MODIFIERS = (
+    "http_method", "http_client_body", "http_cookie", "http_raw_cookie", "http_raw_uri",
+    "http_raw_header", "http_stat_code", "http_stat_msg",
+)
+_OPTION_HANDLERS.update((key, _content_buffer(key)) for key in _SNORT2_BUFFER_MODIFIERS)
+# Buffer modifiers that follow a content in Snort 2 but are sticky buffers
+# in Snort 3; one that comes before any content is Snort 3
+_BUFFER_KEYWORDS = frozenset(("http_uri", "http_header") + _SNORT2_BUFFER_MODIFIERS)
+
+# Snort 3 sticky buffers that map onto ContentMatch flags
+_SNORT3_BUFFERS = {
+    "http.uri": "http_uri", "http_uri": "http_uri",
+    "http.header": "http_header", "http_header": "http_header",
+    "pkt_data": None,
+}
+# Snort 3 http_* keywords that test a value instead of selecting a buffer
+_SNORT3_HTTP_OPTIONS = frozenset({
+    "http_num_headers", "http_num_trailers", "http_num_cookies", "http_max_header_line",
+    "http_max_trailer_line", "http_version_match", "http_header_test", "http_trailer_test",
+    "http_encode",
+})
+_SNORT3_OPTION_HANDLERS = {
+    key: handler for key, handler in _OPTION_HANDLERS.items()
+    if key not in ("http_uri", "http_header", "rawbytes", "uricontent")
+    and key not in _SNORT2_BUFFER_MODIFIERS
+}
+_SNORT3_OPTION_HANDLERS.update({
+    "content": _opt_content_snort3,
+    "fast_pattern_offset": _fast_pattern_bound("fast_pattern_offset"),
+    "fast_pattern_length": _fast_pattern_bound("fast_pattern_length"),
+})
+
+
+def iter_rules(fileobj, start=1, cache=None, stats=None):
+    """Yield ``(line_num, SnortRule | str)`` for each rule line in *fileobj*.
+
+    Blank lines and comments are skipped. Lines that fail to parse yield a
+    client-safe error message instead of a rule, so only one rule is held in
+    memory at a time regardless of the size of the ruleset. Accepts text or
+    binary file objects; bytes are decoded as UTF-8 with replacement.
+    ``start`` is the line number of the first line read from *fileobj*.
+
+    With a :class:`ParseCache`, only cache misses are actually parsed; hit
+    and miss counts are added to the optional *stats* dict.
+    """
+    for line_num, line in _iter_rule_lines(fileobj, start):
+        yield line_num, _parse_line(line_num, line, cache, stats)
+
+
+def _iter_rule_lines(fileobj, start=1):
+    """Yield ``(line_num, line)`` for the stripped, non-comment lines of *fileobj*."""
+    for line_num, line in enumerate(fileobj, start):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line_num, line
+
+
+def _parse_line(line_num, line, cache=None, stats=None):
+    try:
+        if cache is None:
+            return parse_rule(line)
+        return _parse_cached(line, cache, stats)
+    except ParseError as e:
+        # Log the detailed parse error server-side, but return a generic message to the client
+        logger.warning("Parse error on line %d: %s", line_num, str(e))
+        return f"Line {line_num}: Invalid rule syntax."
+    except Exception:
+        # Log detailed exception server-side, but return a generic message to the client
+        logger.exception("Unexpected error while parsing rule on line %d", line_num)
+        return f"Line {line_num}: Internal parsing error."
+
+
+def _parse_cached(line, cache, stats):
+    key = cache.key(line)
+    cached = cache.get(key)
+    if cached is not None:
+        _count(stats, "cache_hits")
+        if isinstance(cached, str):
+            raise ParseError(cached)
+        return cached
+    _count(stats, "cache_misses")
+    try:
+        rule = parse_rule(line)
+    except ParseError as e:
+        cache.put(key, str(e))
+        raise
+    cache.put(key, rule)
+    return rule.copy()
+
+
+def _count(stats, name, n=1):
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + n
+
+
+def parse_rules_file(filepath, cache=None, stats=None):
     rules, errors = [], []
     with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-                # Controlled, user-friendly parse error message
-            try:
-                rules.append(parse_rule(line))
-            except ParseError as e:
-                # Log the detailed parse error server-side, but return a generic message to the client
-                logger.warning("Parse error on line %d: %s", line_num, str(e))
-                errors.append(f"Line {line_num}: Invalid rule syntax.")
-            except Exception:
-                # Log detailed exception server-side, but return a generic message to the client
-                logger.exception("Unexpected error while parsing rule on line %d", line_num)
-                errors.append(f"Line {line_num}: Internal parsing error.")
+        for _, item in iter_rules(f, cache=cache, stats=stats):
+            if isinstance(item, SnortRule):
+                rules.append(item)
+            else:
+                errors.append(item)
     return rules, errors
+
+
+def iter_rules_parallel(filepath, workers=None, cache=None, stats=None):
+    """Like :func:`iter_rules` over *filepath*, parsed across processes.
+
+    The file is split into byte ranges on line boundaries and each range is
+    parsed in a ``ProcessPoolExecutor``. Results are yielded in file order
+    with their original line numbers. Files below ``PARALLEL_MIN_BYTES`` (or
+    ``workers`` <= 1) are parsed serially in-process.
+
+    With a *cache*, each block's lines are looked up in-process, since a hit
+    costs only a hash lookup; only the misses are sent to the workers, and
+    their results are merged back into the cache.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filepath)
+    if workers <= 1 or size < PARALLEL_MIN_BYTES:
+        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+            yield from iter_rules(f, cache=cache, stats=stats)
+        return
+
+    chunk_size = min(max(size // (workers * 4), 1), PARALLEL_MAX_CHUNK_BYTES)
+    with open(filepath, 'rb') as f:
+        jobs = ((None, data, first_line) for data, first_line in _iter_blocks(f, chunk_size))
+        for _, line_num, item in _iter_pool(jobs, workers, cache, stats):
+            yield line_num, item
+
+
+def parse_rules_file_parallel(filepath, workers=None, cache=None, stats=None):
+    rules, errors = [], []
+    for _, item in iter_rules_parallel(filepath, workers, cache, stats):
+        if isinstance(item, SnortRule):
+            rules.append(item)
+        else:
+            errors.append(item)
+    return rules, errors
+
+
+def iter_rules_stream(stream, filename="", workers=None, cache=None, stats=None):
+    """Yield ``(source_name, line_num, SnortRule | str)`` from an upload stream.
+
+    *stream* may be a plain rules file or a compressed rule pack (see
+    :func:`iter_rule_sources`); members are decompressed on the fly and
+    nothing is written to disk. Rule files are cut into line-aligned blocks
+    that are parsed concurrently, one process per block, and results come
+    back in source order. A single small block is parsed in-process instead.
+    With a *cache*, only the lines of a block that miss it go to a worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for name, f in iter_rule_sources(stream, filename):
+            for line_num, item in iter_rules(f, cache=cache, stats=stats):
+                yield name, line_num, item
+        return
+
+    jobs = (
+        (name, data, first_line)
+        for name, f in iter_rule_sources(stream, filename)
+        for data, first_line in _iter_blocks(f, PARALLEL_BLOCK_BYTES)
+    )
+    first = next(jobs, None)
+    if first is None:
+        return
+    second = next(jobs, None)
+    if second is None and len(first[1]) < PARALLEL_MIN_BYTES:
+        name, data, first_line = first
+        for line_num, item in iter_rules(io.BytesIO(data), first_line, cache, stats):
+            yield name, line_num, item
+        return
+
+    jobs = itertools.chain([first] if second is None else [first, second], jobs)
+    yield from _iter_pool(jobs, workers, cache, stats)
+
+
+def _iter_blocks(fileobj, block_size):
+    """Yield ``(data, first_line)`` blocks of about *block_size* bytes ending on a line break."""
+    first_line = 1
+    while True:
+        data = fileobj.read(block_size)
+        if not data:
+            return
+        if not data.endswith(b"\n"):
+            data += fileobj.readline()
+        yield data, first_line
+        first_line += data.count(b"\n")
+
+
+def _iter_pool(jobs, workers, cache, stats):
+    """Parse ``(tag, data, first_line)`` jobs in a process pool, in order.
+
+    At most ``2 * workers`` blocks are in flight so memory stays bounded by
+    the block size rather than the input size. With a *cache*, a block's
+    cached lines are resolved here and only its misses are submitted; a
+    fully cached block never leaves the parent.
+    """
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for tag, data, first_line in jobs:
+            if cache is None:
+                pending.append((tag, [], pool.submit(_parse_block, data, first_line)))
+            else:
+                hits, misses = _lookup_block(data, first_line, cache, stats)
+                future = pool.submit(_parse_lines, misses) if misses else None
+                pending.append((tag, hits, future))
+            if len(pending) > workers * 2:
+                yield from _collect(*pending.popleft(), cache, stats)
+        while pending:
+            yield from _collect(*pending.popleft(), cache, stats)
+
+
+def _lookup_block(data, first_line, cache, stats):
+    """Split a block into cached ``(line_num, item)`` results and ``(line_num, line)`` misses."""
+    hits, misses = [], []
+    for line_num, line in _iter_rule_lines(io.BytesIO(data), first_line):
+        if cache.key(line) in cache:
+            hits.append((line_num, _parse_line(line_num, line, cache, stats)))
+        else:
+            misses.append((line_num, line))
+    return hits, misses
+
+
+def _collect(tag, hits, future, cache, stats):
+    results = []
+    if future is not None:
+        results, entries, block_stats = future.result()
+        if cache is not None:
+            cache.update(entries)
+            for name, n in block_stats.items():
+                _count(stats, name, n)
+    if hits:
+        results = heapq.merge(hits, results, key=operator.itemgetter(0))
+    for line_num, item in results:
+        yield tag, line_num, item
+
+
+def _parse_block(data, first_line):
+    return list(iter_rules(io.BytesIO(data), start=first_line)), [], {}
+
+
+def _parse_lines(lines):
+    # Fill a block-local cache; the parent merges its entries into the shared one
+    cache, stats = ParseCache(max_size=None), {}
+    results = [(line_num, _parse_line(line_num, line, cache, stats)) for line_num, line in lines]
+    return results, cache.items(), stats
@@ -0,0 +1,191 @@
+"""
+SnortForge - Classic pcap Reader
+
+Reads libpcap (``.pcap``) capture files through a memory map and decodes
+each frame down to its transport payload:
+
+  - Link types: Ethernet (with 802.1Q/802.1ad tags), raw IP, BSD
+    loopback and Linux cooked capture (SLL)
+  - IPv4 (non-first fragments are skipped) and IPv6 (extension headers
+    are walked)
+  - TCP, UDP, ICMP and ICMPv6
+
+Frames that cannot be decoded (ARP, truncated headers, other link types)
+are skipped. A capture cut short in the middle of a record raises
+:class:`PcapError` after its complete records. pcapng files are not
+supported.
+"""
+
+import mmap
+import struct
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from .rule import _SLOTS
+
+
+class PcapError(ValueError):
+    """The file is not a classic pcap capture, or is cut short."""
+
+
+# Magic number -> (byte order, timestamp units per second)
+_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1_000_000),
+    b"\xa1\xb2\xc3\xd4": (">", 1_000_000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1_000_000_000),
+    b"\xa1\xb2\x3c\x4d": (">", 1_000_000_000),
+}
+_GLOBAL_HEADER_LEN = 24
+_RECORD_HEADER_LEN = 16
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+# Some platforms write raw IP as DLT_RAW (12 or 14) instead of 101
+_RAW_LINKTYPES = frozenset({LINKTYPE_RAW, 12, 14})
+
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+_IPV6_EXTENSIONS = frozenset({0, 43, 44, 60})
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+_U16 = struct.Struct("!H")
+_TCP = struct.Struct("!HHIIBB")
+_UDP = struct.Struct("!HH")
+
+
+@dataclass(**_SLOTS)
+class Packet:
+    """One decoded packet. Addresses are packed (4 or 16 bytes)."""
+    ts: float
+    proto: int
+    src: bytes
+    dst: bytes
+    sport: int
+    dport: int
+    payload: bytes
+    seq: int = 0
+    flags: int = 0
+
+
+def iter_frames(path: str) -> Iterator[tuple]:
+    """Yield ``(timestamp, linktype, frame bytes)`` for every record of a pcap file.
+
+    Raises :class:`PcapError` after the last complete record if the file
+    ends inside a record.
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fmt = _MAGIC.get(mm[:4])
+            if fmt is None or len(mm) < _GLOBAL_HEADER_LEN:
+                raise PcapError(f"{path}: not a classic pcap file")
+            order, units = fmt
+            linktype = struct.unpack_from(order + "I", mm, 20)[0] & 0x0FFFFFFF
+            record = struct.Struct(order + "IIII")
+            pos, end = _GLOBAL_HEADER_LEN, len(mm)
+            while pos < end:
+                if pos + _RECORD_HEADER_LEN > end:
+                    raise PcapError(f"{path}: capture cut short in a record header at byte {pos}")
+                sec, frac, incl_len, _ = record.unpack_from(mm, pos)
+                if pos + _RECORD_HEADER_LEN + incl_len > end:
+                    raise PcapError(f"{path}: capture cut short in a record at byte {pos}")
+                pos += _RECORD_HEADER_LEN
+                yield sec + frac / units, linktype, mm[pos:pos + incl_len]
+                pos += incl_len
+
+
+def iter_packets(path: str) -> Iterator[Packet]:
+    """Yield the decodable IP packets of a pcap file, in capture order."""
+    for ts, linktype, frame in iter_frames(path):
+        packet = decode_frame(linktype, frame, ts)
+        if packet is not None:
+            yield packet
+
+
+def decode_frame(linktype: int, frame: bytes, ts: float = 0.0) -> Optional[Packet]:
+    """Decode one link-layer frame, or return ``None`` if it is not IP traffic."""
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype, pos = _U16.unpack_from(frame, 12)[0], 14
+        while ethertype in (0x8100, 0x88A8) and len(frame) >= pos + 4:
+            ethertype, pos = _U16.unpack_from(frame, pos + 2)[0], pos + 4
+    elif linktype in _RAW_LINKTYPES:
+        if not frame:
+            return None
+        ethertype, pos = (0x0800 if frame[0] >> 4 == 4 else 0x86DD), 0
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return None
+        ethertype, pos = _U16.unpack_from(frame, 14)[0], 16
+    elif linktype == LINKTYPE_NULL:
+        if len(frame) < 4:
+            return None
+        # Address family in host byte order: 2 is IPv4, 24/28/30 are IPv6
+        family = frame[0] or frame[3]
+        ethertype, pos = (0x0800 if family == 2 else 0x86DD), 4
+    else:
+        return None
+
+    if ethertype == 0x0800:
+        return _decode_ipv4(frame, pos, ts)
+    if ethertype == 0x86DD:
+        return _decode_ipv6(frame, pos, ts)
+    return None
+
+
+def _decode_ipv4(frame, pos, ts):
+    if len(frame) < pos + 20:
+        return None
+    ihl = (frame[pos] & 0x0F) * 4
+    total = _U16.unpack_from(frame, pos + 2)[0]
+    if _U16.unpack_from(frame, pos + 6)[0] & 0x1FFF:
+        return None  # non-first fragment, no transport header
+    end = min(len(frame), pos + total) if total else len(frame)
+    return _decode_transport(
+        frame[pos + 9], frame[pos + 12:pos + 16], frame[pos + 16:pos + 20],
+        frame, pos + ihl, end, ts,
+    )
+
+
+def _decode_ipv6(frame, pos, ts):
+    if len(frame) < pos + 40:
+        return None
+    length = _U16.unpack_from(frame, pos + 4)[0]
+    proto = frame[pos + 6]
+    src, dst = frame[pos + 8:pos + 24], frame[pos + 24:pos + 40]
+    end = min(len(frame), pos + 40 + length) if length else len(frame)
+    pos += 40
+    while proto in _IPV6_EXTENSIONS and pos + 8 <= end:
+        if proto == 44 and _U16.unpack_from(frame, pos + 2)[0] & 0xFFF8:
+            return None  # non-first fragment
+        proto, pos = frame[pos], pos + (8 if proto == 44 else (frame[pos + 1] + 1) * 8)
+    return _decode_transport(proto, src, dst, frame, pos, end, ts)
+
+
+def _decode_transport(proto, src, dst, frame, pos, end, ts):
+    if proto == IPPROTO_TCP:
+        if end < pos + 20:
+            return None
+        sport, dport, seq, _, offset, flags = _TCP.unpack_from(frame, pos)
+        return Packet(ts, proto, src, dst, sport, dport,
+                      bytes(frame[pos + (offset >> 4) * 4:end]), seq, flags)
+    if proto == IPPROTO_UDP:
+        if end < pos + 8:
+            return None
+        sport, dport = _UDP.unpack_from(frame, pos)
+        return Packet(ts, proto, src, dst, sport, dport, bytes(frame[pos + 8:end]))
+    if proto in (IPPROTO_ICMP, IPPROTO_ICMPV6):
+        if end < pos + 8:
+            return None
+        return Packet(ts, proto, src, dst, 0, 0, bytes(frame[pos + 8:end]))
+    return None
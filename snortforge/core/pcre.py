@@ -0,0 +1,702 @@
+"""
+SnortForge - PCRE Cost Analyzer
+
+Estimates how expensive a rule's ``pcre`` option is to evaluate, in two
+stages:
+
+  1. Static analysis. The pattern body is parsed into an AST with Python's
+     own regex parser (PCRE and Python share a backtracking model and most
+     syntax). The AST is checked for nested quantifiers (``(a+)+``),
+     ambiguous alternation inside a repeat (``(a|ab)*``), adjacent
+     quantifiers over overlapping characters (``\\d+\\d*``) and unanchored
+     leading wildcards (``/.*foo/``).
+  2. Measurement. Adversarial inputs are generated from the AST (pumped
+     repeats followed by a character that forces the match to fail) and
+     run in a sandbox of worker processes. A worker that exceeds the time
+     limit is killed and replaced, so a catastrophic pattern can never hang
+     the web worker.
+
+Both stages produce a cost class: ``low``, ``moderate``, ``high`` or
+``catastrophic``; the overall class is the higher of the two, since a
+fast measurement does not make a structurally dangerous pattern safe.
+Results are memoized per pattern. A measurement that times out is
+repeated once before the pattern is called catastrophic (the machine may
+just have been busy), and one that fails is not memoized.
+
+Scoring, validation and the rule engine use static analysis only, which
+is fast and deterministic; measurement runs when asked for explicitly
+(``POST /api/pcre/cost``).
+
+Set ``SNORTFORGE_PCRE_SANDBOX=0`` to disable measurement (static analysis
+only) and ``SNORTFORGE_PCRE_TIMEOUT`` to change the per-pattern time limit
+in seconds (default 1.0).
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+from typing import List, Optional, Tuple
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+from .cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+COST_CLASSES = ("low", "moderate", "high", "catastrophic")
+
+# Measured cost thresholds (slowest single search, in seconds)
+MODERATE_SECONDS = 0.001
+HIGH_SECONDS = 0.01
+
+SANDBOX_ENABLED = os.getenv("SNORTFORGE_PCRE_SANDBOX", "1").lower() not in ("0", "false", "no", "off")
+SANDBOX_TIMEOUT = float(os.getenv("SNORTFORGE_PCRE_TIMEOUT", "1.0"))
+SANDBOX_WORKERS = 2
+
+# Pump counts for adversarial inputs, smallest first; inputs are capped at
+# MAX_INPUT_CHARS so nested repeats don't explode the input size.
+PUMP_COUNTS = (4, 8, 16, 24, 32, 64, 256, 1024, 4096)
+MAX_INPUT_CHARS = 20000
+# A character no sample produces, appended to force a failing match
+_FAIL_CHAR = "\x00"
+
+# Snort pcre modifiers with a Python equivalent; Snort-only ones (R, U, P,
+# H, B, O, ...) select buffers or matching positions and are ignored here.
+_FLAG_MAP = {"i": re.IGNORECASE, "s": re.DOTALL, "m": re.MULTILINE, "x": re.VERBOSE}
+
+_PCRE_RE = re.compile(r'^(!?)/(.*)/([A-Za-z]*)$', re.DOTALL)
+# PCRE named groups (?<name>...) are spelled (?P<name>...) in Python
+_NAMED_GROUP_RE = re.compile(r'\(\?<(?![=!])')
+
+_LITERAL = _sre_parse.LITERAL
+_NOT_LITERAL = _sre_parse.NOT_LITERAL
+_ANY = _sre_parse.ANY
+_IN = _sre_parse.IN
+_BRANCH = _sre_parse.BRANCH
+_SUBPATTERN = _sre_parse.SUBPATTERN
+_AT = _sre_parse.AT
+_MAXREPEAT = _sre_parse.MAXREPEAT
+_REPEATS = {_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT}
+_POSSESSIVE = getattr(_sre_parse, "POSSESSIVE_REPEAT", None)
+_ATOMIC = getattr(_sre_parse, "ATOMIC_GROUP", None)
+_ASSERTS = {_sre_parse.ASSERT, _sre_parse.ASSERT_NOT}
+_AT_START = {_sre_parse.AT_BEGINNING, _sre_parse.AT_BEGINNING_STRING}
+
+# Character sets are bitmasks over Latin-1; bit 256 stands for "anything else"
+_ALL = (1 << 257) - 1
+_OTHER = 1 << 256
+
+
+def _mask(chars) -> int:
+    m = 0
+    for c in chars:
+        m |= 1 << c
+    return m
+
+
+_CATEGORY_MASKS = {
+    _sre_parse.CATEGORY_DIGIT: _mask(range(48, 58)),
+    _sre_parse.CATEGORY_SPACE: _mask(b" \t\n\r\f\v"),
+    _sre_parse.CATEGORY_WORD: _mask(c for c in range(256) if chr(c).isalnum() or c == 95) | _OTHER,
+}
+_CATEGORY_MASKS[_sre_parse.CATEGORY_NOT_DIGIT] = _ALL & ~_CATEGORY_MASKS[_sre_parse.CATEGORY_DIGIT]
+_CATEGORY_MASKS[_sre_parse.CATEGORY_NOT_SPACE] = _ALL & ~_CATEGORY_MASKS[_sre_parse.CATEGORY_SPACE]
+_CATEGORY_MASKS[_sre_parse.CATEGORY_NOT_WORD] = (_ALL & ~_CATEGORY_MASKS[_sre_parse.CATEGORY_WORD]) | _OTHER
+
+# Sets this wide count as a "wildcard" for the leading-wildcard check
+_WILDCARD_BITS = 128
+
+
+def split_pcre(pcre: str) -> Optional[Tuple[str, str, bool]]:
+    """Split a Snort ``pcre`` value into ``(body, modifiers, negated)``.
+
+    The body is returned in Python ``re`` syntax.
+    """
+    m = _PCRE_RE.match(pcre.strip())
+    if not m:
+        return None
+    return _NAMED_GROUP_RE.sub("(?P<", m.group(2)), m.group(3), m.group(1) == "!"
+
+
+def python_flags(modifiers: str) -> int:
+    flags = 0
+    for c in modifiers:
+        flags |= _FLAG_MAP.get(c, 0)
+    return flags
+
+
+# ── Static analysis ──
+
+class _Analyzer:
+    def __init__(self, flags: int):
+        self.ignorecase = bool(flags & re.IGNORECASE)
+        self.dotall = bool(flags & re.DOTALL)
+        self.findings = []
+
+    def add(self, kind: str, detail: str):
+        finding = {"kind": kind, "detail": detail}
+        if finding not in self.findings:
+            self.findings.append(finding)
+
+    # Character sets
+
+    def _literal_mask(self, code: int) -> int:
+        if code > 255:
+            return _OTHER
+        m = 1 << code
+        if self.ignorecase:
+            for c in (chr(code).lower(), chr(code).upper()):
+                if ord(c) < 256:
+                    m |= 1 << ord(c)
+        return m
+
+    def charset(self, op, av) -> int:
+        """Characters a single-character node can match."""
+        if op is _LITERAL:
+            return self._literal_mask(av)
+        if op is _NOT_LITERAL:
+            return _ALL & ~self._literal_mask(av)
+        if op is _ANY:
+            return _ALL if self.dotall else _ALL & ~(1 << 10)
+        if op is _IN:
+            m, negate = 0, False
+            for item_op, item_av in av:
+                if item_op is _sre_parse.NEGATE:
+                    negate = True
+                elif item_op is _LITERAL:
+                    m |= self._literal_mask(item_av)
+                elif item_op is _sre_parse.RANGE:
+                    lo, hi = item_av
+                    for c in range(lo, min(hi, 255) + 1):
+                        m |= self._literal_mask(c)
+                    if hi > 255:
+                        m |= _OTHER
+                elif item_op is _sre_parse.CATEGORY:
+                    m |= _CATEGORY_MASKS.get(item_av, _ALL)
+                else:
+                    m = _ALL
+            return _ALL & ~m if negate else m
+        return 0
+
+    def first(self, items) -> int:
+        """Characters the sequence *items* can start with."""
+        m = 0
+        for op, av in items:
+            node_first, nullable = self._node_first(op, av)
+            m |= node_first
+            if not nullable:
+                break
+        return m
+
+    def _node_first(self, op, av) -> Tuple[int, bool]:
+        if op in (_LITERAL, _NOT_LITERAL, _ANY, _IN):
+            return self.charset(op, av), False
+        if op is _SUBPATTERN:
+            body = av[-1]
+            return self.first(body), self.nullable(body)
+        if op is _ATOMIC:
+            return self.first(av), self.nullable(av)
+        if op is _BRANCH:
+            m, nullable = 0, False
+            for alt in av[1]:
+                m |= self.first(alt)
+                nullable = nullable or self.nullable(alt)
+            return m, nullable
+        if op in _REPEATS or op is _POSSESSIVE:
+            lo, _, body = av
+            return self.first(body), lo == 0 or self.nullable(body)
+        if op is _sre_parse.GROUPREF:
+            return _ALL, True
+        # Zero-width: anchors, assertions
+        return 0, True
+
+    def nullable(self, items) -> bool:
+        return all(self._node_first(op, av)[1] for op, av in items)
+
+    # Checks
+
+    def walk(self, items, repeat_depth: int = 0, in_repeat: bool = False):
+        prev = None
+        for op, av in items:
+            if op in _REPEATS or op is _POSSESSIVE:
+                lo, hi, body = av
+                unbounded = hi is _MAXREPEAT or hi > 64
+                if op is not _POSSESSIVE and hi > 1:
+                    if repeat_depth and unbounded:
+                        self.add("nested_quantifier",
+                                 "Nested quantifiers — a repeated group contains another repeat, "
+                                 "which can backtrack exponentially.")
+                    if prev is not None and unbounded:
+                        self._check_adjacent(prev, (lo, hi, body))
+                    prev = (lo, hi, body) if unbounded else None
+                    self.walk(body, repeat_depth + (1 if unbounded else 0), unbounded or in_repeat)
+                else:
+                    prev = None
+                continue
+            if op is _BRANCH:
+                if in_repeat:
+                    self._check_alternation(av[1])
+                for alt in av[1]:
+                    self.walk(alt, repeat_depth, in_repeat)
+            elif op is _SUBPATTERN:
+                self.walk(av[-1], repeat_depth, in_repeat)
+            elif op is _ATOMIC:
+                pass  # atomic groups never backtrack into themselves
+            elif op in _ASSERTS:
+                self.walk(av[1], repeat_depth, in_repeat)
+            if op not in (_AT,):
+                prev = None
+
+    def _check_alternation(self, alternatives):
+        seen = 0
+        for alt in alternatives:
+            if self.nullable(alt):
+                self.add("ambiguous_alternation",
+                         "Alternation inside a repeat has an empty branch — the engine can "
+                         "loop through it many ways.")
+                return
+            m = self.first(alt)
+            if m & seen:
+                self.add("ambiguous_alternation",
+                         "Alternation inside a repeat has branches that start with the same "
+                         "characters, so failing input is retried for every combination.")
+                return
+            seen |= m
+
+    def _check_adjacent(self, prev, current):
+        if self.first(prev[2]) & self.first(current[2]):
+            self.add("overlapping_quantifiers",
+                     "Adjacent unbounded quantifiers match the same characters — the split "
+                     "between them is retried at every position (quadratic).")
+
+    def check_leading(self, items):
+        for op, av in items:
+            if op is _AT:
+                if av in _AT_START:
+                    return
+                continue
+            if op is _SUBPATTERN:
+                self.check_leading(av[-1])
+                return
+            if (op in _REPEATS or op is _POSSESSIVE) and av[0] == 0 and av[1] is _MAXREPEAT:
+                width = bin(self.first(av[2])).count("1")
+                if width >= _WILDCARD_BITS:
+                    self.add("leading_wildcard",
+                             "Unanchored leading wildcard — the pattern is retried from every "
+                             "offset of the buffer. Anchor it with ^ or drop the leading .*")
+            return
+
+
+def _static_class(findings) -> str:
+    kinds = {f["kind"] for f in findings}
+    if kinds & {"nested_quantifier", "ambiguous_alternation"}:
+        return "high"
+    if kinds:
+        return "moderate"
+    return "low"
+
+
+def _has_unbounded_repeat(items) -> bool:
+    for op, av in items:
+        if op in _REPEATS or op is _POSSESSIVE:
+            if av[1] is _MAXREPEAT or av[1] > 64 or _has_unbounded_repeat(av[2]):
+                return True
+        elif op is _BRANCH:
+            if any(_has_unbounded_repeat(alt) for alt in av[1]):
+                return True
+        elif op is _SUBPATTERN:
+            if _has_unbounded_repeat(av[-1]):
+                return True
+        elif op is _ATOMIC or op in _ASSERTS:
+            if _has_unbounded_repeat(av if op is _ATOMIC else av[1]):
+                return True
+    return False
+
+
+# ── Adversarial inputs ──
+
+def _pick(mask: int) -> str:
+    """A representative character from *mask*, preferring printable ones."""
+    for c in (97, 49, 65, 32, 46):  # a 1 A space .
+        if mask >> c & 1:
+            return chr(c)
+    for c in range(256):
+        if mask >> c & 1 and c != 0:
+            return chr(c)
+    return "Ā" if mask & _OTHER else "a"
+
+
+def _sample(analyzer: _Analyzer, items, pump: int, budget: List[int]) -> str:
+    """A string matching *items*, with every repeat pumped *pump* times."""
+    out = []
+    for op, av in items:
+        if budget[0] <= 0:
+            break
+        if op in (_LITERAL, _NOT_LITERAL, _ANY, _IN):
+            out.append(_pick(analyzer.charset(op, av)))
+            budget[0] -= 1
+        elif op is _SUBPATTERN:
+            out.append(_sample(analyzer, av[-1], pump, budget))
+        elif op is _ATOMIC:
+            out.append(_sample(analyzer, av, pump, budget))
+        elif op is _BRANCH:
+            out.append(_sample(analyzer, av[1][0], pump, budget))
+        elif op in _REPEATS or op is _POSSESSIVE:
+            lo, hi, body = av
+            count = max(lo, min(pump, hi if hi is not _MAXREPEAT else pump))
+            for _ in range(count):
+                if budget[0] <= 0:
+                    break
+                out.append(_sample(analyzer, body, pump, budget))
+    return "".join(out)
+
+
+def adversarial_inputs(tree, flags: int) -> List[str]:
+    """Inputs built to make a backtracking engine work hard on *tree*."""
+    analyzer = _Analyzer(flags)
+    inputs = []
+    for pump in PUMP_COUNTS:
+        text = _sample(analyzer, tree, pump, [MAX_INPUT_CHARS])
+        # A match that almost succeeds and then fails forces full backtracking
+        inputs.append(text + _FAIL_CHAR)
+        if len(text) > 1:
+            inputs.append(text[:-1] + _FAIL_CHAR)
+        if len(text) >= MAX_INPUT_CHARS:
+            break
+    return inputs
+
+
+# ── Required literals ──
+
+# Literal runs shorter than this are too weak to be worth a content match
+MIN_LITERAL_LEN = 3
+# Fixed-count repeats up to this size are expanded into literal text
+_MAX_EXPAND = 16
+# Marks a start-of-buffer anchor in a linearized pattern
+_START = object()
+
+
+def _width(state, items) -> Tuple[int, Optional[int]]:
+    if not isinstance(items, _sre_parse.SubPattern):
+        items = _sre_parse.SubPattern(state, list(items))
+    lo, hi = items.getwidth()
+    return lo, (None if hi >= _MAXREPEAT else hi)
+
+
+def _linearize(state, items, nocase: bool, multiline: bool, out: list):
+    """Flatten *items* into literal ``(char, nocase)`` pairs, ``(lo, hi)`` gaps and ``_START``."""
+    for op, av in items:
+        if op is _LITERAL and av < 0x80:
+            out.append((chr(av), nocase))
+        elif op is _LITERAL:
+            # May stand for a multi-byte UTF-8 sequence in the rule file
+            out.append((1, 4))
+        elif op is _AT:
+            if av is _sre_parse.AT_BEGINNING_STRING or (av is _sre_parse.AT_BEGINNING and not multiline):
+                out.append(_START)
+        elif op is _SUBPATTERN:
+            _, add_flags, del_flags, body = av
+            _linearize(
+                state, body,
+                (nocase or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE,
+                (multiline or bool(add_flags & re.MULTILINE)) and not del_flags & re.MULTILINE,
+                out,
+            )
+        elif op is _ATOMIC:
+            _linearize(state, av, nocase, multiline, out)
+        elif (op in _REPEATS or op is _POSSESSIVE) and av[0] > 0:
+            lo, hi, body = av
+            if lo == hi and lo <= _MAX_EXPAND:
+                for _ in range(lo):
+                    _linearize(state, body, nocase, multiline, out)
+                continue
+            # X{lo,hi} is X followed by X{lo-1,hi-1}: the first copy is required
+            _linearize(state, body, nocase, multiline, out)
+            body_lo, body_hi = _width(state, body)
+            rest_hi = None if hi is _MAXREPEAT or body_hi is None else (hi - 1) * body_hi
+            out.append(((lo - 1) * body_lo, rest_hi))
+        else:
+            out.append(_width(state, [(op, av)]))
+
+
+def required_literals(pcre: str, min_len: int = MIN_LITERAL_LEN) -> Optional[dict]:
+    """Literal substrings every match of a Snort ``pcre`` value must contain.
+
+    Returns ``None`` when the pattern cannot be parsed, otherwise::
+
+        {
+            "anchored": bool,      # pattern only matches at the buffer start
+            "literals": [{"text": str, "nocase": bool,
+                          "gap_min": int, "gap_max": int | None}, ...],
+        }
+
+    Literals are listed in match order. ``gap_min``/``gap_max`` bound the
+    bytes between the end of the previous literal (or the buffer start, for
+    the first one when anchored) and the start of this one; ``None`` means
+    unbounded. Only runs of at least *min_len* ASCII characters are kept;
+    shorter runs are folded into the surrounding gaps. The negation flag of
+    the pcre is ignored.
+    """
+    parts = split_pcre(pcre)
+    if parts is None:
+        return None
+    body, modifiers, _ = parts
+    flags = python_flags(modifiers)
+    try:
+        tree = _sre_parse.parse(body, flags)
+    except (re.error, OverflowError, RecursionError, ValueError):
+        return None
+    state = getattr(tree, "state", None) or tree.pattern
+    linear = []
+    _linearize(state, tree, bool(state.flags & re.IGNORECASE),
+               bool(state.flags & re.MULTILINE), linear)
+
+    anchored = "A" in modifiers
+    runs = []
+    gap_lo, gap_hi = 0, 0
+    for item in linear:
+        if item is _START:
+            if not runs and gap_lo == gap_hi == 0:
+                anchored = True
+            continue
+        if isinstance(item[0], str):
+            if gap_lo == gap_hi == 0 and runs and runs[-1]["_open"]:
+                runs[-1]["text"] += item[0]
+                runs[-1]["nocase"] = runs[-1]["nocase"] or item[1]
+            else:
+                runs.append({"text": item[0], "nocase": item[1],
+                             "gap_min": gap_lo, "gap_max": gap_hi, "_open": True})
+                gap_lo, gap_hi = 0, 0
+        elif item != (0, 0):  # zero-width assertions don't split a run
+            if runs:
+                runs[-1]["_open"] = False
+            gap_lo += item[0]
+            gap_hi = None if gap_hi is None or item[1] is None else gap_hi + item[1]
+
+    literals = []
+    carry_lo, carry_hi = 0, 0
+    for run in runs:
+        del run["_open"]
+        lo = carry_lo + run["gap_min"]
+        hi = None if carry_hi is None or run["gap_max"] is None else carry_hi + run["gap_max"]
+        if len(run["text"]) >= min_len:
+            run["gap_min"], run["gap_max"] = lo, hi
+            literals.append(run)
+            carry_lo, carry_hi = 0, 0
+        else:
+            carry_lo = lo + len(run["text"])
+            carry_hi = None if hi is None else hi + len(run["text"])
+    return {"anchored": anchored, "literals": literals}
+
+
+# ── Sandbox ──
+
+# Worker program, run with ``python -c`` so the sandbox never re-imports the
+# host application. Reads one JSON job per line on stdin and answers with
+# one JSON line on stdout.
+_WORKER_SOURCE = """
+import json, re, sys, time
+for line in sys.stdin:
+    body, flags, inputs = json.loads(line)
+    try:
+        compiled = re.compile(body, flags)
+    except Exception as e:
+        print(json.dumps(["error", str(e)]), flush=True)
+        continue
+    slowest = 0.0
+    for text in inputs:
+        start = time.perf_counter()
+        compiled.search(text)
+        slowest = max(slowest, time.perf_counter() - start)
+    print(json.dumps(["ok", slowest]), flush=True)
+"""
+
+
+class _Worker:
+    """One sandbox process plus a reader thread feeding its answers into a queue."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", "-c", _WORKER_SOURCE],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", errors="surrogatepass",
+        )
+        self.answers = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            self.answers.put(line)
+        self.answers.put(None)
+
+    def ask(self, job, timeout: float):
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        self.proc.stdin.flush()
+        line = self.answers.get(timeout=timeout)
+        if line is None:
+            raise EOFError("sandbox worker exited")
+        return json.loads(line)
+
+    def kill(self):
+        self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class PcreSandbox:
+    """Pool of worker processes that time patterns under a hard time limit.
+
+    A worker that does not answer within *timeout* seconds is killed and
+    replaced on the next request; the pattern is reported as timed out.
+    """
+
+    def __init__(self, workers: int = SANDBOX_WORKERS, timeout: float = SANDBOX_TIMEOUT):
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._live = set()
+        self._closed = False
+
+    def measure(self, body: str, flags: int, inputs: List[str]) -> Tuple[str, Optional[float]]:
+        """Return ``("ok", seconds)``, ``("timeout", None)`` or ``("error", None)``."""
+        if self._closed:
+            raise RuntimeError("PcreSandbox is closed")
+        with self._slots:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = _Worker()
+                with self._lock:
+                    self._live.add(worker)
+            try:
+                status, value = worker.ask([body, flags, inputs], self.timeout)
+            except queue.Empty:
+                self._discard(worker)
+                return "timeout", None
+            except (EOFError, OSError, ValueError):
+                self._discard(worker)
+                return "error", None
+            self._idle.put(worker)
+        return (status, value) if status == "ok" else ("error", None)
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._live.discard(worker)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._live)
+        for worker in workers:
+            self._discard(worker)
+
+
+_sandbox = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox() -> PcreSandbox:
+    """Shared sandbox, started on first use."""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = PcreSandbox()
+            atexit.register(_sandbox.close)
+        return _sandbox
+
+
+# ── Public API ──
+
+# Memo of analysis results per (pcre, measure)
+ANALYSIS_CACHE = ResultCache(max_size=20000)
+
+
+def analyze_pcre(pcre: str, measure: Optional[bool] = None) -> dict:
+    """Analyze a Snort ``pcre`` value and return its cost profile.
+
+    Returns::
+
+        {
+            "parsed": bool,            # False if the body could not be parsed
+            "findings": [{"kind": str, "detail": str}, ...],
+            "static_class": str,       # from the AST alone
+            "measured_class": str | None,
+            "max_ms": float | None,    # slowest adversarial search
+            "cost_class": str,         # the higher of static and measured
+        }
+
+    *measure* defaults to ``SANDBOX_ENABLED``. Patterns without an
+    unbounded repeat are never measured; they cannot backtrack badly.
+    """
+    if measure is None:
+        measure = SANDBOX_ENABLED
+    key = (pcre, measure)
+    result = ANALYSIS_CACHE.get(key)
+    if result is None:
+        result, final = _analyze(pcre, measure)
+        if final:
+            ANALYSIS_CACHE.put(key, result)
+        result = dict(result)
+    return result
+
+
+def _analyze(pcre: str, measure: bool) -> Tuple[dict, bool]:
+    """Return ``(result, final)``; results of a failed measurement are not final."""
+    result = {
+        "parsed": False, "findings": [], "static_class": "low",
+        "measured_class": None, "max_ms": None, "cost_class": "low",
+    }
+    parts = split_pcre(pcre)
+    if parts is None:
+        return result, True
+    body, modifiers, _ = parts
+    flags = python_flags(modifiers)
+    try:
+        tree = list(_sre_parse.parse(body, flags))
+    except (re.error, OverflowError, RecursionError, ValueError):
+        logger.debug("PCRE not parseable by the analyzer: %s", pcre)
+        return result, True
+
+    analyzer = _Analyzer(flags)
+    analyzer.check_leading(tree)
+    analyzer.walk(tree)
+    result["parsed"] = True
+    result["findings"] = analyzer.findings
+    result["static_class"] = result["cost_class"] = _static_class(analyzer.findings)
+
+    if not (measure and _has_unbounded_repeat(tree)):
+        return result, True
+    inputs = adversarial_inputs(tree, flags)
+    sandbox = get_sandbox()
+    status, seconds = sandbox.measure(body, flags, inputs)
+    if status == "timeout":
+        status, seconds = sandbox.measure(body, flags, inputs)
+    if status == "timeout":
+        result["measured_class"] = "catastrophic"
+    elif status == "ok":
+        result["max_ms"] = round(seconds * 1000, 3)
+        if seconds >= HIGH_SECONDS:
+            result["measured_class"] = "high"
+        elif seconds >= MODERATE_SECONDS:
+            result["measured_class"] = "moderate"
+        else:
+            result["measured_class"] = "low"
+    else:
+        return result, False
+    result["cost_class"] = max(result["static_class"], result["measured_class"], key=COST_CLASSES.index)
+    return result, True
@@ -0,0 +1,153 @@
+"""
+SnortForge - Multi-Pattern Content Prefilter
+
+Evaluating every rule against every payload costs rules x payloads. Like
+Snort's fast-pattern matcher, :class:`Prefilter` puts the contents of a
+whole ruleset into one Aho-Corasick automaton, so each payload is scanned
+once and only the rules it could satisfy get their full option checks:
+
+  - every non-negated content of a rule (``get_content_matches()``,
+    hex-decoded) is inserted case-folded, shared between rules, along
+    with the literal text its PCRE requires
+  - a payload is case-folded and scanned once; a rule is a candidate when
+    all of its patterns occur somewhere in it
+  - rules without any such pattern (negated-only, PCREs without a
+    literal) are always candidates
+
+The prefilter only over-approximates: case, positions, buffers and
+negations are left to :meth:`CompiledRule.match`. HTTP buffer contents
+are found in the raw payload because the engine's HTTP buffers are slices
+of it; the cookie buffer is not (it joins every Cookie header), so cookie
+contents are not used as patterns.
+"""
+
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Set
+
+from .pcre import required_literals
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over byte strings.
+
+    ``find`` returns the ids (positions in *patterns*) of every pattern
+    occurring in the scanned data.
+    """
+
+    def __init__(self, patterns: Sequence[bytes]):
+        goto: List[Dict[int, int]] = [{}]
+        own: List[List[int]] = [[]]
+        for pid, pattern in enumerate(patterns):
+            state = 0
+            for b in pattern:
+                nxt = goto[state].get(b)
+                if nxt is None:
+                    nxt = goto[state][b] = len(goto)
+                    goto.append({})
+                    own.append([])
+                state = nxt
+            own[state].append(pid)
+
+        # Breadth-first failure links; each state's outputs include those
+        # of its failure chain, so a scan never walks output links
+        fail = [0] * len(goto)
+        out: List[tuple] = [()] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            out[state] = tuple(own[state])
+        for state in queue:
+            for b, nxt in goto[state].items():
+                f = fail[state]
+                while f and b not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(b, 0)
+                fail[nxt] = f
+                out[nxt] = tuple(own[nxt]) + out[f] if out[f] else tuple(own[nxt])
+                queue.append(nxt)
+        # The root has a transition for every byte, so falling back ends there
+        for b in range(256):
+            goto[0].setdefault(b, 0)
+        self.patterns = len(patterns)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        """Number of automaton states."""
+        return len(self._goto)
+
+    def find(self, data: bytes) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for b in data:
+            nxt = goto[state].get(b)
+            while nxt is None:
+                state = fail[state]
+                nxt = goto[state].get(b)
+            state = nxt
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def required_patterns(compiled) -> Set[bytes]:
+    """Case-folded byte strings that every payload *compiled* fires on contains.
+
+    These are its non-negated contents outside the cookie buffer plus the literal text its PCRE
+    requires (see :func:`snortforge.core.pcre.required_literals`), unless
+    the PCRE is negated or reads the cookie buffer, which is not a slice
+    of the payload.
+    """
+    patterns = {c.pattern.lower() for c in compiled.contents
+                if not c.negated and c.buffer != "http_cookie"}
+    if compiled.pcre is not None and not compiled.pcre_negated and compiled.pcre_buffer != "http_cookie":
+        required = required_literals(compiled.rule.pcre)
+        if required:
+            patterns.update(lit["text"].encode("utf-8").lower() for lit in required["literals"])
+    return patterns
+
+
+class Prefilter:
+    """Candidate selection for a list of compiled rules (see :mod:`engine`)."""
+
+    def __init__(self, compiled: Iterable):
+        ids: Dict[bytes, int] = {}
+        users: List[List[int]] = []
+        self.required: Dict[int, int] = {}
+        self.unfiltered: List[int] = []
+        for pos, rule in enumerate(compiled):
+            patterns = required_patterns(rule)
+            if not patterns:
+                self.unfiltered.append(pos)
+                continue
+            self.required[pos] = len(patterns)
+            for pattern in patterns:
+                pid = ids.get(pattern)
+                if pid is None:
+                    pid = ids[pattern] = len(users)
+                    users.append([])
+                users[pid].append(pos)
+        self.automaton = AhoCorasick(list(ids))
+        self._users = users
+
+    def candidates(self, folded: bytes) -> List[int]:
+        """Positions of the rules that may match a case-folded payload, in order."""
+        found = self.automaton.find(folded)
+        users = self._users
+        required = self.required
+        counts = Counter(chain.from_iterable([users[pid] for pid in found]))
+        hits = [pos for pos, n in counts.items() if n == required[pos]]
+        if self.unfiltered:
+            hits.extend(self.unfiltered)
+        hits.sort()
+        return hits
+
+    def stats(self) -> dict:
+        return {
+            "patterns": self.automaton.patterns,
+            "states": len(self.automaton),
+            "filtered_rules": len(self.required),
+            "unfiltered_rules": len(self.unfiltered),
+        }
@@ -0,0 +1,239 @@
+"""
+SnortForge - Rule Profiler
+
+Measures what each rule actually costs on real traffic, in the manner of
+Snort's ``rule_profiling`` table, where the scorer can only estimate it.
+A local corpus is replayed through a profiling :class:`RuleEngine`:
+
+  - ``.pcap``/``.cap`` files are replayed like :func:`engine.run_pcaps`:
+    headers and flow state apply, and TCP streams are reassembled
+  - any other file is cut into ``SAMPLE_BYTES`` windows (as for the n-gram
+    index) that are evaluated as raw payloads, against the detection
+    options only
+
+For every rule the profile holds checks (evaluations that got past the
+prefilter), matches, total and average microseconds overall, per match
+and per non-match, and the time spent in content and PCRE matching. The
+prefilter scans are shared by all rules and reported in the totals.
+
+Usage::
+
+    python -m snortforge.core.profile local.rules ./corpus --sort avg_us --top 25
+    python -m snortforge.core.profile local.rules ./corpus --format csv -o profile.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Iterable, List, Optional, Sequence
+
+from .engine import Inspection, RuleEngine, run_pcaps
+from .ngram import PCAP_SUFFIXES, SAMPLE_BYTES
+from .parser import parse_rules_file
+from .pcap import PcapError
+from .rule import SnortRule
+from .scope import Variables
+
+# Row columns in output order; every numeric column can be sorted on
+COLUMNS = (
+    "rank", "sid", "gid", "rev", "msg", "checks", "matches", "total_us", "avg_us",
+    "avg_match_us", "avg_nonmatch_us", "content_us", "pcre_us", "percent",
+)
+SORT_KEYS = (
+    "checks", "matches", "total_us", "avg_us", "avg_match_us", "avg_nonmatch_us",
+    "content_us", "pcre_us", "sid",
+)
+DEFAULT_SORT = "total_us"
+
+
+def iter_corpus(paths: Iterable[str]):
+    """Yield ``(kind, path)`` for the files of a corpus, ``kind`` being "pcap" or "raw".
+
+    Directories are walked in sorted order.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield _kind(name), os.path.join(root, name)
+        else:
+            yield _kind(path), path
+
+
+def _kind(name: str) -> str:
+    return "pcap" if name.lower().endswith(PCAP_SUFFIXES) else "raw"
+
+
+def profile_rules(rules: Sequence[SnortRule], corpus: Iterable[str],
+                  variables: Optional[Variables] = None, streams: bool = True,
+                  prefilter: bool = True, sort: str = DEFAULT_SORT,
+                  top: Optional[int] = None) -> dict:
+    """Replay *corpus* (files or directories) through *rules* and profile each rule.
+
+    Returns::
+
+        {
+            "corpus": {"pcaps", "raw_files", "packets", "flows", "payloads", "bytes"},
+            "totals": {"checks", "matches", "rule_us", "prefilter_us", "elapsed_s"},
+            "rules": [row, ...],      # see COLUMNS, sorted by *sort*, cut to *top*
+            "errors": [{"rule", "sid", "error"}, ...],   # rules not evaluated
+        }
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Use one of: {', '.join(SORT_KEYS)}")
+    start = time.perf_counter()
+    engine = RuleEngine(rules, variables, prefilter=prefilter, profile=True)
+    corpus_stats = {"pcaps": 0, "raw_files": 0, "packets": 0, "flows": 0, "payloads": 0, "bytes": 0}
+    pcaps = []
+    for kind, path in iter_corpus(corpus):
+        if kind == "pcap":
+            pcaps.append(path)
+            continue
+        corpus_stats["raw_files"] += 1
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(SAMPLE_BYTES)
+                if not chunk:
+                    break
+                corpus_stats["payloads"] += 1
+                corpus_stats["bytes"] += len(chunk)
+                engine.evaluate(Inspection(chunk, raw=True))
+    if pcaps:
+        report = run_pcaps(engine, pcaps, streams=streams, max_alerts=0)
+        corpus_stats["pcaps"] = len(pcaps)
+        corpus_stats["packets"] = report["packets"]
+        corpus_stats["flows"] = report["flows"]
+        corpus_stats["bytes"] += report["bytes"]
+
+    rows = profile_rows(engine)
+    return {
+        "corpus": corpus_stats,
+        "totals": {
+            "checks": sum(row["checks"] for row in rows),
+            "matches": sum(row["matches"] for row in rows),
+            "rule_us": round(sum(s.ns for s in engine.stats.values()) / 1000, 1),
+            "prefilter_us": round(engine.prefilter_ns / 1000, 1),
+            "elapsed_s": round(time.perf_counter() - start, 3),
+        },
+        "rules": sort_rows(rows, sort, top),
+        "errors": [{"rule": i, "sid": engine.rules[i].sid, "error": msg}
+                   for i, msg in sorted(engine.errors.items())],
+    }
+
+
+def profile_rows(engine: RuleEngine) -> List[dict]:
+    """One row per evaluated rule of a profiling *engine*, in rule order."""
+    total_ns = sum(s.ns for s in engine.stats.values()) or 1
+    rows = []
+    for compiled in engine.compiled:
+        rule, stats = compiled.rule, engine.stats[compiled.index]
+        misses = stats.checks - stats.matches
+        rows.append({
+            "rank": 0,
+            "rule": compiled.index,
+            "sid": rule.sid,
+            "gid": 1,
+            "rev": rule.rev,
+            "msg": rule.msg,
+            "checks": stats.checks,
+            "matches": stats.matches,
+            "total_us": round(stats.ns / 1000, 1),
+            "avg_us": _avg(stats.ns, stats.checks),
+            "avg_match_us": _avg(stats.match_ns, stats.matches),
+            "avg_nonmatch_us": _avg(stats.ns - stats.match_ns, misses),
+            "content_us": round(stats.content_ns / 1000, 1),
+            "pcre_us": round(stats.pcre_ns / 1000, 1),
+            "percent": round(100 * stats.ns / total_ns, 2),
+        })
+    return rows
+
+
+def _avg(ns: int, count: int) -> float:
+    return round(ns / 1000 / count, 2) if count else 0.0
+
+
+def sort_rows(rows: List[dict], key: str = DEFAULT_SORT, top: Optional[int] = None) -> List[dict]:
+    """Rows sorted by *key* (costliest first; SIDs ascending), ranked, cut to *top*."""
+    if key not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{key}'. Use one of: {', '.join(SORT_KEYS)}")
+    ordered = sorted(rows, key=lambda row: row[key], reverse=key != "sid")
+    if top is not None:
+        ordered = ordered[:top]
+    for rank, row in enumerate(ordered, 1):
+        row["rank"] = rank
+    return ordered
+
+
+def write_csv(rows: Iterable[dict], fileobj):
+    writer = csv.DictWriter(fileobj, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def format_table(rows: Iterable[dict]) -> str:
+    """Text table in the layout of Snort's rule profiling output."""
+    out = io.StringIO()
+    out.write(f"{'Num':>5} {'SID':>10} {'GID':>3} {'Rev':>3} {'Checks':>10} {'Matches':>9} "
+              f"{'Microsecs':>11} {'Avg/Check':>10} {'Avg/Match':>10} {'Avg/Nonmatch':>12} "
+              f"{'Content':>10} {'PCRE':>10} {'%':>6}  Msg\n")
+    for row in rows:
+        out.write(f"{row['rank']:>5} {row['sid']:>10} {row['gid']:>3} {row['rev']:>3} "
+                  f"{row['checks']:>10} {row['matches']:>9} {row['total_us']:>11.1f} "
+                  f"{row['avg_us']:>10.2f} {row['avg_match_us']:>10.2f} {row['avg_nonmatch_us']:>12.2f} "
+                  f"{row['content_us']:>10.1f} {row['pcre_us']:>10.1f} {row['percent']:>6.2f}  {row['msg']}\n")
+    return out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the per-rule cost of a ruleset on a local traffic corpus.")
+    parser.add_argument("rules", help="rules file")
+    parser.add_argument("corpus", nargs="+", help="pcap files, raw payload files or directories of them")
+    parser.add_argument("--conf", help="snort.conf or snort.lua with ipvar/portvar definitions")
+    parser.add_argument("--sort", choices=SORT_KEYS, default=DEFAULT_SORT,
+                        help=f"column to sort on (default: {DEFAULT_SORT})")
+    parser.add_argument("--top", type=int, default=None, help="only list the first N rules")
+    parser.add_argument("--format", choices=("table", "json", "csv"), default="table")
+    parser.add_argument("-o", "--output", help="write here instead of stdout")
+    parser.add_argument("--no-streams", action="store_true", help="do not inspect reassembled TCP streams")
+    parser.add_argument("--no-prefilter", action="store_true", help="evaluate every rule on every payload")
+    args = parser.parse_args(argv)
+
+    rules, parse_errors = parse_rules_file(args.rules)
+    for error in parse_errors:
+        print(f"{args.rules}: {error}", file=sys.stderr)
+    variables = Variables.load(args.conf) if args.conf else None
+    try:
+        result = profile_rules(rules, args.corpus, variables, streams=not args.no_streams,
+                               prefilter=not args.no_prefilter, sort=args.sort, top=args.top)
+    except PcapError as e:
+        parser.error(str(e))
+    for entry in result["errors"]:
+        print(f"sid {entry['sid']}: not evaluated: {entry['error']}", file=sys.stderr)
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(result, out, indent=2)
+            out.write("\n")
+        elif args.format == "csv":
+            write_csv(result["rules"], out)
+        else:
+            out.write(format_table(result["rules"]))
+    finally:
+        if args.output:
+            out.close()
+
+    corpus, totals = result["corpus"], result["totals"]
+    print(f"Profiled {len(rules)} rules on {corpus['packets']} packets and {corpus['payloads']} "
+          f"raw payloads ({corpus['bytes']} bytes): {totals['rule_us'] / 1000:.1f} ms in rules, "
+          f"{totals['prefilter_us'] / 1000:.1f} ms prefiltering.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
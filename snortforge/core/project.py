@@ -0,0 +1,321 @@
+"""
+SnortForge - Binary Project Format
+
+A compact, versioned alternative to the JSON project export. Rules are
+serialized through ``SnortRule.to_dict`` / ``from_dict``; the layout is::
+
+    header      magic "SFPJ", u16 format version, u16 reserved
+    meta        u32 length + UTF-8 JSON (snortforge_version, exported, ...)
+    schema      u32 length + UTF-8 JSON field list for rules and contents
+    strings     u32 count, count x u32 byte lengths, UTF-8 blob
+    index       u32 rule count, count x u64 record offsets
+    records     u32 length + fixed-layout payload, one per rule
+
+Every string value (header fields, variables, classtypes, messages, ...)
+is stored once in the string table and referenced by id, so repeated
+values like ``$HOME_NET`` cost four bytes per rule. The schema travels with
+the file, which lets a reader decode files written with more or fewer
+fields than it knows about. Records are length-prefixed and indexed, so a
+reader can stream them in order or seek straight to rule *n*.
+
+All integers are little-endian.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from .rule import ContentMatch, SnortRule, clear_unset_positions
+
+MAGIC = b"SFPJ"
+# 2: optional integer fields (unset positional modifiers) instead of 0
+FORMAT_VERSION = 2
+# Upper bound on one read; larger lengths can only come from a corrupt file
+MAX_SECTION_BYTES = 1 << 30
+
+_HEADER = struct.Struct("<4sHH")
+_U32 = struct.Struct("<I")
+
+# Schema type codes -> struct format of the fixed part of a record. "n" is
+# an optional integer, with None stored as the smallest int64.
+_FIXED_FORMATS = {"s": "I", "b": "?", "i": "q", "n": "q"}
+_FIXED_TYPES = {"s": str, "b": bool, "i": int, "n": int}
+_NONE_INT = -(1 << 63)
+# Variable-length parts: list of strings, list of content sub-records
+_STRING_LIST = "L"
+_CONTENT_LIST = "C"
+
+
+class ProjectFormatError(ValueError):
+    pass
+
+
+def _field_schema(defaults: dict) -> List[list]:
+    schema = []
+    for name, value in defaults.items():
+        if value is None:
+            code = "n"
+        elif isinstance(value, bool):
+            code = "b"
+        elif isinstance(value, int):
+            code = "i"
+        elif isinstance(value, str):
+            code = "s"
+        elif name == "contents":
+            code = _CONTENT_LIST
+        else:
+            code = _STRING_LIST
+        schema.append([name, code])
+    return schema
+
+
+RULE_SCHEMA = _field_schema(SnortRule().to_dict())
+CONTENT_SCHEMA = _field_schema(ContentMatch().to_dict())
+
+
+class _Layout:
+    """Struct layout derived from a schema field list."""
+
+    def __init__(self, schema):
+        for name, code in schema:
+            if code not in _FIXED_FORMATS and code not in (_STRING_LIST, _CONTENT_LIST):
+                raise ValueError(f"Unknown type code {code!r} for field {name!r}")
+        fixed = [(name, code) for name, code in schema if code in _FIXED_FORMATS]
+        self.fixed = [name for name, _ in fixed]
+        self.codes = [code for _, code in fixed]
+        # Positions of string ids within the unpacked fixed values
+        self.strings = [i for i, code in enumerate(self.codes) if code == "s"]
+        self.optionals = [i for i, code in enumerate(self.codes) if code == "n"]
+        self.lists = [(name, code) for name, code in schema if code not in _FIXED_FORMATS]
+        self.struct = struct.Struct("<" + "".join(_FIXED_FORMATS[c] for c in self.codes))
+
+
+def _coerce(code, value):
+    if code == "b":
+        return bool(value)
+    if code == "i":
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+    if code == "n":
+        try:
+            return _NONE_INT if value is None else int(value)
+        except (TypeError, ValueError):
+            return _NONE_INT
+    return "" if value is None else str(value)
+
+
+# ── Writing ──
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def id(self, value: str) -> int:
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return sid
+
+    def encode(self) -> bytes:
+        blobs = [v.encode("utf-8") for v in self.values]
+        lengths = array("I", map(len, blobs))
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        return _U32.pack(len(blobs)) + lengths.tobytes() + b"".join(blobs)
+
+
+def _encode_fixed(layout, data, table):
+    values = []
+    for name, code in zip(layout.fixed, layout.codes):
+        value = data.get(name)
+        if type(value) is not _FIXED_TYPES[code]:
+            value = _coerce(code, value)
+        values.append(table.id(value) if code == "s" else value)
+    return layout.struct.pack(*values)
+
+
+def _encode_record(rule: dict, rule_layout, content_layout, table) -> bytes:
+    parts = [_encode_fixed(rule_layout, rule, table)]
+    for name, code in rule_layout.lists:
+        items = rule.get(name) or []
+        parts.append(_U32.pack(len(items)))
+        if code == _CONTENT_LIST:
+            parts.extend(_encode_fixed(content_layout, cm, table) for cm in items)
+        else:
+            parts.append(struct.pack(f"<{len(items)}I", *(table.id(_coerce("s", v)) for v in items)))
+    return b"".join(parts)
+
+
+def write_project(fileobj, rules: Iterable[Union[SnortRule, dict]], meta: Optional[dict] = None) -> int:
+    """Write *rules* to the binary file object *fileobj* and return the rule count.
+
+    Rule dicts are normalized through ``SnortRule.from_dict`` first.
+    """
+    rule_layout, content_layout = _Layout(RULE_SCHEMA), _Layout(CONTENT_SCHEMA)
+    table = _StringTable()
+    records = []
+    for rule in rules:
+        if not isinstance(rule, SnortRule):
+            rule = SnortRule.from_dict(rule)
+        records.append(_encode_record(rule.to_dict(), rule_layout, content_layout, table))
+
+    offsets = array("Q")
+    pos = 0
+    for record in records:
+        offsets.append(pos)
+        pos += _U32.size + len(record)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+
+    meta = dict(meta or {}, rule_count=len(records))
+    schema = {"rule": RULE_SCHEMA, "content": CONTENT_SCHEMA}
+    fileobj.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+    for section in (json.dumps(meta).encode("utf-8"), json.dumps(schema).encode("utf-8")):
+        fileobj.write(_U32.pack(len(section)))
+        fileobj.write(section)
+    fileobj.write(table.encode())
+    fileobj.write(_U32.pack(len(records)))
+    fileobj.write(offsets.tobytes())
+    for record in records:
+        fileobj.write(_U32.pack(len(record)))
+        fileobj.write(record)
+    return len(records)
+
+
+# ── Reading ──
+
+class ProjectReader:
+    """Reads a binary project from a binary file object.
+
+    Iterating yields rule dicts in file order without seeking; :meth:`get`
+    and :meth:`rule` seek straight to one record and need a seekable file.
+    """
+
+    def __init__(self, fileobj):
+        self._f = fileobj
+        magic, version, _ = _HEADER.unpack(self._read(_HEADER.size))
+        if magic != MAGIC:
+            raise ProjectFormatError("Not a SnortForge binary project.")
+        if version > FORMAT_VERSION:
+            raise ProjectFormatError(f"Unsupported project format version {version}.")
+        self.version = version
+        self.meta = self._read_json("metadata")
+        schema = self._read_json("schema")
+        try:
+            self._rule_layout = _Layout(schema["rule"])
+            self._content_layout = _Layout(schema["content"])
+        except (KeyError, TypeError, ValueError) as e:
+            # Missing sections, unknown type codes or malformed field entries
+            raise ProjectFormatError("Corrupt project schema.") from e
+        self._strings = self._read_strings()
+
+        count = self._read_u32()
+        self._offsets = array("Q")
+        self._offsets.frombytes(self._read(8 * count))
+        if sys.byteorder == "big":
+            self._offsets.byteswap()
+        self._records_start = fileobj.tell() if fileobj.seekable() else None
+
+    def _read(self, n: int) -> bytes:
+        if n > MAX_SECTION_BYTES:
+            raise ProjectFormatError("Corrupt project file.")
+        data = self._f.read(n)
+        if len(data) != n:
+            raise ProjectFormatError("Truncated project file.")
+        return data
+
+    def _read_u32(self) -> int:
+        return _U32.unpack(self._read(_U32.size))[0]
+
+    def _read_section(self) -> bytes:
+        return self._read(self._read_u32())
+
+    def _read_json(self, name: str) -> dict:
+        section = self._read_section()
+        try:
+            value = json.loads(section)
+        except ValueError as e:
+            raise ProjectFormatError(f"Corrupt project {name}.") from e
+        if not isinstance(value, dict):
+            raise ProjectFormatError(f"Corrupt project {name}.")
+        return value
+
+    def _read_strings(self) -> List[str]:
+        count = self._read_u32()
+        lengths = array("I")
+        lengths.frombytes(self._read(4 * count))
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        blob = self._read(sum(lengths))
+        strings, pos = [], 0
+        try:
+            for n in lengths:
+                strings.append(blob[pos:pos + n].decode("utf-8"))
+                pos += n
+        except UnicodeDecodeError as e:
+            raise ProjectFormatError("Corrupt project string table.") from e
+        return strings
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[dict]:
+        for _ in range(len(self._offsets)):
+            yield self._decode(self._read_section())
+
+    def get(self, index: int) -> dict:
+        """Return rule *index* as a dict, seeking directly to its record."""
+        if self._records_start is None:
+            raise ProjectFormatError("Random access needs a seekable file.")
+        self._f.seek(self._records_start + self._offsets[index])
+        return self._decode(self._read_section())
+
+    def rule(self, index: int) -> SnortRule:
+        return SnortRule.from_dict(self.get(index))
+
+    def rules(self) -> Iterator[SnortRule]:
+        for data in self:
+            yield SnortRule.from_dict(data)
+
+    def _decode_fixed(self, layout, payload, pos):
+        values = list(layout.struct.unpack_from(payload, pos))
+        strings = self._strings
+        for i in layout.strings:
+            values[i] = strings[values[i]]
+        for i in layout.optionals:
+            if values[i] == _NONE_INT:
+                values[i] = None
+        return dict(zip(layout.fixed, values)), pos + layout.struct.size
+
+    def _decode(self, payload: bytes) -> dict:
+        try:
+            data, pos = self._decode_fixed(self._rule_layout, payload, 0)
+            for name, code in self._rule_layout.lists:
+                (count,), pos = _U32.unpack_from(payload, pos), pos + _U32.size
+                if code == _CONTENT_LIST:
+                    items = []
+                    for _ in range(count):
+                        item, pos = self._decode_fixed(self._content_layout, payload, pos)
+                        items.append(item)
+                else:
+                    ids = struct.unpack_from(f"<{count}I", payload, pos)
+                    pos += 4 * count
+                    items = [self._strings[i] for i in ids]
+                data[name] = items
+        except (struct.error, IndexError) as e:
+            raise ProjectFormatError("Corrupt project record.") from e
+        if self.version < 2:
+            clear_unset_positions(data)
+        return data
+
+
+def read_project(fileobj) -> Tuple[dict, List[dict]]:
+    """Read a whole binary project; returns ``(meta, rule_dicts)``."""
+    reader = ProjectReader(fileobj)
+    return reader.meta, list(reader)
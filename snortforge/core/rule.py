@@ -6,22 +6,92 @@ When `contents` is populated, it takes priority over the legacy single
 content/depth/offset/etc. fields.
 """
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import MISSING, dataclass, field, fields
+from functools import lru_cache
+from operator import attrgetter
 from typing import List, Optional
 
-
-@dataclass
+# Slotted dataclasses need Python 3.10+; older interpreters fall back to
+# regular dict-backed instances with the same behaviour.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Header and classification values repeat across almost every rule in a
+# corpus ($HOME_NET, $HTTP_PORTS, any, tcp, ...), so they are interned and
+# shared instead of stored once per rule.
+INTERNED_FIELDS = frozenset({
+    "action", "protocol", "src_ip", "src_port", "direction", "dst_ip",
+    "dst_port", "classtype", "flow", "threshold_type", "threshold_track",
+})
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+_set_field = object.__setattr__
+
+
+def _direct_init(cls):
+    """Give dataclass *cls* an ``__init__`` that bypasses its ``__setattr__``.
+
+    The memo-clearing ``__setattr__`` hooks below would otherwise run once
+    per field for every new instance, roughly quadrupling construction
+    time. Fields are stored through their slot descriptors (or
+    ``object.__setattr__`` without slots); list factories are called with
+    a passed-in list so it still ends up wrapped.
+    """
+    ns, params, body = {"MISSING": MISSING}, [], []
+    for f in fields(cls):
+        slot = cls.__dict__.get(f.name)
+        ns[f"set_{f.name}"] = getattr(slot, "__set__", None) or (
+            lambda obj, value, _name=f.name: _set_field(obj, _name, value))
+        if f.default_factory is not MISSING:
+            ns[f"new_{f.name}"] = f.default_factory
+            value = f"new_{f.name}(() if {f.name} is MISSING else {f.name})"
+            default = "MISSING"
+        else:
+            ns[f"default_{f.name}"] = f.default
+            value = default = f"default_{f.name}"
+        if f.init:
+            params.append(f"{f.name}={default}")
+            if default != "MISSING":
+                value = f.name
+        body.append(f"    set_{f.name}(self, {value})")
+    exec(f"def __init__(self, {', '.join(params)}):\n" + "\n".join(body), ns)
+    ns["__init__"].__qualname__ = f"{cls.__qualname__}.__init__"
+    cls.__init__ = ns["__init__"]
+    return cls
+
+
+@_direct_init
+@dataclass(**_SLOTS)
 class ContentMatch:
-    """A single content match entry with its own modifiers."""
+    """A single content match entry with its own modifiers.
+
+    ``buffer`` names any other inspection buffer the content is restricted
+    to (``http_method``, ``http_cookie``, ``file_data``, ...) by its Snort 3
+    sticky buffer name. ``modifiers`` keeps the remaining modifiers
+    (``fast_pattern``, ``rawbytes``, ...) verbatim, ``; ``-separated, so
+    they survive a round trip even though nothing else interprets them.
+    The positional modifiers (``depth``, ``offset``, ``distance``,
+    ``within``) are ``None`` when unset, so ``distance:0`` and negative
+    distances are kept.
+    """
+    # Memo of the rule whose contents hold this match, cleared on any edit
+    # (see SnortRule._memoized)
+    _memo: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
     content: str = ""
     nocase: bool = False
     negated: bool = False
     http_uri: bool = False
     http_header: bool = False
-    depth: int = 0
-    offset: int = 0
-    distance: int = 0
-    within: int = 0
+    depth: Optional[int] = None
+    offset: Optional[int] = None
+    distance: Optional[int] = None
+    within: Optional[int] = None
+    buffer: str = ""
+    modifiers: str = ""
 
     def to_dict(self) -> dict:
         return {
@@ -34,21 +104,128 @@ class ContentMatch:
             "offset": self.offset,
             "distance": self.distance,
             "within": self.within,
+            "buffer": self.buffer,
+            "modifiers": self.modifiers,
         }
 
+    def modifier_names(self) -> List[str]:
+        """Keywords of the verbatim ``modifiers`` (``fast_pattern:only`` -> ``fast_pattern``)."""
+        return [m.partition(":")[0].strip() for m in self.modifiers.split(";") if m.strip()]
+
     @classmethod
     def from_dict(cls, data: dict) -> "ContentMatch":
         cm = cls()
         for key, value in data.items():
-            if hasattr(cm, key):
-                setattr(cm, key, value)
+            if key in _CONTENT_FIELDS:
+                # A new match has no memo to clear
+                _set_field(cm, key, value)
         return cm
 
+    def __setattr__(self, name, value):
+        _set_field(self, name, value)
+        memo = self._memo
+        if memo:
+            memo.clear()
+
+    def __reduce__(self):
+        # The memo belongs to the rule in this process; pickles leave it out
+        return type(self), _content_values(self)
+
+
+_CONTENT_FIELDS = frozenset(f.name for f in fields(ContentMatch) if not f.name.startswith("_"))
+# Content modifiers that are None when unset
+POSITIONAL_FIELDS = ("depth", "offset", "distance", "within")
+_content_values = attrgetter(*(f.name for f in fields(ContentMatch) if not f.name.startswith("_")))
+
+
+class _TrackedList(list):
+    """A list field of SnortRule that clears the rule's memo when changed.
+
+    It holds the rule's memo dict rather than the rule itself, so rules
+    stay free of reference cycles. The slot stays unset until the rule
+    first memoizes something, which keeps construction at list speed.
+    """
+
+    __slots__ = ("_memo",)
+
+    def _bind(self, memo: dict):
+        self._memo = memo
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+class _Contents(_TrackedList):
+    """``SnortRule.contents``: also binds each ContentMatch to the rule's memo."""
+
+    __slots__ = ()
+
+    def _bind(self, memo: dict):
+        self._memo = memo
+        for cm in self:
+            if isinstance(cm, ContentMatch):
+                _set_field(cm, "_memo", memo)
+
+
+def _tracked(name):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        memo = getattr(self, "_memo", None)
+        if memo is not None:
+            memo.clear()
+            self._bind(memo)
+        return result
+
+    mutate.__name__ = name
+    return mutate
 
-@dataclass
+
+for _name in ("append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(_TrackedList, _name, _tracked(_name))
+
+
+@lru_cache(maxsize=65536)
+def decode_content(text: str) -> bytes:
+    """Return the bytes a ``content`` string matches.
+
+    ``|41 42|`` blocks are hex bytes; outside them a backslash escapes the
+    next character (``\\"``, ``\\;``, ``\\\\``). Other text is UTF-8. Raises
+    ValueError on malformed hex.
+    """
+    out = bytearray()
+    in_hex = False
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "|":
+            in_hex = not in_hex
+        elif in_hex:
+            j = text.find("|", i)
+            if j < 0:
+                raise ValueError(f"Unterminated hex block in content '{text}'")
+            out += bytes.fromhex(text[i:j])
+            i = j
+            continue
+        elif ch == "\\" and i + 1 < n:
+            i += 1
+            out += text[i].encode("utf-8")
+        else:
+            out += ch.encode("utf-8")
+        i += 1
+    return bytes(out)
+
+
+@_direct_init
+@dataclass(**_SLOTS)
 class SnortRule:
     """Represents a complete Snort IDS/IPS rule."""
 
+    # Memoized renders, digests and promoted contents (see _memoized)
+    _memo: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+
     action: str = "alert"
     protocol: str = "tcp"
     src_ip: str = "any"
@@ -62,7 +239,7 @@ class SnortRule:
     rev: int = 1
     classtype: str = ""
     priority: int = 0
-    references: List[str] = field(default_factory=list)
+    references: List[str] = field(default_factory=_TrackedList)
 
     # Legacy single-content fields (backward compat)
     content: str = ""
@@ -71,13 +248,13 @@ class SnortRule:
     content_http_uri: bool = False
     content_http_header: bool = False
     pcre: str = ""
-    depth: int = 0
-    offset: int = 0
-    distance: int = 0
-    within: int = 0
+    depth: Optional[int] = None
+    offset: Optional[int] = None
+    distance: Optional[int] = None
+    within: Optional[int] = None
 
     # Multi-content support
-    contents: List[ContentMatch] = field(default_factory=list)
+    contents: List[ContentMatch] = field(default_factory=_Contents)
 
     flow: str = ""
 
@@ -94,27 +271,94 @@ class SnortRule:
         """Return the effective list of content matches.
 
         If `contents` has entries, use those.
-        Otherwise, promote the legacy single content field.
+        Otherwise, promote the legacy single content field. The promoted
+        list is cached until the rule changes, so treat the
+        result as read-only.
         """
         if self.contents:
             return self.contents
         if self.content:
-            return [ContentMatch(
-                content=self.content,
-                nocase=self.content_nocase,
-                negated=self.content_negated,
-                http_uri=self.content_http_uri,
-                http_header=self.content_http_header,
-                depth=self.depth,
-                offset=self.offset,
-                distance=self.distance,
-                within=self.within,
-            )]
+            return self._memoized("matches", self._promote_content)
         return []
 
+    def _promote_content(self) -> List[ContentMatch]:
+        return [ContentMatch(
+            content=self.content,
+            nocase=self.content_nocase,
+            negated=self.content_negated,
+            http_uri=self.content_http_uri,
+            http_header=self.content_http_header,
+            depth=self.depth,
+            offset=self.offset,
+            distance=self.distance,
+            within=self.within,
+        )]
+
+    def snapshot(self) -> tuple:
+        """Hashable snapshot of every field value, including nested contents."""
+        return (
+            _scalar_values(self),
+            tuple(self.references),
+            tuple(map(_content_values, self.contents)),
+        )
+
+    def _memoized(self, key, compute):
+        """Return the cached result for *key*, computing it on first use.
+
+        The memo is emptied by any change to the rule: assigning a field,
+        changing ``references`` or ``contents`` in place, or editing one of
+        its ContentMatch entries. A ContentMatch shared between two rules
+        only invalidates the one that holds it last; copy() does not share.
+        """
+        memo = self._memo
+        if memo is None:
+            memo = {}
+            self._attach_memo(memo)
+        value = memo.get(key)
+        if value is None:
+            value = memo[key] = compute()
+        return value
+
+    def _attach_memo(self, memo: dict):
+        _set_field(self, "_memo", memo)
+        for name in _LIST_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, _TrackedList):
+                value._bind(memo)
+
+    def __setattr__(self, name, value):
+        if name in _LIST_FIELDS and type(value) is list:
+            value = _LIST_FIELDS[name](value)
+        _set_field(self, name, value)
+        memo = self._memo
+        if memo is not None:
+            memo.clear()
+            if isinstance(value, _TrackedList):
+                value._bind(memo)
+
+    def __reduce__(self):
+        # Rebuilt through __init__; the memo is not worth shipping to another process
+        return type(self), _field_values(self)
+
+    def copy(self) -> "SnortRule":
+        """Return an independent copy (lists and content matches are not shared)."""
+        # Positional __init__ is several times faster than copy.copy, which
+        # goes through __reduce_ex__ for slotted instances. __init__ copies
+        # both lists; the content matches are copied here.
+        dup = type(self)(*_field_values(self))
+        contents = _Contents([ContentMatch(*_content_values(cm)) for cm in self.contents])
+        _set_field(dup, "contents", contents)
+        # The copy is equal to this rule, so it can start from the same entries
+        if self._memo:
+            dup._attach_memo(dict(self._memo))
+        return dup
+
     # ── Snort 2 Build ──
 
     def build(self) -> str:
+        return self._memoized("snort2", self._render)
+
+    def _render(self) -> str:
         header = self._build_header()
         options = self._build_options()
         return f"{header} ({options})"
@@ -135,22 +379,26 @@ class SnortRule:
         # Content matches (multi or single)
         for cm in self.get_content_matches():
             prefix = "!" if cm.negated else ""
-            content_str = f'content:"{prefix}{cm.content}"'
+            content_str = f'content:{prefix}"{cm.content}"'
             if cm.nocase:
                 content_str += "; nocase"
             if cm.http_uri:
                 content_str += "; http_uri"
             if cm.http_header:
                 content_str += "; http_header"
+            if cm.buffer:
+                content_str += f"; {cm.buffer}"
             opts.append(content_str)
-            if cm.depth > 0:
+            if cm.depth is not None:
                 opts.append(f"depth:{cm.depth}")
-            if cm.offset > 0:
+            if cm.offset is not None:
                 opts.append(f"offset:{cm.offset}")
-            if cm.distance > 0:
+            if cm.distance is not None:
                 opts.append(f"distance:{cm.distance}")
-            if cm.within > 0:
+            if cm.within is not None:
                 opts.append(f"within:{cm.within}")
+            if cm.modifiers:
+                opts.append(cm.modifiers)
 
         if self.pcre:
             opts.append(f'pcre:"{self.pcre}"')
@@ -186,6 +434,9 @@ class SnortRule:
         - Threshold uses 'detection_filter' keyword for Snort 3
         - Positional modifiers use space instead of colon (depth 4 vs depth:4)
         """
+        return self._memoized("snort3", self._render_snort3)
+
+    def _render_snort3(self) -> str:
         header = self._build_header()
         opts = self._build_snort3_options()
         return f"{header} ({opts})"
@@ -198,29 +449,40 @@ class SnortRule:
             opts.append(f"flow:{self.flow}")
 
         # Content matches — Snort 3 sticky buffers
+        buffer = None
         for cm in self.get_content_matches():
             prefix = "!" if cm.negated else ""
 
-            # Sticky buffer declared BEFORE content in Snort 3
+            # Sticky buffer declared BEFORE content in Snort 3; it stays
+            # active, so switch back to pkt_data for plain payload contents
             if cm.http_uri:
-                opts.append("http.uri")
+                wanted = "http.uri"
             elif cm.http_header:
-                opts.append("http.header")
-
-            content_str = f'content:"{prefix}{cm.content}"'
+                wanted = "http.header"
+            elif cm.buffer:
+                wanted = cm.buffer
+            else:
+                wanted = "pkt_data" if buffer else None
+            if wanted != buffer:
+                opts.append(wanted)
+                buffer = wanted
+
+            content_str = f'content:{prefix}"{cm.content}"'
             if cm.nocase:
                 content_str += "; nocase"
             opts.append(content_str)
 
             # Snort 3 uses space instead of colon for positional mods
-            if cm.depth > 0:
+            if cm.depth is not None:
                 opts.append(f"depth {cm.depth}")
-            if cm.offset > 0:
+            if cm.offset is not None:
                 opts.append(f"offset {cm.offset}")
-            if cm.distance > 0:
+            if cm.distance is not None:
                 opts.append(f"distance {cm.distance}")
-            if cm.within > 0:
+            if cm.within is not None:
                 opts.append(f"within {cm.within}")
+            if cm.modifiers:
+                opts.extend(_snort3_modifiers(cm.modifiers))
 
         if self.pcre:
             opts.append(f'pcre:"{self.pcre}"')
@@ -256,7 +518,7 @@ class SnortRule:
             "dst_ip": self.dst_ip, "dst_port": self.dst_port,
             "msg": self.msg, "sid": self.sid, "rev": self.rev,
             "classtype": self.classtype, "priority": self.priority,
-            "references": self.references,
+            "references": list(self.references),
             "content": self.content,
             "content_nocase": self.content_nocase,
             "content_negated": self.content_negated,
@@ -276,21 +538,148 @@ class SnortRule:
 
     @classmethod
     def from_dict(cls, data: dict) -> "SnortRule":
+        # Setting onto a default instance beats cls(**kwargs): JSON keys are
+        # not interned, which makes keyword matching slow for 30 fields.
         rule = cls()
+        rule.update(data)
+        return rule
+
+    def update(self, data: dict):
+        """Set the fields present in *data* (``to_dict`` form); unknown keys are ignored."""
+        # Stored directly and the memo cleared once at the end, instead of
+        # going through __setattr__ for every key
         for key, value in data.items():
+            loader = _RULE_LOADERS.get(key, _UNKNOWN)
+            if loader is None:
+                _set_field(self, key, value)
+            elif loader is not _UNKNOWN:
+                _set_field(self, key, loader(value))
             # Backward compat: accept old "reference" string key
-            if key == "reference" and isinstance(value, str):
+            elif key == "reference" and isinstance(value, str):
                 if value:
-                    rule.references = [value]
-                continue
-            # Deserialize contents list
-            if key == "contents" and isinstance(value, list):
-                rule.contents = [
-                    ContentMatch.from_dict(c) if isinstance(c, dict) else c
-                    for c in value
-                    if isinstance(c, dict) and c.get("content")
-                ]
-                continue
-            if hasattr(rule, key):
-                setattr(rule, key, value)
-        return rule
+                    _set_field(self, "references", _TrackedList([value]))
+        memo = self._memo
+        if memo is not None:
+            memo.clear()
+            self._attach_memo(memo)
+
+    def diff(self, other: "SnortRule") -> List[str]:
+        """Names of the fields whose values differ between this rule and *other*."""
+        return [name for name in _RULE_FIELDS if getattr(self, name) != getattr(other, name)]
+
+
+def rule_dict_errors(data) -> List[str]:
+    """Type errors in a rule given in ``to_dict`` form, e.g. from an API request.
+
+    ``from_dict`` stores values as given, so a number where a string
+    belongs only fails later, deep inside whatever uses the rule. Unknown
+    keys are ignored, as by ``from_dict``.
+    """
+    if not isinstance(data, dict):
+        return ["Rule must be a JSON object."]
+    errors = []
+    for key, value in data.items():
+        expected = _RULE_TYPES.get(key)
+        if expected is None:
+            continue
+        if not _is_type(value, expected):
+            errors.append(f"'{key}' must be {_TYPE_NAMES[expected]}.")
+        elif key == "references" and not all(isinstance(ref, str) for ref in value):
+            errors.append("'references' must be a list of strings.")
+        elif key == "contents":
+            for i, cm in enumerate(value):
+                if not isinstance(cm, dict):
+                    errors.append(f"Content #{i + 1} must be a JSON object.")
+                    continue
+                errors.extend(
+                    f"Content #{i + 1}: '{name}' must be {_TYPE_NAMES[_CONTENT_TYPES[name]]}."
+                    for name, item in cm.items()
+                    if name in _CONTENT_TYPES and not _is_type(item, _CONTENT_TYPES[name])
+                )
+    return errors
+
+
+def clear_unset_positions(data: dict) -> dict:
+    """Upgrade a rule dict from before positional modifiers were optional.
+
+    Older JSON exports and binary projects stored an unset ``depth``,
+    ``offset``, ``distance`` or ``within`` as 0; this maps those zeros to
+    ``None`` in *data* and its contents, in place, and returns *data*.
+    """
+    for item in [data, *(cm for cm in data.get("contents") or () if isinstance(cm, dict))]:
+        for name in POSITIONAL_FIELDS:
+            if type(item.get(name)) is int and item[name] == 0:
+                item[name] = None
+    return data
+
+
+def _is_type(value, expected) -> bool:
+    # JSON booleans are ints to Python; only accept them where a bool belongs
+    return isinstance(value, expected) and (expected is bool or not isinstance(value, bool))
+
+
+def _snort3_modifiers(modifiers: str) -> List[str]:
+    """Snort 3 spelling of verbatim Snort 2 content modifiers.
+
+    ``fast_pattern:only`` becomes plain ``fast_pattern`` and
+    ``fast_pattern:<offset>,<length>`` its offset/length options; other
+    ``key:value`` modifiers take a space instead of the colon.
+    """
+    out = []
+    for mod in modifiers.split(";"):
+        key, _, value = mod.strip().partition(":")
+        key, value = key.strip(), value.strip()
+        if not key:
+            continue
+        if key == "fast_pattern" and value:
+            out.append("fast_pattern")
+            start, _, length = value.partition(",")
+            if length:
+                out.append(f"fast_pattern_offset {start.strip()}")
+                out.append(f"fast_pattern_length {length.strip()}")
+        else:
+            out.append(f"{key} {value}" if value else key)
+    return out
+
+
+def _load_references(value):
+    return _TrackedList(value) if isinstance(value, list) else value
+
+
+def _load_contents(value):
+    # Deserialize contents list
+    if not isinstance(value, list):
+        return value
+    return _Contents([
+        ContentMatch.from_dict(c) for c in value
+        if isinstance(c, dict) and c.get("content")
+    ])
+
+
+_UNKNOWN = object()
+
+# Public data fields, i.e. everything except private bookkeeping like _memo
+_RULE_FIELDS = tuple(f.name for f in fields(SnortRule) if not f.name.startswith("_"))
+
+_field_values = attrgetter(*_RULE_FIELDS)
+_scalar_values = attrgetter(*(n for n in _RULE_FIELDS if n not in ("references", "contents")))
+_LIST_FIELDS = {"references": _TrackedList, "contents": _Contents}
+
+# Per-field loader table used by from_dict (None = store as-is), generated
+# from the dataclass fields so new fields are picked up automatically.
+_RULE_LOADERS = {
+    name: (_intern if name in INTERNED_FIELDS else None) for name in _RULE_FIELDS
+}
+_RULE_LOADERS["references"] = _load_references
+_RULE_LOADERS["contents"] = _load_contents
+
+_OPTIONAL_INT = (int, type(None))
+_TYPE_NAMES = {
+    str: "a string", int: "an integer", bool: "true or false", list: "a list",
+    _OPTIONAL_INT: "an integer or null",
+}
+_RULE_TYPES = {name: type(value) for name, value in SnortRule().to_dict().items()}
+_RULE_TYPES["reference"] = str
+_CONTENT_TYPES = {name: type(value) for name, value in ContentMatch().to_dict().items()}
+for _types in (_RULE_TYPES, _CONTENT_TYPES):
+    _types.update(dict.fromkeys(POSITIONAL_FIELDS, _OPTIONAL_INT))
@@ -0,0 +1,321 @@
+"""
+SnortForge - Columnar Rule Collection
+
+`RuleSet` stores large rule corpora column by column instead of as a list
+of SnortRule objects:
+
+  - Header fields, classtype and flow are dictionary-encoded into
+    ``array('I')`` columns (one small string table per column)
+  - sid, rev and priority live in ``array('q')`` columns
+  - Derived facts (has content, has PCRE, ...) are packed into a bit-flag
+    column so they can be filtered without touching the rules
+  - Everything else is kept as a compact tuple per rule
+
+Hash indexes on sid, classtype, protocol and dst_port make typical queries
+over a few hundred thousand rules take milliseconds. SnortRule objects are
+only built when a row is actually read.
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .rule import ContentMatch, SnortRule, _content_values
+
+# Dictionary-encoded string columns
+STRING_COLUMNS = (
+    "action", "protocol", "src_ip", "src_port", "direction",
+    "dst_ip", "dst_port", "classtype", "flow",
+)
+# Integer columns
+INT_COLUMNS = ("sid", "rev", "priority")
+# Columns with a value -> rows hash index
+INDEXED_COLUMNS = ("sid", "classtype", "protocol", "dst_port")
+
+# Remaining scalar fields, stored per row as a tuple
+_PAYLOAD_FIELDS = (
+    "msg", "content", "content_nocase", "content_negated", "content_http_uri",
+    "content_http_header", "pcre", "depth", "offset", "distance", "within",
+    "threshold_type", "threshold_track", "threshold_count", "threshold_seconds",
+    "metadata",
+)
+
+# ── Row flags ──
+
+FLAG_CONTENT = 1 << 0
+FLAG_PCRE = 1 << 1
+FLAG_FLOW = 1 << 2
+FLAG_THRESHOLD = 1 << 3
+FLAG_REFERENCE = 1 << 4
+FLAG_METADATA = 1 << 5
+FLAG_HTTP = 1 << 6
+FLAG_NOCASE = 1 << 7
+
+FLAGS = {
+    "has_content": FLAG_CONTENT,
+    "has_pcre": FLAG_PCRE,
+    "has_flow": FLAG_FLOW,
+    "has_threshold": FLAG_THRESHOLD,
+    "has_reference": FLAG_REFERENCE,
+    "has_metadata": FLAG_METADATA,
+    "has_http": FLAG_HTTP,
+    "has_nocase": FLAG_NOCASE,
+}
+
+
+def rule_flags(rule: SnortRule) -> int:
+    """Compute the bit flags stored for *rule*."""
+    flags = 0
+    matches = rule.get_content_matches()
+    if matches:
+        flags |= FLAG_CONTENT
+        if any(cm.http_uri or cm.http_header or cm.buffer.startswith("http_") for cm in matches):
+            flags |= FLAG_HTTP
+        if any(cm.nocase for cm in matches):
+            flags |= FLAG_NOCASE
+    if rule.pcre:
+        flags |= FLAG_PCRE
+    if rule.flow:
+        flags |= FLAG_FLOW
+    if rule.threshold_type and rule.threshold_count > 0 and rule.threshold_seconds > 0:
+        flags |= FLAG_THRESHOLD
+    if any(rule.references):
+        flags |= FLAG_REFERENCE
+    if rule.metadata:
+        flags |= FLAG_METADATA
+    return flags
+
+
+class _StringColumn:
+    """Dictionary-encoded string column."""
+
+    __slots__ = ("codes", "values", "lookup")
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[str] = []
+        self.lookup: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class RuleSet:
+    """Append-mostly columnar container for large rule corpora."""
+
+    def __init__(self, rules: Iterable[SnortRule] = ()):
+        self._strings = {name: _StringColumn() for name in STRING_COLUMNS}
+        self._ints = {name: array("q") for name in INT_COLUMNS}
+        self._flags = array("H")
+        self._payload: List[tuple] = []
+        self._indexes: Dict[str, Dict[object, array]] = {name: {} for name in INDEXED_COLUMNS}
+        # Rows removed from a bucket but not yet dropped from its array, per
+        # index and value; an entry (even an empty one) also means the array
+        # is out of order. Buckets are compacted when next read.
+        self._stale: Dict[str, Dict[object, set]] = {name: {} for name in INDEXED_COLUMNS}
+        self.extend(rules)
+
+    # ── Loading ──
+
+    def add(self, rule: SnortRule) -> int:
+        """Append *rule* and return its row number."""
+        row = len(self._payload)
+        for name, column in self._strings.items():
+            column.codes.append(column.encode(getattr(rule, name)))
+        for name, column in self._ints.items():
+            column.append(getattr(rule, name))
+        self._flags.append(rule_flags(rule))
+        self._payload.append(self._pack(rule))
+        for name in INDEXED_COLUMNS:
+            self._index_add(name, getattr(rule, name), row)
+        return row
+
+    def extend(self, rules: Iterable[SnortRule]):
+        for rule in rules:
+            self.add(rule)
+
+    def replace(self, row: int, rule: SnortRule):
+        """Overwrite *row* with *rule*, keeping every index in sync."""
+        self._check_row(row)
+        for name in INDEXED_COLUMNS:
+            self._index_remove(name, self.value(row, name), row)
+        for name, column in self._strings.items():
+            column.codes[row] = column.encode(getattr(rule, name))
+        for name, column in self._ints.items():
+            column[row] = getattr(rule, name)
+        self._flags[row] = rule_flags(rule)
+        self._payload[row] = self._pack(rule)
+        for name in INDEXED_COLUMNS:
+            self._index_add(name, getattr(rule, name), row)
+
+    @staticmethod
+    def _pack(rule: SnortRule) -> tuple:
+        return (
+            tuple(getattr(rule, name) for name in _PAYLOAD_FIELDS),
+            tuple(rule.references),
+            tuple(map(_content_values, rule.contents)),
+        )
+
+    def _index_add(self, name, value, row):
+        rows = self._indexes[name].get(value)
+        if rows is None:
+            rows = self._indexes[name][value] = array("I")
+        stale = self._stale[name].get(value)
+        if stale is not None and row in stale:
+            # Removed and re-added to the same bucket: still in the array
+            stale.discard(row)
+            return
+        if rows and rows[-1] > row:
+            self._stale[name].setdefault(value, set())
+        rows.append(row)
+
+    def _index_remove(self, name, value, row):
+        # array.remove is a linear scan, so removals are only recorded here
+        self._stale[name].setdefault(value, set()).add(row)
+
+    def _bucket(self, name, value) -> Optional[array]:
+        """Rows with *value* in indexed column *name*, ascending; None if there are none."""
+        index = self._indexes[name]
+        removed = self._stale[name].pop(value, None)
+        if removed is None:
+            return index.get(value)
+        rows = array("I", sorted(row for row in index[value] if row not in removed))
+        if rows:
+            index[value] = rows
+            return rows
+        del index[value]
+        return None
+
+    def _index(self, name: str) -> Dict[object, array]:
+        """Index *name* with every bucket compacted."""
+        for value in list(self._stale[name]):
+            self._bucket(name, value)
+        return self._indexes[name]
+
+    # ── Access ──
+
+    def __len__(self) -> int:
+        return len(self._payload)
+
+    def __getitem__(self, row: int) -> SnortRule:
+        return self.rule(row)
+
+    def __iter__(self) -> Iterator[SnortRule]:
+        for row in range(len(self)):
+            yield self.rule(row)
+
+    def _check_row(self, row: int):
+        if not 0 <= row < len(self._payload):
+            raise IndexError(f"RuleSet row {row} out of range")
+
+    def value(self, row: int, name: str):
+        """Read one column value without building the rule."""
+        if name in self._strings:
+            column = self._strings[name]
+            return column.values[column.codes[row]]
+        if name in self._ints:
+            return self._ints[name][row]
+        if name in FLAGS:
+            return bool(self._flags[row] & FLAGS[name])
+        raise KeyError(f"Unknown RuleSet column '{name}'")
+
+    def rule(self, row: int) -> SnortRule:
+        """Build the SnortRule stored at *row*."""
+        self._check_row(row)
+        rule = SnortRule()
+        for name, column in self._strings.items():
+            setattr(rule, name, column.values[column.codes[row]])
+        for name, column in self._ints.items():
+            setattr(rule, name, column[row])
+        scalars, references, contents = self._payload[row]
+        for name, value in zip(_PAYLOAD_FIELDS, scalars):
+            setattr(rule, name, value)
+        rule.references = list(references)
+        rule.contents = [ContentMatch(*values) for values in contents]
+        return rule
+
+    def rules(self, rows: Iterable[int]) -> Iterator[SnortRule]:
+        for row in rows:
+            yield self.rule(row)
+
+    def distinct(self, name: str) -> List:
+        """Distinct values of an indexed or string column."""
+        if name in self._indexes:
+            return list(self._index(name))
+        if name in self._strings:
+            return list(self._strings[name].values)
+        raise KeyError(f"Column '{name}' is neither indexed nor dictionary-encoded")
+
+    # ── Queries ──
+
+    def find(self, **criteria) -> List[int]:
+        """Return row numbers matching every criterion.
+
+        Keyword names are column names (equality match) or flag names from
+        ``FLAGS`` with a bool, e.g.::
+
+            rs.find(classtype="web-application-attack", protocol="tcp",
+                    dst_port="$HTTP_PORTS", has_flow=False)
+            rs.find(has_pcre=True, has_content=False)
+
+        Indexed columns narrow the candidate rows first; the remaining
+        criteria are checked against the columns.
+        """
+        mask = want = 0
+        columns = {}
+        for name, value in criteria.items():
+            if name in FLAGS:
+                mask |= FLAGS[name]
+                if value:
+                    want |= FLAGS[name]
+            elif name in self._strings or name in self._ints:
+                columns[name] = value
+            else:
+                raise ValueError(f"Unknown RuleSet criterion '{name}'")
+
+        # Start from the smallest index bucket, if any criterion is indexed
+        rows = None
+        for name in INDEXED_COLUMNS:
+            if name in columns:
+                bucket = self._bucket(name, columns[name])
+                if bucket is None:
+                    return []
+                if rows is None or len(bucket) < len(rows):
+                    rows, narrowed_by = bucket, name
+        if rows is None:
+            rows = range(len(self))
+        else:
+            del columns[narrowed_by]
+
+        for name, value in columns.items():
+            if name in self._strings:
+                column = self._strings[name]
+                code = column.lookup.get(value)
+                if code is None:
+                    return []
+                codes = column.codes
+                rows = [r for r in rows if codes[r] == code]
+            else:
+                ints = self._ints[name]
+                rows = [r for r in rows if ints[r] == value]
+
+        if mask:
+            flags = self._flags
+            rows = [r for r in rows if flags[r] & mask == want]
+        return list(rows)
+
+    def by_sid(self, sid: int) -> List[SnortRule]:
+        return list(self.rules(self._bucket("sid", sid) or ()))
+
+    def count_by(self, name: str) -> Dict[object, int]:
+        """Number of rows per value of an indexed column."""
+        if name not in self._indexes:
+            raise KeyError(f"Column '{name}' is not indexed")
+        return {value: len(rows) for value, rows in self._index(name).items()}
+
+    def first(self, **criteria) -> Optional[SnortRule]:
+        rows = self.find(**criteria)
+        return self.rule(rows[0]) if rows else None
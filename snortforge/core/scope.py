@@ -0,0 +1,591 @@
+"""
+SnortForge - Rule Scope Resolution
+
+Resolves the address and port fields of rule headers against the
+``ipvar``/``portvar`` definitions of a snort.conf (or the variable
+assignments of a snort.lua):
+
+  - ``$VAR`` references, ``[...]`` lists (nested, comma or space separated),
+    ``!`` negations, CIDRs, IPv6 and port ranges (``1024:``, ``:1023``) are
+    expanded into a `RangeSet` — sorted, collapsed, inclusive integer
+    ranges. IPv4 addresses live in the IPv4-mapped part of the IPv6 space,
+    so one set covers both families.
+  - `ScopeIndex` resolves a whole ruleset and keeps destination addresses
+    and ports in interval trees, so finding every rule that applies to a
+    given host:port only visits the rules whose ranges contain it. It also
+    reports rules whose scope is empty (they can never match) and rules
+    fully shadowed by another rule with the same action and detection
+    options.
+
+Usage::
+
+    variables = Variables.load("/etc/snort/snort.conf")
+    index = ScopeIndex(rules, variables)
+    index.lookup("10.0.0.5", 443, protocol="tcp")   # -> rule indices
+    index.empty_rules(), index.shadowed_rules()
+"""
+
+import ipaddress
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .canonical import _POS, canonical_state
+from .rule import SnortRule
+
+_V4_BASE = 0xFFFF << 32           # ::ffff:0.0.0.0
+_V4_LAST = _V4_BASE + (1 << 32) - 1
+_IP_MAX = (1 << 128) - 1
+_PORT_MAX = 65535
+
+# Protocols whose rules ignore the port fields
+_PORTLESS_PROTOCOLS = frozenset({"ip", "icmp"})
+
+# Options that decide whether two rules detect the same traffic
+_DETECTION_FIELDS = (
+    "action", "pcre", "flow", "threshold_type", "threshold_track",
+    "threshold_count", "threshold_seconds",
+)
+
+
+class ScopeError(ValueError):
+    pass
+
+
+# ── Range sets ──
+
+class RangeSet:
+    """Immutable set of integers stored as sorted, disjoint, inclusive ranges."""
+
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        merged = []
+        for lo, hi in sorted(ranges):
+            if merged and lo <= merged[-1][1] + 1:
+                if hi > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], hi)
+            else:
+                merged.append((lo, hi))
+        self.ranges = tuple(merged)
+
+    def __bool__(self) -> bool:
+        return bool(self.ranges)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.ranges)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RangeSet) and self.ranges == other.ranges
+
+    def __hash__(self) -> int:
+        return hash(self.ranges)
+
+    def __repr__(self) -> str:
+        return f"RangeSet({list(self.ranges)!r})"
+
+    def __contains__(self, value: int) -> bool:
+        i = bisect_right(self.ranges, (value, float("inf"))) - 1
+        return i >= 0 and self.ranges[i][1] >= value
+
+    def union(self, other: "RangeSet") -> "RangeSet":
+        return RangeSet(self.ranges + other.ranges)
+
+    def complement(self, lo: int, hi: int) -> "RangeSet":
+        """Everything in ``[lo, hi]`` that is not in this set."""
+        out, start = [], lo
+        for r_lo, r_hi in self.ranges:
+            if r_lo > start:
+                out.append((start, min(r_lo - 1, hi)))
+            start = max(start, r_hi + 1)
+            if start > hi:
+                break
+        if start <= hi:
+            out.append((start, hi))
+        return RangeSet(out)
+
+    def difference(self, other: "RangeSet") -> "RangeSet":
+        out = []
+        others = other.ranges
+        j = 0
+        for lo, hi in self.ranges:
+            while j < len(others) and others[j][1] < lo:
+                j += 1
+            k, start = j, lo
+            while k < len(others) and others[k][0] <= hi:
+                if others[k][0] > start:
+                    out.append((start, others[k][0] - 1))
+                start = max(start, others[k][1] + 1)
+                k += 1
+            if start <= hi:
+                out.append((start, hi))
+        return RangeSet(out)
+
+    def issubset(self, other: "RangeSet") -> bool:
+        others = other.ranges
+        j = 0
+        for lo, hi in self.ranges:
+            while j < len(others) and others[j][1] < lo:
+                j += 1
+            if j == len(others) or others[j][0] > lo or others[j][1] < hi:
+                return False
+        return True
+
+
+ANY_IP = RangeSet([(0, _IP_MAX)])
+ANY_PORT = RangeSet([(0, _PORT_MAX)])
+
+
+def ip_point(host: str) -> int:
+    """Integer position of *host* in the combined address space."""
+    addr = ipaddress.ip_address(host.strip())
+    return _V4_BASE + int(addr) if addr.version == 4 else int(addr)
+
+
+def ip_cidrs(ips: RangeSet) -> List[str]:
+    """Collapsed CIDR strings for an address set (``["any"]`` for everything).
+
+    Sets that are mostly "everything but ..." come back as negated entries
+    (``["!10.0.0.0/8"]``), which reads the same way in a Snort list.
+    """
+    if ips == ANY_IP:
+        return ["any"]
+    cidrs = _cidrs(ips)
+    negated = _cidrs(ips.complement(0, _IP_MAX))
+    return cidrs if len(cidrs) <= len(negated) else ["!" + cidr for cidr in negated]
+
+
+def _cidrs(ips: RangeSet) -> List[str]:
+    out = []
+    for lo, hi in ips:
+        pieces = []
+        if lo < _V4_BASE:
+            pieces.append((lo, min(hi, _V4_BASE - 1), ipaddress.IPv6Address, 0))
+        if lo <= _V4_LAST and hi >= _V4_BASE:
+            pieces.append((max(lo, _V4_BASE), min(hi, _V4_LAST), ipaddress.IPv4Address, _V4_BASE))
+        if hi > _V4_LAST:
+            pieces.append((max(lo, _V4_LAST + 1), hi, ipaddress.IPv6Address, 0))
+        for p_lo, p_hi, cls, base in pieces:
+            out.extend(str(net) for net in ipaddress.summarize_address_range(cls(p_lo - base), cls(p_hi - base)))
+    return out
+
+
+def port_ranges(ports: RangeSet) -> List[str]:
+    """Snort-style port strings for a port set (``["any"]`` for everything)."""
+    if ports == ANY_PORT:
+        return ["any"]
+    return [str(lo) if lo == hi else f"{lo}:{hi}" for lo, hi in ports]
+
+
+# ── Variables ──
+
+_CONF_VAR_RE = re.compile(r'^\s*(ipvar|portvar|var)\s+(\w+)\s+(.+?)\s*$')
+_LUA_VAR_RE = re.compile(
+    r'\b([A-Za-z_]\w*)\s*=\s*(?:\'([^\']*)\'|"([^"]*)"|\[\[(.*?)\]\])', re.DOTALL
+)
+_PORT_RE = re.compile(r'^(\d*):?(\d*)$')
+
+
+def _split_list(spec: str) -> List[str]:
+    """Split the top level of a list body on commas and whitespace."""
+    items, depth, current = [], 0, []
+    for ch in spec:
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+            if depth < 0:
+                raise ScopeError(f"Unbalanced ']' in '{spec}'")
+        if depth == 0 and (ch == "," or ch.isspace()):
+            if current:
+                items.append("".join(current))
+                current = []
+            continue
+        current.append(ch)
+    if depth:
+        raise ScopeError(f"Unbalanced '[' in '{spec}'")
+    if current:
+        items.append("".join(current))
+    return items
+
+
+class Variables:
+    """``ipvar``/``portvar`` definitions and resolution of header fields."""
+
+    def __init__(self, ipvars: Optional[Dict[str, str]] = None,
+                 portvars: Optional[Dict[str, str]] = None):
+        self.ipvars = dict(ipvars or {})
+        self.portvars = dict(portvars or {})
+        self._ip_cache: Dict[str, RangeSet] = {}
+        self._port_cache: Dict[str, RangeSet] = {}
+
+    @classmethod
+    def from_conf(cls, text: str) -> "Variables":
+        """Read ``ipvar``, ``portvar`` and legacy ``var`` lines of a snort.conf."""
+        variables = cls()
+        for line in re.sub(r'\\\s*\n', " ", text).splitlines():
+            m = _CONF_VAR_RE.match(line)
+            if not m:
+                continue
+            kind, name, value = m.groups()
+            if kind == "portvar" or (kind == "var" and "PORT" in name):
+                variables.portvars[name] = value
+            else:
+                variables.ipvars[name] = value
+        return variables
+
+    @classmethod
+    def from_lua(cls, text: str) -> "Variables":
+        """Read string assignments of a snort.lua; names containing PORT are port variables."""
+        variables = cls()
+        text = re.sub(r'--(?!\[\[)[^\n]*', "", text)
+        for m in _LUA_VAR_RE.finditer(text):
+            name = m.group(1)
+            value = next(v for v in m.groups()[1:] if v is not None).strip()
+            if "PORT" in name:
+                variables.portvars[name] = value
+            elif "NET" in name or "SERVER" in name or name.endswith("_IP"):
+                variables.ipvars[name] = value
+        return variables
+
+    @classmethod
+    def load(cls, path: str) -> "Variables":
+        """Load a snort.conf or, by extension, a snort.lua."""
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        return cls.from_lua(text) if path.endswith(".lua") else cls.from_conf(text)
+
+    @classmethod
+    def parse(cls, text: str) -> "Variables":
+        """Read config text of either format, telling them apart by content."""
+        if re.search(r'^\s*(ipvar|portvar|var)\s', text, re.MULTILINE):
+            return cls.from_conf(text)
+        return cls.from_lua(text)
+
+    # ── Addresses ──
+
+    def ips(self, spec: str) -> RangeSet:
+        """Resolve an address field (``any``, ``$VAR``, ``!x``, ``[...]``, CIDR)."""
+        spec = spec.strip()
+        cached = self._ip_cache.get(spec)
+        if cached is None:
+            cached = self._ip_cache[spec] = self._resolve_ips(spec, ())
+        return cached
+
+    def _resolve_ips(self, spec: str, seen: tuple) -> RangeSet:
+        spec = spec.strip()
+        if not spec:
+            raise ScopeError("Empty address")
+        if spec.startswith("!"):
+            return self._resolve_ips(spec[1:], seen).complement(0, _IP_MAX)
+        if spec.startswith("["):
+            if not spec.endswith("]"):
+                raise ScopeError(f"Unbalanced address list '{spec}'")
+            return self._resolve_list(spec[1:-1], seen, self._resolve_ips, ANY_IP, _IP_MAX)
+        if spec.startswith("$"):
+            return self._resolve_var(spec[1:], self.ipvars, seen, self._resolve_ips)
+        if spec == "any":
+            return ANY_IP
+        items = _split_list(spec)
+        if len(items) > 1:
+            return self._resolve_list(spec, seen, self._resolve_ips, ANY_IP, _IP_MAX)
+        try:
+            net = ipaddress.ip_network(spec, strict=False)
+        except ValueError:
+            raise ScopeError(f"Invalid address '{spec}'") from None
+        lo = int(net.network_address) + (_V4_BASE if net.version == 4 else 0)
+        return RangeSet([(lo, lo + net.num_addresses - 1)])
+
+    # ── Ports ──
+
+    def ports(self, spec: str) -> RangeSet:
+        """Resolve a port field (``any``, ``$VAR``, ``!x``, ``[...]``, ``lo:hi``)."""
+        spec = spec.strip()
+        cached = self._port_cache.get(spec)
+        if cached is None:
+            cached = self._port_cache[spec] = self._resolve_ports(spec, ())
+        return cached
+
+    def _resolve_ports(self, spec: str, seen: tuple) -> RangeSet:
+        spec = spec.strip()
+        if not spec:
+            raise ScopeError("Empty port")
+        if spec.startswith("!"):
+            return self._resolve_ports(spec[1:], seen).complement(0, _PORT_MAX)
+        if spec.startswith("["):
+            if not spec.endswith("]"):
+                raise ScopeError(f"Unbalanced port list '{spec}'")
+            return self._resolve_list(spec[1:-1], seen, self._resolve_ports, ANY_PORT, _PORT_MAX)
+        if spec.startswith("$"):
+            return self._resolve_var(spec[1:], self.portvars, seen, self._resolve_ports)
+        if spec == "any":
+            return ANY_PORT
+        items = _split_list(spec)
+        if len(items) > 1:
+            return self._resolve_list(spec, seen, self._resolve_ports, ANY_PORT, _PORT_MAX)
+        m = _PORT_RE.match(spec)
+        if not m or spec == ":":
+            raise ScopeError(f"Invalid port '{spec}'")
+        if ":" in spec:
+            lo = int(m.group(1)) if m.group(1) else 0
+            hi = int(m.group(2)) if m.group(2) else _PORT_MAX
+        else:
+            lo = hi = int(m.group(1))
+        if hi > _PORT_MAX or lo > hi:
+            raise ScopeError(f"Invalid port range '{spec}'")
+        return RangeSet([(lo, hi)])
+
+    # ── Shared ──
+
+    def _resolve_var(self, name, table, seen, resolve) -> RangeSet:
+        if name not in table:
+            raise ScopeError(f"Undefined variable '${name}'")
+        if name in seen:
+            raise ScopeError(f"Variable '${name}' refers to itself")
+        return resolve(table[name], seen + (name,))
+
+    @staticmethod
+    def _resolve_list(body, seen, resolve, universe, maximum) -> RangeSet:
+        # Snort semantics: the union of the plain entries (everything if
+        # there are none) minus the union of the negated ones
+        include, exclude = [], []
+        for item in _split_list(body):
+            if item.startswith("!"):
+                exclude.extend(resolve(item[1:], seen))
+            else:
+                include.extend(resolve(item, seen))
+        if not include and not exclude:
+            raise ScopeError("Empty list")
+        result = RangeSet(include) if include else universe
+        return result.difference(RangeSet(exclude)) if exclude else result
+
+
+# ── Interval tree ──
+
+class IntervalTree:
+    """Static centered interval tree over inclusive integer intervals.
+
+    Built once from ``(lo, hi, value)`` items; :meth:`stab` returns the
+    values of every interval containing a point and :meth:`overlapping`
+    those intersecting a range, each in O(log n + k).
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int, object]]):
+        self._root = self._build(list(items))
+
+    @classmethod
+    def _build(cls, items):
+        if not items:
+            return None
+        mids = sorted((lo + hi) // 2 for lo, hi, _ in items)
+        center = mids[len(mids) // 2]
+        left, right, here = [], [], []
+        for item in items:
+            if item[1] < center:
+                left.append(item)
+            elif item[0] > center:
+                right.append(item)
+            else:
+                here.append(item)
+        by_lo = sorted(here, key=lambda item: item[0])
+        by_hi = sorted(here, key=lambda item: -item[1])
+        return (
+            center,
+            [item[0] for item in by_lo], [item[2] for item in by_lo],
+            [-item[1] for item in by_hi], [item[2] for item in by_hi],
+            cls._build(left), cls._build(right),
+        )
+
+    def stab(self, point: int) -> List[object]:
+        out = []
+        node = self._root
+        while node is not None:
+            center, los, lo_vals, neg_his, hi_vals, left, right = node
+            if point < center:
+                out.extend(lo_vals[:bisect_right(los, point)])
+                node = left
+            elif point > center:
+                out.extend(hi_vals[:bisect_right(neg_his, -point)])
+                node = right
+            else:
+                out.extend(lo_vals)
+                break
+        return out
+
+    def overlapping(self, lo: int, hi: int) -> List[object]:
+        out = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, los, lo_vals, neg_his, hi_vals, left, right = node
+            if hi < center:
+                out.extend(lo_vals[:bisect_right(los, hi)])
+                stack.append(left)
+            elif lo > center:
+                out.extend(hi_vals[:bisect_right(neg_his, -lo)])
+                stack.append(right)
+            else:
+                out.extend(lo_vals)
+                stack.append(left)
+                stack.append(right)
+        return out
+
+
+# ── Rule scopes ──
+
+class RuleScope:
+    """Resolved header of one rule.
+
+    ``orientations`` holds ``(src_ips, src_ports, dst_ips, dst_ports)``
+    tuples: one for ``->`` rules, both directions for ``<>`` rules.
+    """
+
+    __slots__ = ("protocol", "orientations")
+
+    def __init__(self, rule: SnortRule, variables: Variables):
+        self.protocol = rule.protocol
+        src_ips, dst_ips = variables.ips(rule.src_ip), variables.ips(rule.dst_ip)
+        if rule.protocol in _PORTLESS_PROTOCOLS:
+            src_ports = dst_ports = ANY_PORT
+        else:
+            src_ports, dst_ports = variables.ports(rule.src_port), variables.ports(rule.dst_port)
+        forward = (src_ips, src_ports, dst_ips, dst_ports)
+        if rule.direction == "<>":
+            self.orientations = (forward, (dst_ips, dst_ports, src_ips, src_ports))
+        else:
+            self.orientations = (forward,)
+
+    @property
+    def empty(self) -> bool:
+        return not all(self.orientations[0])
+
+    def covers(self, other: "RuleScope") -> bool:
+        """True when every packet in *other*'s scope is also in this one."""
+        if self.protocol != other.protocol and self.protocol != "ip":
+            return False
+        return all(
+            any(all(a.issubset(b) for a, b in zip(theirs, mine)) for mine in self.orientations)
+            for theirs in other.orientations
+        )
+
+    def to_dict(self) -> dict:
+        src_ips, src_ports, dst_ips, dst_ports = self.orientations[0]
+        return {
+            "protocol": self.protocol,
+            "bidirectional": len(self.orientations) == 2,
+            "src_ip": ip_cidrs(src_ips), "src_port": port_ranges(src_ports),
+            "dst_ip": ip_cidrs(dst_ips), "dst_port": port_ranges(dst_ports),
+        }
+
+
+def _detection_key(rule: SnortRule) -> tuple:
+    scalars, _, contents = canonical_state(rule)
+    return tuple(scalars[_POS[name]] for name in _DETECTION_FIELDS) + (contents,)
+
+
+class ScopeIndex:
+    """Resolved scopes of a ruleset with destination interval indexes.
+
+    Rules are referred to by their position in *rules*. Rules whose header
+    cannot be resolved (undefined variables, bad syntax) are kept out of
+    the indexes and listed in ``errors``.
+    """
+
+    def __init__(self, rules: Iterable[SnortRule], variables: Variables):
+        self.rules: List[SnortRule] = list(rules)
+        self.scopes: List[Optional[RuleScope]] = []
+        self.errors: Dict[int, str] = {}
+        ip_items, port_items = [], []
+        for i, rule in enumerate(self.rules):
+            try:
+                scope = RuleScope(rule, variables)
+            except ScopeError as e:
+                self.scopes.append(None)
+                self.errors[i] = str(e)
+                continue
+            self.scopes.append(scope)
+            for k, (_, _, dst_ips, dst_ports) in enumerate(scope.orientations):
+                ip_items.extend((lo, hi, (i, k)) for lo, hi in dst_ips)
+                port_items.extend((lo, hi, (i, k)) for lo, hi in dst_ports)
+        self._ip_tree = IntervalTree(ip_items)
+        self._port_tree = IntervalTree(port_items)
+
+    def lookup(self, host: str, port: Optional[int] = None, protocol: Optional[str] = None,
+               src_host: Optional[str] = None, src_port: Optional[int] = None) -> List[int]:
+        """Indices of rules that apply to traffic towards *host* (and *port*).
+
+        *protocol* matches rules of that protocol and ``ip`` rules;
+        *src_host*/*src_port* narrow by the source side as well.
+        """
+        hits = set(self._ip_tree.stab(ip_point(host)))
+        if port is not None:
+            hits.intersection_update(self._port_tree.stab(port))
+        src_point = ip_point(src_host) if src_host is not None else None
+        found = set()
+        for i, k in hits:
+            if i in found:
+                continue
+            scope = self.scopes[i]
+            if protocol is not None and scope.protocol not in (protocol, "ip"):
+                continue
+            src_ips, src_ports, _, _ = scope.orientations[k]
+            if src_point is not None and src_point not in src_ips:
+                continue
+            if src_port is not None and src_port not in src_ports:
+                continue
+            found.add(i)
+        return sorted(found)
+
+    def empty_rules(self) -> List[int]:
+        """Indices of rules whose scope can never match any packet."""
+        return [i for i, scope in enumerate(self.scopes) if scope is not None and scope.empty]
+
+    def shadowed_rules(self) -> List[Tuple[int, int]]:
+        """``(shadowed, by)`` index pairs.
+
+        A rule is shadowed when an earlier-or-broader rule has the same
+        action and detection options and a scope covering all of its own,
+        so the shadowed rule can never fire without the other one firing
+        too. Of two rules with identical scope, the later one is reported.
+        """
+        groups: Dict[tuple, List[int]] = {}
+        for i, scope in enumerate(self.scopes):
+            if scope is not None and not scope.empty:
+                groups.setdefault(_detection_key(self.rules[i]), []).append(i)
+
+        shadowed = []
+        candidates: Dict[Tuple[int, int], List[int]] = {}
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            group = set(members)
+            for b in members:
+                scope = self.scopes[b]
+                point = self._lowest_destination(scope)
+                if point not in candidates:
+                    candidates[point] = self._covering_candidates(*point)
+                for a in candidates[point]:
+                    if a == b or a not in group or not self.scopes[a].covers(scope):
+                        continue
+                    if a > b and scope.covers(self.scopes[a]):
+                        continue  # identical scope: the later rule is the shadowed one
+                    shadowed.append((b, a))
+                    break
+        return shadowed
+
+    @staticmethod
+    def _lowest_destination(scope: RuleScope) -> Tuple[int, int]:
+        _, _, dst_ips, dst_ports = scope.orientations[0]
+        return next(iter(dst_ips))[0], next(iter(dst_ports))[0]
+
+    def _covering_candidates(self, ip: int, port: int) -> List[int]:
+        """Sorted indices of the rules with an orientation towards *ip* and *port*.
+
+        A rule covering another covers in particular the other's lowest
+        destination address and port, so only these rules can cover a scope
+        whose lowest destination that is.
+        """
+        hits = set(self._ip_tree.stab(ip)).intersection(self._port_tree.stab(port))
+        return sorted({i for i, _ in hits})
@@ -6,21 +6,41 @@ and returns a score (0–100) with a detailed breakdown.
 
 Scoring criteria based on Snort documentation and community guidelines:
   - Content matching presence and quality
+  - Content selectivity against benign traffic (see ``ngram``)
   - Positional modifier usage (depth, offset, distance, within)
   - Flow state tracking
   - Protocol and network scope
-  - PCRE usage patterns
+  - PCRE usage patterns and backtracking cost
   - Threshold configuration
   - Metadata completeness
 """
 
-from .rule import SnortRule
+import collections
+import heapq
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
+
+from .cache import ResultCache
+from .canonical import rule_digest
+from .anchors import propose_anchors
+from .features import RuleFeatures, extract_features
+from .ngram import NgramIndex
+from .pcre import analyze_pcre
+from .rule import SnortRule, decode_content
+from .validator import VALIDATION_CACHE
+
+logger = logging.getLogger(__name__)
 
 
 # ── Scoring weights (total = 100) ──
 
 CRITERIA = {
-    "content_match":     {"weight": 25, "label": "Content Match"},
+    "content_match":     {"weight": 20, "label": "Content Match"},
+    "content_selectivity": {"weight": 5, "label": "Content Selectivity"},
     "positional_mods":   {"weight": 15, "label": "Positional Modifiers"},
     "flow_state":        {"weight": 15, "label": "Flow State"},
     "network_scope":     {"weight": 15, "label": "Network Scope"},
@@ -30,11 +50,88 @@ CRITERIA = {
     "general_hygiene":   {"weight": 5,  "label": "General Hygiene"},
 }
 
+# Rule fields each criterion reads, directly or through RuleFeatures. The
+# legacy single-content fields only count when ``contents`` is empty, but
+# are listed anyway so an edit never skips a criterion it affects.
+_CONTENT_INPUTS = (
+    "content", "content_nocase", "content_negated", "content_http_uri",
+    "content_http_header", "depth", "offset", "distance", "within", "contents",
+)
+CRITERION_FIELDS = {
+    "content_match":     frozenset(_CONTENT_INPUTS + ("pcre",)),
+    "content_selectivity": frozenset(_CONTENT_INPUTS),
+    "positional_mods":   frozenset(_CONTENT_INPUTS),
+    "flow_state":        frozenset(("protocol", "flow")),
+    "network_scope":     frozenset(("protocol", "src_ip", "src_port", "dst_ip", "dst_port")),
+    "pcre_efficiency":   frozenset(_CONTENT_INPUTS + ("pcre",)),
+    "threshold_config":  frozenset(("threshold_type", "threshold_count", "threshold_seconds")),
+    "metadata_quality":  frozenset(("msg", "sid", "classtype", "references")),
+    "general_hygiene":   frozenset(("direction", "rev", "priority")),
+}
+
+# Field -> criteria to rescore when it changes, in breakdown order. Fields
+# no criterion reads (action, metadata, threshold_track) are absent.
+FIELD_CRITERIA = {
+    f: tuple(name for name in CRITERIA if f in CRITERION_FIELDS[name])
+    for f in frozenset().union(*CRITERION_FIELDS.values())
+}
+
+
+def affected_criteria(changed_fields: Iterable[str]) -> tuple:
+    """Criteria whose score may change when *changed_fields* change, in breakdown order."""
+    hit = set()
+    for f in changed_fields:
+        hit.update(FIELD_CRITERIA.get(f, ()))
+    return tuple(name for name in CRITERIA if name in hit)
+
+
+# Points per content match using each positional modifier
+_MODIFIER_POINTS = {"depth": 3, "offset": 2, "distance": 3, "within": 3}
+
+# Selectivity points by the estimated benign hit rate of the rarest content
+_SELECTIVITY_POINTS = ((0.0001, 5), (0.001, 4), (0.01, 3), (0.05, 2), (0.25, 1))
+
+# Benign-traffic n-gram index behind content_selectivity. Without one the
+# criterion falls back to the primary content's length.
+_selectivity_index: Optional[NgramIndex] = None
+# Bumped on every index change; ScoreSessions rescore selectivity when it moves
+_selectivity_generation = 0
 
-def score_rule(rule: SnortRule) -> dict:
+
+def set_selectivity_index(index: Union[NgramIndex, str, None]):
+    """Score content selectivity against *index* (an NgramIndex or its path).
+
+    ``None`` goes back to the length heuristic. Clears ``SCORE_CACHE`` and
+    ``VALIDATION_CACHE``, so no shared result predates the index, and
+    existing ScoreSessions rescore content selectivity on their next use.
+    Results held in other caches keep the old selectivity scores.
+    """
+    global _selectivity_index, _selectivity_generation
+    if isinstance(index, str):
+        index = NgramIndex.open(index)
+    _selectivity_index = index
+    _selectivity_generation += 1
+    SCORE_CACHE.clear()
+    VALIDATION_CACHE.clear()
+
+
+def selectivity_index() -> Optional[NgramIndex]:
+    return _selectivity_index
+
+
+# Shared memo of score results, keyed on the rule digest
+SCORE_CACHE = ResultCache(max_size=100000)
+
+
+def score_rule(rule: SnortRule, cache: Optional[ResultCache] = None,
+               features: Optional[RuleFeatures] = None) -> dict:
     """
     Score a Snort rule and return a detailed breakdown.
 
+    With a *cache* (e.g. ``SCORE_CACHE``) the result is memoized on the
+    rule's canonical digest. Pass *features* when they were already
+    extracted for the rule (e.g. to validate it too).
+
     Returns:
         {
             "score": int (0-100),
@@ -47,196 +144,487 @@ def score_rule(rule: SnortRule) -> dict:
             "tips": [str, ...]
         }
     """
-    breakdown = []
-    tips = []
+    if cache is not None:
+        return cache.get_or_compute(rule_digest(rule), lambda: _score(rule, features))
+    return _score(rule, features)
 
-    # ── 1. Content Match (25 pts) ──
-    pts, detail = _score_content(rule, tips)
-    breakdown.append({
-        "name": "content_match",
-        "label": CRITERIA["content_match"]["label"],
-        "score": pts,
-        "max": CRITERIA["content_match"]["weight"],
-        "details": detail,
-    })
 
-    # ── 2. Positional Modifiers (15 pts) ──
-    pts, detail = _score_positional(rule, tips)
-    breakdown.append({
-        "name": "positional_mods",
-        "label": CRITERIA["positional_mods"]["label"],
-        "score": pts,
-        "max": CRITERIA["positional_mods"]["weight"],
-        "details": detail,
-    })
+# ── Batch scoring ──
 
-    # ── 3. Flow State (15 pts) ──
-    pts, detail = _score_flow(rule, tips)
-    breakdown.append({
-        "name": "flow_state",
-        "label": CRITERIA["flow_state"]["label"],
-        "score": pts,
-        "max": CRITERIA["flow_state"]["weight"],
-        "details": detail,
-    })
+# Rules per worker job; smaller inputs are scored in-process
+SCORE_CHUNK_SIZE = 1000
+GRADES = ("A", "B", "C", "D", "F")
 
-    # ── 4. Network Scope (15 pts) ──
-    pts, detail = _score_network(rule, tips)
-    breakdown.append({
-        "name": "network_scope",
-        "label": CRITERIA["network_scope"]["label"],
-        "score": pts,
-        "max": CRITERIA["network_scope"]["weight"],
-        "details": detail,
-    })
 
-    # ── 5. PCRE Efficiency (10 pts) ──
-    pts, detail = _score_pcre(rule, tips)
-    breakdown.append({
-        "name": "pcre_efficiency",
-        "label": CRITERIA["pcre_efficiency"]["label"],
-        "score": pts,
-        "max": CRITERIA["pcre_efficiency"]["weight"],
-        "details": detail,
-    })
+class ScoreSummary:
+    """Incremental ruleset-level aggregates of score results.
 
-    # ── 6. Threshold Config (5 pts) ──
-    pts, detail = _score_threshold(rule, tips)
-    breakdown.append({
-        "name": "threshold_config",
-        "label": CRITERIA["threshold_config"]["label"],
-        "score": pts,
-        "max": CRITERIA["threshold_config"]["weight"],
-        "details": detail,
-    })
+    Results are fed in with :meth:`add` (``score_rules`` does this);
+    :meth:`to_dict` can be called at any point for a partial snapshot:
 
-    # ── 7. Metadata Quality (10 pts) ──
-    pts, detail = _score_metadata(rule, tips)
-    breakdown.append({
-        "name": "metadata_quality",
-        "label": CRITERIA["metadata_quality"]["label"],
-        "score": pts,
-        "max": CRITERIA["metadata_quality"]["weight"],
-        "details": detail,
-    })
+      - grade distribution and an overall score histogram (10-point buckets)
+      - per criterion: average, a histogram with one bucket per possible
+        score ``0..max``, and the *top_n* worst rules
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.total = 0
+        self.errors = 0
+        self.score_sum = 0
+        self.grades = dict.fromkeys(GRADES, 0)
+        self.histogram = [0] * 11
+        self.criteria = {
+            name: {"sum": 0, "histogram": [0] * (info["weight"] + 1), "worst": []}
+            for name, info in CRITERIA.items()
+        }
+
+    def add(self, index: int, sid, result: dict):
+        if "error" in result:
+            self.errors += 1
+            return
+        self.total += 1
+        self.score_sum += result["score"]
+        self.grades[result["grade"]] += 1
+        self.histogram[min(max(result["score"], 0), 100) // 10] += 1
+        for item in result["breakdown"]:
+            stats = self.criteria[item["name"]]
+            score = item["score"]
+            stats["sum"] += score
+            stats["histogram"][min(max(score, 0), item["max"])] += 1
+            # Max-heap (via negation) of the top_n lowest (score, index) pairs
+            entry = (-score, -index, sid)
+            worst = stats["worst"]
+            if len(worst) < self.top_n:
+                heapq.heappush(worst, entry)
+            elif worst and entry > worst[0]:
+                heapq.heapreplace(worst, entry)
+
+    def to_dict(self) -> dict:
+        n = self.total or 1
+        return {
+            "total": self.total,
+            "errors": self.errors,
+            "average": round(self.score_sum / n, 2),
+            "grades": dict(self.grades),
+            "score_histogram": [
+                {"range": f"{i * 10}-{i * 10 + 9 if i < 10 else 100}", "count": count}
+                for i, count in enumerate(self.histogram)
+            ],
+            "criteria": {
+                name: {
+                    "label": CRITERIA[name]["label"],
+                    "max": CRITERIA[name]["weight"],
+                    "average": round(stats["sum"] / n, 2),
+                    "histogram": list(stats["histogram"]),
+                    "worst": [
+                        {"index": -neg_index, "sid": sid, "score": -neg_score}
+                        for neg_score, neg_index, sid in sorted(stats["worst"], reverse=True)
+                    ],
+                }
+                for name, stats in self.criteria.items()
+            },
+        }
 
-    # ── 8. General Hygiene (5 pts) ──
-    pts, detail = _score_hygiene(rule, tips)
-    breakdown.append({
-        "name": "general_hygiene",
-        "label": CRITERIA["general_hygiene"]["label"],
+
+def score_rules(rules: Iterable[SnortRule], summary: Optional[ScoreSummary] = None,
+                workers: Optional[int] = None, chunk_size: int = SCORE_CHUNK_SIZE,
+                cache: Optional[ResultCache] = None) -> Iterator[dict]:
+    """Score a whole ruleset, yielding ``score_rule`` results in input order.
+
+    Each result also carries the rule's ``index`` and ``sid``; items that
+    are not SnortRules yield ``{"index", "sid": None, "error"}``. Rules are
+    scored in chunks of *chunk_size* on a process pool of *workers*
+    (default: CPU count); an input that fits in one chunk is scored
+    in-process. With a *cache*, hits are served in the parent and only
+    misses are sent to the workers. If a *summary* is given, every result
+    is added to it as it is yielded, so it can be read mid-stream.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(rules, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return
+    if workers <= 1 or len(first) < chunk_size:
+        scored = (_score_chunk(chunk, cache) for chunk in itertools.chain([first], chunks))
+    else:
+        scored = _iter_score_pool(itertools.chain([first], chunks), workers, cache)
+
+    index = 0
+    for chunk, results in scored:
+        for rule, result in zip(chunk, results):
+            sid = rule.sid if isinstance(rule, SnortRule) else None
+            if summary is not None:
+                summary.add(index, sid, result)
+            yield {"index": index, "sid": sid, **result}
+            index += 1
+
+
+def _chunked(items, size):
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _score_chunk(chunk, cache=None):
+    """Return ``(chunk, results)`` for one chunk, scored in-process."""
+    results = []
+    for rule in chunk:
+        if not isinstance(rule, SnortRule):
+            results.append({"error": "Not a rule object."})
+            continue
+        try:
+            results.append(score_rule(rule, cache))
+        except Exception:
+            logger.exception("Unexpected error while scoring rule sid %s", rule.sid)
+            results.append({"error": "An internal error occurred while scoring the rule."})
+    return chunk, results
+
+
+def _pool_score(rules):
+    return _score_chunk(rules)[1]
+
+
+def _iter_score_pool(chunks, workers, cache):
+    """Score chunks on a process pool, yielding ``(chunk, results)`` in order.
+
+    At most ``2 * workers`` chunks are in flight.
+    """
+    pending = collections.deque()
+    index = _selectivity_index
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(index.path if index is not None else None,)) as pool:
+        for chunk in chunks:
+            pending.append(_submit_chunk(pool, chunk, cache))
+            if len(pending) > workers * 2:
+                yield _finish_chunk(*pending.popleft(), cache)
+        while pending:
+            yield _finish_chunk(*pending.popleft(), cache)
+
+
+def _init_worker(index_path):
+    # Workers re-open the parent's n-gram index; the mmap shares its pages
+    if index_path is not None:
+        global _selectivity_index
+        _selectivity_index = NgramIndex.open(index_path)
+
+
+def _submit_chunk(pool, chunk, cache):
+    results, keys, misses = [None] * len(chunk), {}, []
+    for i, rule in enumerate(chunk):
+        if cache is not None and isinstance(rule, SnortRule):
+            key = keys[i] = rule_digest(rule)
+            results[i] = cache.get(key)
+        if results[i] is None:
+            misses.append(i)
+    rules = [chunk[i] for i in misses]
+    future = pool.submit(_pool_score, rules) if misses else None
+    return chunk, results, keys, misses, future
+
+
+def _finish_chunk(chunk, results, keys, misses, future, cache):
+    if future is not None:
+        for i, result in zip(misses, future.result()):
+            results[i] = result
+            if cache is not None and i in keys and "error" not in result:
+                cache.put(keys[i], result)
+    return chunk, results
+
+
+# ── Incremental scoring ──
+
+class ScoreSession:
+    """Score results kept per criterion, so an edit rescores only what it touches.
+
+    Rules are scored in full once by :meth:`add` and addressed by the index
+    it returns. :meth:`rescore` and :meth:`update` compare an edit with the
+    stored rule and rerun only the criteria ``FIELD_CRITERIA`` lists for the
+    changed fields; :meth:`what_if` applies one set of field changes across
+    many rules the same way. Results carry ``rescored``, the criteria that
+    were rerun. Breakdown entries are shared with the session, so treat
+    them as read-only.
+
+    A session is not thread-safe by itself: callers sharing one between
+    threads hold ``lock`` for each sequence of calls that belongs together.
+    """
+
+    def __init__(self, rules: Iterable[SnortRule] = ()):
+        self.lock = threading.RLock()
+        self._rules = []
+        self._parts = []
+        self._generation = _selectivity_generation
+        for rule in rules:
+            self.add(rule)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def add(self, rule: SnortRule, features: Optional[RuleFeatures] = None) -> int:
+        """Score *rule* in full and keep a copy; returns its index."""
+        rule = rule.copy()
+        if features is None:
+            features = extract_features(rule)
+        self._rules.append(rule)
+        self._parts.append({name: _score_criterion(name, rule, features) for name in CRITERIA})
+        return len(self._rules) - 1
+
+    def rule(self, index: int) -> SnortRule:
+        return self._rules[index].copy()
+
+    def replace(self, index: int, rule: SnortRule, features: Optional[RuleFeatures] = None) -> dict:
+        """Score *rule* in full in place of rule *index*, for a rule that is not an edit of it."""
+        rule = rule.copy()
+        if features is None:
+            features = extract_features(rule)
+        self._rules[index] = rule
+        self._parts[index] = {name: _score_criterion(name, rule, features) for name in CRITERIA}
+        result = self.result(index)
+        result["rescored"] = list(CRITERIA)
+        return result
+
+    def result(self, index: int) -> dict:
+        self._refresh()
+        return _assemble(self._parts[index])
+
+    def rescore(self, index: int, rule: SnortRule, commit: bool = True,
+                features: Optional[RuleFeatures] = None) -> dict:
+        """Score *rule* as an edit of rule *index*, keeping it unless *commit* is false."""
+        return self._edit(index, rule.copy(), self._rules[index].diff(rule), commit, features)
+
+    def update(self, index: int, changes: dict, commit: bool = True) -> dict:
+        """Apply field *changes* (``to_dict`` form) to rule *index* and rescore it."""
+        rule = self._rules[index].copy()
+        rule.update(changes)
+        return self._edit(index, rule, _changed(self._rules[index], rule, changes), commit)
+
+    def what_if(self, changes: dict, indexes: Optional[Iterable[int]] = None,
+                commit: bool = False, summary: Optional[ScoreSummary] = None) -> Iterator[dict]:
+        """Apply the same field *changes* to every rule (or those in *indexes*).
+
+        Yields ``score_rule`` results with the rule's ``index``, ``sid``,
+        ``rescored`` and ``delta`` (new score minus old). Rules are left as
+        they were unless *commit* is true. If a *summary* is given, every
+        result is added to it as it is yielded.
+        """
+        self._refresh()
+        if indexes is None:
+            indexes = range(len(self._rules))
+        # The changes are the same for every rule, so they are loaded once and
+        # a rule is only copied when one of its values actually differs
+        probe = SnortRule()
+        probe.update(changes)
+        for index in indexes:
+            old = self._rules[index]
+            before = sum(entry["score"] for entry, _ in self._parts[index].values())
+            changed = _changed(old, probe, changes)
+            rule = old
+            if changed:
+                rule = old.copy()
+                rule.update(changes)
+            result = self._edit(index, rule, changed, commit)
+            result = {"index": index, "sid": rule.sid, **result, "delta": result["score"] - before}
+            if summary is not None:
+                summary.add(index, rule.sid, result)
+            yield result
+
+    def summary(self, top_n: int = 10) -> ScoreSummary:
+        """A :class:`ScoreSummary` of the session's current results."""
+        summary = ScoreSummary(top_n)
+        for index, rule in enumerate(self._rules):
+            summary.add(index, rule.sid, self.result(index))
+        return summary
+
+    def _refresh(self):
+        """Rescore content selectivity if the selectivity index changed since it was scored."""
+        if self._generation == _selectivity_generation:
+            return
+        self._generation = _selectivity_generation
+        for rule, parts in zip(self._rules, self._parts):
+            parts["content_selectivity"] = _score_criterion("content_selectivity", rule, extract_features(rule))
+
+    def _edit(self, index, rule, changed, commit, features=None):
+        self._refresh()
+        names = affected_criteria(changed)
+        parts = self._parts[index]
+        if names:
+            if features is None:
+                features = extract_features(rule)
+            parts = dict(parts)
+            for name in names:
+                parts[name] = _score_criterion(name, rule, features)
+        if commit:
+            self._rules[index] = rule
+            self._parts[index] = parts
+        result = _assemble(parts)
+        result["rescored"] = list(names)
+        return result
+
+
+def _changed(old: SnortRule, new: SnortRule, changes: dict) -> list:
+    """Fields named in *changes* whose value differs between *old* and *new*."""
+    keys = set(changes)
+    if "reference" in keys:
+        keys.add("references")
+    return [f for f in FIELD_CRITERIA if f in keys and getattr(old, f) != getattr(new, f)]
+
+
+def _score(rule: SnortRule, features: Optional[RuleFeatures] = None) -> dict:
+    if features is None:
+        features = extract_features(rule)
+    return _assemble({name: _score_criterion(name, rule, features) for name in CRITERIA})
+
+
+def _score_criterion(name: str, rule: SnortRule, features: RuleFeatures) -> tuple:
+    """Return ``(breakdown entry, tips)`` for one criterion."""
+    tips = []
+    pts, detail = _SCORERS[name](rule, features, tips)
+    info = CRITERIA[name]
+    return {
+        "name": name,
+        "label": info["label"],
         "score": pts,
-        "max": CRITERIA["general_hygiene"]["weight"],
+        "max": info["weight"],
         "details": detail,
-    })
+    }, tips
 
-    total = sum(b["score"] for b in breakdown)
-    grade = _grade(total)
 
+def _assemble(parts: dict) -> dict:
+    """Build a ``score_rule`` result from per-criterion ``(entry, tips)`` pairs."""
+    breakdown = [parts[name][0] for name in CRITERIA]
+    total = sum(b["score"] for b in breakdown)
     return {
         "score": total,
-        "grade": grade,
+        "grade": _grade(total),
         "breakdown": breakdown,
-        "tips": tips,
+        "tips": [tip for name in CRITERIA for tip in parts[name][1]],
     }
 
 
 # ── Individual scoring functions ──
 
-def _score_content(rule: SnortRule, tips: list) -> tuple:
+def _score_content(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score content matching quality."""
     weight = CRITERIA["content_match"]["weight"]
-    matches = rule.get_content_matches()
+    matches = features.matches
 
     if not matches and not rule.pcre:
         tips.append("Add a content match or PCRE pattern — header-only rules generate excessive alerts.")
         return 0, "No content or PCRE — header-only detection"
 
-    pts = 0
-
     if matches:
-        pts += 12  # Base points for having content
-
-        # Multi-content bonus — chained matches are more precise
-        if len(matches) > 1:
-            pts += min(len(matches) - 1, 3) * 2  # Up to 6 bonus pts for chaining
-        
-        # Evaluate first (primary) content
-        primary = matches[0]
-        if len(primary.content) >= 8:
-            pts += 4
-        elif len(primary.content) >= 4:
-            pts += 2
-        else:
-            tips.append("Primary content match is very short — consider a longer, more specific string.")
-            pts += 1
+        pts = _content_points(features)
+    else:
+        pts = 10
+        tips.append("Consider adding a fast-pattern content match before your PCRE to improve performance.")
 
-        # Check for nocase and HTTP scoping across any match
-        has_nocase = any(cm.nocase for cm in matches)
-        has_http_scope = any(cm.http_uri or cm.http_header for cm in matches)
-        if has_nocase:
-            pts += 2
-        if has_http_scope:
-            pts += 2
+    return min(pts, weight), _content_detail(rule, features)
 
-    elif rule.pcre:
-        pts += 10
-        tips.append("Consider adding a fast-pattern content match before your PCRE to improve performance.")
 
-    return min(pts, weight), _content_detail(rule)
+def _content_points(features: RuleFeatures) -> int:
+    """Content match points for a rule with contents, before the criterion's cap."""
+    pts = 12  # Base points for having content
+
+    # Multi-content bonus — chained matches are more precise
+    if len(features.matches) > 1:
+        pts += min(len(features.matches) - 1, 3) * 2  # Up to 6 bonus pts for chaining
+
+    # Check for nocase and HTTP scoping across any match
+    if features.has_nocase:
+        pts += 2
+    if features.has_http_scope:
+        pts += 2
+    return pts
 
 
-def _content_detail(rule: SnortRule) -> str:
-    matches = rule.get_content_matches()
-    count = len(matches)
+def _content_detail(rule: SnortRule, features: RuleFeatures) -> str:
+    count = len(features.matches)
     if count > 1 and rule.pcre:
         return f"{count} chained content matches + PCRE"
     elif count > 1:
         return f"{count} chained content matches"
     elif count == 1 and rule.pcre:
-        clen = len(matches[0].content)
+        clen = features.content_lengths[0]
         return f"Content ({clen} chars) + PCRE"
     elif count == 1:
-        clen = len(matches[0].content)
+        clen = features.content_lengths[0]
         return f"Content match ({clen} chars)"
     elif rule.pcre:
         return "PCRE only — no fast-pattern content"
     return "No content match"
 
 
-def _score_positional(rule: SnortRule, tips: list) -> tuple:
+def _score_selectivity(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
+    """Score how rarely the rule's contents occur in benign traffic."""
+    weight = CRITERIA["content_selectivity"]["weight"]
+    matches = features.matches
+
+    if not matches:
+        return 0, "No content — nothing for the fast-pattern matcher"
+
+    # Negated contents never place a match, so both paths skip them
+    positive = [cm for cm in matches if not cm.negated and cm.content]
+    if not positive:
+        return 0, "Only negated contents — nothing for the fast-pattern matcher"
+
+    index = _selectivity_index
+    if index is None:
+        # No traffic index: judge the primary content by its length. Points
+        # match the length bonus content_match gave before this criterion
+        # was split off, and so do the points content_match now loses to
+        # its lower cap, so scores only move once an index is configured.
+        primary_len = len(positive[0].content)
+        if primary_len >= 8:
+            pts = 4
+        elif primary_len >= 4:
+            pts = 2
+        else:
+            tips.append("Primary content match is very short — consider a longer, more specific string.")
+            pts = 1
+        spill = max(0, _content_points(features) - CRITERIA["content_match"]["weight"])
+        return min(pts + spill, weight), f"Primary content {primary_len} chars (no traffic index)"
+
+    # The rule can only match where its rarest positive content does
+    rarest = None
+    for cm in positive:
+        try:
+            rate = index.hit_rate(decode_content(cm.content))
+        except ValueError:
+            continue  # malformed hex, reported by the validator
+        if rarest is None or rate < rarest[0]:
+            rarest = (rate, cm.content)
+    if rarest is None:
+        return 0, "No decodable content — nothing for the fast-pattern matcher"
+
+    rate, text = rarest
+    pts = next((points for limit, points in _SELECTIVITY_POINTS if rate <= limit), 0)
+    if pts <= 2:
+        tips.append(f'Even the rarest content ("{text}") occurs in about {rate:.1%} of benign traffic '
+                    "— add a more distinctive content.")
+    if not rate:
+        return pts, f"Rarest content not seen in {index.samples} benign samples"
+    return pts, f"Rarest content in {rate:.2%} of {index.samples} benign samples"
+
+
+def _score_positional(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score use of depth/offset/distance/within across all content matches."""
     weight = CRITERIA["positional_mods"]["weight"]
-    matches = rule.get_content_matches()
 
-    if not matches:
+    if not features.matches:
         return 0, "No content — positional modifiers not applicable"
 
-    pts = 0
-    all_mods = set()
-
-    for i, cm in enumerate(matches):
-        if cm.depth > 0:
-            pts += 3
-            all_mods.add("depth")
-        if cm.offset > 0:
-            pts += 2
-            all_mods.add("offset")
-        if cm.distance > 0:
-            pts += 3
-            all_mods.add("distance")
-        if cm.within > 0:
-            pts += 3
-            all_mods.add("within")
-
-    if not all_mods:
+    counts = features.modifier_counts
+    if not counts:
         tips.append("Add depth/offset modifiers to narrow the search window — improves performance on high-traffic networks.")
         return 0, "No positional modifiers — full payload scan"
 
-    return min(pts, weight), f"Using: {', '.join(sorted(all_mods))}"
+    pts = sum(n * _MODIFIER_POINTS[name] for name, n in counts.items())
+    return min(pts, weight), f"Using: {', '.join(sorted(counts))}"
 
 
-def _score_flow(rule: SnortRule, tips: list) -> tuple:
+def _score_flow(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score flow state configuration."""
     weight = CRITERIA["flow_state"]["weight"]
 
@@ -249,7 +637,7 @@ def _score_flow(rule: SnortRule, tips: list) -> tuple:
         return 0, "No flow option — matches all packets"
 
     pts = 0
-    parts = [p.strip() for p in rule.flow.split(",")]
+    parts = features.flow_parts
 
     if "established" in parts:
         pts += 10
@@ -259,17 +647,17 @@ def _score_flow(rule: SnortRule, tips: list) -> tuple:
     if "to_server" in parts or "to_client" in parts or "from_server" in parts or "from_client" in parts:
         pts += 5
 
-    return min(pts, weight), f"Flow: {rule.flow}"
+    return min(pts, weight), f"Flow: {','.join(parts)}"
 
 
-def _score_network(rule: SnortRule, tips: list) -> tuple:
+def _score_network(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score network scope (IPs and ports)."""
     weight = CRITERIA["network_scope"]["weight"]
     pts = 0
 
     # IP scoping
-    has_src_scope = rule.src_ip != "any"
-    has_dst_scope = rule.dst_ip != "any"
+    has_src_scope = features.src_ip_scoped
+    has_dst_scope = features.dst_ip_scoped
 
     if has_src_scope and has_dst_scope:
         pts += 8
@@ -279,8 +667,8 @@ def _score_network(rule: SnortRule, tips: list) -> tuple:
         tips.append("Use variables like $HOME_NET/$EXTERNAL_NET instead of 'any' to reduce scope.")
 
     # Port scoping
-    has_src_port = rule.src_port != "any"
-    has_dst_port = rule.dst_port != "any"
+    has_src_port = features.src_port_scoped
+    has_dst_port = features.dst_port_scoped
 
     if has_dst_port:
         pts += 5
@@ -291,10 +679,7 @@ def _score_network(rule: SnortRule, tips: list) -> tuple:
             tips.append("Specify a destination port to narrow rule scope.")
 
     # Bonus for using Snort variables
-    uses_vars = any(
-        v.startswith("$") for v in [rule.src_ip, rule.dst_ip, rule.src_port, rule.dst_port]
-    )
-    if uses_vars:
+    if features.uses_variables:
         pts += 2
 
     return min(pts, weight), _network_detail(rule)
@@ -313,7 +698,7 @@ def _network_detail(rule: SnortRule) -> str:
     return "Scoped: " + ", ".join(parts)
 
 
-def _score_pcre(rule: SnortRule, tips: list) -> tuple:
+def _score_pcre(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score PCRE usage efficiency."""
     weight = CRITERIA["pcre_efficiency"]["weight"]
 
@@ -322,38 +707,46 @@ def _score_pcre(rule: SnortRule, tips: list) -> tuple:
         return weight, "No PCRE — content-based detection"
 
     pts = 5  # Base for having PCRE
+    has_content = features.has_content
 
     # Check if content is also present (fast_pattern + PCRE is best practice)
-    if rule.content:
+    if has_content:
         pts += 5
     else:
-        tips.append("Add a content match to anchor PCRE — Snort checks content first as a fast-pattern.")
-
-    # Check for expensive patterns
-    pcre = rule.pcre
-    if ".*" in pcre and ".+" not in pcre:
-        # Greedy .* without bounds
-        if rule.content:
-            pts -= 1  # Minor penalty if content is present
-        else:
-            pts -= 3
-            tips.append("PCRE uses greedy .* without a content anchor — very expensive on high-traffic networks.")
-
-    return max(0, min(pts, weight)), f"PCRE present{' + content anchor' if rule.content else ' (no anchor)'}"
-
-
-def _score_threshold(rule: SnortRule, tips: list) -> tuple:
+        anchors, _ = propose_anchors(rule)
+        longest = max(anchors, key=lambda cm: len(cm.content), default=None)
+        suggestion = f' The PCRE requires "{longest.content}" — try that.' if longest else ""
+        tips.append("Add a content match to anchor PCRE — Snort checks content first as a fast-pattern." + suggestion)
+
+    # Cost class from the PCRE analyzer's static AST checks. Sandboxed timing
+    # is slow and varies between runs, so it never feeds a (cached) score;
+    # /api/pcre/cost measures on request instead.
+    analysis = analyze_pcre(rule.pcre, measure=False)
+    cost = analysis["cost_class"]
+    kinds = ", ".join(f["kind"].replace("_", " ") for f in analysis["findings"])
+    if cost == "moderate":
+        pts -= 1 if has_content else 3
+        tips.append(f"PCRE is moderately expensive{f' ({kinds})' if kinds else ''} — anchor it with ^ or a content match.")
+    elif cost == "high":
+        pts -= 3 if has_content else 5
+        tips.append(f"PCRE backtracks heavily on crafted input{f' ({kinds})' if kinds else ''} — simplify nested or overlapping repeats.")
+
+    anchor = " + content anchor" if has_content else " (no anchor)"
+    return max(0, min(pts, weight)), f"PCRE present{anchor}, cost: {cost}"
+
+
+def _score_threshold(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score threshold configuration."""
     weight = CRITERIA["threshold_config"]["weight"]
 
-    if rule.threshold_type and rule.threshold_count > 0 and rule.threshold_seconds > 0:
+    if features.threshold_complete:
         return weight, f"Threshold: {rule.threshold_type}, count {rule.threshold_count}/{rule.threshold_seconds}s"
 
     # Threshold is optional — no penalty, but no bonus
     return 2, "No threshold — alerts on every match"
 
 
-def _score_metadata(rule: SnortRule, tips: list) -> tuple:
+def _score_metadata(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score metadata completeness."""
     weight = CRITERIA["metadata_quality"]["weight"]
     pts = 0
@@ -377,26 +770,26 @@ def _score_metadata(rule: SnortRule, tips: list) -> tuple:
         pts += 2
 
     # References
-    if rule.references and any(r for r in rule.references):
+    if features.references:
         pts += 1
 
-    return min(pts, weight), _metadata_detail(rule)
+    return min(pts, weight), _metadata_detail(rule, features)
 
 
-def _metadata_detail(rule: SnortRule) -> str:
+def _metadata_detail(rule: SnortRule, features: RuleFeatures) -> str:
     items = []
     if rule.msg:
         items.append("msg")
     if rule.classtype:
         items.append("classtype")
-    if rule.references and any(r for r in rule.references):
-        items.append(f"{len([r for r in rule.references if r])} ref(s)")
+    if features.references:
+        items.append(f"{len(features.references)} ref(s)")
     if rule.sid >= 1000000:
         items.append("custom SID")
     return f"Has: {', '.join(items)}" if items else "Minimal metadata"
 
 
-def _score_hygiene(rule: SnortRule, tips: list) -> tuple:
+def _score_hygiene(rule: SnortRule, features: RuleFeatures, tips: list) -> tuple:
     """Score general rule hygiene."""
     weight = CRITERIA["general_hygiene"]["weight"]
     pts = 0
@@ -419,6 +812,20 @@ def _score_hygiene(rule: SnortRule, tips: list) -> tuple:
     return min(pts, weight), f"Direction: {rule.direction}, rev: {rule.rev}"
 
 
+# Criterion -> scoring function; _score runs them in CRITERIA order
+_SCORERS = {
+    "content_match": _score_content,
+    "content_selectivity": _score_selectivity,
+    "positional_mods": _score_positional,
+    "flow_state": _score_flow,
+    "network_scope": _score_network,
+    "pcre_efficiency": _score_pcre,
+    "threshold_config": _score_threshold,
+    "metadata_quality": _score_metadata,
+    "general_hygiene": _score_hygiene,
+}
+
+
 def _grade(score: int) -> str:
     """Map score to letter grade."""
     if score >= 90:
@@ -0,0 +1,203 @@
+"""
+SnortForge - Flow Tracking & TCP Stream Reassembly
+
+Groups decoded packets (see :mod:`snortforge.core.pcap`) into flows and
+rebuilds each direction of a TCP connection into one byte stream:
+
+  - the client is the side that sent the SYN; for connections picked up
+    mid-stream, the side with the higher (ephemeral) port
+  - segments are placed by sequence number; out-of-order segments wait
+    until the gap is filled, and overlapping bytes keep what was seen first
+  - a TCP flow is established once the handshake completes (or, with
+    ``midstream``, as soon as it is picked up); a UDP flow once both
+    sides have sent
+  - each direction keeps at most ``max_bytes``; a TCP flow is closed on
+    RST or once both sides have sent FIN
+
+This approximates Snort's stream preprocessor closely enough to test
+rules offline. It does not model target-based overlap policies, timeouts
+or window checks.
+"""
+
+import ipaddress
+from typing import Dict, List, Optional, Tuple
+
+from .pcap import IPPROTO_TCP, IPPROTO_UDP, TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN, Packet
+
+DEFAULT_MAX_BYTES = 1 << 20
+
+_SEQ_MASK = 0xFFFFFFFF
+_PROTO_NAMES = {IPPROTO_TCP: "tcp", IPPROTO_UDP: "udp"}
+
+
+class HalfStream:
+    """One direction of a TCP connection, reassembled by sequence number."""
+
+    __slots__ = ("isn", "data", "pending", "fin", "truncated")
+
+    def __init__(self):
+        self.isn: Optional[int] = None    # sequence number of the first data byte
+        self.data = bytearray()
+        self.pending: Dict[int, bytes] = {}   # stream offset -> out-of-order segment
+        self.fin = False
+        self.truncated = False
+
+    def add(self, seq: int, payload: bytes, max_bytes: int = DEFAULT_MAX_BYTES):
+        if self.isn is None:
+            self.isn = seq
+        offset = (seq - self.isn) & _SEQ_MASK
+        if offset >= 1 << 31:
+            # Starts before the first byte we placed (retransmission)
+            behind = (1 << 32) - offset
+            if behind >= len(payload):
+                return
+            payload, offset = payload[behind:], 0
+        if offset > len(self.data):
+            if offset < max_bytes:
+                self.pending.setdefault(offset, payload)
+            return
+        end = offset + len(payload)
+        while True:
+            # Segments already waiting past the gap were seen first: their
+            # bytes win where this segment overlaps them
+            cut = min((o for o in self.pending if len(self.data) < o < end), default=end)
+            self._append(offset, payload[:cut - offset], max_bytes)
+            self._drain(max_bytes)
+            if cut >= end or len(self.data) < cut:
+                break
+
+    def _drain(self, max_bytes):
+        while self.pending:
+            ready = sorted(o for o in self.pending if o <= len(self.data))
+            if not ready:
+                break
+            for o in ready:
+                self._append(o, self.pending.pop(o), max_bytes)
+
+    def _append(self, offset, payload, max_bytes):
+        new = payload[len(self.data) - offset:]
+        room = max_bytes - len(self.data)
+        if len(new) > room:
+            new = new[:max(room, 0)]
+            self.truncated = True
+        self.data += new
+
+
+class Flow:
+    """A conversation between a client and a server endpoint."""
+
+    __slots__ = ("id", "proto", "client", "client_port", "server", "server_port",
+                 "packets", "established", "closed", "to_server", "to_client",
+                 "_syn", "_synack", "_replied")
+
+    def __init__(self, flow_id: int, proto: int, client: bytes, client_port: int,
+                 server: bytes, server_port: int):
+        self.id = flow_id
+        self.proto = proto
+        self.client, self.client_port = client, client_port
+        self.server, self.server_port = server, server_port
+        self.packets = 0
+        self.established = False
+        self.closed = False
+        self.to_server = HalfStream()
+        self.to_client = HalfStream()
+        self._syn = self._synack = self._replied = False
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "proto": _PROTO_NAMES.get(self.proto, str(self.proto)),
+            "client": endpoint(self.client, self.client_port),
+            "server": endpoint(self.server, self.server_port),
+            "packets": self.packets,
+            "established": self.established,
+            "to_server_bytes": len(self.to_server.data),
+            "to_client_bytes": len(self.to_client.data),
+            "truncated": self.to_server.truncated or self.to_client.truncated,
+        }
+
+
+def endpoint(addr: bytes, port: int) -> str:
+    """``10.0.0.1:80`` / ``[2001:db8::1]:80`` for a packed address."""
+    ip = ipaddress.ip_address(addr)
+    return f"{ip}:{port}" if ip.version == 4 else f"[{ip}]:{port}"
+
+
+class FlowTable:
+    """Tracks the TCP and UDP flows of a packet sequence.
+
+    Feed packets in capture order with :meth:`feed`. Closed TCP flows are
+    dropped from the table and collected until :meth:`drain_closed`, so a
+    caller can inspect their streams and let the buffers go.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, midstream: bool = True):
+        self.max_bytes = max_bytes
+        self.midstream = midstream
+        self.flows: Dict[tuple, Flow] = {}
+        self.count = 0
+        self._closed: List[Flow] = []
+
+    def feed(self, packet: Packet) -> Tuple[Optional[Flow], Optional[bool]]:
+        """Add *packet* and return ``(flow, to_server)``; ``(None, None)`` for non-TCP/UDP."""
+        if packet.proto not in _PROTO_NAMES:
+            return None, None
+        a, b = (packet.src, packet.sport), (packet.dst, packet.dport)
+        key = (packet.proto,) + ((a, b) if a <= b else (b, a))
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = self.flows[key] = self._open(packet)
+        flow.packets += 1
+        to_server = packet.src == flow.client and packet.sport == flow.client_port
+
+        if packet.proto == IPPROTO_UDP:
+            if not to_server:
+                flow._replied = True
+            flow.established = flow._replied
+            return flow, to_server
+
+        flags = packet.flags
+        half = flow.to_server if to_server else flow.to_client
+        seq = packet.seq
+        if flags & TCP_SYN:
+            seq = half.isn = (seq + 1) & _SEQ_MASK
+            if flags & TCP_ACK:
+                flow._synack = flow._synack or not to_server
+            else:
+                flow._syn = flow._syn or to_server
+        elif flow._syn and flow._synack:
+            flow.established = True
+        if packet.payload:
+            half.add(seq, packet.payload, self.max_bytes)
+        if flags & TCP_FIN:
+            half.fin = True
+        if flags & TCP_RST or (flow.to_server.fin and flow.to_client.fin):
+            flow.closed = True
+            del self.flows[key]
+            self._closed.append(flow)
+        return flow, to_server
+
+    def _open(self, packet: Packet) -> Flow:
+        self.count += 1
+        src, dst = (packet.src, packet.sport), (packet.dst, packet.dport)
+        if packet.proto == IPPROTO_TCP:
+            syn = packet.flags & (TCP_SYN | TCP_ACK)
+            if syn == TCP_SYN | TCP_ACK or (syn != TCP_SYN and packet.sport < packet.dport):
+                src, dst = dst, src
+        flow = Flow(self.count, packet.proto, src[0], src[1], dst[0], dst[1])
+        if packet.proto == IPPROTO_TCP and self.midstream and not packet.flags & TCP_SYN:
+            flow.established = True
+        return flow
+
+    def drain_closed(self) -> List[Flow]:
+        """Flows closed since the last call."""
+        closed, self._closed = self._closed, []
+        return closed
+
+    def close_all(self) -> List[Flow]:
+        """Close every open flow (end of capture) and return all undrained flows."""
+        for flow in self.flows.values():
+            flow.closed = True
+            self._closed.append(flow)
+        self.flows.clear()
+        return self.drain_closed()
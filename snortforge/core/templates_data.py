@@ -176,17 +176,28 @@ def get_templates_by_category(category=None):
     return {n: d for n, d in TEMPLATES.items() if d["category"] == category}
 
 
+# Loaded template rules, kept so their memoized build() output is reused
+_TEMPLATE_RULES = {}
+
+
+def _template_rule(name):
+    rule = _TEMPLATE_RULES.get(name)
+    if rule is None:
+        rule = _TEMPLATE_RULES[name] = SnortRule.from_dict(TEMPLATES[name]["rule"])
+    return rule
+
+
 def load_template(name):
     if name not in TEMPLATES:
         return None
-    return SnortRule.from_dict(TEMPLATES[name]["rule"])
+    return _template_rule(name).copy()
 
 
 def get_templates_json():
     """Return templates as JSON-ready list."""
     result = []
     for name, data in TEMPLATES.items():
-        rule = SnortRule.from_dict(data["rule"])
+        rule = _template_rule(name)
         result.append({
             "name": name,
             "category": data["category"],
@@ -2,8 +2,18 @@
 SnortForge - Rule Validator
 """
 
+import logging
 import re
-from .rule import SnortRule
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from .cache import ResultCache
+from .canonical import rule_digest
+from .features import RuleFeatures, extract_features
+from .pcre import analyze_pcre
+from .rule import SnortRule, _content_values
+
+logger = logging.getLogger(__name__)
 
 VALID_ACTIONS = ["alert", "log", "pass", "drop", "reject", "sdrop"]
 VALID_PROTOCOLS = ["tcp", "udp", "icmp", "ip"]
@@ -41,129 +51,406 @@ PORT_PATTERN = re.compile(
 )
 
 
-def validate_rule(rule: SnortRule) -> dict:
-    """Validate a rule and return dict with errors, warnings, is_valid."""
-    errors = []
-    warnings = []
+# Set views for the hot-path membership tests; the lists above keep their
+# order for error messages.
+_ACTIONS = frozenset(VALID_ACTIONS)
+_PROTOCOLS = frozenset(VALID_PROTOCOLS)
+_DIRECTIONS = frozenset(VALID_DIRECTIONS)
+_CLASSTYPES = frozenset(VALID_CLASSTYPES)
+_FLOW_OPTIONS = frozenset(VALID_FLOW_OPTIONS)
+_REFERENCE_TYPES = frozenset(VALID_REFERENCE_TYPES)
+_THRESHOLD_TYPES = frozenset({"limit", "threshold", "both"})
+_THRESHOLD_TRACKS = frozenset({"by_src", "by_dst"})
+
+_HEX_BLOCK_RE = re.compile(r'\|([^|]*)\|')
+_HEX_CHARS_RE = re.compile(r'[0-9a-fA-F\s]+')
+_CVE_RE = re.compile(r'\d{4}-\d{4,}')
+
+_ACTIONS_HINT = ", ".join(VALID_ACTIONS)
+_PROTOCOLS_HINT = ", ".join(VALID_PROTOCOLS)
+_REFERENCE_TYPES_HINT = ", ".join(VALID_REFERENCE_TYPES)
+
+
+# ── Check registry ──
+#
+# Each check is ``fn(rule, features, errors, warnings)`` where ``features``
+# is the rule's RuleFeatures, extracted once per rule and shared with the
+# scorer. Checks run in registration order, which keeps the message order
+# of the full plan stable.
+
+SYNTAX = "syntax"
+BEST_PRACTICE = "best_practice"
+
+CHECKS = {}
+
+
+def register_check(name: str, *tags: str):
+    """Decorator registering a validation check under *name* with *tags*."""
+    def decorator(fn):
+        CHECKS[name] = (fn, frozenset(tags))
+        return fn
+    return decorator
+
+
+def compile_plan(tags: Optional[Iterable[str]] = None,
+                 names: Optional[Iterable[str]] = None) -> Tuple[Callable, ...]:
+    """Select checks by tag and/or name into a tuple of check functions.
+
+    With neither argument every registered check is included.
+    """
+    tags = frozenset(tags) if tags is not None else None
+    names = frozenset(names) if names is not None else None
+    if names is not None and not names <= CHECKS.keys():
+        raise ValueError(f"Unknown validation checks: {', '.join(sorted(names - CHECKS.keys()))}")
+    return tuple(
+        fn for name, (fn, check_tags) in CHECKS.items()
+        if (tags is None or check_tags & tags) and (names is None or name in names)
+    )
+
+
+@register_check("action", SYNTAX)
+def _check_action(rule, features, errors, warnings):
+    if rule.action not in _ACTIONS:
+        errors.append(f"Invalid action '{rule.action}'. Must be: {_ACTIONS_HINT}")
+
+
+@register_check("protocol", SYNTAX)
+def _check_protocol(rule, features, errors, warnings):
+    if rule.protocol not in _PROTOCOLS:
+        errors.append(f"Invalid protocol '{rule.protocol}'. Must be: {_PROTOCOLS_HINT}")
+
+
+# Header values repeat across nearly every rule in a ruleset, so their
+# verdicts are memoized per distinct value.
+@lru_cache(maxsize=4096)
+def _valid_ip(value: str) -> bool:
+    return IP_PATTERN.match(value) is not None
 
-    # Action
-    if rule.action not in VALID_ACTIONS:
-        errors.append(f"Invalid action '{rule.action}'. Must be: {', '.join(VALID_ACTIONS)}")
-
-    # Protocol
-    if rule.protocol not in VALID_PROTOCOLS:
-        errors.append(f"Invalid protocol '{rule.protocol}'. Must be: {', '.join(VALID_PROTOCOLS)}")
-
-    # Network
-    for label, value in [("Source IP", rule.src_ip), ("Destination IP", rule.dst_ip)]:
-        if not IP_PATTERN.match(value):
-            errors.append(f"Invalid {label}: '{value}'")
-    for label, value in [("Source port", rule.src_port), ("Destination port", rule.dst_port)]:
-        if not PORT_PATTERN.match(value):
-            errors.append(f"Invalid {label}: '{value}'")
+
+@lru_cache(maxsize=4096)
+def _valid_port(value: str) -> bool:
+    return PORT_PATTERN.match(value) is not None
+
+
+@register_check("addresses", SYNTAX)
+def _check_addresses(rule, features, errors, warnings):
+    if not _valid_ip(rule.src_ip):
+        errors.append(f"Invalid Source IP: '{rule.src_ip}'")
+    if not _valid_ip(rule.dst_ip):
+        errors.append(f"Invalid Destination IP: '{rule.dst_ip}'")
+    if not _valid_port(rule.src_port):
+        errors.append(f"Invalid Source port: '{rule.src_port}'")
+    if not _valid_port(rule.dst_port):
+        errors.append(f"Invalid Destination port: '{rule.dst_port}'")
+
+
+@register_check("scope", BEST_PRACTICE)
+def _check_scope(rule, features, errors, warnings):
     if rule.src_ip == "any" and rule.dst_ip == "any":
         warnings.append("Both source and destination IPs are 'any' — rule may be overly broad.")
     if rule.src_port == "any" and rule.dst_port == "any":
         warnings.append("Both ports are 'any' — consider narrowing scope.")
 
-    # Direction
-    if rule.direction not in VALID_DIRECTIONS:
+
+@register_check("direction", SYNTAX)
+def _check_direction(rule, features, errors, warnings):
+    if rule.direction not in _DIRECTIONS:
         errors.append(f"Invalid direction '{rule.direction}'. Must be '->' or '<>'.")
 
-    # Message
+
+@register_check("msg", SYNTAX)
+def _check_msg(rule, features, errors, warnings):
     if not rule.msg:
         errors.append("Rule message (msg) is required.")
-    elif len(rule.msg) < 5:
-        warnings.append("Rule message is very short — use a descriptive message.")
-    elif '"' in rule.msg or ";" in rule.msg:
+    elif len(rule.msg) >= 5 and ('"' in rule.msg or ";" in rule.msg):
         errors.append("Message must not contain '\"' or ';' characters.")
 
-    # SID
+
+@register_check("msg_length", BEST_PRACTICE)
+def _check_msg_length(rule, features, errors, warnings):
+    if rule.msg and len(rule.msg) < 5:
+        warnings.append("Rule message is very short — use a descriptive message.")
+
+
+@register_check("sid_range", BEST_PRACTICE)
+def _check_sid_range(rule, features, errors, warnings):
     if rule.sid < 1000000:
         warnings.append(f"SID {rule.sid} is reserved (< 1,000,000). Custom rules should use >= 1,000,000.")
+
+
+@register_check("rev", SYNTAX)
+def _check_rev(rule, features, errors, warnings):
     if rule.rev < 1:
         errors.append("Revision must be >= 1.")
 
-    # Content — use get_content_matches() for multi-content awareness
-    matches = rule.get_content_matches()
-    if not matches and not rule.pcre:
+
+@register_check("detection", BEST_PRACTICE)
+def _check_detection(rule, features, errors, warnings):
+    if not features.matches and not rule.pcre:
         warnings.append("No content or PCRE — rule matches on header only.")
 
+
+def _content_label(i, matches):
+    return f"Content #{i+1}" if len(matches) > 1 else "Content"
+
+
+@register_check("content", SYNTAX)
+def _check_content(rule, features, errors, warnings):
+    matches = features.matches
     for i, cm in enumerate(matches):
-        label = f"Content #{i+1}" if len(matches) > 1 else "Content"
         if cm.content and "|" in cm.content:
-            hex_parts = re.findall(r'\|([^|]*)\|', cm.content)
-            for part in hex_parts:
-                cleaned = part.replace(" ", "")
-                if len(cleaned) % 2 != 0:
+            for part in _HEX_BLOCK_RE.findall(cm.content):
+                label = _content_label(i, matches)
+                if len(part.replace(" ", "")) % 2 != 0:
                     errors.append(f"{label}: Invalid hex '|{part}|' — must have even number of hex chars.")
-                if not re.match(r'^[0-9a-fA-F\s]+$', part):
+                if not _HEX_CHARS_RE.fullmatch(part):
                     errors.append(f"{label}: Invalid hex '|{part}|' — contains non-hex characters.")
-        # Depth/Offset per content match
-        if cm.depth > 0 and not cm.content:
-            errors.append(f"{label}: Depth requires content.")
-        if cm.offset > 0 and not cm.content:
-            errors.append(f"{label}: Offset requires content.")
-        if cm.depth > 0 and cm.offset >= cm.depth:
-            warnings.append(f"{label}: Offset >= depth — content may never match.")
+        if not cm.content:
+            if cm.depth is not None:
+                errors.append(f"{_content_label(i, matches)}: Depth requires content.")
+            if cm.offset is not None:
+                errors.append(f"{_content_label(i, matches)}: Offset requires content.")
+
+
+@register_check("content_modifiers", SYNTAX)
+def _check_content_modifiers(rule, features, errors, warnings):
+    matches = features.matches
+    fast_patterns = 0
+    for i, cm in enumerate(matches):
+        names = cm.modifier_names()
+        if "fast_pattern" in names:
+            fast_patterns += 1
+            if cm.negated and ("fast_pattern:" in cm.modifiers or "fast_pattern_offset" in names):
+                errors.append(f"{_content_label(i, matches)}: A negated content cannot use fast_pattern options.")
+        if "rawbytes" in names and (cm.http_uri or cm.http_header or cm.buffer):
+            errors.append(f"{_content_label(i, matches)}: rawbytes cannot be combined with a buffer modifier.")
+    if fast_patterns > 1:
+        errors.append("Only one content may be marked fast_pattern.")
+
+
+@register_check("content_position", BEST_PRACTICE)
+def _check_content_position(rule, features, errors, warnings):
+    matches = features.matches
+    for i, cm in enumerate(matches):
+        if cm.depth is not None and cm.offset is not None and 0 < cm.depth <= cm.offset:
+            warnings.append(f"{_content_label(i, matches)}: Offset >= depth — content may never match.")
         # Chained match checks (2nd+ content)
-        if i > 0 and cm.distance == 0 and cm.within == 0 and cm.depth == 0 and cm.offset == 0:
+        if i > 0 and cm.distance is None and cm.within is None and cm.depth is None and cm.offset is None:
             warnings.append(
-                f"{label}: No positional modifier — consider distance/within "
+                f"{_content_label(i, matches)}: No positional modifier — consider distance/within "
                 f"to constrain match relative to Content #{i}."
             )
 
-    # Flow
-    if rule.flow:
-        parts = [p.strip() for p in rule.flow.split(",")]
-        for part in parts:
-            if part not in VALID_FLOW_OPTIONS:
-                errors.append(f"Invalid flow option '{part}'.")
-    elif rule.protocol == "tcp":
+
+@register_check("flow", SYNTAX)
+def _check_flow(rule, features, errors, warnings):
+    for part in features.flow_parts:
+        if part not in _FLOW_OPTIONS:
+            errors.append(f"Invalid flow option '{part}'.")
+
+
+@register_check("tcp_flow", BEST_PRACTICE)
+def _check_tcp_flow(rule, features, errors, warnings):
+    if not rule.flow and rule.protocol == "tcp":
         warnings.append("No flow option for TCP — consider adding 'established'.")
 
-    # Classtype
-    if rule.classtype and rule.classtype not in VALID_CLASSTYPES:
+
+@register_check("classtype", BEST_PRACTICE)
+def _check_classtype(rule, features, errors, warnings):
+    if rule.classtype and rule.classtype not in _CLASSTYPES:
         warnings.append(f"Classtype '{rule.classtype}' is non-standard.")
 
-    # References
-    for ref in rule.references:
-        if not ref:
-            continue
+
+@register_check("references", SYNTAX)
+def _check_references(rule, features, errors, warnings):
+    for ref in features.references:
         if "," not in ref:
             errors.append(f"Invalid reference '{ref}' — must be in format: type,value (e.g., cve,2024-1234).")
+        elif not ref.split(",", 1)[1].strip():
+            errors.append(f"Reference '{ref}' is missing a value after the type.")
+
+
+@register_check("reference_types", BEST_PRACTICE)
+def _check_reference_types(rule, features, errors, warnings):
+    for ref in features.references:
+        if "," not in ref:
             continue
-        ref_type = ref.split(",", 1)[0].strip().lower()
-        ref_value = ref.split(",", 1)[1].strip()
-        if ref_type not in VALID_REFERENCE_TYPES:
+        ref_type, ref_value = ref.split(",", 1)
+        ref_type, ref_value = ref_type.strip().lower(), ref_value.strip()
+        if ref_type not in _REFERENCE_TYPES:
             warnings.append(
                 f"Reference type '{ref_type}' is non-standard. "
-                f"Known types: {', '.join(VALID_REFERENCE_TYPES)}."
+                f"Known types: {_REFERENCE_TYPES_HINT}."
             )
-        if not ref_value:
-            errors.append(f"Reference '{ref}' is missing a value after the type.")
         # CVE format check
-        if ref_type == "cve" and not re.match(r'^\d{4}-\d{4,}$', ref_value):
+        if ref_type == "cve" and not _CVE_RE.fullmatch(ref_value):
             warnings.append(f"CVE reference '{ref_value}' may not match standard format (YYYY-NNNNN).")
 
-    # PCRE
+
+@register_check("pcre", SYNTAX)
+def _check_pcre(rule, features, errors, warnings):
     if rule.pcre:
         if not rule.pcre.startswith("/") or rule.pcre.count("/") < 2:
             errors.append("PCRE must be in format: /pattern/flags")
 
-    # Threshold
+
+@register_check("pcre_cost", BEST_PRACTICE)
+def _check_pcre_cost(rule, features, errors, warnings):
+    # Static findings only: validation runs on every keystroke and in pool
+    # workers, which must not start sandboxes. Measured cost is scored.
+    if not rule.pcre:
+        return
+    for finding in analyze_pcre(rule.pcre, measure=False)["findings"]:
+        warnings.append(f"PCRE: {finding['detail']}")
+
+
+@register_check("threshold", SYNTAX)
+def _check_threshold(rule, features, errors, warnings):
     if rule.threshold_type:
-        if rule.threshold_type not in ["limit", "threshold", "both"]:
+        if rule.threshold_type not in _THRESHOLD_TYPES:
             errors.append("Threshold type must be 'limit', 'threshold', or 'both'.")
-        if rule.threshold_track not in ["by_src", "by_dst"]:
+        if rule.threshold_track not in _THRESHOLD_TRACKS:
             errors.append("Threshold track must be 'by_src' or 'by_dst'.")
         if rule.threshold_count <= 0:
             errors.append("Threshold count must be > 0.")
         if rule.threshold_seconds <= 0:
             errors.append("Threshold seconds must be > 0.")
 
+
+# Plans compiled at import time. Checks registered later (plugins) need a
+# fresh compile_plan() call to be picked up.
+PLANS = {
+    "full": compile_plan(),
+    SYNTAX: compile_plan(tags=[SYNTAX]),
+    BEST_PRACTICE: compile_plan(tags=[BEST_PRACTICE]),
+}
+
+
+# Shared memo of per-rule validation results, keyed on (digest, plan)
+VALIDATION_CACHE = ResultCache(max_size=100000)
+
+
+def _resolve_plan(plan):
+    if plan is None:
+        return PLANS["full"]
+    if isinstance(plan, str):
+        try:
+            return PLANS[plan]
+        except KeyError:
+            raise ValueError(f"Unknown validation plan '{plan}'. Known plans: {', '.join(PLANS)}") from None
+    return plan
+
+
+def validate_rule(rule: SnortRule, plan=None, cache: Optional[ResultCache] = None,
+                  features: Optional[RuleFeatures] = None) -> dict:
+    """Validate a rule and return dict with errors, warnings, is_valid.
+
+    *plan* is a name from ``PLANS`` (e.g. ``"syntax"`` for fast pre-commit
+    runs) or a tuple from :func:`compile_plan`; the default runs every check.
+    With a *cache* (e.g. ``VALIDATION_CACHE``) the result is memoized on
+    the rule's canonical digest. Pass *features* when they were already
+    extracted for the rule (e.g. to score it too).
+    """
+    plan = _resolve_plan(plan)
+    if cache is not None:
+        return cache.get_or_compute((rule_digest(rule), plan), lambda: _run_plan(rule, plan, features))
+    return _run_plan(rule, plan, features)
+
+
+def _run_plan(rule, plan, features=None):
+    errors = []
+    warnings = []
+    if features is None:
+        features = extract_features(rule)
+    for check in plan:
+        check(rule, features, errors, warnings)
     return {
         "is_valid": len(errors) == 0,
         "errors": errors,
         "warnings": warnings,
     }
+
+
+def validate_rules(rules: Iterable[SnortRule], summary: Optional[dict] = None, plan=None,
+                   cache: Optional[ResultCache] = None) -> Iterator[dict]:
+    """Validate a whole ruleset, yielding one result dict per rule.
+
+    Each result is :func:`validate_rule`'s output plus the rule's ``index``
+    and ``sid``, with ruleset-wide findings merged in. Cross-rule checks run
+    in the same single pass over hash indexes on sid and msg, so a conflict
+    is reported on the later of the two rules:
+
+      - duplicate SID (same detection, same rev) — error
+      - same SID with different content/pcre — error
+      - same SID and detection under another rev — warning
+      - msg already used by another rule — warning
+
+    If a *summary* dict is given it is filled in once iteration completes.
+    *plan* and *cache* are passed on to :func:`validate_rule`.
+    """
+    plan = _resolve_plan(plan)
+    by_sid = {}        # sid -> [(index, rev, detection hash), ...]
+    by_msg = {}        # msg -> first index
+    duplicate_sids = set()
+    conflicting_sids = set()
+    reused_msgs = set()
+    counts = {"total": 0, "valid": 0, "invalid": 0, "with_warnings": 0}
+
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, SnortRule):
+            result = {"is_valid": False, "errors": ["Not a rule object."], "warnings": []}
+            sid = None
+        else:
+            sid = rule.sid
+            try:
+                result = validate_rule(rule, plan, cache)
+                # Cached results share their lists; copy before adding findings
+                errors = result["errors"] = list(result["errors"])
+                warnings = result["warnings"] = list(result["warnings"])
+
+                detection = hash((
+                    tuple(map(_content_values, rule.get_content_matches())), rule.pcre,
+                ))
+                seen = by_sid.setdefault(sid, [])
+                if seen:
+                    # Compare against the first rule that claimed this SID
+                    other, rev, other_detection = seen[0]
+                    if other_detection != detection:
+                        conflicting_sids.add(sid)
+                        errors.append(f"SID {sid} is also used by rule #{other} with different detection content.")
+                    elif rev == rule.rev:
+                        duplicate_sids.add(sid)
+                        errors.append(f"Duplicate SID {sid} (same as rule #{other}).")
+                    else:
+                        warnings.append(f"SID {sid} also appears as rev {rev} in rule #{other}.")
+                seen.append((index, rule.rev, detection))
+
+                if rule.msg:
+                    first = by_msg.setdefault(rule.msg, index)
+                    if first != index:
+                        reused_msgs.add(rule.msg)
+                        warnings.append(f"Message is also used by rule #{first}.")
+            except Exception:
+                logger.exception("Unexpected error while validating rule #%d", index)
+                result = {
+                    "is_valid": False,
+                    "errors": ["An internal error occurred while validating the rule."],
+                    "warnings": [],
+                }
+        errors, warnings = result["errors"], result["warnings"]
+
+        result["is_valid"] = not errors
+        counts["total"] += 1
+        counts["valid" if not errors else "invalid"] += 1
+        if warnings:
+            counts["with_warnings"] += 1
+        yield {"index": index, "sid": sid, **result}
+
+    if summary is not None:
+        summary.update(counts)
+        summary["duplicate_sids"] = [
+            {"sid": sid, "rules": [i for i, _, _ in by_sid[sid]]}
+            for sid in sorted(duplicate_sids | conflicting_sids)
+        ]
+        summary["conflicting_sids"] = sorted(conflicting_sids)
+        summary["reused_msgs"] = len(reused_msgs)
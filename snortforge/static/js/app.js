@@ -209,19 +209,19 @@ function addContentBlock() {
         <div class="form-row four-col">
             <div class="form-group">
                 <label>Depth</label>
-                <input type="number" data-field="depth" value="0" min="0">
+                <input type="number" data-field="depth" min="0">
             </div>
             <div class="form-group">
                 <label>Offset</label>
-                <input type="number" data-field="offset" value="0" min="0">
+                <input type="number" data-field="offset" min="0">
             </div>
             <div class="form-group">
                 <label>Distance</label>
-                <input type="number" data-field="distance" value="0" min="0">
+                <input type="number" data-field="distance">
             </div>
             <div class="form-group">
                 <label>Within</label>
-                <input type="number" data-field="within" value="0" min="0">
+                <input type="number" data-field="within" min="0">
             </div>
         </div>
     `;
@@ -248,7 +248,8 @@ function getContentMatchesFromUI() {
             const el = block.querySelector(`[data-field="${field}"]`);
             if (!el) return el;
             if (el.type === "checkbox") return el.checked;
-            if (el.type === "number") return parseInt(el.value) || 0;
+            // An empty positional field is unset; 0 is a real value
+            if (el.type === "number") return el.value === "" ? null : parseInt(el.value, 10);
             return el.value.trim();
         };
         const content = val("content");
@@ -263,6 +264,9 @@ function getContentMatchesFromUI() {
                 offset: val("offset"),
                 distance: val("distance"),
                 within: val("within"),
+                // Not editable in the form; carried through from imported rules
+                buffer: block.dataset.buffer || "",
+                modifiers: block.dataset.modifiers || "",
             });
         }
     });
@@ -280,8 +284,9 @@ function clearContentBlocks() {
     const first = container.querySelector(".content-block");
     if (first) {
         first.querySelectorAll("input[type='text']").forEach(el => el.value = "");
-        first.querySelectorAll("input[type='number']").forEach(el => el.value = "0");
+        first.querySelectorAll("input[type='number']").forEach(el => el.value = "");
         first.querySelectorAll("input[type='checkbox']").forEach(el => el.checked = false);
+        first.dataset.buffer = first.dataset.modifiers = "";
     }
     renumberContentBlocks();
 }
@@ -302,6 +307,8 @@ function loadContentBlocksFromData(contents) {
         const block = document.createElement("div");
         block.className = "content-block";
         block.dataset.index = i;
+        block.dataset.buffer = cm.buffer || "";
+        block.dataset.modifiers = cm.modifiers || "";
         const removeDisplay = i === 0 ? 'style="display:none"' : '';
         block.innerHTML = `
             <div class="content-block-header">
@@ -318,10 +325,10 @@ function loadContentBlocksFromData(contents) {
                 <label class="checkbox-label"><input type="checkbox" data-field="http_header" ${cm.http_header ? "checked" : ""}><span>HTTP Header</span></label>
             </div>
             <div class="form-row four-col">
-                <div class="form-group"><label>Depth</label><input type="number" data-field="depth" value="${cm.depth || 0}" min="0"></div>
-                <div class="form-group"><label>Offset</label><input type="number" data-field="offset" value="${cm.offset || 0}" min="0"></div>
-                <div class="form-group"><label>Distance</label><input type="number" data-field="distance" value="${cm.distance || 0}" min="0"></div>
-                <div class="form-group"><label>Within</label><input type="number" data-field="within" value="${cm.within || 0}" min="0"></div>
+                <div class="form-group"><label>Depth</label><input type="number" data-field="depth" value="${cm.depth ?? ""}" min="0"></div>
+                <div class="form-group"><label>Offset</label><input type="number" data-field="offset" value="${cm.offset ?? ""}" min="0"></div>
+                <div class="form-group"><label>Distance</label><input type="number" data-field="distance" value="${cm.distance ?? ""}"></div>
+                <div class="form-group"><label>Within</label><input type="number" data-field="within" value="${cm.within ?? ""}" min="0"></div>
             </div>
         `;
         container.appendChild(block);
@@ -347,10 +354,10 @@ function addDefaultContentBlock(container) {
             <label class="checkbox-label"><input type="checkbox" data-field="http_header"><span>HTTP Header</span><span class="tooltip-trigger" data-tooltip="Only match within HTTP headers.">?</span></label>
         </div>
         <div class="form-row four-col">
-            <div class="form-group"><label>Depth</label><input type="number" data-field="depth" value="0" min="0"></div>
-            <div class="form-group"><label>Offset</label><input type="number" data-field="offset" value="0" min="0"></div>
-            <div class="form-group"><label>Distance</label><input type="number" data-field="distance" value="0" min="0"></div>
-            <div class="form-group"><label>Within</label><input type="number" data-field="within" value="0" min="0"></div>
+            <div class="form-group"><label>Depth</label><input type="number" data-field="depth" min="0"></div>
+            <div class="form-group"><label>Offset</label><input type="number" data-field="offset" min="0"></div>
+            <div class="form-group"><label>Distance</label><input type="number" data-field="distance"></div>
+            <div class="form-group"><label>Within</label><input type="number" data-field="within" min="0"></div>
         </div>
     `;
     container.appendChild(block);
@@ -401,10 +408,10 @@ function getFormData() {
         content_negated: false,
         content_http_uri: false,
         content_http_header: false,
-        depth: 0,
-        offset: 0,
-        distance: 0,
-        within: 0,
+        depth: null,
+        offset: null,
+        distance: null,
+        within: null,
         // Multi-content
         contents: getContentMatchesFromUI(),
         pcre: buildPcreString(),
@@ -446,15 +453,17 @@ function buildRuleTextSnort2(data) {
     matches.forEach(cm => {
         if (!cm.content) return;
         const prefix = cm.negated ? "!" : "";
-        let cs = `content:"${prefix}${cm.content}"`;
+        let cs = `content:${prefix}"${cm.content}"`;
         if (cm.nocase) cs += "; nocase";
         if (cm.http_uri) cs += "; http_uri";
         if (cm.http_header) cs += "; http_header";
+        if (cm.buffer) cs += `; ${cm.buffer}`;
         opts.push(cs);
-        if (cm.depth > 0) opts.push(`depth:${cm.depth}`);
-        if (cm.offset > 0) opts.push(`offset:${cm.offset}`);
-        if (cm.distance > 0) opts.push(`distance:${cm.distance}`);
-        if (cm.within > 0) opts.push(`within:${cm.within}`);
+        if (cm.depth != null) opts.push(`depth:${cm.depth}`);
+        if (cm.offset != null) opts.push(`offset:${cm.offset}`);
+        if (cm.distance != null) opts.push(`distance:${cm.distance}`);
+        if (cm.within != null) opts.push(`within:${cm.within}`);
+        if (cm.modifiers) opts.push(cm.modifiers);
     });
 
     if (data.pcre) opts.push(`pcre:"${data.pcre}"`);
@@ -497,13 +506,14 @@ function buildRuleTextSnort3(data) {
         const prefix = cm.negated ? "!" : "";
         if (cm.http_uri) opts.push("http.uri");
         else if (cm.http_header) opts.push("http.header");
-        let cs = `content:"${prefix}${cm.content}"`;
+        else if (cm.buffer) opts.push(cm.buffer);
+        let cs = `content:${prefix}"${cm.content}"`;
         if (cm.nocase) cs += "; nocase";
         opts.push(cs);
-        if (cm.depth > 0) opts.push(`depth ${cm.depth}`);
-        if (cm.offset > 0) opts.push(`offset ${cm.offset}`);
-        if (cm.distance > 0) opts.push(`distance ${cm.distance}`);
-        if (cm.within > 0) opts.push(`within ${cm.within}`);
+        if (cm.depth != null) opts.push(`depth ${cm.depth}`);
+        if (cm.offset != null) opts.push(`offset ${cm.offset}`);
+        if (cm.distance != null) opts.push(`distance ${cm.distance}`);
+        if (cm.within != null) opts.push(`within ${cm.within}`);
     });
 
     if (data.pcre) opts.push(`pcre:"${data.pcre}"`);
@@ -530,16 +540,29 @@ function updatePreview() {
     document.getElementById("livePreview").textContent = ruleText;
 }
 
-async function validateRule() {
+// Last /api/analyze response and the form data it was computed for, so
+// Validate and Score on an unchanged rule share one request
+let lastAnalysis = { key: null, result: null };
+
+async function analyzeRule() {
     const data = getFormData();
+    const key = JSON.stringify(data);
+    if (lastAnalysis.key === key) return lastAnalysis.result;
+    const resp = await fetch("/api/analyze", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: key,
+    });
+    const result = await resp.json();
+    if (!result.success) throw new Error(result.error);
+    lastAnalysis = { key, result };
+    return result;
+}
+
+async function validateRule() {
     try {
-        const resp = await fetch("/api/validate", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(data),
-        });
-        const result = await resp.json();
-        showValidation(result);
+        const result = await analyzeRule();
+        showValidation(result.validation);
     } catch (err) {
         toast("Validation request failed", "error");
     }
@@ -573,18 +596,47 @@ function showValidation(result) {
 }
 
 async function scoreRule() {
-    const data = getFormData();
     try {
-        const resp = await fetch("/api/score", {
+        const result = await analyzeRule();
+        showScore(result.score);
+    } catch (err) {
+        toast("Score request failed", "error");
+        return;
+    }
+    showProfile(getFormData());
+}
+
+// Measured cost on the server's profiling corpus, under the heuristic score.
+// Skipped quietly when no corpus is configured (503).
+async function showProfile(data) {
+    let result;
+    try {
+        const resp = await fetch("/api/profile", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(data),
+            body: JSON.stringify({ rules: [data] }),
         });
-        const result = await resp.json();
-        showScore(result);
+        if (resp.status === 503) return;
+        result = await resp.json().catch(() => ({}));
+        if (!resp.ok) {
+            toast(result.error || "Profiling failed", "error");
+            return;
+        }
     } catch (err) {
-        toast("Score request failed", "error");
+        toast("Profiling failed", "error");
+        return;
     }
+    const row = result.rules[0];
+    const corpus = result.corpus;
+    let html = `<div class="score-tips">`;
+    html += `<h4>Measured Cost</h4>`;
+    if (row) {
+        html += `<div class="score-tip">⏱ ${row.checks} checks, ${row.matches} matches on ${corpus.packets} packets and ${corpus.payloads} raw payloads — ${row.avg_us} µs per check (${row.content_us} µs in content, ${row.pcre_us} µs in PCRE overall)</div>`;
+    } else if (result.errors.length) {
+        html += `<div class="score-tip">⚠ ${escapeHtml(result.errors[0].error)}</div>`;
+    }
+    html += `</div>`;
+    document.getElementById("scoreOutput").insertAdjacentHTML("beforeend", html);
 }
 
 function showScore(result) {
@@ -732,10 +784,10 @@ function loadRuleIntoBuilder(ruleData) {
             negated: ruleData.content_negated || false,
             http_uri: ruleData.content_http_uri || false,
             http_header: ruleData.content_http_header || false,
-            depth: ruleData.depth || 0,
-            offset: ruleData.offset || 0,
-            distance: ruleData.distance || 0,
-            within: ruleData.within || 0,
+            depth: ruleData.depth ?? null,
+            offset: ruleData.offset ?? null,
+            distance: ruleData.distance ?? null,
+            within: ruleData.within ?? null,
         }]);
     } else {
         clearContentBlocks();
@@ -803,6 +855,7 @@ function initManager() {
 
     document.getElementById("btnExportRules").addEventListener("click", exportRules);
     document.getElementById("btnExportJson").addEventListener("click", exportJson);
+    document.getElementById("btnExportBinary").addEventListener("click", exportBinary);
     document.getElementById("btnEditSelected").addEventListener("click", editSelected);
     document.getElementById("btnDuplicate").addEventListener("click", duplicateSelected);
     document.getElementById("btnDeleteSelected").addEventListener("click", deleteSelected);
@@ -955,6 +1008,27 @@ async function exportJson() {
     }
 }
 
+async function exportBinary() {
+    if (state.rules.length === 0) { toast("No rules to export", "error"); return; }
+    try {
+        const resp = await fetch("/api/export/binary", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ rules: state.rules }),
+        });
+        if (!resp.ok) {
+            const result = await resp.json().catch(() => ({}));
+            toast(result.error || "Export failed", "error");
+            return;
+        }
+        const blob = await resp.blob();
+        downloadBlob(blob, "snortforge_project.sfproj");
+        toast(`Exported project with ${state.rules.length} rule(s)`, "success");
+    } catch (err) {
+        toast("Export failed", "error");
+    }
+}
+
 // ── Import ──
 
 async function importRulesFile(e) {
@@ -971,6 +1045,7 @@ async function importRulesFile(e) {
             state.rules.push(...result.rules);
             refreshTable();
             let msg = `Imported ${result.count} rule(s)`;
+            if (result.sources && result.sources.length > 1) msg += ` from ${result.sources.length} files`;
             if (result.errors.length > 0) msg += ` (${result.errors.length} parse errors)`;
             toast(msg, "success");
         } else {
@@ -990,7 +1065,9 @@ async function importJsonFile(e) {
     formData.append("file", file);
 
     try {
-        const resp = await fetch("/api/import/json", { method: "POST", body: formData });
+        // Binary projects share the project import button
+        const url = file.name.toLowerCase().endsWith(".sfproj") ? "/api/import/binary" : "/api/import/json";
+        const resp = await fetch(url, { method: "POST", body: formData });
         const result = await resp.json();
         if (result.success) {
             state.rules.push(...result.rules);
@@ -0,0 +1,106 @@
+import ipaddress
+import struct
+
+import pytest
+
+from snortforge.core.parser import parse_rule
+from snortforge.core.pcap import TCP_ACK, TCP_FIN, TCP_SYN
+
+PSH = 0x08
+
+
+def _addr(text):
+    return ipaddress.ip_address(text).packed
+
+
+def tcp_frame(src, dst, sport, dport, seq, flags, payload=b"", vlan=False):
+    """An Ethernet/IPv4/TCP frame; *vlan* adds an 802.1Q tag."""
+    tcp = struct.pack("!HHIIBBHHH", sport, dport, seq, 0, 5 << 4, flags, 65535, 0, 0) + payload
+    ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(tcp), 1, 0, 64, 6, 0, _addr(src), _addr(dst))
+    tag = b"\x81\x00\x00\x01" if vlan else b""
+    return b"\x00" * 12 + tag + b"\x08\x00" + ip + tcp
+
+
+def udp6_frame(src, dst, sport, dport, payload):
+    """An Ethernet/IPv6/UDP frame."""
+    udp = struct.pack("!HHHH", sport, dport, 8 + len(payload), 0) + payload
+    ip = struct.pack("!IHBB16s16s", 0x60000000, len(udp), 17, 64, _addr(src), _addr(dst))
+    return b"\x00" * 12 + b"\x86\xdd" + ip + udp
+
+
+def write_pcap(path, frames, linktype=1):
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, linktype))
+        for i, frame in enumerate(frames):
+            f.write(struct.pack("<IIII", 1000 + i, 500000, len(frame), len(frame)) + frame)
+    return str(path)
+
+
+CLIENT, SERVER = ("10.0.0.1", 40000), ("10.0.0.2", 80)
+
+
+def _c2s(seq, flags, payload=b""):
+    return tcp_frame(CLIENT[0], SERVER[0], CLIENT[1], SERVER[1], seq, flags, payload)
+
+
+def _s2c(seq, flags, payload=b""):
+    return tcp_frame(SERVER[0], CLIENT[0], SERVER[1], CLIENT[1], seq, flags, payload)
+
+
+# An HTTP exchange whose URI is split across two segments, an ARP frame, a
+# DNS query over IPv6 and a VLAN-tagged TCP flow picked up midstream
+CAPTURE_FRAMES = [
+    _c2s(100, TCP_SYN),
+    _s2c(500, TCP_SYN | TCP_ACK),
+    _c2s(101, TCP_ACK),
+    _c2s(101, PSH | TCP_ACK, b"GET /admin/log"),
+    _c2s(115, PSH | TCP_ACK, b"in.php?user=admin HTTP/1.1\r\nHost: lab\r\n\r\n"),
+    _s2c(501, PSH | TCP_ACK, b"HTTP/1.1 200 OK\r\n\r\nwelcome"),
+    _c2s(157, TCP_FIN | TCP_ACK),
+    _s2c(527, TCP_FIN | TCP_ACK),
+    b"\xff" * 6 + b"\x00" * 6 + b"\x08\x06" + b"\x00" * 28,
+    udp6_frame("2001:db8::1", "2001:db8::2", 5353, 53, b"\x12\x34\x01\x00\x00\x01\x07example\x03com\x00"),
+    tcp_frame("192.168.1.5", "10.0.0.2", 45555, 8080, 9000, PSH | TCP_ACK, b"cmd=exec&x=1", vlan=True),
+]
+
+
+HEADER = 'alert {proto} any any -> any {port} (msg:"{msg}"; {options} sid:{sid};)'
+
+# Rules replayed over the capture, SIDs 1000001 onwards
+CAPTURE_RULES = [
+    ("tcp", "80", "URI split", 'flow:to_server,established; content:"admin/login.php";'),
+    ("tcp", "80", "First segment", 'flow:to_server,established; content:"GET /admin/log";'),
+    ("tcp", "any", "Response", 'flow:to_client,established; content:"200 OK";'),
+    ("udp", "53", "DNS", 'content:"|07|example|03|com";'),
+    ("tcp", "8080", "Midstream", 'content:"cmd=exec";'),
+    ("tcp", "any", "Wrong direction", 'flow:to_server; content:"welcome";'),
+    ("tcp", "any", "ReDoS", 'pcre:"/(a+)+$/";'),
+    ("tcp", "80", "HTTP URI", 'content:"/admin/login.php"; http_uri; pcre:"/user=\\w+/U";'),
+    ("tcp", "any", "Packets only", 'flow:no_stream; content:"HTTP/1.1";'),
+]
+
+# (SID - 1000000, unit, frame, direction) of every alert the replay raises
+CAPTURE_ALERTS = [
+    (2, "packet", 4, "to_server"),
+    (9, "packet", 5, "to_server"),
+    (3, "packet", 6, "to_client"),
+    (9, "packet", 6, "to_client"),
+    (1, "stream", 8, "to_server"),
+    (2, "stream", 8, "to_server"),
+    (8, "stream", 8, "to_server"),
+    (3, "stream", 8, "to_client"),
+    (4, "packet", 10, "to_server"),
+    (5, "packet", 11, "to_server"),
+    (5, "stream", None, "to_server"),
+]
+
+
+def capture_rules():
+    return [parse_rule(HEADER.format(proto=p, port=port, msg=msg, options=o, sid=1000001 + n))
+            for n, (p, port, msg, o) in enumerate(CAPTURE_RULES)]
+
+
+@pytest.fixture
+def capture(tmp_path):
+    """Path of a pcap holding ``CAPTURE_FRAMES``."""
+    return write_pcap(tmp_path / "capture.pcap", CAPTURE_FRAMES)
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from snortforge.core.anchors import anchor_rules, anchor_ruleset, apply_anchors, content_text, propose_anchors
+from snortforge.core.engine import Inspection, RuleEngine
+from snortforge.core.parser import parse_rule
+from snortforge.core.ruleset import RuleSet
+
+LINE = 'alert tcp any any -> any 80 (msg:"m"; {options} sid:{sid};)'
+
+
+def _rule(options, sid=1000001):
+    return parse_rule(LINE.format(options=options, sid=sid))
+
+
+def test_content_text_escapes_special_bytes():
+    assert content_text('a;b"c|d\\e') == "a|3B|b|22|c|7C|d|5C|e"
+    assert content_text("x\x00\x01y") == "x|00 01|y"
+
+
+def test_uri_pcre_gets_a_nocase_uri_anchor():
+    anchors, reason = propose_anchors(_rule(r'pcre:"/admin\.php\?id=\d+/Ui";'))
+    assert reason is None
+    assert [(a.content, a.nocase, a.http_uri) for a in anchors] == [("admin.php?id=", True, True)]
+
+
+def test_anchored_pcre_gets_bounded_chain():
+    anchors, _ = propose_anchors(_rule(r'pcre:"/^GET \/login.{0,10}token=/";'))
+    assert [(a.content, a.offset, a.depth, a.distance, a.within) for a in anchors] == [
+        ("GET /login", None, 10, None, None), ("token=", None, None, 0, 16),
+    ]
+
+
+@pytest.mark.parametrize("options, reason", [
+    ('content:"abc";', "Rule has no PCRE."),
+    ('pcre:"admin";', "PCRE is not in /pattern/flags form."),
+    ('pcre:"!/evil/";', "Negated PCRE"),
+    (r'pcre:"/foo\d+bar/R";', "Relative PCRE"),
+    ('pcre:"/cookie=x/C";', "PCRE inspects a buffer"),
+    ('pcre:"/(a+)+$/";', "PCRE has no required literal"),
+    ('content:"login"; pcre:"/login/";', "The PCRE's literals are already content matches."),
+])
+def test_unsafe_or_useless_proposals_are_refused(options, reason):
+    anchors, why = propose_anchors(_rule(options))
+    assert anchors == []
+    assert why.startswith(reason)
+
+
+def test_apply_anchors_leaves_the_original_alone():
+    rule = _rule('pcre:"/evil-payload/";')
+    anchored, anchors = apply_anchors(rule)
+    assert len(anchors) == 1
+    assert rule.get_content_matches() == []
+    assert 'content:"evil-payload"; pcre:"/evil-payload/";' in anchored.build()
+    assert parse_rule(anchored.build()).to_dict() == anchored.to_dict()
+
+
+def test_anchor_rules_skips_rules_with_contents_by_default():
+    rules = [_rule('content:"x"; pcre:"/evil-payload/";'), _rule('pcre:"/evil-payload/";', 2)]
+    results = list(anchor_rules(rules))
+    assert [r["reason"] for r in results] == ["Rule already has a content match.", None]
+    assert results[0]["rule"] is rules[0]
+    assert len(list(anchor_rules(rules, pcre_only=False))[0]["anchors"]) == 1
+
+
+def test_anchor_ruleset_replaces_rows():
+    ruleset = RuleSet([_rule('pcre:"/evil-payload/";'), _rule('pcre:"/(a+)+$/";', 2)])
+    assert anchor_ruleset(ruleset) == 1
+    assert ruleset.rule(0).get_content_matches()[0].content == "evil-payload"
+    assert ruleset.rule(1).get_content_matches() == []
+
+
+PCRES = [
+    r"/^GET \/login.{0,10}token=/",
+    r"/user=admin[^&]{0,8}&pass=/i",
+    r"/abc;def\d+xyz/",
+    r"/select.+from.{2,6}where/i",
+]
+WORDS = ["GET /login", "token=", "user=admin", "USER=ADMIN", "&pass=", "abc;def", "7", "xyz",
+         "select", "SELECT", " from ", "  where", "?", "aaaa", "\x00"]
+
+
+def test_anchored_rules_match_exactly_what_the_pcre_matched():
+    rules = [_rule(f'pcre:"{p}";', 1000001 + n) for n, p in enumerate(PCRES)]
+    anchored = [apply_anchors(r)[0] for r in rules]
+    assert all(r.get_content_matches() for r in anchored)
+    plain, tight = RuleEngine(rules, prefilter=False), RuleEngine(anchored, prefilter=False)
+    rng = random.Random(7)
+    fired = 0
+    for _ in range(2000):
+        payload = "".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))).encode()
+        insp = Inspection(payload, raw=True)
+        expected = plain.evaluate(insp)
+        assert tight.evaluate(insp) == expected, payload
+        fired += len(expected)
+    assert fired > 50
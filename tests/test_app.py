@@ -0,0 +1,271 @@
+import io
+import json
+
+import pytest
+
+import app as webapp
+from snortforge.core import pcre
+from snortforge.core.parser import parse_rule
+from snortforge.core.rule import SnortRule
+from snortforge.core.scorer import CRITERIA, score_rule
+
+RULE = parse_rule(
+    'alert tcp any any -> any 80 (msg:"Admin login"; flow:to_server,established; content:"POST"; '
+    'http_method; content:"/admin"; nocase; http_uri; sid:1000001; rev:2;)'
+).to_dict()
+
+
+@pytest.fixture
+def client():
+    return webapp.app.test_client()
+
+
+# ── Binary projects ──
+
+def test_binary_export_import_round_trip(client):
+    rules = [RULE, dict(RULE, sid=1000002, msg="Second")]
+    resp = client.post("/api/export/binary", json={"rules": rules})
+    assert resp.status_code == 200
+    resp = client.post("/api/import/binary", data={"file": (io.BytesIO(resp.data), "p.sfproj")})
+    result = json.loads(resp.get_data(as_text=True))
+    assert result["success"] and result["count"] == 2
+    assert result["rules"] == rules
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"rules": [1]}, "Rule #1: Rule must be a JSON object."),
+    ({"rules": [RULE, {"src_ip": 1}]}, "Rule #2: 'src_ip' must be a string."),
+    ({"rules": [{"contents": [{"depth": "x"}]}]}, "Rule #1: Content #1: 'depth' must be an integer or null."),
+])
+def test_binary_export_rejects_mistyped_rules(client, body, error):
+    resp = client.post("/api/export/binary", json=body)
+    assert resp.status_code == 400
+    assert resp.get_json() == {"success": False, "error": error}
+
+
+def test_binary_import_of_truncated_project(client):
+    data = client.post("/api/export/binary", json={"rules": [RULE] * 3}).data
+    resp = client.post("/api/import/binary", data={"file": (io.BytesIO(data[:20]), "p.sfproj")})
+    assert resp.status_code == 400
+    resp = client.post("/api/import/binary", data={"file": (io.BytesIO(data[:-5]), "p.sfproj")})
+    result = json.loads(resp.get_data(as_text=True))
+    assert not result["success"] and result["count"] == 2
+
+
+def test_json_import_upgrades_zero_positions(client):
+    rules = [{"content": "a", "depth": 0, "contents": [{"content": "b", "distance": 0, "within": 4}]}]
+    old = json.dumps({"snortforge_version": "1.0.0", "rules": rules}).encode()
+    result = client.post("/api/import/json", data={"file": (io.BytesIO(old), "p.json")}).get_json()
+    assert result["rules"][0]["depth"] is None
+    assert (result["rules"][0]["contents"][0]["distance"], result["rules"][0]["contents"][0]["within"]) == (None, 4)
+
+    exported = client.post("/api/export/json", json={"rules": rules}).data
+    result = client.post("/api/import/json", data={"file": (io.BytesIO(exported), "p.json")}).get_json()
+    assert result["rules"] == rules
+
+
+# ── Batch validation ──
+
+def test_batch_validation_stream(client):
+    rules = [RULE, dict(RULE, msg="Changed", contents=[{"content": "x"}]), "junk"]
+    resp = client.post("/api/validate/batch", json={"rules": rules, "plan": "syntax"})
+    result = json.loads(resp.get_data(as_text=True))
+    assert [r["is_valid"] for r in result["results"]] == [True, False, False]
+    assert result["summary"]["conflicting_sids"] == [1000001]
+    assert client.post("/api/validate/batch", json={"rules": [], "plan": "bogus"}).status_code == 400
+
+
+# ── PCRE anchors ──
+
+def test_batch_anchors_stream(client, monkeypatch):
+    rules = [{"sid": 1, "pcre": "/abcdef/"}, {"sid": 2, "pcre": "/x/"}, {"sid": 3, "pcre": "/ghijkl/"}]
+    result = json.loads(client.post("/api/pcre/anchors/batch", json={"rules": rules}).get_data(as_text=True))
+    assert [bool(r["anchors"]) for r in result["results"]] == [True, False, True]
+    assert result["anchored"] == 2
+
+    anchor_rules = webapp.anchor_rules
+
+    def failing(rules, pcre_only):
+        rules = list(rules)
+        if rules[0].sid == 2:
+            raise RuntimeError("boom")
+        return anchor_rules(rules, pcre_only)
+
+    monkeypatch.setattr(webapp, "anchor_rules", failing)
+    result = json.loads(client.post("/api/pcre/anchors/batch", json={"rules": rules}).get_data(as_text=True))
+    assert [r["sid"] for r in result["results"]] == [1, 2, 3]
+    assert "error" in result["results"][1] and result["anchored"] == 2
+
+
+class _TimingOutSandbox:
+    def __init__(self):
+        self.calls = []
+
+    def measure(self, body, flags, inputs):
+        self.calls.append(body)
+        return "timeout", None
+
+
+def test_pcre_cost_measures_on_request(client, monkeypatch):
+    sandbox = _TimingOutSandbox()
+    monkeypatch.setattr(pcre, "get_sandbox", lambda: sandbox)
+    monkeypatch.setattr(pcre, "SANDBOX_ENABLED", True)
+    pcre.ANALYSIS_CACHE.clear()
+    try:
+        result = client.post("/api/pcre/cost", json={"pcre": "/(x+)+$/"}).get_json()
+    finally:
+        pcre.ANALYSIS_CACHE.clear()
+    assert result["success"] and result["analysis"]["cost_class"] == "catastrophic"
+    assert sandbox.calls == ["(x+)+$", "(x+)+$"]  # a timeout is retried once
+    assert client.post("/api/pcre/cost", json={"pcre": 5}).status_code == 400
+
+
+def test_batch_anchors_rejects_mistyped_rules(client):
+    resp = client.post("/api/pcre/anchors/batch", json={"rules": [{"sid": 1, "pcre": "/abc/"}, {"sid": 2, "pcre": 5}]})
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "Rule #2: 'pcre' must be a string."}
+
+
+# ── Scope analysis ──
+
+def test_scope_analysis(client):
+    rules = [
+        dict(RULE, dst_ip="$HOME_NET", dst_port="any"),
+        dict(RULE, sid=1000002, dst_ip="10.1.2.3", dst_port="80"),
+        dict(RULE, sid=1000003, dst_ip="$NOPE"),
+    ]
+    resp = client.post("/api/scope", json={
+        "rules": rules, "config": "ipvar HOME_NET 10.0.0.0/8\n",
+        "lookup": {"host": "10.1.2.3", "port": "80", "protocol": "tcp"},
+    })
+    result = resp.get_json()
+    assert result["success"]
+    assert result["unresolved"] == [{"index": 2, "sid": 1000003, "error": "Undefined variable '$NOPE'"}]
+    assert result["shadowed"] == [{"index": 1, "sid": 1000002, "by_index": 0, "by_sid": 1000001}]
+    assert [m["sid"] for m in result["matches"]] == [1000001, 1000002]
+
+
+@pytest.mark.parametrize("body, error", [
+    ([RULE], "Expected a JSON object with a 'rules' list."),
+    ({"rules": {"0": RULE}}, "Expected a JSON object with a 'rules' list."),
+    ({"rules": [RULE], "config": ["ipvar X 1.2.3.4"]},
+     "'config' must be the text of a snort.conf or snort.lua."),
+    ({"rules": [RULE, {"dst_port": 80}]}, "Rule #2: 'dst_port' must be a string."),
+    ({"rules": [RULE], "lookup": {"host": "10.0.0.999"}}, "Invalid lookup: "),
+    ({"rules": [RULE], "lookup": {"host": "10.0.0.1", "port": "http"}}, "Invalid lookup: "),
+])
+def test_scope_analysis_rejects_bad_input(client, body, error):
+    resp = client.post("/api/scope", json=body)
+    assert resp.status_code == 400
+    result = resp.get_json()
+    assert result["success"] is False and result["error"].startswith(error)
+
+
+# ── Batch scoring ──
+
+def test_batch_scoring_stream(client, monkeypatch):
+    monkeypatch.setattr(webapp, "SCORE_BATCH_LINE", 2)
+    rules = [RULE, dict(RULE, sid=1000002), "junk"]
+    resp = client.post("/api/score/batch", json={"rules": rules, "top_n": 1})
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(lines) == 2 and lines[-1]["done"]
+    results = [r for line in lines for r in line["results"]]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["grade"] == results[1]["grade"]
+    assert results[2] == {"index": 2, "sid": None, "error": "Not a rule object."}
+    assert (lines[0]["summary"]["total"], lines[-1]["summary"]["total"]) == (2, 2)
+    assert lines[-1]["summary"]["errors"] == 1
+
+
+@pytest.mark.parametrize("body", [[RULE], {"rules": "x"}, {"rules": [], "top_n": -1}, {"rules": [], "top_n": "5"}])
+def test_batch_scoring_rejects_bad_input(client, body):
+    assert client.post("/api/score/batch", json=body).status_code == 400
+
+
+# ── Incremental scoring ──
+
+def test_analyze_rescores_edits_and_replaces_on_sid_change(client):
+    first = client.post("/api/analyze", json=RULE).get_json()
+    assert first["success"] and len(first["score"]["rescored"]) == len(CRITERIA)
+    edit = client.post("/api/analyze", json=dict(RULE, msg="Renamed")).get_json()
+    assert edit["score"]["rescored"] == ["metadata_quality"]
+
+    other = dict(RULE, sid=1000002, flow="", contents=[], content="x")
+    switched = client.post("/api/analyze", json=other).get_json()
+    assert switched["score"]["rescored"] == list(CRITERIA)
+    expected = score_rule(SnortRule.from_dict(other))
+    assert {k: v for k, v in switched["score"].items() if k != "rescored"} == expected
+
+
+def test_score_session_what_if(client):
+    rules = [RULE, dict(RULE, sid=1000002, flow="")]
+    created = client.post("/api/score/session", json={"rules": rules}).get_json()
+    assert created["total"] == 2
+    url = f"/api/score/session/{created['session']}/what-if"
+    result = client.post(url, json={"changes": {"flow": ""}}).get_json()
+    assert result["rescored"] == 1  # the second rule has no flow already
+    assert [c["index"] for c in result["changed"]] == [0]
+    assert result["changed"][0]["delta"] < 0
+    assert client.post(url, json={"changes": {"flow": ""}, "indexes": [2]}).status_code == 400
+    assert client.post(url, json={"changes": {}}).status_code == 400
+    assert client.post("/api/score/session/nope/what-if", json={"changes": {"msg": "x"}}).status_code == 404
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"rules": [RULE], "top_n": True}, "'top_n' must be an integer between 0 and 1000."),
+    ({"rules": [RULE, "junk"]}, "Rule #2: Rule must be a JSON object."),
+    ({"rules": [{"sid": 1, "pcre": 5}]}, "Rule #1: 'pcre' must be a string."),
+])
+def test_score_session_rejects_bad_input_without_a_session(client, body, error):
+    before = len(webapp.SCORE_SESSIONS)
+    resp = client.post("/api/score/session", json=body)
+    assert resp.status_code == 400 and resp.get_json() == {"error": error}
+    assert len(webapp.SCORE_SESSIONS) == before
+
+
+# ── Rule profiling ──
+
+def test_profile_needs_a_corpus(client, monkeypatch):
+    monkeypatch.setattr(webapp, "PROFILE_CORPUS", [])
+    resp = client.post("/api/profile", json={"rules": [RULE]})
+    assert resp.status_code == 503 and resp.get_json()["success"] is False
+
+
+def test_profile(client, monkeypatch, capture):
+    monkeypatch.setattr(webapp, "PROFILE_CORPUS", [capture])
+    rules = [dict(RULE, flow="", contents=[{"content": "GET /admin/log"}]),
+             dict(RULE, sid=1000002, contents=[], pcre="/(a+)+$/")]
+    resp = client.post("/api/profile", json={"rules": rules, "sort": "matches", "top": 5})
+    result = resp.get_json()
+    assert resp.status_code == 200 and result["success"]
+    assert result["corpus"]["packets"] == 10
+    assert [(r["sid"], r["matches"]) for r in result["rules"]] == [(1000001, 2)]
+    assert "grade" in result["rules"][0]
+    assert result["errors"][0]["sid"] == 1000002 and "grade" in result["errors"][0]
+
+
+@pytest.mark.parametrize("body, error", [
+    ([RULE], "Expected a JSON object with a 'rules' list"),
+    ({"rules": [RULE] * (webapp.PROFILE_MAX_RULES + 1)}, "Expected a JSON object with a 'rules' list"),
+    ({"rules": [RULE], "sort": "msg"}, "Unknown sort key."),
+    ({"rules": [RULE], "top": -1}, "'top' must be a non-negative integer."),
+    ({"rules": [RULE], "top": True}, "'top' must be a non-negative integer."),
+    ({"rules": [RULE], "config": 5}, "'config' must be the text of a snort.conf or snort.lua."),
+    ({"rules": [dict(RULE, sid="1")]}, "Rule #1: 'sid' must be an integer."),
+])
+def test_profile_rejects_bad_input(client, monkeypatch, capture, body, error):
+    monkeypatch.setattr(webapp, "PROFILE_CORPUS", [capture])
+    resp = client.post("/api/profile", json=body)
+    assert resp.status_code == 400
+    result = resp.get_json()
+    assert result["success"] is False and result["error"].startswith(error)
+
+
+def test_profile_of_an_unreadable_corpus(client, monkeypatch, tmp_path):
+    bad = tmp_path / "bad.pcap"
+    bad.write_bytes(b"not a capture")
+    for corpus in ([str(bad)], [str(tmp_path / "missing.bin")]):
+        monkeypatch.setattr(webapp, "PROFILE_CORPUS", corpus)
+        resp = client.post("/api/profile", json={"rules": [RULE]})
+        assert resp.status_code == 500
+        assert resp.get_json() == {"success": False, "error": "The profiling corpus could not be read."}
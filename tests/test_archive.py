@@ -0,0 +1,69 @@
+import gzip
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from snortforge.core.archive import iter_rule_sources
+from snortforge.core.parser import iter_rules_stream
+
+RULES = (
+    'alert tcp any any -> any 80 (msg:"One"; content:"abc"; sid:1000001;)\n'
+    "# comment\n"
+    'alert udp any any -> any 53 (msg:"Two"; content:"def"; sid:1000002;)\n'
+)
+
+
+def _tar_gz(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _read(stream, filename=""):
+    return [(name, f.read()) for name, f in iter_rule_sources(stream, filename)]
+
+
+def test_plain_and_gzip_files():
+    data = RULES.encode()
+    assert _read(io.BytesIO(data), "local.rules") == [("local.rules", data)]
+    assert _read(io.BytesIO(gzip.compress(data)), "local.rules.gz") == [("local.rules", data)]
+
+
+@pytest.mark.parametrize("pack", [_tar_gz, _zip])
+def test_rule_packs_yield_rule_members_only(pack):
+    data = pack({
+        "rules/a.rules": RULES.encode(),
+        "rules/b.txt": b"",
+        "docs/readme.md": b"not rules",
+    })
+    assert [name for name, _ in _read(io.BytesIO(data), "pack")] == ["rules/a.rules", "rules/b.txt"]
+
+
+def test_stream_parse_of_a_rule_pack_keeps_sources_and_lines():
+    data = _tar_gz({"a.rules": RULES.encode(), "b.rules": b"garbage\n" + RULES.encode()})
+    items = list(iter_rules_stream(io.BytesIO(data), "pack.tar.gz", workers=1))
+    assert [(name, line) for name, line, _ in items] == [
+        ("a.rules", 1), ("a.rules", 3), ("b.rules", 1), ("b.rules", 2), ("b.rules", 4),
+    ]
+    assert items[2][2] == "Line 1: Invalid rule syntax."
+    assert [item.sid for _, _, item in items if not isinstance(item, str)] == [1000001, 1000002] * 2
+
+
+def test_truncated_archive_raises():
+    data = _tar_gz({"a.rules": RULES.encode() * 200})
+    with pytest.raises((OSError, EOFError, tarfile.TarError)):
+        _read(io.BytesIO(data[:len(data) // 2]), "pack.tar.gz")
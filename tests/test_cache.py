@@ -0,0 +1,106 @@
+import io
+
+from snortforge.core import parser
+from snortforge.core.cache import ParseCache
+from snortforge.core.rule import SnortRule
+
+RULE = 'alert tcp any any -> any 80 (msg:"Test {n}"; content:"abc{n}"; sid:{sid}; rev:1;)'
+
+
+def _lines(count):
+    return [RULE.format(n=n, sid=1000001 + n) for n in range(count)]
+
+
+def _norm(items):
+    return [(n, item.to_dict() if isinstance(item, SnortRule) else item) for n, item in items]
+
+
+def _journal_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_cached_parse_matches_uncached_and_counts_hits():
+    text = "\n".join(_lines(20) + ["garbage"]) + "\n"
+    cache, stats = ParseCache(), {}
+    first = list(parser.iter_rules(io.StringIO(text), cache=cache, stats=stats))
+    again = list(parser.iter_rules(io.StringIO(text), cache=cache, stats=stats))
+    assert _norm(first) == _norm(again) == _norm(parser.iter_rules(io.StringIO(text)))
+    assert stats == {"cache_misses": 21, "cache_hits": 21}
+
+
+def test_cached_rules_are_copies():
+    cache = ParseCache()
+    line = _lines(1)[0]
+    list(parser.iter_rules(io.StringIO(line), cache=cache))
+    _, rule = next(parser.iter_rules(io.StringIO(line), cache=cache))
+    rule.msg = "changed"
+    assert cache.get(cache.key(line)).msg == "Test 0"
+
+
+def test_parallel_parse_with_warm_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, "PARALLEL_MIN_BYTES", 0)
+    lines = _lines(2000)
+    path = tmp_path / "local.rules"
+    path.write_text("\n".join(lines) + "\n")
+    cache = ParseCache()
+    list(parser.iter_rules_parallel(str(path), workers=4, cache=cache))
+
+    lines[10] = "broken"
+    lines[1500] = lines[1500].replace("abc", "xyz")
+    path.write_text("\n".join(lines) + "\n")
+    stats = {}
+    result = list(parser.iter_rules_parallel(str(path), workers=4, cache=cache, stats=stats))
+    assert _norm(result) == _norm(parser.iter_rules(io.StringIO(path.read_text())))
+    assert stats == {"cache_hits": 1998, "cache_misses": 2}
+
+
+def test_journal_appends_and_reloads(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = ParseCache(path=path)
+    cache.put("a", SnortRule(msg="one", sid=1))
+    cache.put("b", "Bad rule")
+    cache.save()
+    assert len(_journal_lines(path)) == 3
+
+    cache.put("c", SnortRule(msg="three", sid=3))
+    cache.save()
+    assert len(_journal_lines(path)) == 4  # appended, not rewritten
+
+    loaded = ParseCache(path=path)
+    assert len(loaded) == 3
+    assert loaded.get("a").msg == "one"
+    assert loaded.get("b") == "Bad rule"
+
+
+def test_journal_is_compacted(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = ParseCache(path=path)
+    cache.put("a", "x")
+    cache.save()
+    for n in range(5):
+        cache.put("a", f"x{n}")
+        cache.save()
+    assert len(_journal_lines(path)) <= 1 + 2
+    assert ParseCache(path=path).get("a") == "x4"
+
+
+def test_damaged_journal_tail_is_skipped_and_rewritten(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    cache = ParseCache(path=path)
+    cache.put("a", SnortRule(msg="one", sid=1))
+    cache.save()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('["b", "r", {')
+
+    loaded = ParseCache(path=path)
+    assert len(loaded) == 1
+    loaded.save()
+    assert len(_journal_lines(path)) == 2
+    assert len(ParseCache(path=path)) == 1
+
+
+def test_journal_with_other_version_is_ignored(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    path.write_text('{"version": 0}\n["a", "e", "x"]\n')
+    assert len(ParseCache(path=str(path))) == 0
@@ -0,0 +1,58 @@
+from snortforge.core.cache import ResultCache
+from snortforge.core.canonical import canonical_text, canonicalize, rule_digest
+from snortforge.core.parser import parse_rule
+from snortforge.core.rule import SnortRule
+
+LINE = (
+    'alert tcp any any -> any 80 (msg:"Admin"; flow:to_server,established; content:"/admin"; '
+    'nocase; http_uri; metadata:service http, policy balanced; reference:url,example.com; '
+    'sid:1000001; rev:1;)'
+)
+
+
+def test_representation_differences_share_a_digest():
+    rule = parse_rule(LINE)
+    legacy = SnortRule.from_dict({
+        **{k: v for k, v in rule.to_dict().items() if k != "contents"},
+        "content": "/admin", "content_nocase": True, "content_http_uri": True,
+        "flow": "to_server, established",
+        "metadata": " service http,policy balanced ,",
+        "references": ["url,example.com", ""],
+        "threshold_count": 5,
+    })
+    assert rule_digest(legacy) == rule_digest(rule)
+    assert canonical_text(legacy) == canonical_text(rule)
+    assert canonicalize(legacy).to_dict() == canonicalize(rule).to_dict()
+
+
+def test_meaningful_differences_change_the_digest():
+    base = rule_digest(parse_rule(LINE))
+    for old, new in [('"/admin"', '"/Admin"'), ("nocase; ", ""), ('msg:"Admin"', 'msg:"admin"'),
+                     ("-> any 80", "-> any 8080"), ("rev:1", "rev:2")]:
+        assert rule_digest(parse_rule(LINE.replace(old, new))) != base, (old, new)
+
+
+def test_ignore_ids():
+    other = parse_rule(LINE.replace("sid:1000001; rev:1", "sid:7; rev:3"))
+    assert rule_digest(other) != rule_digest(parse_rule(LINE))
+    assert rule_digest(other, ignore_ids=True) == rule_digest(parse_rule(LINE), ignore_ids=True)
+
+
+def test_digest_is_stable_across_copies_and_edits():
+    rule = parse_rule(LINE)
+    digest = rule_digest(rule)
+    assert rule_digest(rule.copy()) == digest
+    rule.msg = "Changed"
+    assert rule_digest(rule) != digest
+
+
+def test_result_cache():
+    cache = ResultCache(max_size=2)
+    calls = []
+    compute = lambda: calls.append(1) or {"value": len(calls)}  # noqa: E731
+    assert cache.get_or_compute("a", compute) == {"value": 1}
+    assert cache.get_or_compute("a", compute) == {"value": 1}
+    cache.put("b", {"value": 2})
+    cache.put("c", {"value": 3})
+    assert cache.get("a") is None
+    assert len(calls) == 1
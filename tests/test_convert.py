@@ -0,0 +1,62 @@
+import json
+import re
+
+import pytest
+
+from snortforge.core import convert
+from snortforge.core.convert import convert_file, convert_rule_line
+from snortforge.core.parser import ParseError, parse_rule
+
+RULE = (
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET $HTTP_PORTS (msg:"Admin {n}"; '
+    'flow:to_server,established; content:"/admin{n}"; nocase; http_uri; depth:20; '
+    'content:"sess"; http_cookie; distance:0; within:50; '
+    'threshold:type threshold, track by_src, count 1, seconds 60; '
+    'classtype:web-application-attack; sid:{sid}; rev:1;)'
+)
+
+
+def test_convert_rule_line_keeps_every_option():
+    line = RULE.format(n=1, sid=1000001)
+    text = convert_rule_line(line)
+    assert 'http.uri; content:"/admin1"; nocase; depth 20;' in text
+    assert 'http_cookie; content:"sess"; distance 0; within 50;' in text
+    assert "detection_filter:track by_src, count 1, seconds 60;" in text
+    assert parse_rule(text).to_dict() == parse_rule(line).to_dict()
+
+
+@pytest.mark.parametrize("line, error", [
+    ('alert tcp any any -> any 80 (msg:"x"; flowbits:set,a; content:"a"; dsize:>10; sid:1;)',
+     "Unsupported option(s): flowbits, dsize"),
+    ('alert tcp any any -> any 80 (msg:"x"; content:"a"; rawbytes; sid:1;)',
+     "rawbytes has no Snort 3 equivalent"),
+    ('alert tcp any any -> any 80 (msg:"x"; content:"a"; threshold:type limit, track by_src, '
+     'count 1, seconds 60; sid:1;)', "threshold type limit needs a Snort 3 event_filter"),
+    ("not a rule", "Could not parse rule structure."),
+])
+def test_convert_rule_line_refuses_lossy_conversions(line, error):
+    with pytest.raises(ParseError, match=re.escape(error)):
+        convert_rule_line(line)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_convert_file_reports_failures_with_line_numbers(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(convert, "PARALLEL_MIN_BYTES", 0)
+    lines = ["# header", ""]
+    lines += [RULE.format(n=n, sid=1000001 + n) for n in range(300)]
+    lines[50] = 'alert tcp any any -> any 80 (msg:"x"; byte_test:1,>,2,0; sid:9;)'
+    lines[250] = "garbage"
+    src, dst, report = tmp_path / "in.rules", tmp_path / "out.rules", tmp_path / "failed.jsonl"
+    # CRLF line endings must not shift the reported line numbers
+    src.write_bytes("\r\n".join(lines).encode() + b"\r\n")
+
+    summary = convert_file(str(src), str(dst), str(report), workers=workers, block_size=4096)
+    assert summary == {"converted": 298, "failed": 2, "passthrough": 2}
+    failures = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [(f["line"], f["rule"]) for f in failures] == [(51, lines[50]), (251, "garbage")]
+    assert failures[0]["error"] == "Unsupported option(s): byte_test"
+
+    out = dst.read_text().splitlines()
+    assert out[:2] == ["# header", ""]
+    assert len(out) == 300
+    assert out[2] == convert_rule_line(lines[2])
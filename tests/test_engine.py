@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from conftest import CAPTURE_ALERTS, HEADER, capture_rules
+from snortforge.core.engine import Inspection, RuleEngine, http_buffers, main, run_pcaps
+from snortforge.core.parser import parse_rule
+from snortforge.core.scope import Variables, ip_point
+
+
+def _alerts(report):
+    return [(a["sid"] - 1000000, a["unit"], a["frame"], a["direction"]) for a in report["alerts"]]
+
+
+# ── Capture replay ──
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_capture_replay(capture, prefilter):
+    report = run_pcaps(capture_rules(), [capture], prefilter=prefilter)
+    assert (report["frames"], report["packets"], report["flows"]) == (11, 10, 3)
+    assert _alerts(report) == CAPTURE_ALERTS
+    assert report["alert_count"] == len(CAPTURE_ALERTS)
+    assert report["errors"] == [{"rule": 6, "sid": 1000007,
+                                 "error": "PCRE can backtrack catastrophically; not evaluated"}]
+    rows = {row["sid"] - 1000000: row for row in report["rules"]}
+    assert (rows[1]["packet_alerts"], rows[1]["stream_alerts"]) == (0, 1)
+    assert rows[6]["matches"] == 0
+    assert report["flow_details"][1]["client"] == "10.0.0.1:40000"
+
+
+def test_packets_only_and_alert_cap(capture):
+    report = run_pcaps(capture_rules(), [capture], streams=False, max_alerts=2)
+    assert report["alert_count"] == sum(1 for a in CAPTURE_ALERTS if a[1] == "packet")
+    assert _alerts(report) == [a for a in CAPTURE_ALERTS if a[1] == "packet"][:2]
+
+
+def test_variables_narrow_the_header(capture):
+    rules = [parse_rule('alert tcp any any -> $HTTP_SERVERS 80 (msg:"m"; content:"GET"; sid:1;)')]
+    hit = run_pcaps(rules, [capture], Variables.parse("ipvar HTTP_SERVERS 10.0.0.2\n"))
+    miss = run_pcaps(rules, [capture], Variables.parse("ipvar HTTP_SERVERS 10.9.9.9\n"))
+    assert hit["alert_count"] == 2 and miss["alert_count"] == 0
+
+
+def test_truncated_capture_fails_replay(capture, tmp_path):
+    with open(capture, "rb") as f:
+        data = f.read()
+    cut = tmp_path / "cut.pcap"
+    cut.write_bytes(data[:-5])
+    with pytest.raises(ValueError, match="capture cut short"):
+        run_pcaps(capture_rules(), [str(cut)])
+
+
+# ── Evaluation ──
+
+def _packet(payload, dport=80, to_server=True):
+    return Inspection(payload, 6, ip_point("10.0.0.1"), 40000, ip_point("10.0.0.2"), dport,
+                      to_server, established=True)
+
+
+@pytest.mark.parametrize("options, payload, fires", [
+    ('content:"abc"; offset:2; depth:3;', b"xxabc", True),
+    ('content:"abc"; offset:2; depth:3;', b"xxxabc", False),
+    ('content:"a"; content:"b"; distance:1; within:2;', b"a-b", True),
+    ('content:"a"; content:"b"; distance:1; within:2;', b"a---b", False),
+    ('content:"a"; content:"b"; distance:0; within:1;', b"a-a-ab", True),  # retries earlier matches
+    ('content:"B"; content:"A"; distance:0;', b"AB", False),
+    ('content:"B"; content:"A"; distance:0;', b"BA", True),
+    ('content:"bc"; content:"ab"; distance:-3; within:2;', b"abc", True),
+    ('content:"c"; content:"a"; distance:-1;', b"abc", False),
+    ('content:"c"; content:"a"; distance:-10; within:5;', b"abc", False),  # window ends before the buffer
+    ('content:"ABC"; nocase;', b"xabcx", True),
+    ('content:!"evil"; content:"ok";', b"ok evil", False),
+    ('content:"|00 01|x";', b"\x00\x01x", True),
+    ('content:"GET"; http_method; content:"/a"; http_uri;', b"GET /a HTTP/1.1\r\n\r\n", True),
+    ('content:"/a"; http_header;', b"GET /a HTTP/1.1\r\n\r\n", False),
+    ('content:"k=v"; http_cookie;', b"GET / HTTP/1.1\r\nCookie: k=v\r\n\r\n", True),
+    ('pcre:"/^ab+c/";', b"abbbc", True),
+    ('content:"id="; pcre:"/^\\d+/R";', b"?id=42", True),
+    ('content:"id="; pcre:"/^\\d+/R";', b"?id=x42", False),
+    ('pcre:"!/evil/";', b"fine", True),
+    ('pcre:"!/evil/";', b"evil", False),
+    ('flow:to_client; content:"a";', b"a", False),
+])
+def test_detection_options(options, payload, fires):
+    rule = parse_rule(HEADER.format(proto="tcp", port="80", msg="m", options=options, sid=1))
+    for prefilter in (True, False):
+        engine = RuleEngine([rule], prefilter=prefilter)
+        assert not engine.errors
+        assert engine.evaluate(_packet(payload)) == ([0] if fires else [])
+
+
+def test_distance_zero_is_relative_on_raw_payloads():
+    rule = parse_rule(HEADER.format(proto="tcp", port="80", msg="m",
+                                    options='content:"B"; content:"A"; distance:0;', sid=1))
+    engine = RuleEngine([rule])
+    assert engine.evaluate(Inspection(b"AB", raw=True)) == []
+    assert engine.evaluate(Inspection(b"BA", raw=True)) == [0]
+
+
+def test_header_is_checked_for_packets_but_not_raw_payloads():
+    engine = RuleEngine([parse_rule(HEADER.format(proto="udp", port="53", msg="m",
+                                                   options='content:"x";', sid=1))])
+    assert engine.evaluate(_packet(b"x")) == []
+    assert engine.evaluate(Inspection(b"x", raw=True)) == [0]
+
+
+@pytest.mark.parametrize("options, error", [
+    ('pcre:"nope";', "not in /pattern/flags form"),
+    ('pcre:"/a/Q";', "not supported"),
+    ('pcre:"/(/";', "does not compile"),
+    ('content:"|0G|";', "Content '|0G|'"),
+])
+def test_rules_the_engine_cannot_evaluate(options, error):
+    engine = RuleEngine([parse_rule(HEADER.format(proto="tcp", port="80", msg="m", options=options, sid=1))])
+    assert error in engine.errors[0] and not engine.compiled
+
+
+def test_http_buffers():
+    buffers = http_buffers(b"POST /login?x=1 HTTP/1.1\r\nHost: a\r\nCookie: s=1\r\n\r\nuser=bob")
+    assert (buffers["http_method"], buffers["http_uri"], buffers["http_cookie"], buffers["http_body"]) == (
+        b"POST", b"/login?x=1", b"s=1", b"user=bob")
+    assert http_buffers(b"HTTP/1.1 404 Not Found\r\n\r\n")["http_stat_msg"] == b"Not Found"
+    assert not any(http_buffers(b"\x00binary").values())
+
+
+# ── Command line ──
+
+def test_cli_expect_and_forbid(capture, tmp_path, capsys):
+    rules = tmp_path / "local.rules"
+    rules.write_text("\n".join(r.build() for r in capture_rules()) + "\n")
+    out = tmp_path / "report.json"
+    assert main([str(rules), capture, "--expect", "1000001,1000004", "--json", str(out)]) == 0
+    assert json.loads(out.read_text())["alert_count"] == len(CAPTURE_ALERTS)
+    assert main([str(rules), capture, "--forbid", "1000002"]) == 1
+    assert "FAIL: sid 1000002 fired" in capsys.readouterr().err
+
+
+def test_cli_reports_bad_captures(tmp_path, capsys):
+    rules = tmp_path / "local.rules"
+    rules.write_text("")
+    bad = tmp_path / "bad.pcap"
+    bad.write_bytes(b"not a capture at all")
+    with pytest.raises(SystemExit) as exc:
+        main([str(rules), str(bad)])
+    assert exc.value.code == 2
+    assert "not a classic pcap file" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+import pytest
+
+from snortforge.core import analyze, scorer, validator
+from snortforge.core.analyze import analyze_rule
+from snortforge.core.features import extract_features
+from snortforge.core.parser import parse_rule
+from snortforge.core.rule import SnortRule
+from snortforge.core.scorer import score_rule
+from snortforge.core.validator import validate_rule
+
+LINE = (
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET 80 (msg:"Admin login"; flow:to_server, established; '
+    'content:"POST"; http_method; content:"/admin"; nocase; http_uri; depth:20; '
+    'content:"x"; distance:1; within:4; content:"s"; http_cookie; '
+    'reference:url,example.com; threshold:type limit, track by_src, count 1, seconds 60; '
+    'sid:1000001; rev:2;)'
+)
+
+
+def test_extracted_features():
+    features = extract_features(parse_rule(LINE))
+    assert features.has_content
+    assert features.content_lengths == (4, 6, 1, 1)
+    assert features.has_nocase and features.has_http_scope
+    assert features.modifier_counts == {"depth": 1, "distance": 1, "within": 1}
+    assert features.flow_parts == ("to_server", "established")
+    assert (features.src_ip_scoped, features.dst_ip_scoped) == (True, True)
+    assert (features.src_port_scoped, features.dst_port_scoped) == (False, True)
+    assert features.uses_variables
+    assert features.references == ("url,example.com",)
+    assert features.threshold_complete
+
+
+def test_features_of_a_bare_rule():
+    features = extract_features(SnortRule(content="abc", references=["", "cve,2024-1"]))
+    assert features.content_lengths == (3,)
+    assert not (features.has_nocase or features.has_http_scope or features.uses_variables)
+    assert features.modifier_counts == {} and features.flow_parts == ()
+    assert features.references == ("cve,2024-1",)
+    assert not features.threshold_complete
+    assert not extract_features(SnortRule(pcre="/x/")).has_content
+
+
+@pytest.mark.parametrize("line", [
+    LINE,
+    'alert ip any any -> any any (msg:"Loose"; pcre:"/a/"; sid:1;)',
+    'alert tcp any any -> any any (content:"a"; sid:0;)',
+])
+def test_validation_and_score_take_shared_features(line):
+    rule = parse_rule(line)
+    features = extract_features(rule)
+    assert validate_rule(rule, features=features) == validate_rule(rule)
+    assert score_rule(rule, features=features) == score_rule(rule)
+
+
+def test_analyze_rule_extracts_once(monkeypatch):
+    rule = parse_rule(LINE)
+    expected = {"validation": validate_rule(rule), "score": score_rule(rule)}
+    calls = []
+
+    def counting(r):
+        calls.append(r)
+        return extract_features(r)
+
+    def unexpected(r):
+        raise AssertionError("features extracted again")
+
+    monkeypatch.setattr(analyze, "extract_features", counting)
+    monkeypatch.setattr(validator, "extract_features", unexpected)
+    monkeypatch.setattr(scorer, "extract_features", unexpected)
+    result = analyze_rule(rule)
+    assert calls == [rule]
+    assert {k: result[k] for k in expected} == expected
+    assert result["rule_text"] == rule.build()
@@ -0,0 +1,149 @@
+import pytest
+
+from snortforge.core import scorer
+from snortforge.core.cache import ResultCache
+from snortforge.core.ngram import SAMPLE_BYTES, NgramIndex, build_index, iter_samples, main
+from snortforge.core.parser import parse_rule
+from snortforge.core.scorer import SCORE_CACHE, ScoreSession, score_rule, set_selectivity_index
+from snortforge.core.validator import VALIDATION_CACHE
+
+SAMPLES = [b"GET /index.html HTTP/1.1", b"get /images/logo.png HTTP/1.1", b"POST /login HTTP/1.1",
+           b"\x00\x01binary\xff"] * 5
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / "benign.sfng")
+    build_index(SAMPLES, path, hash_bits=10)
+    return path
+
+
+@pytest.fixture
+def no_index():
+    yield
+    set_selectivity_index(None)
+
+
+# ── Index ──
+
+def test_build_and_open(index_path):
+    with NgramIndex.open(index_path) as index:
+        assert index.stats()["samples"] == 20 and index.hash_bits == 10
+        assert index.hit_rate(b"") == 1.0
+        assert index.hit_rate(b"G") == 0.75
+        assert index.hit_rate(b"ge") == 0.5             # case-folded
+        assert index.hit_rate(b"HTTP/1.1") == 0.75
+        assert index.hit_rate(b"/login") == 0.25
+        assert index.hit_rate(b"\x00\x01") == 0.25
+
+
+def test_estimates_never_undercount(index_path):
+    with NgramIndex.open(index_path) as index:
+        for sample in set(SAMPLES):
+            for i in range(len(sample)):
+                for j in range(i + 1, min(len(sample), i + 12) + 1):
+                    gram = sample[i:j]
+                    true = sum(gram.lower() in s.lower() for s in SAMPLES)
+                    assert index.doc_freq(gram) >= true
+
+
+def test_empty_corpus(tmp_path):
+    path = str(tmp_path / "empty.sfng")
+    assert build_index([], path, hash_bits=8) == {"samples": 0, "bytes": 0, "hash_bits": 8}
+    with NgramIndex.open(path) as index:
+        assert index.hit_rate(b"abc") == 1.0
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"",
+    lambda data: data[:10],
+    lambda data: data[:-4],
+    lambda data: b"XXXX" + data[4:],
+    lambda data: data[:4] + b"\x09\x00" + data[6:],
+])
+def test_damaged_index_is_rejected(index_path, damage):
+    with open(index_path, "rb") as f:
+        data = f.read()
+    with open(index_path, "wb") as f:
+        f.write(damage(data))
+    with pytest.raises(ValueError, match="n-gram index"):
+        NgramIndex.open(index_path)
+
+
+def test_bad_hash_bits(tmp_path):
+    with pytest.raises(ValueError):
+        build_index([b"x"], str(tmp_path / "x.sfng"), hash_bits=4)
+
+
+def test_iter_samples_and_cli(tmp_path):
+    corpus = tmp_path / "corpus"
+    (corpus / "sub").mkdir(parents=True)
+    (corpus / "a.txt").write_bytes(b"x" * (SAMPLE_BYTES + 10))
+    (corpus / "sub" / "b.bin").write_bytes(b"abc")
+    (corpus / "broken.pcap").write_bytes(b"\xd4\xc3\xb2")  # skipped, not fatal
+    assert [len(s) for s in iter_samples(str(corpus))] == [SAMPLE_BYTES, 10, 3]
+    assert main(["build", str(corpus), str(tmp_path / "out.sfng"), "--hash-bits", "8"]) == 0
+    assert NgramIndex.open(str(tmp_path / "out.sfng")).samples == 3
+
+
+# ── Selectivity scoring ──
+
+def _selectivity(result):
+    return next(b for b in result["breakdown"] if b["name"] == "content_selectivity")
+
+
+def test_selectivity_scoring_uses_the_index(index_path, no_index):
+    common = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:"HTTP/1.1"; sid:1;)')
+    rare = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:"HTTP/1.1"; content:"evil!"; sid:2;)')
+    assert "no traffic index" in _selectivity(score_rule(common))["details"]
+    set_selectivity_index(index_path)
+    assert _selectivity(score_rule(common))["score"] == 0
+    assert _selectivity(score_rule(rare))["details"] == "Rarest content not seen in 20 benign samples"
+
+
+def test_scores_without_an_index_match_the_old_content_criterion():
+    # Scores from before content selectivity was split off content_match
+    rule = parse_rule('alert tcp $EXTERNAL_NET any -> $HOME_NET 80 (msg:"Evil payload detected"; '
+                      'flow:to_server,established; content:"evilpayload"; classtype:trojan-activity; '
+                      'sid:1000001; rev:1;)')
+    assert score_rule(rule)["score"] == 71
+    for primary, old_points in (("abcdefghij", 25), ("abcd", 24), ("ab", 23)):
+        chained = parse_rule(f'alert tcp any any -> any 80 (msg:"m"; content:"{primary}"; nocase; http_uri; '
+                             'content:"c"; content:"d"; content:"e"; sid:1;)')
+        parts = {b["name"]: b["score"] for b in score_rule(chained)["breakdown"]}
+        assert parts["content_match"] + parts["content_selectivity"] == old_points
+
+
+def test_negated_contents_are_skipped_with_and_without_an_index(index_path, no_index):
+    negated_first = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:!"ab"; content:"evil!"; sid:1;)')
+    only_negated = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:!"evil!"; sid:2;)')
+    assert _selectivity(score_rule(negated_first))["details"] == "Primary content 5 chars (no traffic index)"
+    assert _selectivity(score_rule(only_negated))["score"] == 0
+    set_selectivity_index(index_path)
+    assert _selectivity(score_rule(negated_first))["details"] == "Rarest content not seen in 20 benign samples"
+    assert _selectivity(score_rule(only_negated))["score"] == 0
+
+
+def test_index_change_invalidates_caches_and_sessions(index_path, no_index):
+    rule = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:"HTTP/1.1"; sid:1;)')
+    session = ScoreSession([rule])
+    score_rule(rule, SCORE_CACHE)
+    VALIDATION_CACHE.put("key", {"is_valid": True})
+    before = session.result(0)
+
+    set_selectivity_index(index_path)
+    assert len(SCORE_CACHE) == 0 and len(VALIDATION_CACHE) == 0
+    assert session.result(0) == score_rule(rule) != before
+    edit = rule.copy()
+    edit.msg = "renamed"
+    assert session.rescore(0, edit)["rescored"] == ["metadata_quality"]
+    assert _selectivity(session.result(0)) == _selectivity(score_rule(rule))
+
+
+def test_pool_workers_reopen_the_index(index_path, no_index):
+    set_selectivity_index(index_path)
+    rules = [parse_rule(f'alert tcp any any -> any 80 (msg:"m"; content:"HTTP/1.1"; sid:{n};)')
+             for n in range(1, 9)]
+    pooled = list(scorer.score_rules(rules, workers=2, chunk_size=3, cache=ResultCache()))
+    assert [r["score"] for r in pooled] == [score_rule(r)["score"] for r in rules]
+    assert all(_selectivity(r)["score"] == 0 for r in pooled)
@@ -0,0 +1,167 @@
+import io
+
+import pytest
+
+from snortforge.core import parser
+from snortforge.core.parser import ParseError, iter_rules, parse_rule, parse_rules_file
+from snortforge.core.rule import SnortRule
+
+RULE = 'alert tcp any any -> any 80 (msg:"Test {n}"; content:"abc{n}"; sid:{sid}; rev:1;)'
+
+
+def _ruleset(count, start_sid=1000001):
+    return "\n".join(RULE.format(n=n, sid=start_sid + n) for n in range(count)) + "\n"
+
+
+# ── Streaming parser ──
+
+def test_iter_rules_keeps_line_numbers_and_skips_comments():
+    text = "# header\n\n" + RULE.format(n=1, sid=1000001) + "\n  # indented comment\n" + RULE.format(n=2, sid=1000002) + "\n"
+    items = list(iter_rules(io.StringIO(text)))
+    assert [line_num for line_num, _ in items] == [3, 5]
+    assert [rule.sid for _, rule in items] == [1000001, 1000002]
+
+
+def test_iter_rules_reports_bad_lines_without_stopping():
+    text = RULE.format(n=1, sid=1000001) + "\nnot a rule\n" + RULE.format(n=2, sid=1000002) + "\n"
+    items = list(iter_rules(io.StringIO(text)))
+    assert isinstance(items[0][1], SnortRule)
+    assert items[1] == (2, "Line 2: Invalid rule syntax.")
+    assert isinstance(items[2][1], SnortRule)
+
+
+def test_iter_rules_accepts_binary_files_and_start_offset():
+    data = (RULE.format(n=1, sid=1000001) + "\n").encode() + b"\xff\xfe garbage\n"
+    items = list(iter_rules(io.BytesIO(data), start=10))
+    assert items[0][0] == 10 and items[0][1].sid == 1000001
+    assert items[1] == (11, "Line 11: Invalid rule syntax.")
+
+
+def test_parse_rules_file(tmp_path):
+    path = tmp_path / "local.rules"
+    path.write_text(_ruleset(5) + "garbage\n")
+    rules, errors = parse_rules_file(str(path))
+    assert [r.sid for r in rules] == list(range(1000001, 1000006))
+    assert errors == ["Line 6: Invalid rule syntax."]
+
+
+@pytest.mark.parametrize("line", [
+    "",
+    "alert tcp any any -> any 80",
+    'alert tcp any any -> any 80 (msg:"unterminated; sid:1;',
+    'alert tcp any any -> any 80 msg:"no parens"; sid:1;',
+])
+def test_parse_rule_rejects_malformed_lines(line):
+    with pytest.raises(ParseError):
+        parse_rule(line)
+
+
+# ── Parallel parsing ──
+
+def test_parallel_parse_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, "PARALLEL_MIN_BYTES", 0)
+    text = _ruleset(3000).replace(RULE.format(n=7, sid=1000008), "broken line")
+    path = tmp_path / "big.rules"
+    path.write_text(text)
+
+    serial = [(n, item if isinstance(item, str) else item.to_dict())
+              for n, item in iter_rules(io.StringIO(text))]
+    parallel = [(n, item if isinstance(item, str) else item.to_dict())
+                for n, item in parser.iter_rules_parallel(str(path), workers=4)]
+    assert parallel == serial
+    assert parallel[7] == (8, "Line 8: Invalid rule syntax.")
+
+
+def test_parallel_parse_of_empty_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, "PARALLEL_MIN_BYTES", 0)
+    path = tmp_path / "empty.rules"
+    path.write_text("")
+    assert parser.parse_rules_file_parallel(str(path), workers=2) == ([], [])
+
+
+# ── Content matches and modifiers ──
+
+MULTI = (
+    'alert tcp any any -> any 80 (msg:"Multi"; content:"a|00|b"; depth:10; offset:2; '
+    'content:!"zz"; nocase; within:20; content:"sess"; http_cookie; fast_pattern:2,3; '
+    'content:"raw"; rawbytes; sid:1000001; rev:3;)'
+)
+
+
+def test_every_content_keeps_its_own_modifiers():
+    contents = parse_rule(MULTI).get_content_matches()
+    assert [(c.content, c.depth, c.offset, c.within) for c in contents] == [
+        ("a|00|b", 10, 2, None), ("zz", None, None, 20), ("sess", None, None, None),
+        ("raw", None, None, None),
+    ]
+    assert [(c.negated, c.nocase) for c in contents] == [
+        (False, False), (True, True), (False, False), (False, False),
+    ]
+    assert [(c.buffer, c.modifiers) for c in contents] == [
+        ("", ""), ("", ""), ("http_cookie", "fast_pattern:2,3"), ("", "rawbytes"),
+    ]
+
+
+def test_snort2_round_trip():
+    rule = parse_rule(MULTI)
+    assert rule.build() == MULTI
+    assert parse_rule(rule.build()).to_dict() == rule.to_dict()
+
+
+def test_snort3_rendering_of_buffers_and_modifiers():
+    text = parse_rule(MULTI).build_snort3()
+    assert 'content:!"zz"; nocase; within 20;' in text
+    assert ('http_cookie; content:"sess"; fast_pattern; fast_pattern_offset 2; '
+            'fast_pattern_length 3;') in text
+    assert 'pkt_data; content:"raw";' in text
+
+
+# ── Snort 3 dialect ──
+
+SNORT3 = (
+    'alert http (msg:"S3"; flow:to_server,established; http_uri; content:"/login", nocase; '
+    'http_param:"user"; content:"admin"; pkt_data; content:"x", depth 5; sid:1000002; rev:1;)'
+)
+
+
+def test_snort3_sticky_buffers():
+    rule = parse_rule(SNORT3)
+    assert rule.protocol == "http"
+    contents = rule.get_content_matches()
+    assert [(c.content, c.http_uri, c.nocase, c.depth) for c in contents] == [
+        ("/login", True, True, None), ("admin", False, False, None), ("x", False, False, 5),
+    ]
+    # Buffers the model has no field for stay attached, arguments included
+    assert [c.buffer for c in contents] == ["", 'http_param:"user"', ""]
+
+
+def test_snort3_round_trip():
+    rule = parse_rule(SNORT3)
+    assert parse_rule(rule.build_snort3()).to_dict() == rule.to_dict()
+
+
+def test_snort2_to_snort3_round_trip():
+    rule = parse_rule(MULTI.replace(' content:"raw"; rawbytes;', ""))
+    assert parse_rule(rule.build_snort3()).to_dict() == rule.to_dict()
+
+
+@pytest.mark.parametrize("line, dialect", [
+    ('alert tcp any any -> any 80 (msg:"x"; content:"a"; http_uri; sid:1;)', "snort2"),
+    ('alert tcp any any -> any 80 (msg:"x"; http_uri; content:"a"; sid:1;)', "snort3"),
+    ('alert tcp any any -> any 80 (msg:"x"; content:"a", nocase; sid:1;)', "snort3"),
+    ('alert tcp any any -> any 80 (msg:"x"; service:http; content:"a"; sid:1;)', "snort3"),
+])
+def test_dialect_detection(line, dialect):
+    rule = parse_rule(line)
+    assert rule.get_content_matches()[0].http_uri == ("http_uri" in line)
+    assert parse_rule(line, dialect=dialect).to_dict() == rule.to_dict()
+
+
+def test_snort3_fast_pattern_bounds_fold_into_snort2_form():
+    rule = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:"abcdef", fast_pattern, '
+                      'fast_pattern_offset 1, fast_pattern_length 2; sid:1;)')
+    assert rule.contents[0].modifiers == "fast_pattern:1,2"
+    assert "content:\"abcdef\"; fast_pattern:1,2;" in rule.build()
+    rule = parse_rule('alert tcp any any -> any 80 (msg:"m"; content:"abcdef"; fast_pattern; '
+                      'fast_pattern_offset 2; sid:1;)', dialect="snort3")
+    assert rule.contents[0].modifiers == "fast_pattern:2,4"
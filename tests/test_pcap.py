@@ -0,0 +1,83 @@
+import struct
+
+import pytest
+
+from conftest import CAPTURE_FRAMES, tcp_frame, udp6_frame, write_pcap
+from snortforge.core.pcap import (
+    IPPROTO_TCP, IPPROTO_UDP, LINKTYPE_LINUX_SLL, LINKTYPE_NULL, LINKTYPE_RAW, TCP_ACK,
+    PcapError, decode_frame, iter_frames, iter_packets,
+)
+
+
+def test_frames_and_packets(capture):
+    frames = list(iter_frames(capture))
+    assert len(frames) == len(CAPTURE_FRAMES)
+    assert frames[0][:2] == (1000.5, 1)
+    packets = list(iter_packets(capture))
+    assert len(packets) == len(CAPTURE_FRAMES) - 1  # the ARP frame is skipped
+    http = packets[3]
+    assert (http.proto, http.sport, http.dport, http.payload) == (IPPROTO_TCP, 40000, 80, b"GET /admin/log")
+    assert http.src == bytes([10, 0, 0, 1]) and http.seq == 101
+    dns = packets[8]
+    assert (dns.proto, dns.dport, len(dns.src)) == (IPPROTO_UDP, 53, 16)
+    assert packets[9].payload == b"cmd=exec&x=1"  # behind a VLAN tag
+
+
+def test_big_endian_and_nanosecond_captures(tmp_path):
+    frame = CAPTURE_FRAMES[3]
+    path = tmp_path / "be.pcap"
+    path.write_bytes(struct.pack(">IHHiIII", 0xA1B23C4D, 2, 4, 0, 0, 65535, 1)
+                     + struct.pack(">IIII", 7, 250000000, len(frame), len(frame)) + frame)
+    (ts, linktype, data), = iter_frames(str(path))
+    assert (ts, linktype, bytes(data)) == (7.25, 1, frame)
+
+
+def test_other_link_types():
+    eth = tcp_frame("10.0.0.1", "10.0.0.2", 1234, 80, 1, TCP_ACK, b"x")
+    ip = eth[14:]
+    for linktype, frame in [(LINKTYPE_RAW, ip), (LINKTYPE_NULL, b"\x02\x00\x00\x00" + ip),
+                            (LINKTYPE_LINUX_SLL, b"\x00" * 14 + b"\x08\x00" + ip)]:
+        packet = decode_frame(linktype, frame)
+        assert (packet.dport, packet.payload) == (80, b"x")
+    assert decode_frame(LINKTYPE_RAW, udp6_frame("::1", "::2", 1, 2, b"y")[14:]).payload == b"y"
+    assert decode_frame(147, eth) is None
+
+
+def test_truncated_headers_are_skipped():
+    frame = tcp_frame("10.0.0.1", "10.0.0.2", 1234, 80, 1, TCP_ACK, b"payload")
+    assert decode_frame(1, frame[:30]) is None
+    assert decode_frame(1, frame[:40]) is None
+    assert decode_frame(1, frame[:-3]).payload == b"payl"
+
+
+def test_empty_file_has_no_frames(tmp_path):
+    path = tmp_path / "empty.pcap"
+    path.write_bytes(b"")
+    assert list(iter_frames(str(path))) == []
+
+
+@pytest.mark.parametrize("data", [b"\x0a\x0d\x0d\x0a" + b"\x00" * 40, b"\xd4\xc3\xb2\xa1\x02\x00"])
+def test_other_formats_raise_pcap_error(tmp_path, data):
+    path = tmp_path / "x.pcap"
+    path.write_bytes(data)
+    with pytest.raises(PcapError, match="not a classic pcap file"):
+        list(iter_frames(str(path)))
+
+
+@pytest.mark.parametrize("cut", [1, 10, 17, 30])
+def test_truncated_capture_raises_after_complete_records(capture, tmp_path, cut):
+    with open(capture, "rb") as f:
+        data = f.read()
+    path = str(tmp_path / "cut.pcap")
+    with open(path, "wb") as f:
+        f.write(data[:-cut])
+    frames = []
+    with pytest.raises(PcapError, match="capture cut short"):
+        for frame in iter_frames(path):
+            frames.append(frame)
+    assert len(frames) == len(CAPTURE_FRAMES) - 1
+
+
+def test_write_helper_round_trip(tmp_path):
+    path = write_pcap(tmp_path / "one.pcap", [CAPTURE_FRAMES[0]], linktype=LINKTYPE_RAW)
+    assert [linktype for _, linktype, _ in iter_frames(path)] == [LINKTYPE_RAW]
@@ -0,0 +1,118 @@
+import pytest
+
+from snortforge.core import pcre
+from snortforge.core.pcre import analyze_pcre, split_pcre
+from snortforge.core.engine import RuleEngine
+from snortforge.core.rule import SnortRule
+from snortforge.core.scorer import score_rule
+from snortforge.core.validator import validate_rule
+
+
+class FakeSandbox:
+    """Answers measure() calls from a list of canned ``(status, seconds)`` results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def measure(self, body, flags, inputs):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+@pytest.fixture
+def sandbox(monkeypatch):
+    pcre.ANALYSIS_CACHE.clear()
+    fake = FakeSandbox()
+    monkeypatch.setattr(pcre, "get_sandbox", lambda: fake)
+    yield fake
+    pcre.ANALYSIS_CACHE.clear()
+
+
+# ── Static analysis ──
+
+@pytest.mark.parametrize("pattern, cost, kinds", [
+    (r"/admin\.php/i", "low", []),
+    (r"/^GET\s+\/x/", "low", []),
+    ("/.*foo.*bar/s", "moderate", ["leading_wildcard"]),
+    ("/(a+)+$/", "high", ["nested_quantifier"]),
+    ("/(a|a)*b/", "high", ["ambiguous_alternation"]),
+])
+def test_static_analysis(pattern, cost, kinds):
+    result = analyze_pcre(pattern, measure=False)
+    assert result["parsed"]
+    assert (result["static_class"], result["cost_class"]) == (cost, cost)
+    assert [f["kind"] for f in result["findings"]] == kinds
+    assert result["measured_class"] is None
+
+
+def test_unparseable_pattern():
+    result = analyze_pcre("not a pcre", measure=False)
+    assert not result["parsed"] and result["cost_class"] == "low"
+
+
+def test_split_pcre():
+    assert split_pcre("!/abc/Ui") == ("abc", "Ui", True)
+    assert split_pcre("abc") is None
+
+
+# ── Measurement ──
+
+def test_bounded_patterns_are_not_measured(sandbox):
+    analyze_pcre(r"/admin\.php/i", measure=True)
+    assert sandbox.calls == 0
+
+
+def test_cost_class_is_the_worse_of_static_and_measured(sandbox):
+    sandbox.results = [("ok", 0.0001)]
+    result = analyze_pcre("/(a+)+$/", measure=True)
+    assert (result["static_class"], result["measured_class"], result["cost_class"]) == ("high", "low", "high")
+
+    sandbox.results = [("ok", 0.02)]
+    result = analyze_pcre("/x.*y+z/", measure=True)
+    assert (result["measured_class"], result["cost_class"]) == ("high", "high")
+    assert result["max_ms"] == 20.0
+
+
+def test_timeout_is_retried_once(sandbox):
+    sandbox.results = [("timeout", None), ("ok", 0.002)]
+    assert analyze_pcre("/(a+)+$/", measure=True)["measured_class"] == "moderate"
+    sandbox.results = [("timeout", None), ("timeout", None)]
+    assert analyze_pcre("/(b+)+$/", measure=True)["cost_class"] == "catastrophic"
+    assert sandbox.calls == 4
+
+
+def test_results_are_memoized_but_failures_are_not(sandbox):
+    sandbox.results = [("error", None), ("ok", 0.0)]
+    assert analyze_pcre("/(a+)+$/", measure=True)["measured_class"] is None
+    assert analyze_pcre("/(a+)+$/", measure=True)["measured_class"] == "low"
+    assert analyze_pcre("/(a+)+$/", measure=True)["measured_class"] == "low"
+    assert sandbox.calls == 2
+
+
+def test_real_sandbox_flags_catastrophic_backtracking(monkeypatch):
+    sandbox = pcre.PcreSandbox(timeout=0.2)
+    monkeypatch.setattr(pcre, "get_sandbox", lambda: sandbox)
+    pcre.ANALYSIS_CACHE.clear()
+    try:
+        assert analyze_pcre("/(a+)+$/", measure=True)["measured_class"] == "catastrophic"
+        assert analyze_pcre("/^(ab)+c/", measure=True)["measured_class"] == "low"
+    finally:
+        sandbox.close()
+        pcre.ANALYSIS_CACHE.clear()
+
+
+def test_validation_reports_static_findings_without_measuring(sandbox):
+    rule = SnortRule(msg="Nested quantifier", sid=1000001, pcre="/(a+)+$/")
+    warnings = validate_rule(rule)["warnings"]
+    assert any(w.startswith("PCRE: Nested quantifiers") for w in warnings)
+    assert sandbox.calls == 0
+
+
+def test_scores_and_engine_builds_use_static_analysis_only(sandbox, monkeypatch):
+    monkeypatch.setattr(pcre, "SANDBOX_ENABLED", True)
+    rule = SnortRule(msg="Nested quantifier", sid=1000001, pcre="/(a+)+$/")
+    pcre_score = next(c for c in score_rule(rule)["breakdown"] if c["name"] == "pcre_efficiency")
+    assert pcre_score["details"] == "PCRE present (no anchor), cost: high"
+    assert RuleEngine([rule]).errors == {0: "PCRE can backtrack catastrophically; not evaluated"}
+    assert sandbox.calls == 0
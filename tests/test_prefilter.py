@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from conftest import CAPTURE_ALERTS, capture_rules
+from snortforge.core.engine import CompiledRule, Inspection, RuleEngine, run_pcaps
+from snortforge.core.parser import parse_rule
+from snortforge.core.prefilter import AhoCorasick, Prefilter, required_patterns
+
+RULE = 'alert tcp any any -> any any (msg:"m"; {options} sid:{sid};)'
+
+
+def _compiled(options, sid=1):
+    return CompiledRule(parse_rule(RULE.format(options=options, sid=sid)), sid - 1, None, False)
+
+
+# ── Automaton ──
+
+def test_aho_corasick_finds_overlapping_patterns():
+    patterns = [b"he", b"she", b"his", b"hers", b"e", b"xyz"]
+    automaton = AhoCorasick(patterns)
+    assert automaton.find(b"ushers") == {0, 1, 3, 4}
+    assert automaton.find(b"this") == {2}
+    assert automaton.find(b"") == set()
+
+
+def test_aho_corasick_matches_naive_search():
+    rng = random.Random(11)
+    patterns = list({bytes(rng.choice(b"abc") for _ in range(rng.randint(1, 5))) for _ in range(40)})
+    automaton = AhoCorasick(patterns)
+    for _ in range(300):
+        data = bytes(rng.choice(b"abcd") for _ in range(rng.randint(0, 30)))
+        assert automaton.find(data) == {i for i, p in enumerate(patterns) if p in data}
+
+
+# ── Required patterns ──
+
+@pytest.mark.parametrize("options, patterns", [
+    ('content:"ABC"; content:"|00 01|";', {b"abc", b"\x00\x01"}),
+    ('content:!"evil"; content:"ok";', {b"ok"}),
+    ('content:"s=1"; http_cookie; content:"GET"; http_method;', {b"get"}),
+    ('pcre:"/User-Agent:\\s+curl/i";', {b"user-agent:", b"curl"}),
+    ('pcre:"/\\xffabcdef/";', {b"abcdef"}),  # non-ASCII bytes are left to the regex
+    ('pcre:"!/evil-payload/";', set()),
+    ('pcre:"/session=abc/C";', set()),
+    ('content:!"x";', set()),
+])
+def test_required_patterns(options, patterns):
+    assert required_patterns(_compiled(options)) == patterns
+
+
+def test_candidates_need_every_pattern():
+    prefilter = Prefilter([
+        _compiled('content:"alpha"; content:"beta";', 1),
+        _compiled('content:"beta";', 2),
+        _compiled('content:!"gamma";', 3),
+    ])
+    assert prefilter.candidates(b"alpha") == [2]
+    assert prefilter.candidates(b"beta alpha") == [0, 1, 2]
+    assert prefilter.stats()["unfiltered_rules"] == 1
+
+
+# ── Same alerts with and without the prefilter ──
+
+def test_capture_alerts_do_not_depend_on_the_prefilter(capture):
+    with_prefilter = run_pcaps(capture_rules(), [capture])
+    without = run_pcaps(capture_rules(), [capture], prefilter=False)
+    assert with_prefilter["alerts"] == without["alerts"]
+    assert len(with_prefilter["alerts"]) == len(CAPTURE_ALERTS)
+    checks = [row["checks"] for row in with_prefilter["rules"]]
+    assert sum(checks) < sum(row["checks"] for row in without["rules"])
+
+
+WORDS = [b"GET ", b"/admin", b"/login.php", b" HTTP/1.1\r\n", b"Host: lab\r\n", b"Cookie: s=1\r\n",
+         b"\r\n", b"user=", b"ADMIN", b"\x00\x01", b"\xff", b"evil", b"id=", b"42", b"curl/7"]
+
+OPTIONS = [
+    'content:"/admin";',
+    'content:"admin"; nocase; content:"login"; distance:0;',
+    'content:"GET"; http_method; content:"/login.php"; http_uri;',
+    'content:"s=1"; http_cookie;',
+    'content:"|00 01|"; depth:5;',
+    'content:"|FF|"; content:!"evil";',
+    'content:!"evil";',
+    'content:"id="; pcre:"/^\\d+/R";',
+    'pcre:"/user=admin/i";',
+    'pcre:"/curl\\/\\d/";',
+    'pcre:"!/evil/";',
+    'pcre:"/\\/login\\.php/U";',
+    'pcre:"/Host: lab/H";',
+    'pcre:"/s=1/C";',
+    'content:"HTTP/1.1"; pcre:"/(admin|login)/";',
+]
+
+
+def test_random_payloads_fire_the_same_rules():
+    rules = [parse_rule(RULE.format(options=o, sid=n + 1)) for n, o in enumerate(OPTIONS)]
+    fast, slow = RuleEngine(rules), RuleEngine(rules, prefilter=False)
+    assert not fast.errors
+    rng = random.Random(2)
+    fired = set()
+    for _ in range(3000):
+        payload = b"".join(rng.choice(WORDS) for _ in range(rng.randint(0, 10)))
+        for insp in (Inspection(payload, 6, 1, 40000, 2, 80, True, True), Inspection(payload, raw=True)):
+            hits = fast.evaluate(insp)
+            assert hits == slow.evaluate(insp), payload
+            fired.update(hits)
+    assert fired == set(range(len(rules)))
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import CAPTURE_ALERTS, capture_rules
+from snortforge.core.parser import parse_rule
+from snortforge.core.profile import COLUMNS, format_table, iter_corpus, main, profile_rules, sort_rows, write_csv
+
+
+@pytest.fixture
+def corpus(tmp_path, capture):
+    raw = tmp_path / "raw"
+    (raw / "sub").mkdir(parents=True)
+    (raw / "a.bin").write_bytes(b"cmd=exec " * 200)         # two payload windows
+    (raw / "sub" / "b.txt").write_bytes(b"nothing to see")
+    return [capture, str(raw)]
+
+
+def _rows(result):
+    return {row["sid"] - 1000000: row for row in result["rules"]}
+
+
+def test_iter_corpus_walks_directories_in_order(corpus):
+    assert [(kind, path.rsplit("/", 1)[-1]) for kind, path in iter_corpus(corpus)] == [
+        ("pcap", "capture.pcap"), ("raw", "a.bin"), ("raw", "b.txt"),
+    ]
+
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_profile_counts_checks_and_matches(corpus, prefilter):
+    result = profile_rules(capture_rules(), corpus, prefilter=prefilter)
+    assert result["corpus"] == {
+        "pcaps": 1, "raw_files": 2, "packets": 10, "flows": 3, "payloads": 3,
+        "bytes": result["corpus"]["bytes"],
+    }
+    assert result["corpus"]["bytes"] > 9 * 200
+    rows = _rows(result)
+    assert 7 not in rows and result["errors"][0]["sid"] == 1000007
+    # Capture alerts plus the two raw windows holding "cmd=exec"
+    assert rows[5]["matches"] == sum(1 for a in CAPTURE_ALERTS if a[0] == 5) + 2
+    assert sum(row["matches"] for row in rows.values()) == len(CAPTURE_ALERTS) + 2
+    assert result["totals"]["matches"] == len(CAPTURE_ALERTS) + 2
+    for row in rows.values():
+        assert row["checks"] >= row["matches"]
+        assert set(COLUMNS) <= set(row)
+    assert round(sum(row["percent"] for row in rows.values())) == 100
+    assert (result["totals"]["prefilter_us"] > 0) == prefilter
+
+
+def test_prefilter_cuts_checks_not_matches(corpus):
+    fast = _rows(profile_rules(capture_rules(), corpus))
+    slow = _rows(profile_rules(capture_rules(), corpus, prefilter=False))
+    assert {sid: row["matches"] for sid, row in fast.items()} == {sid: row["matches"] for sid, row in slow.items()}
+    assert sum(row["checks"] for row in fast.values()) < sum(row["checks"] for row in slow.values())
+
+
+def test_pcre_time_is_split_out(corpus):
+    rules = [parse_rule('alert tcp any any -> any any (msg:"p"; content:"HTTP"; pcre:"/\\d{3} OK/"; sid:1;)')]
+    row = profile_rules(rules, corpus)["rules"][0]
+    assert row["checks"] and row["pcre_us"] > 0 and row["content_us"] > 0
+
+
+def test_sort_and_top():
+    rows = [{"sid": s, "total_us": t, "checks": c} for s, t, c in [(3, 1.0, 9), (1, 5.0, 1), (2, 5.0, 4)]]
+    assert [r["sid"] for r in sort_rows([dict(r) for r in rows])] == [1, 2, 3]
+    assert [r["sid"] for r in sort_rows([dict(r) for r in rows], "sid")] == [1, 2, 3]
+    ranked = sort_rows([dict(r) for r in rows], "checks", top=2)
+    assert [(r["rank"], r["sid"]) for r in ranked] == [(1, 3), (2, 2)]
+    with pytest.raises(ValueError, match="Unknown sort key"):
+        sort_rows(rows, "msg")
+    with pytest.raises(ValueError, match="Unknown sort key"):
+        profile_rules([], [], sort="bogus")
+
+
+def test_table_and_csv_output(corpus):
+    rows = profile_rules(capture_rules(), corpus, top=3)["rules"]
+    table = format_table(rows).splitlines()
+    assert table[0].split()[:3] == ["Num", "SID", "GID"] and len(table) == 4
+    out = io.StringIO()
+    write_csv(rows, out)
+    parsed = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert list(parsed[0]) == list(COLUMNS)
+    assert [int(r["sid"]) for r in parsed] == [r["sid"] for r in rows]
+
+
+def test_cli(corpus, tmp_path, capsys):
+    rules = tmp_path / "local.rules"
+    rules.write_text("\n".join(r.build() for r in capture_rules()) + "\n")
+    out = tmp_path / "profile.json"
+    assert main([str(rules), *corpus, "--format", "json", "-o", str(out), "--sort", "matches"]) == 0
+    data = json.loads(out.read_text())
+    assert data["rules"][0]["sid"] == 1000005
+    assert "not evaluated" in capsys.readouterr().err
+
+
+def test_cli_reports_a_truncated_capture(corpus, tmp_path, capsys):
+    rules = tmp_path / "local.rules"
+    rules.write_text("")
+    with open(corpus[0], "rb") as f:
+        data = f.read()
+    cut = tmp_path / "cut.pcap"
+    cut.write_bytes(data[:-5])
+    with pytest.raises(SystemExit):
+        main([str(rules), str(cut)])
+    assert "capture cut short" in capsys.readouterr().err
@@ -0,0 +1,127 @@
+import io
+import json
+import struct
+
+import pytest
+
+from snortforge.core import project
+from snortforge.core.parser import parse_rule
+from snortforge.core.project import ProjectFormatError, ProjectReader, read_project, write_project
+from snortforge.core.rule import rule_dict_errors
+
+LINES = [
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET $HTTP_PORTS (msg:"Admin login"; flow:to_server,established; '
+    'content:"POST"; http_method; content:"/admin"; nocase; http_uri; fast_pattern; '
+    'pcre:"/admin\\.php/Ui"; classtype:web-application-attack; reference:url,example.com; '
+    'sid:1000001; rev:2;)',
+    'alert udp $HOME_NET any -> any 53 (msg:"DNS \\"quoted\\" é"; content:"|00 01|"; depth:4; '
+    'threshold:type limit, track by_src, count 1, seconds 60; sid:1000002;)',
+    'alert icmp any any -> any any (msg:"No content"; sid:1000003;)',
+]
+
+
+def _project(rules=None, meta=None):
+    buf = io.BytesIO()
+    write_project(buf, rules if rules is not None else [parse_rule(line) for line in LINES], meta)
+    return buf.getvalue()
+
+
+def test_round_trip():
+    rules = [parse_rule(line) for line in LINES]
+    meta, data = read_project(io.BytesIO(_project(rules, {"exported": "now"})))
+    assert meta == {"exported": "now", "rule_count": 3}
+    assert data == [rule.to_dict() for rule in rules]
+
+
+def test_positional_modifiers_keep_zero_and_unset():
+    rule = parse_rule('alert tcp any any -> any any (content:"B"; content:"A"; distance:0; '
+                      'content:"C"; distance:-2; within:6; sid:1;)')
+    _, data = read_project(io.BytesIO(_project([rule])))
+    assert [(cm["offset"], cm["distance"], cm["within"]) for cm in data[0]["contents"]] == [
+        (None, None, None), (None, 0, None), (None, -2, 6),
+    ]
+
+
+def test_version_1_zero_means_unset():
+    rule = parse_rule('alert tcp any any -> any any (content:"B"; content:"A"; distance:0; sid:1;)')
+    data = bytearray(_project([rule]))
+    data[4:6] = struct.pack("<H", 1)
+    _, rules = read_project(io.BytesIO(bytes(data)))
+    assert rules[0]["contents"][1]["distance"] is None
+
+
+def test_random_access():
+    reader = ProjectReader(io.BytesIO(_project()))
+    assert len(reader) == 3
+    assert reader.rule(2).sid == 1000003
+    assert reader.rule(0).build() == parse_rule(LINES[0]).build()
+
+
+def test_empty_project():
+    assert read_project(io.BytesIO(_project([]))) == ({"rule_count": 0}, [])
+
+
+def test_rule_dicts_are_normalized():
+    _, data = read_project(io.BytesIO(_project([{"msg": "dict", "sid": 5}])))
+    assert (data[0]["msg"], data[0]["sid"], data[0]["action"]) == ("dict", 5, "alert")
+
+
+def test_every_truncation_raises_format_error():
+    data = _project()
+    for n in range(len(data)):
+        with pytest.raises(ProjectFormatError):
+            read_project(io.BytesIO(data[:n]))
+
+
+def test_not_a_project():
+    with pytest.raises(ProjectFormatError, match="Not a SnortForge binary project"):
+        read_project(io.BytesIO(b"PK\x03\x04" + bytes(64)))
+    with pytest.raises(ProjectFormatError, match="Unsupported project format version"):
+        read_project(io.BytesIO(project._HEADER.pack(project.MAGIC, project.FORMAT_VERSION + 1, 0)))
+
+
+def _with_sections(meta, schema, rest=b"\0" * 8):
+    out = project._HEADER.pack(project.MAGIC, project.FORMAT_VERSION, 0)
+    for section in (meta, schema):
+        out += struct.pack("<I", len(section)) + section
+    return out + rest
+
+
+@pytest.mark.parametrize("meta, schema", [
+    (b"{{{", b"{}"),
+    (b"[1]", b"{}"),
+    (b"{}", json.dumps({"content": []}).encode()),
+    (b"{}", json.dumps({"rule": [["x", "Z"]], "content": []}).encode()),
+    (b"{}", json.dumps({"rule": [["x"]], "content": []}).encode()),
+    (b"{}", b"\xff\xfe"),
+])
+def test_corrupt_sections_raise_format_error(meta, schema):
+    with pytest.raises(ProjectFormatError):
+        read_project(io.BytesIO(_with_sections(meta, schema)))
+
+
+def test_oversized_length_raises_format_error():
+    data = project._HEADER.pack(project.MAGIC, project.FORMAT_VERSION, 0) + struct.pack("<I", 0xFFFFFFF0)
+    with pytest.raises(ProjectFormatError, match="Corrupt project file"):
+        read_project(io.BytesIO(data))
+
+
+def test_corrupt_record_raises_format_error():
+    data = bytearray(_project())
+    # Point the last record's first string id far past the string table
+    data[-len(data) // 8:] = b"\xff" * (len(data) // 8)
+    with pytest.raises(ProjectFormatError):
+        read_project(io.BytesIO(bytes(data)))
+
+
+def test_rule_dict_errors():
+    assert rule_dict_errors(parse_rule(LINES[0]).to_dict()) == []
+    assert rule_dict_errors([]) == ["Rule must be a JSON object."]
+    assert rule_dict_errors({"sid": "1", "nocase": 1, "references": ["a", 2]}) == [
+        "'sid' must be an integer.", "'references' must be a list of strings.",
+    ]
+    assert rule_dict_errors({"sid": True}) == ["'sid' must be an integer."]
+    assert rule_dict_errors({"contents": [{"depth": "4"}, 3]}) == [
+        "Content #1: 'depth' must be an integer or null.", "Content #2 must be a JSON object.",
+    ]
+    assert rule_dict_errors({"depth": None, "contents": [{"distance": None, "within": 0}]}) == []
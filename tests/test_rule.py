@@ -0,0 +1,107 @@
+import pickle
+
+from snortforge.core.parser import parse_rule
+from snortforge.core.rule import ContentMatch, SnortRule
+
+LINE = (
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET 80 (msg:"Admin login"; flow:to_server,established; '
+    'content:"POST"; http_method; content:"/admin"; nocase; http_uri; fast_pattern; '
+    'pcre:"/admin\\.php/Ui"; classtype:web-application-attack; reference:url,example.com; '
+    'sid:1000001; rev:2;)'
+)
+
+
+# ── Model ──
+
+def test_dict_round_trip():
+    rule = parse_rule(LINE)
+    data = rule.to_dict()
+    assert SnortRule.from_dict(data).to_dict() == data
+    assert SnortRule.from_dict(data).build() == rule.build()
+
+
+def test_zero_and_negative_positions_round_trip():
+    line = ('alert tcp any any -> any any (content:"B"; offset:0; content:"A"; distance:0; '
+            'content:"C"; distance:-3; within:5; sid:1; rev:1;)')
+    rule = parse_rule(line)
+    assert [(c.offset, c.distance, c.within) for c in rule.contents] == [
+        (0, None, None), (None, 0, None), (None, -3, 5),
+    ]
+    assert rule.build() == line
+    assert parse_rule(rule.build_snort3()).build() == line
+    assert SnortRule.from_dict(rule.to_dict()).build() == line
+
+
+def test_from_dict_ignores_unknown_keys():
+    rule = SnortRule.from_dict({"msg": "x", "sid": 5, "bogus": 1, "_memo": {"snort2": "stale"}})
+    assert (rule.msg, rule.sid) == ("x", 5)
+    assert "stale" not in rule.build()
+
+
+def test_copy_is_independent():
+    rule = parse_rule(LINE)
+    dup = rule.copy()
+    dup.contents[0].content = "GET"
+    dup.references.append("cve,2024-0001")
+    assert rule.contents[0].content == "POST"
+    assert rule.references == ["url,example.com"]
+
+
+# ── Rendering memo ──
+
+def test_build_follows_field_changes():
+    rule = parse_rule(LINE)
+    first = rule.build()
+    assert rule.build() is first
+    rule.msg = "Renamed"
+    assert 'msg:"Renamed"' in rule.build()
+
+
+def test_build_follows_content_changes():
+    rule = parse_rule(LINE)
+    rule.build()
+    rule.build_snort3()
+    rule.contents[1].nocase = False
+    rule.contents.append(ContentMatch(content="login"))
+    assert 'content:"/admin"; http_uri;' in rule.build()
+    assert rule.build().count("content:") == 3
+    assert 'content:"login"' in rule.build_snort3()
+
+
+def test_copy_does_not_share_stale_output():
+    rule = parse_rule(LINE)
+    rule.build()
+    dup = rule.copy()
+    dup.sid = 7
+    assert "sid:7;" in dup.build()
+    assert "sid:1000001;" in rule.build()
+
+
+def test_build_follows_reference_changes():
+    rule = parse_rule(LINE)
+    rule.build()
+    rule.references.append("cve,2024-0001")
+    assert "reference:cve,2024-0001;" in rule.build()
+    rule.references = ["url,example.org"]
+    rule.build()
+    rule.references.clear()
+    assert "reference:" not in rule.build()
+
+
+def test_build_follows_replaced_content_list():
+    rule = parse_rule(LINE)
+    rule.build()
+    rule.contents = [ContentMatch(content="first")]
+    assert rule.build().count("content:") == 1
+    rule.contents[0].content = "second"
+    assert 'content:"second"' in rule.build()
+
+
+def test_pickle_round_trip_rebuilds():
+    rule = parse_rule(LINE)
+    rule.build()
+    clone = pickle.loads(pickle.dumps(rule))
+    assert clone.build() == rule.build()
+    clone.contents[0].content = "changed"
+    assert 'content:"changed"' in clone.build()
+    assert 'content:"changed"' not in rule.build()
@@ -0,0 +1,60 @@
+import pytest
+
+from snortforge.core.parser import parse_rule
+from snortforge.core.ruleset import RuleSet
+
+LINES = [
+    'alert tcp any any -> any 80 (msg:"Web one"; flow:established; content:"GET"; http_method; '
+    'content:"x"; fast_pattern; classtype:web-application-attack; sid:1000001;)',
+    'alert tcp any any -> any 80 (msg:"Web two"; pcre:"/a+b/"; classtype:web-application-attack; sid:1000002;)',
+    'alert udp any any -> any 53 (msg:"DNS"; content:"|00 01|"; classtype:bad-unknown; sid:1000003; rev:4;)',
+    'alert tcp any any -> any 80 (msg:"Web one again"; content:"POST"; sid:1000001; rev:2;)',
+]
+
+
+@pytest.fixture
+def ruleset():
+    return RuleSet(parse_rule(line) for line in LINES)
+
+
+def test_rows_round_trip(ruleset):
+    assert len(ruleset) == 4
+    assert [rule.to_dict() for rule in ruleset] == [parse_rule(line).to_dict() for line in LINES]
+
+
+def test_find_by_columns_and_flags(ruleset):
+    assert ruleset.find(protocol="tcp", dst_port="80") == [0, 1, 3]
+    assert ruleset.find(classtype="web-application-attack", has_pcre=True) == [1]
+    assert ruleset.find(has_content=True, has_flow=False) == [2, 3]
+    assert ruleset.find(rev=4) == [2]
+    assert ruleset.find(protocol="icmp") == []
+    assert [rule.rev for rule in ruleset.by_sid(1000001)] == [1, 2]
+    assert ruleset.count_by("protocol") == {"tcp": 3, "udp": 1}
+
+
+def test_replace_keeps_indexes_in_sync(ruleset):
+    ruleset.replace(2, parse_rule(LINES[0]))
+    assert ruleset.find(protocol="udp") == []
+    assert len(ruleset.by_sid(1000001)) == 3
+    assert ruleset.rule(2).msg == "Web one"
+    assert ruleset.value(2, "has_http")
+
+
+def test_replace_keeps_bucket_order(ruleset):
+    ruleset.replace(0, parse_rule(LINES[2]))
+    ruleset.replace(2, parse_rule(LINES[1]))
+    ruleset.replace(0, parse_rule(LINES[0]))
+    assert ruleset.find(protocol="tcp") == [0, 1, 2, 3]
+    assert ruleset.find(classtype="web-application-attack") == [0, 1, 2]
+    assert ruleset.count_by("classtype") == {"web-application-attack": 3, "": 1}
+    assert "bad-unknown" not in ruleset.distinct("classtype")
+    assert [rule.msg for rule in ruleset.by_sid(1000001)] == ["Web one", "Web one again"]
+
+
+def test_bad_queries(ruleset):
+    with pytest.raises(ValueError):
+        ruleset.find(bogus=1)
+    with pytest.raises(IndexError):
+        ruleset.rule(4)
+    with pytest.raises(KeyError):
+        ruleset.count_by("msg")
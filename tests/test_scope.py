@@ -0,0 +1,152 @@
+import random
+
+import pytest
+
+from snortforge.core.rule import SnortRule
+from snortforge.core.scope import RangeSet, ScopeError, ScopeIndex, Variables, ip_cidrs, ip_point, port_ranges
+
+CONF = """\
+ipvar HOME_NET [10.0.0.0/8,192.168.0.0/16]
+ipvar EXTERNAL_NET !$HOME_NET
+ipvar DNS_SERVERS 10.0.0.53
+portvar HTTP_PORTS [80,8080:8081]
+ipvar LOOP $LOOP
+"""
+
+LUA = """\
+HOME_NET = '10.0.0.0/8'  -- lab
+EXTERNAL_NET = '!$HOME_NET'
+HTTP_PORTS = [[ 80 8080 ]]
+"""
+
+
+def _rule(sid, **fields):
+    fields.setdefault("content", "abc")
+    return SnortRule(msg=f"Rule {sid}", sid=sid, **fields)
+
+
+# ── Resolution ──
+
+def test_conf_variables_resolve():
+    v = Variables.parse(CONF)
+    assert ip_cidrs(v.ips("$HOME_NET")) == ["10.0.0.0/8", "192.168.0.0/16"]
+    assert ip_cidrs(v.ips("$EXTERNAL_NET")) == ["!10.0.0.0/8", "!192.168.0.0/16"]
+    assert port_ranges(v.ports("$HTTP_PORTS")) == ["80", "8080:8081"]
+    assert port_ranges(v.ports("!1:1023")) == ["0", "1024:65535"]
+    assert ip_cidrs(v.ips("[10.0.0.0/8,!10.0.0.0/9]")) == ["10.128.0.0/9"]
+
+
+def test_lua_variables_resolve():
+    v = Variables.parse(LUA)
+    assert ip_point("10.1.2.3") in v.ips("$HOME_NET")
+    assert ip_point("10.1.2.3") not in v.ips("$EXTERNAL_NET")
+    assert port_ranges(v.ports("$HTTP_PORTS")) == ["80", "8080"]
+
+
+def test_ipv4_and_ipv6_share_one_space():
+    assert ip_point("10.0.0.1") == ip_point("::ffff:10.0.0.1")
+    v = Variables()
+    assert ip_cidrs(v.ips("[2001:db8::/32,10.0.0.0/8]")) == ["10.0.0.0/8", "2001:db8::/32"]
+
+
+@pytest.mark.parametrize("spec, error", [
+    ("$LOOP", "Variable '$LOOP' refers to itself"),
+    ("$NOPE", "Undefined variable '$NOPE'"),
+    ("10.0.0", "Invalid address '10.0.0'"),
+    ("[1.2.3.4", "Unbalanced address list '[1.2.3.4'"),
+])
+def test_bad_addresses_raise_scope_error(spec, error):
+    with pytest.raises(ScopeError, match=error.replace("$", r"\$").replace("[", r"\[")):
+        Variables.parse(CONF).ips(spec)
+
+
+@pytest.mark.parametrize("spec", ["http", "70000", "90:80"])
+def test_bad_ports_raise_scope_error(spec):
+    with pytest.raises(ScopeError):
+        Variables().ports(spec)
+
+
+def test_range_set_operations():
+    a = RangeSet([(5, 9), (1, 3), (4, 4)])
+    assert a.ranges == ((1, 9),)
+    b = a.difference(RangeSet([(3, 5)]))
+    assert b.ranges == ((1, 2), (6, 9))
+    assert b.complement(0, 10).ranges == ((0, 0), (3, 5), (10, 10))
+    assert b.issubset(a) and not a.issubset(b)
+    assert 6 in b and 4 not in b
+
+
+# ── Index ──
+
+def test_lookup_by_destination_protocol_and_source():
+    rules = [
+        _rule(1, dst_ip="$HOME_NET", dst_port="$HTTP_PORTS"),
+        _rule(2, protocol="udp", dst_ip="$DNS_SERVERS", dst_port="53"),
+        _rule(3, protocol="ip", dst_ip="10.0.0.0/24"),
+        _rule(4, src_ip="$HOME_NET", dst_ip="$EXTERNAL_NET", direction="<>"),
+    ]
+    index = ScopeIndex(rules, Variables.parse(CONF))
+    assert index.lookup("10.0.0.53", 8080) == [0, 2, 3]
+    assert index.lookup("10.0.0.53", 53, protocol="udp") == [1, 2]
+    assert index.lookup("8.8.8.8", 80) == [3]
+    assert index.lookup("10.9.9.9", 25, protocol="tcp") == [3]  # reverse side of the <> rule
+    assert index.lookup("10.9.9.9", 25, protocol="tcp", src_host="10.0.0.1") == []
+
+
+def test_unresolved_and_empty_rules():
+    rules = [_rule(1, dst_ip="$NOPE"), _rule(2, dst_port="!any"), _rule(3)]
+    index = ScopeIndex(rules, Variables())
+    assert index.errors == {0: "Undefined variable '$NOPE'"}
+    assert index.empty_rules() == [1]
+    assert index.lookup("1.2.3.4", 80) == [2]
+
+
+def test_shadowed_rules():
+    rules = [
+        _rule(1, dst_ip="$HOME_NET"),
+        _rule(2, dst_ip="10.1.2.3", dst_port="80"),       # inside rule 1
+        _rule(3, action="drop", dst_ip="10.1.2.3"),        # other action
+        _rule(4, dst_ip="$HOME_NET"),                      # same as rule 1, later
+        _rule(5, dst_ip="$EXTERNAL_NET"),
+        _rule(6, protocol="ip", dst_ip="8.8.8.8"),
+        _rule(7, protocol="ip", dst_ip="8.8.8.0/24"),      # ip rule covers any protocol
+    ]
+    rules[5].content = rules[6].content = "abc"
+    index = ScopeIndex(rules, Variables.parse(CONF))
+    assert sorted(index.shadowed_rules()) == [(1, 0), (3, 0), (5, 6)]
+
+
+def _brute_force_shadowed(index):
+    from snortforge.core.scope import _detection_key
+    scopes, found = index.scopes, []
+    for b, scope in enumerate(scopes):
+        if scope is None or scope.empty:
+            continue
+        for a, other in enumerate(scopes):
+            if a == b or other is None or other.empty:
+                continue
+            if _detection_key(index.rules[a]) != _detection_key(index.rules[b]):
+                continue
+            if other.covers(scope) and not (a > b and scope.covers(other)):
+                found.append(b)
+                break
+    return found
+
+
+def test_shadowed_rules_match_pairwise_comparison():
+    rng = random.Random(5)
+    rules = []
+    for sid in range(400):
+        rule = _rule(sid, content="abc" if sid % 3 else "x", direction=rng.choice(["->", "->", "<>"]),
+                     protocol=rng.choice(["tcp", "ip", "udp"]),
+                     src_ip=rng.choice(["any", "$HOME_NET", "1.2.3.4"]),
+                     dst_ip=rng.choice(["any", "10.0.0.0/8", "10.1.0.0/16", "10.1.2.3", "!10.0.0.0/8",
+                                        "[10.1.2.3,192.168.1.1]", f"172.16.{sid % 7}.0/24"]),
+                     dst_port=rng.choice(["any", "80", "1:1024", "[80,443]", "!80"]))
+        rules.append(rule)
+    index = ScopeIndex(rules, Variables.parse(CONF))
+    pairs = index.shadowed_rules()
+    assert len(pairs) > 50
+    assert sorted(b for b, _ in pairs) == _brute_force_shadowed(index)
+    for b, a in pairs:
+        assert index.scopes[a].covers(index.scopes[b])
@@ -0,0 +1,202 @@
+import threading
+
+import pytest
+
+from snortforge.core.cache import ResultCache
+from snortforge.core.canonical import rule_digest
+from snortforge.core.parser import parse_rule
+from snortforge.core.scorer import CRITERIA, ScoreSession, ScoreSummary, score_rule, score_rules
+
+LINES = [
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET 80 (msg:"Admin login"; flow:to_server,established; '
+    'content:"POST"; http_method; content:"/admin/login.php"; nocase; http_uri; fast_pattern; '
+    'classtype:web-application-attack; reference:url,example.com; sid:{sid}; rev:2;)',
+    'alert tcp any any -> any any (msg:"Loose"; content:"a"; sid:{sid};)',
+    'alert udp any any -> any 53 (msg:"DNS"; content:"|01 00 00 01|"; depth:4; offset:2; '
+    'pcre:"/\\x03www\\d+/"; classtype:policy-violation; sid:{sid}; rev:1;)',
+    'alert ip any any -> any any (msg:"Any"; pcre:"/(a+)+$/"; sid:{sid};)',
+]
+
+
+def _rules(count):
+    return [parse_rule(LINES[n % len(LINES)].format(sid=1000001 + n)) for n in range(count)]
+
+
+# ── Batch scoring ──
+
+def test_score_rules_matches_score_rule_in_order():
+    rules = _rules(8) + ["junk"]
+    results = list(score_rules(rules, workers=1))
+    assert [r["index"] for r in results] == list(range(9))
+    assert [r["sid"] for r in results] == [r.sid for r in rules[:8]] + [None]
+    for rule, result in zip(rules[:8], results):
+        assert {k: v for k, v in result.items() if k not in ("index", "sid")} == score_rule(rule)
+    assert results[-1]["error"] == "Not a rule object."
+
+
+def test_pool_scoring_matches_in_process_scoring():
+    rules = _rules(40)
+    serial = list(score_rules(rules, workers=1))
+    pooled = list(score_rules(rules, workers=2, chunk_size=7))
+    assert pooled == serial
+
+
+def test_cache_serves_hits_and_skips_errors():
+    rules, cache = _rules(12), ResultCache()
+    first = list(score_rules(rules + [None], workers=2, chunk_size=5, cache=cache))
+    assert len(cache) == 12
+    assert first[-1]["error"] == "Not a rule object."
+    cache.put(rule_digest(rules[0]), {"score": -1})
+    again = list(score_rules(rules, workers=2, chunk_size=5, cache=cache))
+    assert again[0] == {"index": 0, "sid": rules[0].sid, "score": -1}
+    assert again[1:] == first[1:12]
+
+
+def test_empty_input():
+    summary = ScoreSummary()
+    assert list(score_rules([], summary)) == []
+    assert summary.to_dict()["total"] == 0
+
+
+# ── Summary ──
+
+def test_summary_aggregates():
+    rules = _rules(20) + ["junk"]
+    summary = ScoreSummary(top_n=3)
+    results = [r for r in score_rules(rules, summary, workers=1) if "error" not in r]
+    data = summary.to_dict()
+    assert (data["total"], data["errors"]) == (20, 1)
+    assert data["average"] == round(sum(r["score"] for r in results) / 20, 2)
+    assert sum(data["grades"].values()) == sum(b["count"] for b in data["score_histogram"]) == 20
+    assert set(data["criteria"]) == set(CRITERIA)
+    for name, stats in data["criteria"].items():
+        scores = [(next(b["score"] for b in r["breakdown"] if b["name"] == name), r["index"])
+                  for r in results]
+        assert sum(stats["histogram"]) == 20
+        assert [(w["score"], w["index"]) for w in stats["worst"]] == sorted(scores)[:3]
+
+
+def test_summary_can_be_read_mid_stream():
+    summary = ScoreSummary()
+    stream = score_rules(_rules(6), summary, workers=1)
+    next(stream), next(stream)
+    assert summary.to_dict()["total"] == 2
+    list(stream)
+    assert summary.to_dict()["total"] == 6
+
+
+@pytest.mark.parametrize("top_n", [0, 1])
+def test_summary_top_n_bounds(top_n):
+    summary = ScoreSummary(top_n=top_n)
+    list(score_rules(_rules(5), summary, workers=1))
+    assert all(len(c["worst"]) == top_n for c in summary.to_dict()["criteria"].values())
+
+
+# ── Incremental scoring ──
+
+EDITS = [
+    {"msg": "x"},
+    {"sid": 0, "rev": 0},
+    {"classtype": "", "references": []},
+    {"reference": "cve,2024-0001"},
+    {"protocol": "ip"},
+    {"flow": ""},
+    {"src_ip": "$HOME_NET", "dst_port": "any"},
+    {"direction": "<>", "priority": 1},
+    {"pcre": "/(a+)+$/"},
+    {"pcre": ""},
+    {"content": "longer-content", "contents": []},
+    {"contents": [{"content": "abc", "depth": 3}, {"content": "d", "distance": 1, "within": 2}]},
+    {"threshold_type": "limit", "threshold_count": 1, "threshold_seconds": 60},
+    {"action": "drop", "metadata": "policy max-detect"},
+]
+
+
+def _plain(result):
+    return {k: v for k, v in result.items() if k not in ("index", "sid", "rescored", "delta")}
+
+
+@pytest.mark.parametrize("changes", EDITS)
+def test_session_update_matches_full_score(changes):
+    rules = _rules(4)
+    session = ScoreSession(rules)
+    for index, rule in enumerate(rules):
+        edited = rule.copy()
+        edited.update(changes)
+        result = session.update(index, changes)
+        assert _plain(result) == score_rule(edited)
+        assert set(result["rescored"]) <= set(CRITERIA)
+        assert session.rule(index).to_dict() == edited.to_dict()
+
+
+def test_session_rescore_reruns_only_touched_criteria():
+    rule = _rules(1)[0]
+    session = ScoreSession([rule])
+    edited = rule.copy()
+    edited.msg = "Renamed"
+    assert session.rescore(0, edited)["rescored"] == ["metadata_quality"]
+    edited.action = "drop"
+    assert session.rescore(0, edited)["rescored"] == []
+    assert session.rescore(0, edited)["rescored"] == []
+
+
+def test_session_uncommitted_edit_is_discarded():
+    rule = _rules(1)[0]
+    session = ScoreSession([rule])
+    before = session.result(0)
+    session.update(0, {"flow": ""}, commit=False)
+    assert session.result(0) == before
+    assert session.rule(0).flow == rule.flow
+
+
+def test_session_replace_scores_in_full():
+    rules = _rules(2)
+    session = ScoreSession(rules[:1])
+    result = session.replace(0, rules[1])
+    assert result["rescored"] == list(CRITERIA)
+    assert _plain(result) == score_rule(rules[1])
+    assert session.rule(0).sid == rules[1].sid
+
+
+def test_what_if_matches_full_score():
+    rules = _rules(8)
+    session = ScoreSession(rules)
+    before = [session.result(i)["score"] for i in range(8)]
+    summary = ScoreSummary()
+    results = list(session.what_if({"flow": "", "msg": "x"}, indexes=[1, 2, 5], summary=summary))
+    assert [r["index"] for r in results] == [1, 2, 5]
+    for result in results:
+        edited = rules[result["index"]].copy()
+        edited.update({"flow": "", "msg": "x"})
+        assert _plain(result) == score_rule(edited)
+        assert result["delta"] == result["score"] - before[result["index"]]
+    assert summary.to_dict()["total"] == 3
+    assert [session.result(i)["score"] for i in range(8)] == before
+
+    list(session.what_if({"msg": "x"}, commit=True))
+    assert all(session.rule(i).msg == "x" for i in range(8))
+
+
+def test_session_summary_matches_batch_summary():
+    rules = _rules(9)
+    batch = ScoreSummary(top_n=3)
+    list(score_rules(rules, batch, workers=1))
+    assert ScoreSession(rules).summary(top_n=3).to_dict() == batch.to_dict()
+
+
+def test_session_lock_serializes_edits():
+    session = ScoreSession(_rules(1))
+
+    def edit(n):
+        for i in range(50):
+            with session.lock:
+                rev = session.rule(0).rev
+                session.update(0, {"rev": rev + 1, "msg": f"{n}-{i}"})
+
+    threads = [threading.Thread(target=edit, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert session.rule(0).rev == 2 + 200
+    assert _plain(session.result(0)) == score_rule(session.rule(0))
@@ -0,0 +1,105 @@
+import random
+
+from snortforge.core.pcap import IPPROTO_TCP, IPPROTO_UDP, TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN, Packet, iter_packets
+from snortforge.core.stream import FlowTable, HalfStream
+
+CLIENT, SERVER = bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2])
+
+
+def _tcp(seq, flags, payload=b"", to_server=True, sport=40000):
+    if to_server:
+        return Packet(0.0, IPPROTO_TCP, CLIENT, SERVER, sport, 80, payload, seq, flags)
+    return Packet(0.0, IPPROTO_TCP, SERVER, CLIENT, 80, sport, payload, seq, flags)
+
+
+def test_capture_flows(capture):
+    table = FlowTable()
+    for packet in iter_packets(capture):
+        table.feed(packet)
+    closed = table.drain_closed()
+    assert [f.to_dict()["client"] for f in closed] == ["10.0.0.1:40000"]
+    http = closed[0]
+    assert http.established and http.closed
+    assert bytes(http.to_server.data).startswith(b"GET /admin/login.php?user=admin HTTP/1.1\r\n")
+    assert bytes(http.to_client.data) == b"HTTP/1.1 200 OK\r\n\r\nwelcome"
+    rest = table.close_all()
+    assert [(f.to_dict()["proto"], f.to_dict()["server"]) for f in rest] == [
+        ("udp", "[2001:db8::2]:53"), ("tcp", "10.0.0.2:8080"),
+    ]
+    assert table.count == 3
+
+
+def test_out_of_order_and_overlapping_segments():
+    half = HalfStream()
+    half.add(1000, b"abc")
+    half.add(1009, b"jkl")           # waits for the gap
+    half.add(1006, b"ghi")
+    assert bytes(half.data) == b"abc"
+    half.add(1002, b"XdefY")         # overlap keeps the first copy of "c"
+    assert bytes(half.data) == b"abcdefghijkl"
+    half.add(998, b"zzab")           # retransmission from before the start
+    half.add(1000, b"abc")
+    assert bytes(half.data) == b"abcdefghijkl" and not half.pending
+
+
+def test_sequence_wraparound():
+    half = HalfStream()
+    half.add(0xFFFFFFFE, b"ab")
+    half.add(0, b"cd")
+    assert bytes(half.data) == b"abcd"
+
+
+def test_max_bytes_truncates():
+    half = HalfStream()
+    half.add(1, b"abcdef", max_bytes=4)
+    half.add(7, b"gh", max_bytes=4)
+    assert bytes(half.data) == b"abcd" and half.truncated
+
+
+def test_handshake_and_reset():
+    table = FlowTable(midstream=False)
+    flow, to_server = table.feed(_tcp(100, TCP_SYN))
+    assert to_server and not flow.established
+    table.feed(_tcp(500, TCP_SYN | TCP_ACK, to_server=False))
+    table.feed(_tcp(101, TCP_ACK, b"hello"))
+    assert flow.established and bytes(flow.to_server.data) == b"hello"
+    table.feed(_tcp(106, TCP_RST))
+    assert table.drain_closed() == [flow] and not table.flows
+
+
+def test_midstream_pickup():
+    flow, to_server = FlowTable().feed(_tcp(7, TCP_ACK, b"data"))
+    assert flow.established and to_server
+    flow, _ = FlowTable(midstream=False).feed(_tcp(7, TCP_ACK, b"data"))
+    assert not flow.established
+
+
+def test_fin_from_both_sides_closes():
+    table = FlowTable()
+    table.feed(_tcp(1, TCP_FIN | TCP_ACK))
+    assert not table.drain_closed()
+    table.feed(_tcp(1, TCP_FIN | TCP_ACK, to_server=False))
+    assert len(table.drain_closed()) == 1
+
+
+def test_udp_established_once_both_sides_sent():
+    table = FlowTable()
+    query = Packet(0.0, IPPROTO_UDP, CLIENT, SERVER, 5353, 53, b"q")
+    reply = Packet(0.0, IPPROTO_UDP, SERVER, CLIENT, 53, 5353, b"r")
+    flow, _ = table.feed(query)
+    assert not flow.established
+    assert table.feed(reply) == (flow, False) and flow.established
+
+
+def test_shuffled_segments_reassemble():
+    rng = random.Random(3)
+    data = bytes(rng.randrange(256) for _ in range(2000))
+    for _ in range(50):
+        cuts = sorted(rng.sample(range(1, len(data)), 40))
+        segments = [(a, data[a:b + rng.randint(0, 30)]) for a, b in zip([0] + cuts, cuts + [len(data)])]
+        first = segments.pop(0)
+        rng.shuffle(segments)
+        half = HalfStream()
+        for start, payload in [first] + segments:
+            half.add(5000 + start, payload)
+        assert bytes(half.data) == data and not half.pending
@@ -0,0 +1,89 @@
+import pytest
+
+from snortforge.core.cache import ResultCache
+from snortforge.core.parser import parse_rule
+from snortforge.core.rule import SnortRule
+from snortforge.core.validator import PLANS, compile_plan, validate_rule, validate_rules
+
+GOOD = (
+    'alert tcp $EXTERNAL_NET any -> $HOME_NET 80 (msg:"WEB admin login attempt"; '
+    'flow:to_server,established; content:"/admin"; http_uri; classtype:web-application-attack; '
+    'sid:1000001; rev:1;)'
+)
+
+
+def _rule(**changes):
+    rule = parse_rule(GOOD)
+    rule.update(changes)
+    return rule
+
+
+# ── Single rules ──
+
+def test_good_rule_is_valid():
+    result = validate_rule(parse_rule(GOOD))
+    assert result == {"is_valid": True, "errors": [], "warnings": []}
+
+
+@pytest.mark.parametrize("changes", [
+    {"action": "explode"},
+    {"protocol": "sctp"},
+    {"direction": "<-"},
+    {"msg": ""},
+    {"src_ip": "10.0.0"},
+    {"dst_port": "http"},
+])
+def test_syntax_errors(changes):
+    result = validate_rule(_rule(**changes))
+    assert not result["is_valid"] and result["errors"]
+
+
+def test_content_modifier_errors():
+    rule = parse_rule('alert tcp any any -> any 80 (msg:"Two fast patterns here"; flow:established; '
+                      'content:"abcd"; fast_pattern; content:!"efgh"; fast_pattern:only; '
+                      'content:"ijkl"; http_cookie; rawbytes; sid:1000001;)')
+    errors = validate_rule(rule)["errors"]
+    assert "Only one content may be marked fast_pattern." in errors
+    assert any("negated content cannot use fast_pattern options" in e for e in errors)
+    assert any("rawbytes" in e for e in errors)
+
+
+def test_syntax_plan_skips_best_practice_checks():
+    rule = SnortRule(msg="x", sid=5)
+    assert validate_rule(rule, "syntax")["warnings"] == []
+    assert validate_rule(rule)["warnings"]
+    assert set(compile_plan(["syntax"])) == set(PLANS["syntax"])
+    with pytest.raises(ValueError):
+        validate_rule(rule, "bogus")
+
+
+def test_cached_results_follow_rule_content():
+    cache = ResultCache()
+    assert validate_rule(_rule(), cache=cache)["is_valid"]
+    assert not validate_rule(_rule(action="explode"), cache=cache)["is_valid"]
+    assert validate_rule(_rule(), cache=cache)["is_valid"]
+    assert cache.hits == 1
+
+
+# ── Rulesets ──
+
+def test_cross_rule_checks():
+    rules = [
+        _rule(),
+        _rule(msg="Other msg", contents=[{"content": "/other", "http_uri": True}]),  # SID conflict
+        _rule(msg="Third msg"),                                                     # duplicate SID
+        _rule(msg="Fourth msg", rev=2),                                             # newer rev
+        _rule(sid=1000002),                                                         # reused msg
+        "not a rule",
+    ]
+    summary = {}
+    results = list(validate_rules(rules, summary))
+    assert [r["is_valid"] for r in results] == [True, False, False, True, True, False]
+    assert "different detection content" in results[1]["errors"][-1]
+    assert results[2]["errors"][-1] == "Duplicate SID 1000001 (same as rule #0)."
+    assert results[3]["warnings"][-1] == "SID 1000001 also appears as rev 1 in rule #0."
+    assert results[4]["warnings"][-1] == "Message is also used by rule #0."
+    assert summary["total"] == 6 and summary["invalid"] == 3
+    assert summary["duplicate_sids"] == [{"sid": 1000001, "rules": [0, 1, 2, 3]}]
+    assert summary["conflicting_sids"] == [1000001]
+    assert summary["reused_msgs"] == 1